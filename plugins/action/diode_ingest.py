@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Action plugin for diode_ingest adding cross-host buffering.
+
+Without O(buffer) the module runs as usual. With O(buffer=append) the
+task's entities are appended to a controller-side spool and nothing is
+sent; with O(buffer=flush) every buffered entity is sent by a single
+module run, so many per-host tasks share one client and full-size chunks.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+from ansible.errors import AnsibleActionFail
+from ansible.plugins.action import ActionBase
+
+from ansible_collections.my0373.diode.plugins.module_utils.spool import (
+    append_entities,
+    check_private_dir,
+    clear_spool,
+    default_spool_dir,
+    read_spool,
+    remove_spool_dir,
+)
+
+BUFFER_MODES = ("append", "flush")
+
+
+class ActionModule(ActionBase):
+
+    TRANSFERS_FILES = False
+    _supports_check_mode = True
+
+    def run(self, tmp=None, task_vars=None):
+        result = super(ActionModule, self).run(tmp, task_vars)
+        del tmp
+
+        args = dict(self._task.args)
+        buffer_mode = args.pop("buffer", None)
+        buffer_dir = args.pop("buffer_dir", None)
+        spool_dir = buffer_dir or default_spool_dir()
+
+        if buffer_mode is None:
+            result.update(self._execute_module(module_args=args, task_vars=task_vars))
+            return result
+
+        if buffer_mode not in BUFFER_MODES:
+            raise AnsibleActionFail(
+                "buffer must be one of {0}, got: {1}".format(", ".join(BUFFER_MODES), buffer_mode)
+            )
+
+        # The default directory has a predictable name in the shared temp
+        # directory, so refuse one that another user could have set up.
+        if buffer_dir is None:
+            try:
+                check_private_dir(
+                    spool_dir, create=buffer_mode == "append" and not self._task.check_mode
+                )
+            except ValueError as exc:
+                raise AnsibleActionFail(str(exc))
+
+        if buffer_mode == "append":
+            entities = args.get("entities")
+            if not isinstance(entities, list):
+                raise AnsibleActionFail("entities must be a list when buffer=append")
+            # In check mode nothing is queued, or the next real flush
+            # would send entities from a run that only looked.
+            if not self._task.check_mode:
+                host = (task_vars or {}).get("inventory_hostname", "localhost")
+                try:
+                    append_entities(spool_dir, host, entities)
+                except ValueError as exc:
+                    raise AnsibleActionFail(str(exc))
+            result.update(changed=False, buffered_count=len(entities), buffer_dir=spool_dir)
+            return result
+
+        try:
+            entities, files = read_spool(spool_dir)
+        except ValueError as exc:
+            raise AnsibleActionFail(str(exc))
+        entities.extend(args.get("entities") or [])
+        if not entities:
+            result.update(changed=False, ingested_count=0, chunk_count=0, errors=[],
+                          flushed_hosts=0, buffer_dir=spool_dir)
+            return result
+
+        args["entities"] = entities
+        result.update(self._execute_module(module_args=args, task_vars=task_vars))
+        result.update(flushed_hosts=len(files), buffer_dir=spool_dir)
+
+        # Keep the buffer for a retry if the send failed, and after check
+        # mode so the real run still has everything to send.
+        if not result.get("failed") and not self._task.check_mode:
+            clear_spool(files)
+            # The run-scoped default directory is not reused by later runs.
+            if buffer_dir is None:
+                remove_spool_dir(spool_dir)
+        return result
@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Callback plugin that aggregates Diode module performance for a run."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+---
+name: diode_stats
+type: aggregate
+short_description: Aggregate Diode ingest performance across a playbook run
+version_added: "1.11.0"
+description:
+  - Recognises the results of M(my0373.diode.diode_ingest),
+    M(my0373.diode.diode_replay), M(my0373.diode.diode_flush) and
+    M(my0373.diode.diode_dry_run) tasks and rolls up entity counts, bytes,
+    chunks, errors, chunk latencies and task time across every host and
+    task in the run.
+  - M(my0373.diode.diode_flush) results contribute C(total_ingested),
+    C(total_bytes), C(chunk_count), C(errors), C(send_seconds),
+    C(throttle_wait_seconds) and C(entity_type_counts). They carry no
+    per-chunk latencies, so its chunk latency is the average only.
+  - Prints a summary at the end of the playbook and can optionally write
+    the same data as a JSON report and as a Prometheus node_exporter
+    textfile, so capacity trends can be tracked over time.
+  - Check-mode results are reported separately as planned work.
+  - Module start-up time is summed as C(startup_seconds) for tasks run
+    with the E(DIODE_PROFILE_IMPORTS) environment variable set.
+  - Tasks run with O(my0373.diode.diode_ingest#module:trace_file) or
+    O(my0373.diode.diode_ingest#module:trace_endpoint) list the
+    C(trace_ids) of their hosts in the JSON report, so the slowest tasks
+    can be looked up in the tracing backend.
+requirements:
+  - Enable in C(ansible.cfg) with C(callbacks_enabled = my0373.diode.diode_stats).
+options:
+  json_report:
+    description:
+      - Path of a JSON file to write the run summary to.
+    type: path
+    env:
+      - name: DIODE_STATS_JSON_REPORT
+    ini:
+      - section: callback_diode_stats
+        key: json_report
+  prometheus_textfile:
+    description:
+      - Path of a Prometheus text exposition file to write gauges to.
+      - The file is written atomically with mode C(0644) so it can live in a
+        node_exporter textfile collector directory.
+    type: path
+    env:
+      - name: DIODE_STATS_PROMETHEUS_TEXTFILE
+    ini:
+      - section: callback_diode_stats
+        key: prometheus_textfile
+  slowest_tasks:
+    description:
+      - Number of slowest Diode tasks to list in the printed summary.
+    type: int
+    default: 5
+    env:
+      - name: DIODE_STATS_SLOWEST_TASKS
+    ini:
+      - section: callback_diode_stats
+        key: slowest_tasks
+author:
+  - Matt York (@my0373)
+  - NetBox Labs
+"""
+
+import json
+import os
+import tempfile
+import time
+
+from ansible import context
+from ansible.plugins.callback import CallbackBase
+
+DIODE_MODULES = ("diode_ingest", "diode_replay", "diode_flush", "diode_dry_run")
+COLLECTION_PREFIX = "my0373.diode."
+
+
+def diode_module_name(action):
+    """Return the short Diode module name for a task action, or ``None``."""
+    if not action:
+        return None
+    if action.startswith(COLLECTION_PREFIX):
+        action = action[len(COLLECTION_PREFIX):]
+    return action if action in DIODE_MODULES else None
+
+
+def _percentile(values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return None
+    rank = max(0, min(len(values) - 1, int(round(fraction * len(values) + 0.5)) - 1))
+    return values[rank]
+
+
+class ModuleStats(object):
+    """Running totals for one Diode module (or its check-mode runs)."""
+
+    def __init__(self):
+        self.results = 0
+        self.failed = 0
+        self.entities = 0
+        self.bytes = 0
+        self.chunks = 0
+        self.errors = 0
+        self.task_seconds = 0.0
+        self.send_seconds = 0.0
+        self.throttle_wait_seconds = 0.0
+        self.startup_seconds = 0.0
+        self.chunk_latencies = []
+        self.entity_type_counts = {}
+
+    def add(self, res, seconds, failed):
+        self.results += 1
+        self.task_seconds += seconds
+        if failed:
+            self.failed += 1
+        self.entities += int(
+            res.get("ingested_count", res.get("total_ingested", res.get("entity_count", 0))) or 0
+        )
+        chunk_bytes = res.get("chunk_bytes") or []
+        self.bytes += int(res.get("total_bytes", sum(chunk_bytes)) or 0)
+        self.chunks += int(res.get("chunk_count", 0) or 0)
+        self.errors += len(res.get("errors") or [])
+        chunk_seconds = [s for s in res.get("chunk_seconds") or [] if s is not None]
+        self.chunk_latencies.extend(chunk_seconds)
+        self.send_seconds += float(res.get("send_seconds", sum(chunk_seconds)) or 0.0)
+        self.throttle_wait_seconds += float(res.get("throttle_wait_seconds", 0.0) or 0.0)
+        profile = res.get("import_profile") or {}
+        self.startup_seconds += float(
+            profile.get("process_seconds") or profile.get("startup_seconds") or 0.0
+        )
+        for entity_type, count in (res.get("entity_type_counts") or {}).items():
+            self.entity_type_counts[entity_type] = (
+                self.entity_type_counts.get(entity_type, 0) + count
+            )
+
+    def summary(self):
+        latencies = sorted(self.chunk_latencies)
+        return {
+            "results": self.results,
+            "failed": self.failed,
+            "entities": self.entities,
+            "bytes": self.bytes,
+            "chunks": self.chunks,
+            "errors": self.errors,
+            "task_seconds": round(self.task_seconds, 3),
+            "send_seconds": round(self.send_seconds, 3),
+            "throttle_wait_seconds": round(self.throttle_wait_seconds, 3),
+            "startup_seconds": round(self.startup_seconds, 3),
+            "chunk_latency_seconds": {
+                "avg": round(self.send_seconds / self.chunks, 4) if self.chunks else None,
+                "p50": _percentile(latencies, 0.5),
+                "p95": _percentile(latencies, 0.95),
+                "max": latencies[-1] if latencies else None,
+            },
+            "entity_type_counts": self.entity_type_counts,
+        }
+
+
+class CallbackModule(CallbackBase):
+    """Aggregate Diode module results and timing across a playbook run."""
+
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = "aggregate"
+    CALLBACK_NAME = "my0373.diode.diode_stats"
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self, display=None):
+        super(CallbackModule, self).__init__(display=display)
+        self.run_started = time.time()
+        self.playbook = None
+        self.modules = {}
+        self.tasks = {}
+        self._started = {}
+
+    def v2_playbook_on_start(self, playbook):
+        self.playbook = getattr(playbook, "_file_name", None)
+
+    def v2_runner_on_start(self, host, task):
+        if diode_module_name(task.action):
+            self._started[(host.get_name(), task._uuid)] = time.time()
+
+    def _is_check_mode(self, task):
+        check_mode = getattr(task, "check_mode", None)
+        if isinstance(check_mode, bool):
+            return check_mode
+        return bool(context.CLIARGS.get("check", False))
+
+    def _record(self, result, failed):
+        task = result._task
+        module = diode_module_name(task.action)
+        if module is None:
+            return
+
+        started = self._started.pop((result._host.get_name(), task._uuid), None)
+        seconds = time.time() - started if started is not None else 0.0
+
+        key = module + " (check)" if self._is_check_mode(task) else module
+        stats = self.modules.setdefault(key, ModuleStats())
+
+        res = result._result
+        items = res.get("results") if isinstance(res.get("results"), list) else None
+        items = items or [res]
+        for item in items:
+            # Spread a looped task's time evenly over its items.
+            stats.add(item, seconds / len(items), failed)
+
+        task_stats = self.tasks.setdefault(
+            task._uuid,
+            {"name": task.get_name(), "module": key, "hosts": 0, "seconds": 0.0, "entities": 0},
+        )
+        task_stats["hosts"] += 1
+        task_stats["seconds"] = round(task_stats["seconds"] + seconds, 3)
+        task_stats["entities"] += sum(
+            int(i.get("ingested_count", i.get("total_ingested", i.get("entity_count", 0))) or 0)
+            for i in items
+        )
+        trace_ids = [i["trace_id"] for i in items if i.get("trace_id")]
+        if trace_ids:
+            task_stats.setdefault("trace_ids", []).extend(trace_ids)
+
+    def v2_runner_on_ok(self, result):
+        self._record(result, failed=False)
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self._record(result, failed=True)
+
+    def report(self):
+        """Return the aggregated run data as a JSON-serialisable dict."""
+        return {
+            "playbook": self.playbook,
+            "started": self.run_started,
+            "finished": time.time(),
+            "modules": dict(
+                (name, stats.summary()) for name, stats in sorted(self.modules.items())
+            ),
+            "tasks": sorted(self.tasks.values(), key=lambda t: t["seconds"], reverse=True),
+        }
+
+    def v2_playbook_on_stats(self, stats):
+        if not self.modules:
+            return
+
+        report = self.report()
+        self._display.banner("DIODE SUMMARY")
+        for name, summary in report["modules"].items():
+            latency = summary["chunk_latency_seconds"]
+            self._display.display(
+                "{0}: {1} results ({2} failed), {3} entities, {4} bytes in {5} chunks, "
+                "{6} errors, {7}s task time, {8}s sending, {9}s throttled".format(
+                    name,
+                    summary["results"],
+                    summary["failed"],
+                    summary["entities"],
+                    summary["bytes"],
+                    summary["chunks"],
+                    summary["errors"],
+                    summary["task_seconds"],
+                    summary["send_seconds"],
+                    summary["throttle_wait_seconds"],
+                )
+            )
+            if latency["max"] is not None:
+                self._display.display(
+                    "  chunk latency: avg {0}s p50 {1}s p95 {2}s max {3}s".format(
+                        latency["avg"], latency["p50"], latency["p95"], latency["max"]
+                    )
+                )
+
+        slowest = report["tasks"][:self.get_option("slowest_tasks") or 0]
+        if slowest:
+            self._display.display("slowest Diode tasks:")
+            for task in slowest:
+                self._display.display(
+                    "  {0}s  {1} ({2}, {3} hosts, {4} entities)".format(
+                        task["seconds"], task["name"], task["module"],
+                        task["hosts"], task["entities"],
+                    )
+                )
+
+        json_report = self.get_option("json_report")
+        if json_report:
+            _write_atomic(json_report, json.dumps(report, indent=2, sort_keys=True))
+
+        textfile = self.get_option("prometheus_textfile")
+        if textfile:
+            _write_atomic(textfile, prometheus_text(report))
+
+
+_PROMETHEUS_METRICS = (
+    ("results", "diode_ansible_results", "Task results returned by Diode modules."),
+    ("failed", "diode_ansible_failed_results", "Failed task results returned by Diode modules."),
+    ("entities", "diode_ansible_entities", "Entities sent (or planned in check mode)."),
+    ("bytes", "diode_ansible_bytes", "Serialized entity bytes sent."),
+    ("chunks", "diode_ansible_chunks", "gRPC chunks sent."),
+    ("errors", "diode_ansible_errors", "Errors returned by Diode."),
+    ("task_seconds", "diode_ansible_task_seconds", "Summed task wall time."),
+    ("send_seconds", "diode_ansible_send_seconds", "Summed Ingest RPC time."),
+    ("throttle_wait_seconds", "diode_ansible_throttle_wait_seconds", "Summed throttling waits."),
+    ("startup_seconds", "diode_ansible_startup_seconds", "Summed module start-up time (DIODE_PROFILE_IMPORTS)."),
+)
+
+
+def prometheus_text(report):
+    """Render a run report in the Prometheus text exposition format."""
+    lines = []
+    modules = report["modules"]
+    for key, metric, help_text in _PROMETHEUS_METRICS:
+        lines.append("# HELP {0} {1}".format(metric, help_text))
+        lines.append("# TYPE {0} gauge".format(metric))
+        for name, summary in modules.items():
+            lines.append('{0}{{module="{1}"}} {2}'.format(metric, name, summary[key]))
+
+    metric = "diode_ansible_chunk_latency_seconds"
+    lines.append("# HELP {0} Ingest RPC latency per chunk.".format(metric))
+    lines.append("# TYPE {0} gauge".format(metric))
+    for name, summary in modules.items():
+        for stat, value in sorted(summary["chunk_latency_seconds"].items()):
+            if value is not None:
+                lines.append('{0}{{module="{1}",stat="{2}"}} {3}'.format(metric, name, stat, value))
+
+    metric = "diode_ansible_last_run_timestamp_seconds"
+    lines.append("# HELP {0} When the last playbook run finished.".format(metric))
+    lines.append("# TYPE {0} gauge".format(metric))
+    lines.append("{0} {1}".format(metric, round(report["finished"], 3)))
+    return "\n".join(lines) + "\n"
+
+
+def _write_atomic(path, content):
+    """Write ``content`` to ``path`` via a temporary file and rename.
+
+    ``mkstemp`` creates the file with mode ``0600``; it is opened up to
+    ``0644`` so that a collector running as another user can read it.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".diode_stats.")
+    try:
+        with os.fdopen(fd, "w") as fh:
+            fh.write(content)
+            os.fchmod(fh.fileno(), 0o644)
+        os.rename(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
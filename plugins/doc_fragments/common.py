@@ -49,6 +49,88 @@ options:
       - Can also be set via the E(DIODE_SKIP_TLS_VERIFY) environment variable.
     type: bool
     default: false
+  token_cache_dir:
+    description:
+      - Directory in which to cache OAuth2 access tokens between module runs.
+      - Forks and tasks using the same O(target) and O(client_id) share one
+        token until it expires instead of each requesting their own.
+      - Tokens are encrypted with a key derived from O(client_secret) and
+        written with mode C(0600); the C(cryptography) Python package is
+        required on the host running the module.
+      - Can also be set via the E(DIODE_TOKEN_CACHE_DIR) environment variable.
+    type: path
+    version_added: "1.11.0"
+  concurrency:
+    description:
+      - Maximum number of chunks in flight at once.
+      - Values above C(1) send chunks concurrently from an asyncio event loop
+        over a single gRPC (HTTP/2) connection instead of one after another.
+      - Diode's per-entity errors are attributed exactly as with sequential
+        sending. If sending a chunk raises, sequential sending stops there,
+        while concurrent sending still attempts every other chunk, so more
+        may be delivered and more than one may fail; modules that report
+        C(failed_chunks) list each one.
+    type: int
+    default: 1
+    version_added: "1.11.0"
+  max_entities_per_second:
+    description:
+      - Maximum average number of entities sent per second.
+      - Chunks are delayed by a token bucket so that one large sync does not
+        saturate a Diode gateway shared with other teams.
+      - Unlimited when not set.
+    type: float
+    version_added: "1.11.0"
+  max_bytes_per_second:
+    description:
+      - Maximum average number of serialized bytes sent per second.
+      - Applied together with O(max_entities_per_second); the stricter limit
+        wins.
+      - Unlimited when not set.
+    type: int
+    version_added: "1.11.0"
+  respect_server_hints:
+    description:
+      - Retry a chunk that Diode rejects with C(RESOURCE_EXHAUSTED) or
+        C(UNAVAILABLE) instead of failing the task.
+      - The retry waits for the delay in the C(retry-after) or
+        C(grpc-retry-pushback-ms) response trailer, or an exponential
+        back-off when the server gives no hint, up to 5 times per chunk.
+    type: bool
+    default: false
+    version_added: "1.11.0"
+  compression:
+    description:
+      - Compress each C(Ingest) request with this algorithm.
+      - Entity payloads are repetitive text and typically shrink several
+        times over, at the cost of client CPU time; worthwhile on slow or
+        metered links to Diode.
+    type: str
+    choices: [none, gzip, deflate]
+    default: none
+    version_added: "1.11.0"
+  max_send_message_mb:
+    description:
+      - Largest request, in megabytes, the client will send.
+      - Unlimited on the client when not set; the server's own receive
+        limit, 4 MB by default, still applies. Keep O(chunk_size_mb) below
+        both.
+    type: float
+    version_added: "1.11.0"
+  keepalive_time_s:
+    description:
+      - Seconds between HTTP/2 keepalive pings on the connection to Diode.
+      - The SDK pings every 30 seconds when not set; the server may close
+        connections that ping more often than it allows.
+    type: float
+    version_added: "1.11.0"
+  keepalive_timeout_s:
+    description:
+      - Seconds to wait for a keepalive ping to be acknowledged before the
+        connection is considered dead.
+      - The SDK waits 10 seconds when not set.
+    type: float
+    version_added: "1.11.0"
 requirements:
   - netboxlabs-diode-sdk >= 1.10.0
 """
@@ -67,6 +149,11 @@ options:
         constructor so all SDK-supported fields are available.
       - For simple entities that accept a single primary value, C(data) can
         be a string instead of a dict.
+      - An entity may also set its own C(stream) and request C(metadata),
+        overriding O(stream) and merged over O(metadata). Entities are then
+        grouped into one request batch per stream and metadata, and the
+        batches are sent over a single client, in parallel when
+        O(concurrency) is above C(1).
     type: list
     elements: dict
     required: true
@@ -85,4 +172,102 @@ options:
       - Entities are automatically split into chunks of this size.
     type: float
     default: 3.0
+  on_error:
+    description:
+      - What to do with entities that cannot be built.
+      - Every entity is first checked against the SDK's field names and
+        value types, so all invalid entities are reported at once.
+      - V(fail) fails the task, listing each invalid entity in RV(rejected),
+        before anything is sent.
+      - V(skip) drops invalid entities and entities whose build raises,
+        reports them in RV(rejected), and sends the rest. Index ranges in
+        RV(error_details) and RV(failed_chunk) still refer to positions in
+        O(entities).
+    type: str
+    choices: [fail, skip]
+    default: fail
+    version_added: "1.11.0"
+  dependency_order:
+    description:
+      - Send entities in dependency tiers, parents first, so Diode does not
+        have to reconcile entities whose references have not arrived yet.
+      - Tiers are derived from the SDK entity signatures, so every
+        supported type is ordered, for example sites, then device types,
+        then devices, then interfaces, then IP addresses.
+      - Each tier finishes before the next starts; chunks within a tier are
+        sent in parallel when O(concurrency) is above C(1). If a chunk fails,
+        later tiers are not sent.
+      - Error index ranges still refer to positions in O(entities).
+    type: bool
+    default: false
+    version_added: "1.11.0"
+"""
+
+    CHECK_MODE = r"""
+---
+options:
+  estimate_mb_per_second:
+    description:
+      - Assumed send throughput, in megabytes per second, used to compute
+        C(estimated_send_seconds) in check mode.
+      - Tune this from the C(total_bytes) and task duration of real runs
+        against your Diode instance.
+    type: float
+    default: 1.0
+    version_added: "1.11.0"
+"""
+
+    PROFILE = r"""
+---
+options:
+  profile_dir:
+    description:
+      - Profile the module run with C(cProfile) and write the stats to a
+        C(.pstats) file in this directory.
+      - Covers everything after the arguments are parsed, including
+        building, chunking and sending the entities.
+      - The result includes the file path and the functions that took the
+        most time in C(cpu_profile). Open the file with C(python -m pstats),
+        C(snakeviz) or C(flameprof).
+      - Profiling slows the run down; leave it unset in normal use.
+      - Can also be set via the E(DIODE_PROFILE_DIR) environment variable.
+    type: path
+    version_added: "1.11.0"
+"""
+
+    TRACING = r"""
+---
+options:
+  trace_file:
+    description:
+      - Append the trace spans of the module run to this file on the
+        managed host, one OTLP/JSON C(ExportTraceServiceRequest) per line.
+      - The OpenTelemetry Collector's C(otlpjsonfile) receiver reads this
+        format, so the file can be forwarded to any tracing backend later.
+      - Can also be set via the E(DIODE_TRACE_FILE) environment variable.
+    type: path
+    version_added: "1.11.0"
+  trace_endpoint:
+    description:
+      - Post the trace spans of the module run to this OTLP/HTTP collector,
+        for example V(http://otel-collector:4318).
+      - C(/v1/traces) is appended unless the URL already ends with it.
+      - A collector that cannot be reached only produces a warning.
+      - Can also be set via the E(DIODE_TRACE_ENDPOINT) environment variable.
+    type: str
+    version_added: "1.11.0"
+  trace_headers:
+    description:
+      - Extra HTTP headers sent to O(trace_endpoint), for example an API
+        key required by the collector.
+    type: dict
+    version_added: "1.11.0"
+notes:
+  - With O(trace_file) or O(trace_endpoint) set, the run is recorded as a
+    trace with a root span for the task and child spans for building the
+    entities, creating the client (including authentication) and every
+    chunk sent, with its entity count and bytes.
+  - A W3C E(TRACEPARENT) environment variable makes the task's root span a
+    child of that span. Every chunk is sent to Diode with a C(traceparent)
+    gRPC header so server-side spans can join the trace.
 """
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Filters that reshape Ansible data into Diode entity lists in one pass."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+from collections.abc import Mapping, Sequence
+
+from ansible.errors import AnsibleFilterError
+
+
+def _is_list(value):
+    """True for lists and other sequences, but not strings."""
+    return isinstance(value, Sequence) and not isinstance(value, (str, bytes))
+
+
+def to_diode_entities(records, entity_type=None, type_key=None, name_key="name"):
+    """Wrap ``records`` as ``{type, data}`` entity dicts."""
+    if entity_type is None and type_key is None:
+        raise AnsibleFilterError("to_diode_entities requires an entity_type or type_key")
+
+    if isinstance(records, Mapping):
+        items = []
+        for name, fields in records.items():
+            data = dict(fields) if fields else {}
+            data.setdefault(name_key, name)
+            items.append(data)
+    elif _is_list(records):
+        items = records
+    else:
+        raise AnsibleFilterError(
+            "to_diode_entities expects a list or dict, got {0}".format(type(records).__name__)
+        )
+
+    entities = []
+    for index, item in enumerate(items):
+        kind = entity_type
+        if type_key is not None and isinstance(item, Mapping) and type_key in item:
+            item = dict(item)
+            kind = item.pop(type_key)
+        if not kind:
+            raise AnsibleFilterError(
+                "to_diode_entities: record {0} has no '{1}' and no entity_type was given".format(
+                    index, type_key
+                )
+            )
+        if not isinstance(item, (Mapping, str)):
+            raise AnsibleFilterError(
+                "to_diode_entities: record {0} must be a dict or string, got {1}".format(
+                    index, type(item).__name__
+                )
+            )
+        entities.append({"type": kind, "data": item})
+    return entities
+
+
+def diode_merge(entities, *others, **kwargs):
+    """Concatenate entity lists, optionally dropping exact duplicates.
+
+    The input may be a single entity list or a list of entity lists;
+    further lists can be passed as arguments.
+    """
+    unique = kwargs.pop("unique", False)
+    if kwargs:
+        raise AnsibleFilterError(
+            "diode_merge got unexpected arguments: {0}".format(", ".join(sorted(kwargs)))
+        )
+
+    if entities and all(_is_list(e) for e in entities):
+        lists = list(entities)
+    else:
+        lists = [entities]
+    lists.extend(others)
+
+    merged = []
+    seen = set()
+    for entity_list in lists:
+        if not _is_list(entity_list):
+            raise AnsibleFilterError(
+                "diode_merge expects lists of entities, got {0}".format(type(entity_list).__name__)
+            )
+        if not unique:
+            merged.extend(entity_list)
+            continue
+        for entity in entity_list:
+            key = json.dumps(entity, sort_keys=True, default=str)
+            if key not in seen:
+                seen.add(key)
+                merged.append(entity)
+    return merged
+
+
+class FilterModule(object):
+    """Diode entity filters."""
+
+    def filters(self):
+        return {
+            "to_diode_entities": to_diode_entities,
+            "diode_merge": diode_merge,
+        }
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Inventory plugin building hosts and groups from Diode dry-run captures."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+---
+name: diode
+short_description: Build an inventory from Diode dry-run captures
+version_added: "1.11.0"
+description:
+  - Reads the JSON files written by M(my0373.diode.diode_dry_run) (or the
+    SDK's C(DiodeDryRunClient)) and turns every C(device) and
+    C(virtual_machine) entity into a host, grouped by site, role,
+    platform and so on.
+  - The files are parsed directly as JSON, so the Diode SDK is not needed
+    on the controller.
+  - Files are applied oldest first, so the newest value of each host
+    attribute wins; attributes missing from newer captures are kept.
+  - With caching enabled, the hosts found in each file are stored together
+    with the file's modification time. Later runs only re-parse files that
+    are new or changed, and an unchanged directory loads straight from the
+    cache. Entries expire after O(cache_timeout) seconds.
+  - The inventory file name must end in C(diode.yml) or C(diode.yaml).
+extends_documentation_fragment:
+  - constructed
+  - inventory_cache
+options:
+  plugin:
+    description: Token that ensures this is a source file for the plugin.
+    required: true
+    choices: ["my0373.diode.diode"]
+  src_dir:
+    description: Directory containing the dry-run JSON files.
+    type: path
+    required: true
+  pattern:
+    description: Shell-style glob matched against file names in O(src_dir).
+    type: str
+    default: "*.json"
+  group_by:
+    description:
+      - Host attributes to create groups from, named C(<attribute>_<value>),
+        for example C(site_NYC_DC1).
+    type: list
+    elements: str
+    default: [site, role, platform, entity_type]
+    choices: [site, role, platform, device_type, manufacturer, cluster, tenant, status, entity_type, tags]
+author:
+  - Matt York (@my0373)
+  - NetBox Labs
+"""
+
+EXAMPLES = r"""
+# inventory/diode.yml
+plugin: my0373.diode.diode
+src_dir: /var/lib/diode/captures
+group_by:
+  - site
+  - role
+  - manufacturer
+cache: true
+cache_plugin: ansible.builtin.jsonfile
+cache_connection: ~/.cache/ansible/diode-inventory
+cache_timeout: 3600
+keyed_groups:
+  - key: diode_status
+    prefix: status
+compose:
+  ansible_network_os: diode_platform
+"""
+
+import json
+import os
+
+from ansible.errors import AnsibleParserError
+from ansible.plugins.inventory import BaseInventoryPlugin, Cacheable, Constructable
+
+from ansible_collections.my0373.diode.plugins.module_utils.dryrun import (
+    discover_dryrun_files,
+)
+
+HOST_ENTITY_TYPES = ("device", "virtual_machine")
+
+# Host var name -> path of nested reference names in the entity data.
+_REFERENCE_FIELDS = {
+    "diode_site": ("site", "name"),
+    "diode_role": ("role", "name"),
+    "diode_platform": ("platform", "name"),
+    "diode_device_type": ("device_type", "model"),
+    "diode_manufacturer": ("device_type", "manufacturer", "name"),
+    "diode_cluster": ("cluster", "name"),
+    "diode_tenant": ("tenant", "name"),
+}
+_SCALAR_FIELDS = ("serial", "asset_tag", "status", "description")
+
+
+def _lookup(data, path):
+    for key in path:
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+
+def host_vars(entity_type, data):
+    """Return the host vars for one ``device``/``virtual_machine`` entity dict."""
+    hostvars = {"diode_entity_type": entity_type}
+    for var, path in _REFERENCE_FIELDS.items():
+        value = _lookup(data, path)
+        if value:
+            hostvars[var] = value
+    # Virtual machines reference the manufacturer through the platform only.
+    if "diode_manufacturer" not in hostvars:
+        value = _lookup(data, ("platform", "manufacturer", "name"))
+        if value:
+            hostvars["diode_manufacturer"] = value
+    for field in _SCALAR_FIELDS:
+        if data.get(field):
+            hostvars["diode_" + field] = data[field]
+    tags = [t.get("name") for t in data.get("tags") or [] if isinstance(t, dict) and t.get("name")]
+    if tags:
+        hostvars["diode_tags"] = tags
+    for family in ("primary_ip4", "primary_ip6"):
+        address = _lookup(data, (family, "address"))
+        if address:
+            hostvars["diode_" + family] = address
+            hostvars.setdefault("ansible_host", address.split("/")[0])
+    return hostvars
+
+
+def hosts_from_file(path):
+    """Return ``{host: hostvars}`` for every host entity in a dry-run file."""
+    with open(path) as fh:
+        request = json.load(fh)
+    hosts = {}
+    for entity in request.get("entities") or []:
+        for entity_type in HOST_ENTITY_TYPES:
+            data = entity.get(entity_type)
+            if isinstance(data, dict) and data.get("name"):
+                hosts.setdefault(data["name"], {}).update(host_vars(entity_type, data))
+    return hosts
+
+
+def build_index(files, previous=None):
+    """Parse ``files`` into a per-file host index, reusing ``previous`` entries.
+
+    Args:
+        files: ``(path, mtime)`` pairs, oldest first.
+        previous: Index from an earlier run, as returned by this function.
+
+    Returns:
+        ``(index, parsed)``: dict mapping file name to ``{"mtime", "hosts"}``
+        for every file in ``files``, and the number of files re-parsed.
+    """
+    previous = previous or {}
+    index = {}
+    parsed = 0
+    for path, mtime in files:
+        name = os.path.basename(path)
+        entry = previous.get(name)
+        if entry is None or entry.get("mtime") != mtime:
+            entry = {"mtime": mtime, "hosts": hosts_from_file(path)}
+            parsed += 1
+        index[name] = entry
+    return index, parsed
+
+
+def merge_index(files, index):
+    """Return ``{host: hostvars}``, newer files overriding older values.
+
+    Diode upserts entities, so a field missing from a newer capture keeps
+    the value from an older one.
+    """
+    hosts = {}
+    for path, _mtime in files:
+        for name, hostvars in index[os.path.basename(path)]["hosts"].items():
+            hosts.setdefault(name, {}).update(hostvars)
+    return hosts
+
+
+class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
+    """Hosts and groups from Diode dry-run captures."""
+
+    NAME = "my0373.diode.diode"
+
+    def verify_file(self, path):
+        if super(InventoryModule, self).verify_file(path):
+            return path.endswith(("diode.yml", "diode.yaml"))
+        return False
+
+    def _load_index(self, files, cache_key, use_cache):
+        """Return the per-file index, re-parsing only new or changed files."""
+        previous = None
+        if use_cache:
+            try:
+                previous = self._cache[cache_key]
+            except KeyError:
+                previous = None
+
+        index, parsed = build_index(files, previous)
+        if self.get_option("cache") and (parsed or previous is None or len(index) != len(previous)):
+            self._cache[cache_key] = index
+        return index
+
+    def _populate(self, hosts):
+        strict = self.get_option("strict")
+        group_by = self.get_option("group_by") or []
+        for name in sorted(hosts):
+            hostvars = hosts[name]
+            self.inventory.add_host(name)
+            for var, value in hostvars.items():
+                self.inventory.set_variable(name, var, value)
+
+            for attribute in group_by:
+                values = hostvars.get("diode_" + attribute)
+                if values is None:
+                    continue
+                if not isinstance(values, list):
+                    values = [values]
+                for value in values:
+                    group = self.inventory.add_group(
+                        self._sanitize_group_name("{0}_{1}".format(attribute, value))
+                    )
+                    self.inventory.add_child(group, name)
+
+            self._set_composite_vars(self.get_option("compose"), hostvars, name, strict=strict)
+            self._add_host_to_composed_groups(self.get_option("groups"), hostvars, name, strict=strict)
+            self._add_host_to_keyed_groups(self.get_option("keyed_groups"), hostvars, name, strict=strict)
+
+    def parse(self, inventory, loader, path, cache=True):
+        super(InventoryModule, self).parse(inventory, loader, path, cache)
+        self._read_config_data(path)
+
+        src_dir = self.get_option("src_dir")
+        if not os.path.isdir(src_dir):
+            raise AnsibleParserError("src_dir not found: {0}".format(src_dir))
+
+        files = list(discover_dryrun_files(src_dir, pattern=self.get_option("pattern") or "*.json"))
+        try:
+            index = self._load_index(
+                files, self.get_cache_key(path), self.get_option("cache") and cache
+            )
+        except (IOError, OSError, ValueError) as exc:
+            raise AnsibleParserError("Failed to read Diode dry-run files: {0}".format(exc))
+
+        self._populate(merge_index(files, index))
@@ -8,6 +8,12 @@ from __future__ import absolute_import, division, print_function
 
 __metaclass__ = type
 
+from ansible.module_utils.basic import env_fallback
+
+from ansible_collections.my0373.diode.plugins.module_utils.channel import (
+    COMPRESSION_CHOICES,
+)
+
 
 def diode_connection_arg_spec():
     """Return argument spec for Diode connection parameters."""
@@ -38,6 +44,38 @@ def diode_connection_arg_spec():
             type="bool",
             default=False,
         ),
+        token_cache_dir=dict(
+            type="path",
+            fallback=(env_fallback, ["DIODE_TOKEN_CACHE_DIR"]),
+        ),
+        concurrency=dict(
+            type="int",
+            default=1,
+        ),
+        max_entities_per_second=dict(
+            type="float",
+        ),
+        max_bytes_per_second=dict(
+            type="int",
+        ),
+        respect_server_hints=dict(
+            type="bool",
+            default=False,
+        ),
+        compression=dict(
+            type="str",
+            default="none",
+            choices=list(COMPRESSION_CHOICES),
+        ),
+        max_send_message_mb=dict(
+            type="float",
+        ),
+        keepalive_time_s=dict(
+            type="float",
+        ),
+        keepalive_timeout_s=dict(
+            type="float",
+        ),
     )
 
 
@@ -72,4 +110,91 @@ def diode_entities_arg_spec():
             type="float",
             default=3.0,
         ),
+        on_error=dict(
+            type="str",
+            choices=["fail", "skip"],
+            default="fail",
+        ),
+        dependency_order=dict(
+            type="bool",
+            default=False,
+        ),
+    )
+
+
+def diode_check_mode_arg_spec():
+    """Return argument spec for check-mode capacity estimates."""
+    return dict(
+        estimate_mb_per_second=dict(
+            type="float",
+            default=1.0,
+        ),
+    )
+
+
+def diode_buffer_arg_spec():
+    """Return argument spec for cross-host buffering (handled by the action plugin)."""
+    return dict(
+        buffer=dict(
+            type="str",
+            choices=["append", "flush"],
+        ),
+        buffer_dir=dict(
+            type="path",
+        ),
+    )
+
+
+def diode_outbox_arg_spec():
+    """Return argument spec for queueing entities in a local outbox."""
+    return dict(
+        outbox_dir=dict(
+            type="path",
+        ),
+    )
+
+
+def diode_capture_arg_spec():
+    """Return argument spec for writing sent chunks as dry-run captures."""
+    return dict(
+        capture_dir=dict(
+            type="path",
+        ),
+    )
+
+
+def diode_snapshot_arg_spec():
+    """Return argument spec for the last-sent snapshot used by ``--diff``."""
+    return dict(
+        snapshot_dir=dict(
+            type="path",
+        ),
+    )
+
+
+def diode_profile_arg_spec():
+    """Return argument spec for opt-in CPU profiling of a module run."""
+    return dict(
+        profile_dir=dict(
+            type="path",
+            fallback=(env_fallback, ["DIODE_PROFILE_DIR"]),
+        ),
+    )
+
+
+def diode_tracing_arg_spec():
+    """Return argument spec for exporting trace spans of a module run."""
+    return dict(
+        trace_file=dict(
+            type="path",
+            fallback=(env_fallback, ["DIODE_TRACE_FILE"]),
+        ),
+        trace_endpoint=dict(
+            type="str",
+            fallback=(env_fallback, ["DIODE_TRACE_ENDPOINT"]),
+        ),
+        trace_headers=dict(
+            type="dict",
+            no_log=True,
+        ),
     )
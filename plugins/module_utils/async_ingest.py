@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Asyncio ingestion engine that multiplexes chunk RPCs over one channel.
+
+``DiodeClient.ingest`` is blocking, so sending chunks concurrently would
+otherwise need a thread per in-flight request. This engine instead opens a
+single ``grpc.aio`` channel -- one HTTP/2 connection -- and issues up to
+``concurrency`` ``Ingest`` RPCs on it at a time from one event loop.
+
+The engine borrows target, TLS settings and the OAuth2 token from an
+already-constructed ``DiodeClient`` so connection behaviour (environment
+variables, certificates, authentication) stays identical to the
+synchronous path.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import asyncio
+import threading
+import time
+import uuid
+
+from ansible_collections.my0373.diode.plugins.module_utils.channel import (
+    client_channel_options,
+)
+from ansible_collections.my0373.diode.plugins.module_utils.client import (
+    DEFAULT_STREAM,
+)
+
+try:
+    import grpc
+    from grpc import aio as grpc_aio
+    from netboxlabs.diode.sdk.client import DiodeClient
+    from netboxlabs.diode.sdk.diode.v1 import ingester_pb2
+    from netboxlabs.diode.sdk.ingester import convert_dict_to_struct
+
+    HAS_GRPC_AIO = True
+except ImportError:
+    HAS_GRPC_AIO = False
+
+# Mirrors the SDK's auth scope for DiodeClient.ingest().
+_INGEST_SCOPE = "diode:ingest"
+_INGEST_METHOD = "/diode.v1.IngesterService/Ingest"
+
+
+def supports_async_ingest(client):
+    """Return True if ``client`` can be driven by :class:`AsyncIngestEngine`.
+
+    Only live ``DiodeClient`` instances qualify; dry-run clients write files
+    and gain nothing from concurrency.
+    """
+    return HAS_GRPC_AIO and isinstance(client, DiodeClient)
+
+
+class AsyncIngestEngine(object):
+    """Send many chunks concurrently over a single ``grpc.aio`` channel.
+
+    Args:
+        client: An authenticated ``DiodeClient`` providing target, TLS
+            settings, producer identity and the bearer token.
+        concurrency: Maximum number of ``Ingest`` RPCs in flight at once.
+    """
+
+    def __init__(self, client, concurrency=4):
+        self.client = client
+        self.concurrency = max(1, int(concurrency))
+        self._auth_lock = threading.Lock()
+        self.chunk_seconds = []
+        self.chunk_started = []
+
+    def _open_channel(self):
+        """Open an aio channel with the same transport as the sync client."""
+        client = self.client
+        options = [
+            (
+                "grpc.primary_user_agent",
+                "{0}/{1} {2}/{3}".format(
+                    client.name, client.version, client.app_name, client.app_version
+                ),
+            ),
+        ] + client_channel_options(client)
+
+        # Skip-verify TLS goes through the SDK's local plaintext tunnel.
+        tunnel = getattr(client, "_tunnel", None)
+        if tunnel is not None:
+            options += [
+                ("grpc.default_authority", client.target),
+                ("grpc.enable_http_proxy", 0),
+            ]
+            return grpc_aio.insecure_channel(tunnel.target, options=options)
+
+        if not getattr(client, "_secure", False):
+            return grpc_aio.insecure_channel(client.target, options=options)
+
+        certificates = getattr(client, "_certificates", None)
+        credentials = (
+            grpc.ssl_channel_credentials(root_certificates=certificates)
+            if certificates
+            else grpc.ssl_channel_credentials()
+        )
+        return grpc_aio.secure_channel(client.target, credentials, options=options)
+
+    def _build_request(self, chunk, stream, metadata):
+        """Build the ``IngestRequest`` exactly as ``DiodeClient.ingest`` does."""
+        client = self.client
+        request = ingester_pb2.IngestRequest(
+            stream=stream if stream is not None else DEFAULT_STREAM,
+            id=str(uuid.uuid4()),
+            entities=chunk,
+            sdk_name=client.name,
+            sdk_version=client.version,
+            producer_app_name=client.app_name,
+            producer_app_version=client.app_version,
+        )
+        if metadata is not None:
+            request.metadata.CopyFrom(convert_dict_to_struct(metadata))
+        return request
+
+    def _reauthenticate(self, stale_metadata):
+        """Refresh the client's token once, however many RPCs hit UNAUTHENTICATED."""
+        with self._auth_lock:
+            if self.client._metadata is stale_metadata:
+                self.client._authenticate(_INGEST_SCOPE)
+
+    async def _call(self, call, request):
+        metadata = self.client._metadata
+        try:
+            return await call(request, metadata=metadata)
+        except grpc_aio.AioRpcError as err:
+            if err.code() != grpc.StatusCode.UNAUTHENTICATED:
+                raise
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._reauthenticate, metadata)
+        return await call(request, metadata=self.client._metadata)
+
+    async def _send(self, index, call, semaphore, chunk, route, size, throttle):
+        if throttle is not None:
+            await throttle.wait_async(len(chunk), size)
+        async with semaphore:
+            # Built only once a slot is free, so at most ``concurrency``
+            # serialized copies of the chunks are held at a time.
+            request = self._build_request(chunk, *route)
+            attempt = 0
+            while True:
+                started = time.monotonic()
+                self.chunk_started[index] = time.time()
+                try:
+                    response = await self._call(call, request)
+                    self.chunk_seconds[index] = time.monotonic() - started
+                    return response
+                except Exception as exc:
+                    delay = throttle.retry_delay(exc, attempt) if throttle is not None else None
+                    if delay is None:
+                        raise
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    async def _ingest(self, chunks, routes, chunk_sizes, throttle):
+        path = (self.client.path or "").rstrip("/")
+        channel = self._open_channel()
+        try:
+            call = channel.unary_unary(
+                path + _INGEST_METHOD,
+                request_serializer=ingester_pb2.IngestRequest.SerializeToString,
+                response_deserializer=ingester_pb2.IngestResponse.FromString,
+            )
+            semaphore = asyncio.Semaphore(self.concurrency)
+            return await asyncio.gather(
+                *[
+                    self._send(index, call, semaphore, chunk, route, size, throttle)
+                    for index, (chunk, route, size) in enumerate(
+                        zip(chunks, routes, chunk_sizes)
+                    )
+                ],
+                return_exceptions=True
+            )
+        finally:
+            await channel.close()
+
+    def ingest_chunks(self, chunks, stream=None, metadata=None, chunk_sizes=None,
+                      throttle=None, routes=None):
+        """Send ``chunks`` concurrently and wait for all of them.
+
+        Every chunk is attempted even if another fails, so the caller can
+        account for everything that was actually delivered.
+
+        Args:
+            chunks: List of entity lists, one ``IngestRequest`` each.
+            stream: Optional stream name.
+            metadata: Optional request-level metadata dict.
+            chunk_sizes: Encoded size of each chunk, used by ``throttle``.
+            throttle: Optional :class:`Throttle` applied before each send.
+            routes: Optional ``(stream, metadata)`` per chunk, overriding
+                ``stream`` and ``metadata`` so one call can fan chunks out
+                to several streams.
+
+        Returns:
+            List with one item per chunk, in chunk order: the
+            ``IngestResponse`` or the exception raised while sending it.
+            The RPC latency of each successful chunk is left in
+            ``chunk_seconds``, and the epoch time its last attempt started
+            in ``chunk_started``.
+        """
+        if chunk_sizes is None:
+            chunk_sizes = [0] * len(chunks)
+        if routes is None:
+            routes = [(stream, metadata)] * len(chunks)
+        self.chunk_seconds = [None] * len(chunks)
+        self.chunk_started = [None] * len(chunks)
+        return asyncio.run(self._ingest(chunks, routes, chunk_sizes, throttle))
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""gRPC channel tuning for Diode clients: compression, message size, keepalive.
+
+``DiodeClient`` opens its channel with fixed options. When any of the
+``compression``, ``max_send_message_mb``, ``keepalive_time_s`` or
+``keepalive_timeout_s`` parameters is set, :func:`apply_channel_options`
+reopens that channel with the SDK's own options plus the requested ones.
+gRPC connects lazily, so the channel being replaced has not connected yet
+and nothing is sent twice.
+
+The options are also recorded on the client, so :class:`AsyncIngestEngine`
+opens its ``grpc.aio`` channel with the same settings.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+COMPRESSION_CHOICES = ("none", "gzip", "deflate")
+
+# grpc_compression_algorithm values, so building the options does not
+# import grpc.
+_COMPRESSION_ALGORITHMS = {"none": 0, "deflate": 1, "gzip": 2}
+
+# Attribute of a DiodeClient holding the options applied to it.
+CLIENT_OPTIONS_ATTR = "_diode_channel_options"
+
+# Private SDK helpers and DiodeClient attributes the channel is rebuilt
+# from. They are not part of the SDK's public API, so each is checked
+# before the client's channel is touched.
+_SDK_FUNCTIONS = ("_diode_ingest_grpc_channel_options", "_open_grpc_channel", "_get_grpc_proxy_url")
+_CLIENT_ATTRIBUTES = (
+    "_target", "_secure", "_tls_verify", "_certificates", "_path", "_channel", "_stub",
+)
+_OPEN_CHANNEL_KEYWORDS = ("secure", "tls_verify", "certificates", "channel_opts", "proxy_url")
+
+
+def channel_options(params):
+    """Return the gRPC channel arguments requested by module ``params``.
+
+    Returns:
+        A list of ``(name, value)`` pairs; empty when every tuning
+        parameter is left at its default.
+    """
+    options = []
+    compression = params.get("compression")
+    if compression and compression != "none":
+        options.append(("grpc.default_compression_algorithm", _COMPRESSION_ALGORITHMS[compression]))
+    if params.get("max_send_message_mb"):
+        options.append(("grpc.max_send_message_length", int(params["max_send_message_mb"] * 1024 * 1024)))
+    if params.get("keepalive_time_s"):
+        options.append(("grpc.keepalive_time_ms", int(params["keepalive_time_s"] * 1000)))
+    if params.get("keepalive_timeout_s"):
+        options.append(("grpc.keepalive_timeout_ms", int(params["keepalive_timeout_s"] * 1000)))
+    return options
+
+
+def client_channel_options(client):
+    """Return the options :func:`apply_channel_options` gave ``client``."""
+    return list(getattr(client, CLIENT_OPTIONS_ATTR, None) or ())
+
+
+def missing_sdk_features(client):
+    """Return the private SDK names :func:`apply_channel_options` needs but cannot find.
+
+    Args:
+        client: The ``DiodeClient`` whose channel would be reopened.
+
+    Returns:
+        A list of missing names, empty when the installed SDK is supported.
+    """
+    import inspect
+
+    from netboxlabs.diode.sdk import client as sdk_client
+
+    missing = [name for name in _SDK_FUNCTIONS if not hasattr(sdk_client, name)]
+    missing.extend(name for name in _CLIENT_ATTRIBUTES if not hasattr(client, name))
+    if hasattr(sdk_client, "_open_grpc_channel"):
+        try:
+            parameters = inspect.signature(sdk_client._open_grpc_channel).parameters
+        except (TypeError, ValueError):
+            parameters = {}
+        missing.extend(
+            "_open_grpc_channel({0}=)".format(name)
+            for name in _OPEN_CHANNEL_KEYWORDS
+            if name not in parameters
+        )
+    return missing
+
+
+def apply_channel_options(client, options):
+    """Reopen the channel of ``DiodeClient`` ``client`` with ``options``.
+
+    ``options`` override the SDK's defaults of the same name, such as its
+    keepalive interval; the SDK's other options, TLS, proxy and
+    skip-verify tunnel handling are kept.
+
+    Raises:
+        RuntimeError: If the installed SDK does not build its channel in a
+            way that can be reopened; see :func:`missing_sdk_features`.
+    """
+    missing = missing_sdk_features(client)
+    if missing:
+        raise RuntimeError(
+            "compression, max_send_message_mb and keepalive options are not "
+            "supported by the installed netboxlabs-diode-sdk {0} (missing {1}); "
+            "upgrade it or leave these options unset".format(
+                getattr(client, "version", "version"), ", ".join(missing)
+            )
+        )
+
+    from netboxlabs.diode.sdk import client as sdk_client
+
+    import weakref
+
+    import grpc
+    from netboxlabs.diode.sdk.diode.v1 import ingester_pb2_grpc
+
+    merged = sdk_client._diode_ingest_grpc_channel_options(
+        "{0}/{1} {2}/{3}".format(client.name, client.version, client.app_name, client.app_version)
+    )
+    overridden = set(name for name, _value in options)
+    merged = [item for item in merged if item[0] not in overridden] + list(options)
+
+    client.close()
+    client._channel, client._tunnel = sdk_client._open_grpc_channel(
+        client._target,
+        secure=client._secure,
+        tls_verify=client._tls_verify,
+        certificates=client._certificates,
+        channel_opts=merged,
+        proxy_url=sdk_client._get_grpc_proxy_url(client._target, client._secure),
+    )
+    if client._tunnel:
+        weakref.finalize(client._channel, client._tunnel.close)
+    channel = client._channel
+    if client._path:
+        channel = grpc.intercept_channel(
+            channel, sdk_client.DiodeMethodClientInterceptor(subpath=client._path)
+        )
+    client._stub = ingester_pb2_grpc.IngesterServiceStub(channel)
+    setattr(client, CLIENT_OPTIONS_ATTR, list(options))
+    return client
@@ -8,19 +8,40 @@ from __future__ import absolute_import, division, print_function
 
 __metaclass__ = type
 
+import json
 import os
+import time
+
+from ansible_collections.my0373.diode.plugins.module_utils.channel import (
+    apply_channel_options,
+    channel_options,
+)
+from ansible_collections.my0373.diode.plugins.module_utils.sdk_import import (
+    defer_sdk_package,
+)
+from ansible_collections.my0373.diode.plugins.module_utils.tracing import (
+    SPAN_KIND_CLIENT,
+    inject_traceparent,
+    trace_span,
+)
+
+defer_sdk_package()
 
 try:
-    from netboxlabs.diode.sdk import (
-        DiodeClient,
-        DiodeDryRunClient,
-        create_message_chunks,
-    )
+    from netboxlabs.diode.sdk.chunking import create_message_chunks
 
     HAS_DIODE_SDK = True
 except ImportError:
     HAS_DIODE_SDK = False
 
+# The client classes import grpc, so they are only loaded by
+# _load_client_classes() when a client is actually created.
+DiodeClient = None
+DiodeDryRunClient = None
+
+# Mirrors the SDK's default for DiodeClient.ingest().
+DEFAULT_STREAM = "latest"
+
 SDK_IMPORT_ERROR = (
     "netboxlabs-diode-sdk is required but not installed. "
     "Install it with: pip install netboxlabs-diode-sdk"
@@ -37,6 +58,13 @@ def get_sdk_version():
         return "unknown"
 
 
+def _load_client_classes():
+    """Import ``DiodeClient`` and ``DiodeDryRunClient`` on first use."""
+    global DiodeClient, DiodeDryRunClient
+    if DiodeClient is None or DiodeDryRunClient is None:
+        from netboxlabs.diode.sdk.client import DiodeClient, DiodeDryRunClient
+
+
 def create_diode_client(params):
     """Create a DiodeClient from Ansible module params.
 
@@ -51,6 +79,7 @@ def create_diode_client(params):
     """
     if not HAS_DIODE_SDK:
         raise ImportError(SDK_IMPORT_ERROR)
+    _load_client_classes()
 
     if params.get("skip_tls_verify"):
         os.environ["DIODE_SKIP_TLS_VERIFY"] = "true"
@@ -68,7 +97,19 @@ def create_diode_client(params):
     if params.get("cert_file"):
         kwargs["cert_file"] = params["cert_file"]
 
-    return DiodeClient(**kwargs)
+    if params.get("token_cache_dir"):
+        from ansible_collections.my0373.diode.plugins.module_utils.token_cache import (
+            CachedTokenDiodeClient,
+        )
+
+        client = CachedTokenDiodeClient(params["token_cache_dir"], **kwargs)
+    else:
+        client = DiodeClient(**kwargs)
+
+    options = channel_options(params)
+    if options:
+        apply_channel_options(client, options)
+    return client
 
 
 def create_dry_run_client(params):
@@ -85,6 +126,7 @@ def create_dry_run_client(params):
     """
     if not HAS_DIODE_SDK:
         raise ImportError(SDK_IMPORT_ERROR)
+    _load_client_classes()
 
     kwargs = dict(
         app_name=params.get("app_name", "dryrun"),
@@ -96,43 +138,621 @@ def create_dry_run_client(params):
     return DiodeDryRunClient(**kwargs)
 
 
-def ingest_with_chunking(client, entities, stream=None, metadata=None, chunk_size_mb=3.0):
+class ChunkIngestError(Exception):
+    """Raised when sending a chunk fails part-way through an ingest.
+
+    Carries the position and input index range of the first chunk that
+    failed and the result accumulated for the chunks that were sent, so
+    callers can report exactly which slice of the input needs to be
+    re-sent. Concurrent sends attempt every chunk, so more than one can
+    fail; ``failures`` lists each with its ``chunk_index``,
+    ``start_index``, ``end_index`` and ``message``, in chunk order.
+    """
+
+    def __init__(self, exc, chunk_index, start_index, end_index, result, failures=None):
+        if failures is None:
+            failures = [_chunk_failure(exc, chunk_index, start_index, end_index)]
+        message = "chunk {0} (entities {1}-{2}): {3}".format(
+            chunk_index, start_index, end_index - 1, str(exc)
+        )
+        if len(failures) > 1:
+            message += " ({0} chunks failed)".format(len(failures))
+        super(ChunkIngestError, self).__init__(message)
+        self.error = exc
+        self.chunk_index = chunk_index
+        self.start_index = start_index
+        self.end_index = end_index
+        self.result = result
+        self.failures = failures
+
+
+def _chunk_failure(exc, chunk_index, start_index, end_index):
+    return {
+        "chunk_index": chunk_index,
+        "start_index": start_index,
+        "end_index": end_index,
+        "message": str(exc),
+    }
+
+
+def _varint_size(value):
+    """Return the number of bytes protobuf uses to encode ``value`` as a varint."""
+    size = 1
+    while value > 0x7F:
+        value >>= 7
+        size += 1
+    return size
+
+
+def chunk_entities(entities, chunk_size_mb):
+    """Split entities into chunks the same way for sending and planning."""
+    if chunk_size_mb and chunk_size_mb > 0 and HAS_DIODE_SDK:
+        return list(create_message_chunks(entities, max_chunk_size_mb=chunk_size_mb))
+    return [entities]
+
+
+def _chunk_bytes(chunk):
+    """Return the encoded size of ``chunk`` inside an ``IngestRequest``."""
+    size = 0
+    for entity in chunk:
+        entity_size = entity.ByteSize()
+        size += 1 + _varint_size(entity_size) + entity_size
+    return size
+
+
+def entity_type_counts(entities):
+    """Count entities by their populated ``Entity`` oneof field.
+
+    Args:
+        entities: Iterable of Entity protobuf messages.
+
+    Returns:
+        dict mapping entity type name (e.g. ``device``) to count.
+    """
+    counts = {}
+    for entity in entities:
+        entity_type = entity.WhichOneof("entity") or "unknown"
+        counts[entity_type] = counts.get(entity_type, 0) + 1
+    return counts
+
+
+def merge_entity_type_counts(total, counts):
+    """Add the per-type ``counts`` into ``total`` in place and return it."""
+    for entity_type, count in counts.items():
+        total[entity_type] = total.get(entity_type, 0) + count
+    return total
+
+
+def merge_ingest_result(total, part, **source):
+    """Fold one ``ingest_with_chunking`` or ``plan_chunks`` result into ``total``.
+
+    ``total`` holds running ``total_ingested``, ``chunk_count``,
+    ``total_bytes``, ``send_seconds``, ``entity_type_counts``, ``errors``
+    and ``error_details`` for modules that send several batches. Keyword
+    arguments (e.g. ``file=path``) are added to each ``error_details``
+    entry so errors stay attributable to their source.
+    """
+    total["total_ingested"] += part["ingested_count"]
+    total["chunk_count"] += part.get("chunk_count", 0)
+    total["total_bytes"] += part.get("total_bytes", sum(part.get("chunk_bytes", [])))
+    total["send_seconds"] = round(
+        total["send_seconds"] + sum(part.get("chunk_seconds", [])), 4
+    )
+    merge_entity_type_counts(total["entity_type_counts"], part.get("entity_type_counts", {}))
+    total["errors"].extend(part.get("errors", []))
+    for detail in part.get("error_details", []):
+        detail = dict(detail)
+        detail.update(source)
+        total["error_details"].append(detail)
+    return total
+
+
+def input_positions(indices, start_index, end_index):
+    """Map a half-open range of sent entities back to input positions.
+
+    ``indices`` holds the input index of each entity that was sent, as
+    returned by ``entity_builder.build_entities_skipping``,
+    :func:`group_batches` or :func:`group_tiers`.
+
+    Returns:
+        ``{"start_index", "end_index"}`` when the slice covers a contiguous
+        run of the input, otherwise ``{"input_indices": [...]}`` listing
+        exactly the input entities the slice holds. Entities regrouped by
+        stream or tier, or with rejected entities between them, are not
+        contiguous, and a range would name entities that were delivered
+        from other chunks.
+    """
+    if indices is None or start_index >= end_index:
+        return {"start_index": start_index, "end_index": end_index}
+    positions = list(indices[start_index:end_index])
+    first = positions[0]
+    if positions == list(range(first, first + len(positions))):
+        return {"start_index": first, "end_index": first + len(positions)}
+    return {"input_indices": positions}
+
+
+def remap_error_details(result, indices):
+    """Rewrite ``error_details`` ranges in ``result`` to input positions in place."""
+    for detail in result.get("error_details", []):
+        detail.update(input_positions(
+            indices, detail.pop("start_index"), detail.pop("end_index")
+        ))
+    return result
+
+
+def plan_chunks(entities, chunk_size_mb=3.0, mb_per_second=None):
+    """Chunk and size entities exactly as ``ingest_with_chunking`` would.
+
+    Nothing is serialized or sent: sizes come from ``ByteSize()``, which
+    only walks the already-built messages, plus the repeated-field framing
+    each entity costs inside an ``IngestRequest``.
+
+    Args:
+        entities: List of Entity protobuf messages.
+        chunk_size_mb: Max chunk size in MB.
+        mb_per_second: Optional assumed throughput used to estimate how
+            long sending would take.
+
+    Returns:
+        dict with ``ingested_count``, ``chunk_count``, ``chunk_bytes``,
+        ``total_bytes``, ``entity_type_counts`` and, when
+        ``mb_per_second`` is given, ``estimated_send_seconds``.
+    """
+    return plan_batches([(None, None, entities)], chunk_size_mb, mb_per_second)
+
+
+def plan_batches(batches, chunk_size_mb=3.0, mb_per_second=None):
+    """Chunk and size ``(stream, metadata, entities)`` batches like ``ingest_batches``.
+
+    Returns the same keys as :func:`plan_chunks`, plus ``stream_counts``
+    when there is more than one batch.
+    """
+    chunks = []
+    for _stream, _metadata, entities in batches:
+        chunks.extend(chunk_entities(entities, chunk_size_mb))
+    chunk_bytes = [_chunk_bytes(chunk) for chunk in chunks]
+    total_bytes = sum(chunk_bytes)
+    type_counts = {}
+    for _stream, _metadata, entities in batches:
+        merge_entity_type_counts(type_counts, entity_type_counts(entities))
+    result = {
+        "ingested_count": sum(len(entities) for _s, _m, entities in batches),
+        "chunk_count": len(chunks),
+        "chunk_bytes": chunk_bytes,
+        "total_bytes": total_bytes,
+        "entity_type_counts": type_counts,
+    }
+    if len(batches) > 1:
+        result["stream_counts"] = _stream_counts(
+            (stream, len(entities)) for stream, _metadata, entities in batches
+        )
+    if mb_per_second and mb_per_second > 0:
+        result["estimated_send_seconds"] = round(
+            total_bytes / (mb_per_second * 1024 * 1024), 3
+        )
+    return result
+
+
+def _stream_counts(pairs):
+    """Sum ``(stream, count)`` pairs per stream name; unset streams count as ``latest``."""
+    counts = {}
+    for stream, count in pairs:
+        stream = stream or DEFAULT_STREAM
+        counts[stream] = counts.get(stream, 0) + count
+    return counts
+
+
+def group_batches(entity_dicts, entities, indices=None, stream=None, metadata=None):
+    """Group built entities by the ``stream``/``metadata`` keys of their dicts.
+
+    An entity dict may carry its own ``stream`` and request ``metadata``
+    next to ``type`` and ``data``. Entities without a ``stream`` use
+    ``stream``; an entity's ``metadata`` is merged over ``metadata``.
+
+    Args:
+        entity_dicts: The entity dicts as given to the module.
+        entities: The Entity messages built from them.
+        indices: Input index in ``entity_dicts`` of each entity, or
+            ``None`` when every dict was built.
+        stream: Task-level stream name.
+        metadata: Task-level request metadata dict.
+
+    Returns:
+        ``(batches, indices)``: ``(stream, metadata, entities)`` tuples in
+        order of first appearance, and the input index of each entity in
+        batch order. When no entity sets either key a single batch is
+        returned and ``indices`` is passed through unchanged.
+    """
+    positions = indices if indices is not None else range(len(entities))
+    if not any(
+        "stream" in entity_dicts[index] or "metadata" in entity_dicts[index]
+        for index in positions
+    ):
+        return [(stream, metadata, entities)], indices
+
+    groups = {}
+    for entity, index in zip(entities, positions):
+        entity_dict = entity_dicts[index]
+        batch_stream = entity_dict.get("stream") or stream
+        batch_metadata = metadata
+        if entity_dict.get("metadata"):
+            batch_metadata = dict(metadata or {})
+            batch_metadata.update(entity_dict["metadata"])
+        key = (batch_stream, json.dumps(batch_metadata, sort_keys=True, default=str))
+        if key not in groups:
+            groups[key] = (batch_stream, batch_metadata, [], [])
+        groups[key][2].append(entity)
+        groups[key][3].append(index)
+
+    batches = [group[:3] for group in groups.values()]
+    return batches, [index for group in groups.values() for index in group[3]]
+
+
+def group_tiers(entity_dicts, entities, indices=None, stream=None, metadata=None, tiers=None):
+    """Split entities into dependency tiers of ``(stream, metadata, entities)`` batches.
+
+    Args:
+        entity_dicts, entities, indices, stream, metadata: As for
+            :func:`group_batches`.
+        tiers: ``{entity_type: tier}`` from
+            ``entity_builder.dependency_tiers``, or ``None`` to keep every
+            entity in one tier.
+
+    Returns:
+        ``(tiers, indices)``: a list with one list of batches per non-empty
+        tier, lowest tier first, and the input index of each entity in
+        send order.
+    """
+    if tiers is None:
+        batches, indices = group_batches(entity_dicts, entities, indices, stream, metadata)
+        return [batches], indices
+
+    positions = indices if indices is not None else range(len(entities))
+    buckets = {}
+    for entity, index in zip(entities, positions):
+        bucket = buckets.setdefault(tiers.get(entity_dicts[index]["type"], 0), ([], []))
+        bucket[0].append(entity)
+        bucket[1].append(index)
+
+    grouped = []
+    order = []
+    for tier in sorted(buckets):
+        tier_entities, tier_indices = buckets[tier]
+        batches, tier_indices = group_batches(
+            entity_dicts, tier_entities, tier_indices, stream, metadata
+        )
+        grouped.append(batches)
+        order.extend(tier_indices)
+    return grouped, order
+
+
+def _chunk_attributes(index, chunk, size, stream):
+    """Return the trace span attributes of one chunk."""
+    return {
+        "diode.chunk.index": index,
+        "diode.chunk.entity_count": len(chunk),
+        "diode.chunk.bytes": size,
+        "diode.stream": stream or DEFAULT_STREAM,
+    }
+
+
+def _send_chunk(client, chunk, kwargs, throttle, span):
+    """Send one chunk, retrying on server back-off; return ``(response, exception, seconds)``."""
+    attempt = 0
+    while True:
+        started = time.monotonic()
+        try:
+            response = client.ingest(entities=chunk, **kwargs)
+            break
+        except Exception as exc:
+            delay = throttle.retry_delay(exc, attempt) if throttle is not None else None
+            if delay is None:
+                span.record_error(exc)
+                return None, exc, None
+            throttle.sleep(delay)
+            attempt += 1
+    span.set_attribute("diode.chunk.retries", attempt)
+    span.set_attribute("diode.chunk.error_count", len(getattr(response, "errors", None) or []))
+    return response, None, time.monotonic() - started
+
+
+def _send_sequential(client, chunks, routes, chunk_sizes, throttle=None, tracer=None):
+    """Yield ``(response, exception, seconds)`` per chunk, stopping at the first failure.
+
+    ``routes`` holds the ``(stream, metadata)`` of each chunk. ``seconds``
+    is the wall time of the successful ``ingest`` call only, excluding
+    throttling and back-off waits. With a ``tracer`` each chunk is sent
+    inside its own span, whose ``traceparent`` goes with the request.
+    """
+    for index, (chunk, (stream, metadata), size) in enumerate(zip(chunks, routes, chunk_sizes)):
+        kwargs = {}
+        if stream is not None:
+            kwargs["stream"] = stream
+        if metadata is not None:
+            kwargs["metadata"] = metadata
+        if throttle is not None:
+            throttle.wait(len(chunk), size)
+        attributes = _chunk_attributes(index, chunk, size, stream)
+        with trace_span(tracer, "chunk", attributes, kind=SPAN_KIND_CLIENT) as span:
+            inject_traceparent(client, span)
+            outcome = _send_chunk(client, chunk, kwargs, throttle, span)
+        yield outcome
+        if outcome[1] is not None:
+            return
+
+
+def ingest_with_chunking(client, entities, stream=None, metadata=None, chunk_size_mb=3.0,
+                         concurrency=1, throttle=None, capture=None, tracer=None):
     """Ingest entities, automatically chunking if needed.
 
+    Chunks are contiguous slices of ``entities``, so every error Diode
+    returns for a chunk is attributed to the input index range of that
+    chunk in ``error_details``.
+
     Args:
         client: A DiodeClient or DiodeDryRunClient instance.
         entities: List of Entity protobuf messages.
         stream: Optional stream name.
         metadata: Optional request-level metadata dict.
         chunk_size_mb: Max chunk size in MB.
+        concurrency: Max chunks in flight at once. Values above 1 send
+            through :class:`AsyncIngestEngine` over a single channel when
+            ``client`` is a live ``DiodeClient``; otherwise chunks are sent
+            one after another.
+        throttle: Optional :class:`Throttle` limiting entities/bytes per
+            second and retrying chunks on server back-off hints. Pass the
+            same instance to consecutive calls to rate limit across them.
+        capture: Optional ``dryrun.CaptureWriter``; every chunk Diode
+            accepts is also written to it as a dry-run capture file, in
+            chunk order, without building or chunking anything again.
+        tracer: Optional ``tracing.Tracer``; each chunk is recorded as a
+            ``chunk`` span with its entity count and encoded bytes.
 
     Returns:
-        dict with ``ingested_count`` and ``errors`` keys.
+        dict with ``ingested_count``, ``chunk_count``, ``chunk_bytes``,
+        ``chunk_seconds``, ``entity_type_counts``, ``errors`` and
+        ``error_details`` keys. ``chunk_bytes`` and ``chunk_seconds``
+        describe each successfully sent chunk in chunk order.
+
+    Raises:
+        ChunkIngestError: If sending a chunk raises; wraps the original
+            exception together with the progress made so far. Sequential
+            sends stop at the first failure; concurrent sends attempt every
+            chunk and list each failed one in ``failures``.
+    """
+    return ingest_batches(
+        client,
+        [(stream, metadata, entities)],
+        chunk_size_mb=chunk_size_mb,
+        concurrency=concurrency,
+        throttle=throttle,
+        capture=capture,
+        tracer=tracer,
+    )
+
+
+def ingest_batches(client, batches, chunk_size_mb=3.0, concurrency=1, throttle=None,
+                   capture=None, tracer=None):
+    """Ingest ``(stream, metadata, entities)`` batches over one client.
+
+    Each batch is chunked on its own and every chunk is sent with its
+    batch's stream and metadata. With ``concurrency`` above 1 the chunks of
+    all batches share one channel and one in-flight limit, so several
+    streams are sent in parallel over a single connection.
+
+    Offsets in ``error_details`` and :class:`ChunkIngestError` count
+    through the batches in order, as if their entities were concatenated.
+    With more than one batch each ``error_details`` entry also names its
+    ``stream`` and the result adds ``stream_counts``.
+
+    Returns and raises as :func:`ingest_with_chunking`.
     """
     errors = []
+    error_details = []
+    chunk_bytes = []
+    chunk_seconds = []
+    type_counts = {}
     ingested = 0
-
-    if chunk_size_mb and chunk_size_mb > 0 and HAS_DIODE_SDK:
-        chunks = list(create_message_chunks(entities, max_chunk_size_mb=chunk_size_mb))
+    sent = 0
+    offset = 0
+    failures = []
+    stream_sent = []
+
+    chunks = []
+    routes = []
+    for stream, metadata, entities in batches:
+        for chunk in chunk_entities(entities, chunk_size_mb):
+            chunks.append(chunk)
+            routes.append((stream, metadata))
+    chunk_sizes = [_chunk_bytes(chunk) for chunk in chunks]
+    fanned_out = len(batches) > 1
+
+    engine = None
+    if concurrency and concurrency > 1 and len(chunks) > 1:
+        # Imported here so that only concurrent sends load grpc.aio.
+        from ansible_collections.my0373.diode.plugins.module_utils import async_ingest
+
+        if async_ingest.supports_async_ingest(client):
+            engine = async_ingest.AsyncIngestEngine(client, concurrency=concurrency)
+    if engine is not None:
+        # Concurrent chunks share the client's metadata, so they all carry
+        # the enclosing span as their parent.
+        if tracer is not None and tracer.current is not None:
+            inject_traceparent(client, tracer.current)
+        responses = engine.ingest_chunks(
+            chunks,
+            chunk_sizes=chunk_sizes,
+            throttle=throttle,
+            routes=routes,
+        )
+        outcomes = [
+            (None, outcome, None) if isinstance(outcome, BaseException)
+            else (outcome, None, seconds)
+            for outcome, seconds in zip(responses, engine.chunk_seconds)
+        ]
+        if tracer is not None:
+            _trace_concurrent(tracer, engine, chunks, routes, chunk_sizes, outcomes)
     else:
-        chunks = [entities]
+        outcomes = _send_sequential(client, chunks, routes, chunk_sizes, throttle, tracer)
 
-    for chunk in chunks:
-        kwargs = {}
-        if stream is not None:
-            kwargs["stream"] = stream
-        if metadata is not None:
-            kwargs["metadata"] = metadata
+    for index, (response, exc, seconds) in enumerate(outcomes):
+        chunk = chunks[index]
+        end = offset + len(chunk)
 
-        response = client.ingest(entities=chunk, **kwargs)
+        if exc is not None:
+            failures.append((exc, index, offset, end))
+            offset = end
+            continue
+
+        sent += 1
         ingested += len(chunk)
+        stream_sent.append((routes[index][0], len(chunk)))
+        chunk_bytes.append(chunk_sizes[index])
+        chunk_seconds.append(round(seconds, 4))
+        merge_entity_type_counts(type_counts, entity_type_counts(chunk))
+        if capture is not None:
+            capture.write(chunk, *routes[index])
 
         if hasattr(response, "errors") and response.errors:
             for err in response.errors:
                 errors.append(str(err))
-
-    return {
+                detail = {
+                    "chunk_index": index,
+                    "start_index": offset,
+                    "end_index": end,
+                    "message": str(err),
+                }
+                if fanned_out:
+                    detail["stream"] = routes[index][0] or DEFAULT_STREAM
+                error_details.append(detail)
+
+        offset = end
+
+    result = {
         "ingested_count": ingested,
-        "chunk_count": len(chunks),
+        "chunk_count": sent,
+        "chunk_bytes": chunk_bytes,
+        "chunk_seconds": chunk_seconds,
+        "entity_type_counts": type_counts,
         "errors": errors,
+        "error_details": error_details,
+    }
+    if fanned_out:
+        result["stream_counts"] = _stream_counts(stream_sent)
+
+    if failures:
+        exc, index, start, end = failures[0]
+        raise ChunkIngestError(
+            exc, index, start, end, result,
+            failures=[_chunk_failure(*failure) for failure in failures],
+        )
+
+    return result
+
+
+def _trace_concurrent(tracer, engine, chunks, routes, chunk_sizes, outcomes):
+    """Record a ``chunk`` span for each chunk the async engine sent."""
+    for index, (response, exc, seconds) in enumerate(outcomes):
+        attributes = _chunk_attributes(index, chunks[index], chunk_sizes[index], routes[index][0])
+        if exc is None:
+            attributes["diode.chunk.error_count"] = len(getattr(response, "errors", None) or [])
+        tracer.add_span(
+            "chunk",
+            engine.chunk_started[index] or time.time(),
+            seconds or 0.0,
+            attributes,
+            error=exc,
+            kind=SPAN_KIND_CLIENT,
+        )
+
+
+def _extend_result(total, part, offset, chunk_offset):
+    """Append one tier's ``ingest_batches`` result to ``total``, shifting its positions."""
+    for key in ("ingested_count", "chunk_count"):
+        total[key] += part.get(key, 0)
+    for key in ("chunk_bytes", "chunk_seconds", "errors"):
+        total[key].extend(part.get(key, []))
+    merge_entity_type_counts(total["entity_type_counts"], part.get("entity_type_counts", {}))
+    if "stream_counts" in part:
+        merge_entity_type_counts(total.setdefault("stream_counts", {}), part["stream_counts"])
+    for detail in part.get("error_details", []):
+        detail = dict(detail)
+        detail["chunk_index"] += chunk_offset
+        detail["start_index"] += offset
+        detail["end_index"] += offset
+        total["error_details"].append(detail)
+    total["tiers"].append({
+        "entity_types": sorted(part.get("entity_type_counts", {})),
+        "ingested_count": part.get("ingested_count", 0),
+        "seconds": round(sum(part.get("chunk_seconds", [])), 4),
+    })
+    return total
+
+
+def ingest_tiers(client, tiers, chunk_size_mb=3.0, concurrency=1, throttle=None, capture=None,
+                 tracer=None):
+    """Ingest dependency tiers in order, each tier's batches in parallel.
+
+    Every tier is sent with :func:`ingest_batches` and must finish before
+    the next one starts, so parents reach Diode before the entities that
+    reference them. If a chunk fails, later tiers are not sent.
+
+    Args:
+        tiers: List of batch lists, as returned by :func:`group_tiers`.
+
+    Returns:
+        The :func:`ingest_batches` result for all tiers, with positions
+        counted across tiers. With more than one tier it adds ``tiers``: the
+        ``entity_types``, ``ingested_count`` and send ``seconds`` of each.
+
+    Raises:
+        ChunkIngestError: As :func:`ingest_batches`, with positions and the
+            accumulated result covering every tier sent so far.
+    """
+    kwargs = dict(
+        chunk_size_mb=chunk_size_mb,
+        concurrency=concurrency,
+        throttle=throttle,
+        capture=capture,
+        tracer=tracer,
+    )
+    if len(tiers) == 1:
+        return ingest_batches(client, tiers[0], **kwargs)
+
+    total = {
+        "ingested_count": 0,
+        "chunk_count": 0,
+        "chunk_bytes": [],
+        "chunk_seconds": [],
+        "entity_type_counts": {},
+        "errors": [],
+        "error_details": [],
+        "tiers": [],
     }
+    offset = 0
+    chunk_offset = 0
+    for batches in tiers:
+        try:
+            part = ingest_batches(client, batches, **kwargs)
+        except ChunkIngestError as exc:
+            _extend_result(total, exc.result, offset, chunk_offset)
+            raise ChunkIngestError(
+                exc.error,
+                exc.chunk_index + chunk_offset,
+                exc.start_index + offset,
+                exc.end_index + offset,
+                total,
+                failures=[
+                    dict(
+                        failure,
+                        chunk_index=failure["chunk_index"] + chunk_offset,
+                        start_index=failure["start_index"] + offset,
+                        end_index=failure["end_index"] + offset,
+                    )
+                    for failure in exc.failures
+                ],
+            )
+        _extend_result(total, part, offset, chunk_offset)
+        offset += sum(len(entities) for _stream, _metadata, entities in batches)
+        chunk_offset += part["chunk_count"]
+    return total
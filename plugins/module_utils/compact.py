@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Compaction of many dry-run capture files into a few large ones.
+
+Captures are read one file at a time with ``json`` alone -- no protobuf
+message is built -- and only the latest version of each entity is kept,
+keyed by stream, entity type and natural key (see
+:func:`snapshot.natural_key`). The survivors are written in the order
+they first appeared, one set of files per stream and request metadata,
+each file holding up to ``max_file_mb`` of entities. Output files use the
+``DiodeDryRunClient`` format, so ``diode_replay`` and the inventory
+plugin read them unchanged.
+
+Memory is proportional to the number of distinct entities, held as
+their compact JSON text, rather than to the number of files read.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import os
+import uuid
+
+from ansible_collections.my0373.diode.plugins.module_utils.client import (
+    DEFAULT_STREAM,
+)
+from ansible_collections.my0373.diode.plugins.module_utils.dryrun import (
+    capture_file_prefix,
+    write_capture_file,
+)
+from ansible_collections.my0373.diode.plugins.module_utils.snapshot import (
+    canonical_json,
+    natural_key,
+)
+
+DEFAULT_MAX_FILE_MB = 32.0
+
+# Request fields carried over from the newest capture of each stream.
+_PRODUCER_FIELDS = ("producer_app_name", "producer_app_version", "sdk_name", "sdk_version")
+
+_compact_json = json.JSONEncoder(separators=(",", ":")).encode
+
+
+def capture_entity_key(stream, entity):
+    """Return the dedup key of one entity from a capture file.
+
+    ``entity`` is the protobuf JSON of an ``Entity``: a single entity type
+    field, plus an optional ``timestamp``. Entities of the same stream,
+    type and natural key share a key; anything unexpected is keyed on
+    its whole content, so it is only merged with exact duplicates.
+    """
+    names = [name for name in entity if name != "timestamp"]
+    if len(names) == 1 and isinstance(entity[names[0]], dict):
+        key = natural_key(names[0], entity[names[0]])
+    else:
+        key = entity
+    return canonical_json([stream, key])
+
+
+class CaptureCompactor(object):
+    """Collect the latest version of every entity across capture files.
+
+    Args:
+        max_file_mb: Most entity JSON to put in one output file, in MB.
+
+    Attributes:
+        sources: Paths of the captures read, in the order given.
+        errors: Messages for files that could not be read.
+        entities_read: Entities in all captures read.
+        bytes_read: Total size of the captures read.
+    """
+
+    def __init__(self, max_file_mb=DEFAULT_MAX_FILE_MB):
+        self.max_file_bytes = max(1, int(max_file_mb * 1024 * 1024))
+        self.sources = []
+        self.errors = []
+        self.entities_read = 0
+        self.bytes_read = 0
+        self._groups = {}
+        self._headers = []
+        self._mtimes = []
+        self._latest = {}
+
+    @property
+    def entity_count(self):
+        """Number of distinct entities kept."""
+        return len(self._latest)
+
+    @property
+    def superseded_count(self):
+        """Number of entities read that a later version replaced."""
+        return self.entities_read - len(self._latest)
+
+    def add(self, path, mtime=None):
+        """Read the capture at ``path``; later captures win over earlier ones.
+
+        Args:
+            path: Capture file.
+            mtime: Its modification time, if already known.
+
+        Returns:
+            ``False``, with the reason added to ``errors``, if the file is
+            not a readable capture; nothing from it is kept.
+        """
+        try:
+            with open(path, "r") as fh:
+                request = json.load(fh)
+                size = os.fstat(fh.fileno()).st_size
+            entities = request.get("entities", []) if isinstance(request, dict) else None
+            if not isinstance(entities, list) or not all(isinstance(e, dict) for e in entities):
+                raise ValueError("not a dry-run capture")
+        except (IOError, OSError, ValueError) as exc:
+            self.errors.append("Failed to load {0}: {1}".format(path, str(exc)))
+            return False
+
+        stream = request.get("stream") or DEFAULT_STREAM
+        header = {"stream": stream}
+        for field in _PRODUCER_FIELDS:
+            if request.get(field):
+                header[field] = request[field]
+        if request.get("metadata") is not None:
+            header["metadata"] = request["metadata"]
+        group_key = canonical_json([stream, header.get("metadata")])
+        group = self._groups.get(group_key)
+        if group is None:
+            group = self._groups[group_key] = len(self._headers)
+            self._headers.append(header)
+        else:
+            self._headers[group] = header
+
+        source = len(self.sources)
+        self.sources.append(path)
+        self._mtimes.append(os.path.getmtime(path) if mtime is None else mtime)
+        latest = self._latest
+        for entity in entities:
+            # Re-assigning a key keeps its first position, so entities
+            # stay in the order they first appeared.
+            latest[capture_entity_key(stream, entity)] = (group, source, _compact_json(entity))
+        self.entities_read += len(entities)
+        self.bytes_read += size
+        return True
+
+    def layout(self):
+        """Yield ``(header, entity_texts, mtime)`` for each output file.
+
+        ``mtime`` is the newest modification time of the captures the
+        file's entities came from.
+        """
+        buckets = [[] for _header in self._headers]
+        for group, source, text in self._latest.values():
+            buckets[group].append((source, text))
+        for group, entries in enumerate(buckets):
+            texts = []
+            size = 0
+            mtime = None
+            for source, text in entries:
+                # Entity JSON is ASCII, so its length is its size in bytes.
+                if texts and size + len(text) + 1 > self.max_file_bytes:
+                    yield self._headers[group], texts, mtime
+                    texts, size, mtime = [], 0, None
+                texts.append(text)
+                size += len(text) + 1
+                mtime = max(mtime, self._mtimes[source]) if mtime is not None else self._mtimes[source]
+            if texts:
+                yield self._headers[group], texts, mtime
+
+    def write(self, dest_dir, app_name):
+        """Write the compacted captures to ``dest_dir``.
+
+        Each file gets the modification time of the newest capture it
+        draws from, so ``newer_than`` in ``diode_replay`` still skips
+        entities that were already replayed. If any write fails, the
+        files written so far are removed before the error is raised.
+
+        Returns:
+            ``(paths, bytes_written)``.
+        """
+        prefix = capture_file_prefix(app_name)
+        paths = []
+        written = 0
+        try:
+            for header, texts, mtime in self.layout():
+                request = dict(header, id=str(uuid.uuid4()))
+                text = '{0},"entities":[{1}]}}'.format(_compact_json(request)[:-1], ",".join(texts))
+                path = write_capture_file(dest_dir, prefix, text)
+                paths.append(path)
+                os.utime(path, (mtime, mtime))
+                written += len(text)
+        except Exception:
+            for path in paths:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            raise
+        return paths, written
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Opt-in cProfile run of a module, written as a ``.pstats`` file.
+
+With O(profile_dir) (or ``DIODE_PROFILE_DIR``) set, the module process is
+profiled from the moment its arguments are parsed until it exits or
+fails, so building, chunking, sending and replaying are all covered on
+the real payload. The stats file can be opened with ``python -m pstats``,
+``snakeviz`` or ``flameprof``; the result carries its path and the
+functions that took the most time.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import cProfile
+import os
+import pstats
+import time
+
+from ansible_collections.my0373.diode.plugins.module_utils.result_hooks import (
+    add_result_hook,
+)
+
+TOP_FUNCTIONS = 15
+
+
+def _function_name(func):
+    filename, line, name = func
+    if filename == "~":
+        return name
+    return "{0}:{1}({2})".format(filename, line, name)
+
+
+def profile_summary(stats, limit=TOP_FUNCTIONS):
+    """Return the ``limit`` functions with the most cumulative time in ``stats``."""
+    rows = []
+    for func, (_prim_calls, calls, self_time, cumulative, _callers) in stats.stats.items():
+        rows.append((cumulative, self_time, calls, func))
+    rows.sort(key=lambda row: row[0], reverse=True)
+    return [
+        {
+            "function": _function_name(func),
+            "calls": calls,
+            "self_seconds": round(self_time, 4),
+            "cumulative_seconds": round(cumulative, 4),
+        }
+        for cumulative, self_time, calls, func in rows[:limit]
+    ]
+
+
+def profile_file_name(name, clock=time.time):
+    """Return a unique ``<name>-<timestamp>-<pid>.pstats`` file name."""
+    return "{0}-{1}-{2}.pstats".format(
+        name, time.strftime("%Y%m%dT%H%M%S", time.gmtime(clock())), os.getpid()
+    )
+
+
+def attach_cpu_profile(module, name):
+    """Profile the rest of the module run when ``profile_dir`` is set.
+
+    Starts a ``cProfile.Profile`` immediately and adds a result hook so
+    that the profile is stopped and written to
+    ``profile_dir`` before the module exits, and ``cpu_profile`` (file
+    ``path``, ``total_seconds`` and the top ``functions``) is added to the
+    result. A profile that cannot be written reports an ``error`` instead
+    of failing the task.
+
+    Args:
+        module: The ``AnsibleModule``.
+        name: Module name used as the profile file name prefix.
+
+    Returns:
+        The running profiler, or ``None`` when profiling is off.
+    """
+    profile_dir = module.params.get("profile_dir")
+    if not profile_dir:
+        return None
+    profiler = cProfile.Profile()
+
+    def write_profile():
+        profiler.disable()
+        path = os.path.join(profile_dir, profile_file_name(name))
+        try:
+            if not os.path.isdir(profile_dir):
+                os.makedirs(profile_dir, exist_ok=True)
+            profiler.dump_stats(path)
+        except (IOError, OSError) as exc:
+            return {"error": "Could not write profile to {0}: {1}".format(path, str(exc))}
+        stats = pstats.Stats(profiler)
+        return {
+            "path": path,
+            "total_seconds": round(stats.total_tt, 4),
+            "functions": profile_summary(stats),
+        }
+
+    def add_profile(result, failed):
+        result["cpu_profile"] = write_profile()
+
+    add_result_hook(module, add_profile)
+    profiler.enable()
+    return profiler
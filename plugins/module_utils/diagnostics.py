@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Self-diagnostics for the execution environment running the Diode modules.
+
+Everything here measures the interpreter the module runs in: how long the
+SDK takes to import in a fresh process, which protobuf backend is active,
+what each entity type costs to construct, how fast entities serialize and,
+given connection parameters, how long the client takes to authenticate and
+connect. Slow environments (for example an EE image that fell back to the
+pure-Python protobuf backend) show up here before they slow down real runs.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import subprocess
+import sys
+import time
+
+from ansible_collections.my0373.diode.plugins.module_utils.entity_builder import (
+    ENTITY_TYPE_MAP,
+    build_entities,
+    build_entity,
+    field_table,
+)
+
+_IMPORT_PROBE = (
+    "import time\n"
+    "started = time.perf_counter()\n"
+    "import {0}\n"
+    "print(time.perf_counter() - started)\n"
+)
+
+
+def protobuf_backend():
+    """Return ``(backend, version)`` of the active protobuf runtime.
+
+    The backend is ``upb`` or ``cpp`` for the native runtimes and
+    ``python`` for the pure-Python fallback.
+    """
+    try:
+        import google.protobuf
+        from google.protobuf.internal import api_implementation
+    except ImportError:
+        return None, None
+    return api_implementation.Type(), google.protobuf.__version__
+
+
+def cold_import_seconds(module_name="netboxlabs.diode.sdk", timeout=60):
+    """Time importing ``module_name`` in a fresh interpreter.
+
+    The module itself already has the SDK loaded, so the import is timed
+    in a child process started from the same ``sys.executable``.
+    """
+    output = subprocess.check_output(
+        [sys.executable, "-c", _IMPORT_PROBE.format(module_name)],
+        stderr=subprocess.STDOUT,
+        timeout=timeout,
+    )
+    return round(float(output.decode().strip().splitlines()[-1]), 4)
+
+
+def _sample_entity(entity_type):
+    """Return a small entity dict for ``entity_type``, filling its first field."""
+    table = field_table(entity_type)
+    if table is None:
+        return {"type": entity_type, "data": {}}
+    first, fields = table
+    accepted = fields.get(first)
+    if accepted is None or str in accepted:
+        return {"type": entity_type, "data": {first: "diag"}}
+    return {"type": entity_type, "data": {}}
+
+
+def construct_costs(iterations=200):
+    """Return ``{entity_type: microseconds}`` to build one entity of each type.
+
+    Types that cannot be built from a sample value are left out.
+    """
+    costs = {}
+    for entity_type in sorted(ENTITY_TYPE_MAP):
+        sample = _sample_entity(entity_type)
+        try:
+            build_entity(sample)
+        except (ValueError, TypeError):
+            continue
+        started = time.perf_counter()
+        for _ in range(iterations):
+            build_entity(sample)
+        costs[entity_type] = round((time.perf_counter() - started) * 1e6 / iterations, 2)
+    return costs
+
+
+def serialization_throughput(count=10000):
+    """Build and serialize ``count`` IP address entities into one request.
+
+    Returns:
+        dict with ``entity_count``, ``build_entities_per_second``,
+        ``serialize_entities_per_second``, ``serialize_mb_per_second`` and
+        ``request_bytes``.
+    """
+    from netboxlabs.diode.sdk.diode.v1 import ingester_pb2
+
+    entity_dicts = [
+        {
+            "type": "ip_address",
+            "data": {
+                "address": "10.{0}.{1}.{2}/32".format(i >> 16 & 255, i >> 8 & 255, i & 255),
+                "status": "active",
+                "description": "diagnostics",
+            },
+        }
+        for i in range(count)
+    ]
+
+    started = time.perf_counter()
+    entities = build_entities(entity_dicts)
+    build_seconds = time.perf_counter() - started
+
+    request = ingester_pb2.IngestRequest(entities=entities)
+    started = time.perf_counter()
+    payload = request.SerializeToString()
+    serialize_seconds = max(time.perf_counter() - started, 1e-9)
+
+    return {
+        "entity_count": count,
+        "build_entities_per_second": int(count / max(build_seconds, 1e-9)),
+        "serialize_entities_per_second": int(count / serialize_seconds),
+        "serialize_mb_per_second": round(len(payload) / serialize_seconds / (1024 * 1024), 2),
+        "request_bytes": len(payload),
+    }
+
+
+def connection_latency(params, timeout=10.0):
+    """Time creating, authenticating and connecting a ``DiodeClient``.
+
+    Returns:
+        dict with ``client_seconds`` (construction, including the first
+        token request), ``auth_seconds`` (one more token request) and
+        ``connect_seconds`` (until the gRPC channel is ready).
+    """
+    import grpc
+
+    from ansible_collections.my0373.diode.plugins.module_utils.client import (
+        create_diode_client,
+    )
+
+    started = time.perf_counter()
+    client = create_diode_client(params)
+    result = {"client_seconds": round(time.perf_counter() - started, 4)}
+    try:
+        started = time.perf_counter()
+        client._authenticate("diode:ingest")
+        result["auth_seconds"] = round(time.perf_counter() - started, 4)
+
+        started = time.perf_counter()
+        grpc.channel_ready_future(client._channel).result(timeout=timeout)
+        result["connect_seconds"] = round(time.perf_counter() - started, 4)
+    finally:
+        client.close()
+    return result
+
+
+def run_diagnostics(params, sample_size=10000):
+    """Run every measurement, collecting failures and slow-environment warnings."""
+    backend, version = protobuf_backend()
+    report = {
+        "python_version": sys.version.split()[0],
+        "protobuf_backend": backend,
+        "protobuf_version": version,
+        "warnings": [],
+    }
+    if backend == "python":
+        report["warnings"].append(
+            "protobuf is using the pure-Python backend; building and serializing "
+            "entities is many times slower than with the upb backend"
+        )
+
+    try:
+        report["sdk_import_seconds"] = cold_import_seconds()
+    except Exception as exc:
+        report["warnings"].append("Could not time the SDK import: {0}".format(exc))
+
+    costs = construct_costs()
+    report["construct_microseconds"] = costs
+    report["slowest_entity_types"] = sorted(costs, key=costs.get, reverse=True)[:5]
+
+    report["serialization"] = serialization_throughput(sample_size)
+
+    if params.get("target"):
+        try:
+            report["connection"] = connection_latency(params, params.get("connect_timeout") or 10.0)
+        except Exception as exc:
+            report["connection"] = {"error": str(exc)}
+    return report
@@ -19,12 +19,40 @@ from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.my0373.diode.plugins.module_utils.client import (
     HAS_DIODE_SDK,
     SDK_IMPORT_ERROR,
+    ChunkIngestError,
     create_diode_client,
     create_dry_run_client,
-    ingest_with_chunking,
+    group_tiers,
+    ingest_tiers,
+    input_positions,
+    plan_batches,
+    remap_error_details,
+)
+from ansible_collections.my0373.diode.plugins.module_utils.dryrun import (
+    CaptureWriter,
 )
 from ansible_collections.my0373.diode.plugins.module_utils.entity_builder import (
     build_entities,
+    build_entities_skipping,
+    dependency_tiers,
+    invalid_entities_message,
+    validate_entities,
+)
+from ansible_collections.my0373.diode.plugins.module_utils.outbox import (
+    enqueue_batches,
+)
+from ansible_collections.my0373.diode.plugins.module_utils.snapshot import (
+    diff_snapshot,
+    snapshot_entries,
+    snapshot_path,
+    sorted_entries,
+    update_snapshot,
+)
+from ansible_collections.my0373.diode.plugins.module_utils.throttle import (
+    create_throttle,
+)
+from ansible_collections.my0373.diode.plugins.module_utils.tracing import (
+    trace_span,
 )
 
 
@@ -38,12 +66,19 @@ class DiodeModule(object):
     Args:
         module: An ``AnsibleModule`` instance.
         mode:   One of ``"ingest"``, ``"dry_run"``, or ``"replay"``.
+        tracer: Optional ``tracing.Tracer`` from ``attach_tracer``; the run
+            records ``build``, ``connect`` and ``send`` spans in it.
     """
 
-    def __init__(self, module, mode):
+    def __init__(self, module, mode, tracer=None):
         self.module = module
         self.mode = mode
+        self.tracer = tracer
         self.result = {"changed": False}
+        self.rejection = {}
+        self.indices = None
+        self.snapshot = None
+        self.entity_diff = {}
 
         if not HAS_DIODE_SDK:
             self.module.fail_json(msg=SDK_IMPORT_ERROR)
@@ -60,14 +95,150 @@ class DiodeModule(object):
             )
 
     def _build_entities(self):
-        """Convert raw entity dicts to SDK Entity objects."""
+        """Validate and convert raw entity dicts to SDK Entity objects.
+
+        Every entity is validated up front. With ``on_error: fail`` any
+        invalid entity fails the task, listing every bad index. With
+        ``on_error: skip`` invalid entities and entities that fail to build
+        are recorded in ``self.rejection`` and the rest are returned;
+        ``self.indices`` maps each returned entity to its input position.
+
+        The built entities share one protobuf arena; ``params["entities"]``
+        is left as passed. Only with ``snapshot_dir`` are their snapshot
+        entries taken, into ``self.snapshot``; ``--diff`` compares against
+        that snapshot.
+        """
+        invalid = validate_entities(self.module.params["entities"])
+        entity_dicts = self.module.params["entities"]
+        if self.module.params.get("snapshot_dir"):
+            self.snapshot = snapshot_entries(entity_dicts)
+
+        if self.module.params.get("on_error") == "skip":
+            entities, self.indices, rejected = build_entities_skipping(entity_dicts, invalid)
+            if rejected:
+                self.rejection = dict(rejected=rejected, rejected_count=len(rejected))
+            if not entities:
+                self.module.exit_json(
+                    changed=False,
+                    errors=[],
+                    msg="Every entity was rejected",
+                    **self.rejection
+                )
+            return entities
+
+        if invalid:
+            self.module.fail_json(msg=invalid_entities_message(invalid), rejected=invalid)
         try:
-            return build_entities(self.module.params["entities"])
+            return build_entities(entity_dicts)
         except (ValueError, TypeError) as exc:
             self.module.fail_json(
                 msg="Failed to build entities: {0}".format(str(exc))
             )
 
+    def _tiers(self, entities):
+        """Group entities into send tiers of per-stream batches.
+
+        There is a single tier unless ``dependency_order`` is set. Re-orders
+        ``self.indices`` to match, so error ranges still map back to
+        positions in ``entities``.
+        """
+        params = self.module.params
+        tiers, self.indices = group_tiers(
+            self.module.params["entities"],
+            entities,
+            indices=self.indices,
+            stream=params.get("stream"),
+            metadata=params.get("metadata"),
+            tiers=dependency_tiers() if params.get("dependency_order") else None,
+        )
+        return tiers
+
+    def _snapshot_entries(self):
+        """Return the sorted snapshot entries of the entities being sent.
+
+        Returns ``None`` without ``snapshot_dir``. Rejected entities are
+        left out. With ``--diff`` the entries are also compared with the
+        last-sent snapshot, setting ``self.entity_diff``.
+        """
+        params = self.module.params
+        if self.snapshot is None:
+            if self.module._diff and "snapshot_dir" in params:
+                self.module.warn("--diff needs snapshot_dir to compare against the last sent entities")
+            return None
+
+        skip = [item["index"] for item in self.rejection.get("rejected", [])]
+        entries = sorted_entries(self.snapshot, skip=skip)
+        self.snapshot = None
+        if self.module._diff:
+            path = snapshot_path(params["snapshot_dir"], params["target"])
+            try:
+                compared = diff_snapshot(path, entries)
+            except (IOError, OSError) as exc:
+                self.module.fail_json(msg="Failed to read snapshot {0}: {1}".format(path, str(exc)))
+            self.entity_diff = dict(
+                entity_diff=dict(
+                    (key, compared[key]) for key in ("added", "changed", "unchanged")
+                ),
+                diff=dict(
+                    before_header=path,
+                    after_header="entities",
+                    before=compared["before"],
+                    after=compared["after"],
+                ),
+            )
+        return entries
+
+    def _update_snapshot(self, entries, result):
+        """Record ``entries`` as sent, unless Diode reported errors."""
+        if entries is None or result.get("errors"):
+            return
+        params = self.module.params
+        path = snapshot_path(params["snapshot_dir"], params["target"])
+        try:
+            update_snapshot(path, entries)
+        except (IOError, OSError) as exc:
+            self.module.warn("Entities were sent but snapshot {0} was not updated: {1}".format(path, str(exc)))
+
+    def _create_capture(self, client):
+        """Return a ``CaptureWriter`` for ``capture_dir``, or ``None`` if unset."""
+        params = self.module.params
+        if not params.get("capture_dir"):
+            return None
+        return CaptureWriter(
+            params["capture_dir"],
+            params["app_name"],
+            app_version=params.get("app_version"),
+            sdk_name=getattr(client, "name", None),
+            sdk_version=getattr(client, "version", None),
+        )
+
+    def _enqueue(self, batches):
+        """Write entities to the outbox instead of sending them.
+
+        The snapshot is not updated, here or when ``diode_flush`` delivers
+        the segment: Diode has not seen the entities yet, and segments hold
+        built protobufs rather than the entity dicts snapshots are taken of.
+        """
+        params = self.module.params
+        if params.get("snapshot_dir"):
+            self.module.warn(
+                "snapshot_dir is not updated for entities queued with outbox_dir, "
+                "so it will not include them once diode_flush sends them"
+            )
+        try:
+            result = enqueue_batches(
+                params["outbox_dir"],
+                batches,
+                chunk_size_mb=params.get("chunk_size_mb", 3.0),
+            )
+        except Exception as exc:
+            self.module.fail_json(
+                msg="Failed to write outbox segment: {0}".format(str(exc))
+            )
+        result.update(self.rejection)
+        result.update(self.entity_diff)
+        self.module.exit_json(changed=True, errors=[], **result)
+
     def run(self):
         """Execute the module action.
 
@@ -76,34 +247,85 @@ class DiodeModule(object):
         """
         params = self.module.params
 
+        with trace_span(self.tracer, "build") as span:
+            tiers = self._tiers(self._build_entities())
+            batches = [batch for tier in tiers for batch in tier]
+            span.set_attribute(
+                "diode.entity_count", sum(len(entities) for _s, _m, entities in batches)
+            )
+            span.set_attribute("diode.rejected_count", self.rejection.get("rejected_count", 0))
+        entries = self._snapshot_entries()
+
         if self.module.check_mode:
-            self.module.exit_json(
-                changed=True,
-                ingested_count=len(params["entities"]),
-                chunk_count=0,
-                errors=[],
+            plan = plan_batches(
+                batches,
+                chunk_size_mb=params.get("chunk_size_mb", 3.0),
+                mb_per_second=params.get("estimate_mb_per_second"),
             )
+            if len(tiers) > 1:
+                plan["tier_count"] = len(tiers)
+            plan.update(self.rejection)
+            plan.update(self.entity_diff)
+            changed = True
+            if self.entity_diff:
+                counts = self.entity_diff["entity_diff"]
+                changed = bool(counts["added"] or counts["changed"])
+            self.module.exit_json(changed=changed, errors=[], **plan)
 
-        entities = self._build_entities()
-        client = self._create_client()
+        if params.get("outbox_dir"):
+            self._enqueue(batches)
 
         try:
-            with client:
-                result = ingest_with_chunking(
+            throttle = create_throttle(params)
+        except ValueError as exc:
+            self.module.fail_json(msg=str(exc))
+        with trace_span(self.tracer, "connect", {"diode.target": params.get("target")}):
+            client = self._create_client()
+        capture = self._create_capture(client)
+
+        try:
+            with trace_span(self.tracer, "send"), client:
+                result = ingest_tiers(
                     client=client,
-                    entities=entities,
-                    stream=params.get("stream"),
-                    metadata=params.get("metadata"),
+                    tiers=tiers,
                     chunk_size_mb=params.get("chunk_size_mb", 3.0),
+                    concurrency=params.get("concurrency") or 1,
+                    throttle=throttle,
+                    capture=capture,
+                    tracer=self.tracer,
                 )
+        except ChunkIngestError as exc:
+            exc.result.update(self.rejection)
+            if capture is not None:
+                exc.result["capture_files"] = capture.files
+            self.module.fail_json(
+                msg="{0} failed: {1}".format(self.mode.replace("_", " ").title(), str(exc)),
+                failed_chunk=dict(
+                    input_positions(self.indices, exc.start_index, exc.end_index),
+                    chunk_index=exc.chunk_index,
+                ),
+                failed_chunks=[
+                    dict(
+                        input_positions(self.indices, failure["start_index"], failure["end_index"]),
+                        chunk_index=failure["chunk_index"],
+                        message=failure["message"],
+                    )
+                    for failure in exc.failures
+                ],
+                **remap_error_details(exc.result, self.indices)
+            )
         except Exception as exc:
             self.module.fail_json(
                 msg="{0} failed: {1}".format(self.mode.replace("_", " ").title(), str(exc))
             )
 
-        self.module.exit_json(
-            changed=True,
-            ingested_count=result["ingested_count"],
-            chunk_count=result["chunk_count"],
-            errors=result["errors"],
-        )
+        if throttle is not None:
+            result.update(throttle.stats())
+        if capture is not None:
+            result["capture_files"] = capture.files
+        remap_error_details(result, self.indices)
+        result.update(self.rejection)
+        result.update(self.entity_diff)
+        self._update_snapshot(entries, result)
+
+        self.module.exit_json(changed=True, **result)
@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Helpers for locating, reading and writing Diode dry-run capture files."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import fnmatch
+import json
+import os
+import tempfile
+import time
+import uuid
+
+from ansible_collections.my0373.diode.plugins.module_utils.client import (
+    DEFAULT_STREAM,
+)
+from ansible_collections.my0373.diode.plugins.module_utils.sdk_import import (
+    defer_sdk_package,
+)
+
+defer_sdk_package()
+
+try:
+    from google.protobuf.json_format import MessageToJson, ParseDict
+    from netboxlabs.diode.sdk.diode.v1 import ingester_pb2
+    from netboxlabs.diode.sdk.ingester import convert_dict_to_struct
+
+    HAS_LOAD_DRYRUN = True
+except ImportError:
+    HAS_LOAD_DRYRUN = False
+
+
+def _match_value(value):
+    """Return ``value`` as compared by :class:`EntityFilter`.
+
+    Capture JSON holds 64-bit integers as strings and booleans as JSON
+    booleans, while task values arrive as whatever YAML produced, so both
+    sides are compared as text.
+    """
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _field_values(data, path):
+    """Yield the values at dotted ``path`` in entity ``data``.
+
+    Lists along the way, such as ``tags``, are searched element by element.
+    """
+    if isinstance(data, list):
+        for item in data:
+            for value in _field_values(item, path):
+                yield value
+    elif not path:
+        if data is not None:
+            yield data
+    elif isinstance(data, dict):
+        for value in _field_values(data.get(path[0]), path[1:]):
+            yield value
+
+
+class EntityFilter(object):
+    """Select capture entities by type and field value before parsing them.
+
+    Entities are tested as the plain dicts of the capture JSON, so those
+    that are filtered out never become protobuf messages.
+
+    Args:
+        include_types: Entity types to keep; all types if empty.
+        exclude_types: Entity types to drop.
+        match: Dict of dotted field path, relative to the entity, to the
+            value or list of values it must have, for example
+            ``{"site.name": "NYC"}``. Every path must match.
+
+    Attributes:
+        skipped_count: Entities rejected so far.
+    """
+
+    def __init__(self, include_types=None, exclude_types=None, match=None):
+        self.include_types = frozenset(include_types) if include_types else None
+        self.exclude_types = frozenset(exclude_types or ())
+        self.match = []
+        for path, expected in sorted((match or {}).items()):
+            if not isinstance(expected, list):
+                expected = [expected]
+            self.match.append((tuple(path.split(".")), frozenset(_match_value(v) for v in expected)))
+        self.skipped_count = 0
+
+    def __call__(self, entity):
+        """Return whether the capture entity dict ``entity`` is kept."""
+        entity_type = None
+        for name in entity:
+            if name != "timestamp":
+                entity_type = name
+                break
+        keep = (
+            (self.include_types is None or entity_type in self.include_types)
+            and entity_type not in self.exclude_types
+        )
+        if keep and self.match:
+            data = entity.get(entity_type)
+            for path, expected in self.match:
+                if not any(_match_value(v) in expected for v in _field_values(data, path)):
+                    keep = False
+                    break
+        if not keep:
+            self.skipped_count += 1
+        return keep
+
+
+def load_dryrun_entities(file_path, entity_filter=None):
+    """Return the entities of one dry-run capture file.
+
+    Equivalent to the SDK's ``load_dryrun_entities`` but without importing
+    ``netboxlabs.diode.sdk.client``, and with it grpc, just to read a file.
+
+    Args:
+        file_path: Capture file.
+        entity_filter: Optional :class:`EntityFilter`. Entities it rejects
+            are dropped from the JSON before the rest is parsed into
+            protobuf messages, which is where most of the load time goes.
+    """
+    with open(file_path, "r") as capture:
+        data = json.load(capture)
+    if entity_filter is not None:
+        data = {"entities": [e for e in data.get("entities") or [] if entity_filter(e)]}
+    request = ParseDict(data, ingester_pb2.IngestRequest())
+    return list(request.entities)
+
+
+def discover_dryrun_files(src_dir, pattern="*.json", newer_than=None, newer_than_file=None):
+    """Yield dry-run capture files in ``src_dir`` oldest first.
+
+    The directory is scanned once with ``os.scandir`` so only the file
+    name and ``stat`` result of each entry are held in memory; paths are
+    yielded one at a time so callers can start ingesting immediately.
+
+    Args:
+        src_dir: Directory containing dry-run JSON files.
+        pattern: Shell-style glob matched against file names.
+        newer_than: Optional epoch timestamp; only files modified after
+            it are returned.
+        newer_than_file: Optional file name completing the ``(mtime,
+            name)`` watermark of ``newer_than``; files modified at exactly
+            ``newer_than`` are then returned when their name sorts after
+            it, so captures written within one timestamp tick are not
+            skipped.
+
+    Yields:
+        ``(path, mtime)`` tuples ordered by modification time, then name.
+    """
+    watermark = None
+    if newer_than is not None and newer_than_file:
+        watermark = (newer_than, newer_than_file)
+    found = []
+    with os.scandir(src_dir) as entries:
+        for entry in entries:
+            if not fnmatch.fnmatchcase(entry.name, pattern):
+                continue
+            if not entry.is_file():
+                continue
+            mtime = entry.stat().st_mtime
+            if watermark is not None:
+                if (mtime, entry.name) <= watermark:
+                    continue
+            elif newer_than is not None and mtime <= newer_than:
+                continue
+            found.append((mtime, entry.name))
+
+    found.sort()
+    for mtime, name in found:
+        yield os.path.join(src_dir, name), mtime
+
+
+def capture_file_prefix(app_name):
+    """Return ``app_name`` made safe for use in a capture file name."""
+    return "".join(c if c.isalnum() or c in ("_", "-") else "_" for c in app_name)
+
+
+def write_capture_file(directory, prefix, text):
+    """Write capture JSON ``text`` to a new file in ``directory``.
+
+    The file is named ``<prefix>_<timestamp>.json`` like those of
+    ``DiodeDryRunClient``, written under a temporary name and renamed into
+    place. ``directory`` is created if missing.
+
+    Returns:
+        The path of the new file.
+    """
+    if not os.path.isdir(directory):
+        os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, "{0}_{1}.json".format(prefix, time.perf_counter_ns()))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as fh:
+            fh.write(text)
+        os.rename(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+    return path
+
+
+class CaptureWriter(object):
+    """Write chunks as they are sent to Diode as dry-run capture files.
+
+    Each chunk becomes one file in the format ``DiodeDryRunClient`` writes:
+    the ``IngestRequest`` as JSON, named ``<app_name>_<timestamp>.json``.
+    The capture can therefore be replayed by ``diode_replay`` and read by
+    the inventory plugin like any other dry run. Files are written under a
+    temporary name and renamed into place.
+
+    Args:
+        capture_dir: Directory to write to; created if missing.
+        app_name: Producer application name recorded in each request.
+        app_version: Producer application version.
+        sdk_name: SDK name of the client that sent the chunks.
+        sdk_version: SDK version of the client that sent the chunks.
+    """
+
+    def __init__(self, capture_dir, app_name, app_version=None, sdk_name=None, sdk_version=None):
+        self.capture_dir = capture_dir
+        self.app_name = app_name
+        self.app_version = app_version
+        self.sdk_name = sdk_name
+        self.sdk_version = sdk_version
+        self.files = []
+        self._prefix = capture_file_prefix(app_name)
+
+    def write(self, entities, stream=None, metadata=None):
+        """Write one sent chunk and return the capture file path."""
+        request = ingester_pb2.IngestRequest(
+            stream=stream or DEFAULT_STREAM,
+            id=str(uuid.uuid4()),
+            entities=entities,
+            producer_app_name=self.app_name,
+        )
+        for field, value in (
+            ("producer_app_version", self.app_version),
+            ("sdk_name", self.sdk_name),
+            ("sdk_version", self.sdk_version),
+        ):
+            if value:
+                setattr(request, field, value)
+        if metadata is not None:
+            request.metadata.CopyFrom(convert_dict_to_struct(metadata))
+        path = write_capture_file(
+            self.capture_dir,
+            self._prefix,
+            MessageToJson(request, preserving_proto_field_name=True),
+        )
+        self.files.append(path)
+        return path
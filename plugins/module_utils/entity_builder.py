@@ -8,6 +8,16 @@ from __future__ import absolute_import, division, print_function
 
 __metaclass__ = type
 
+import difflib
+import inspect
+import re
+
+from ansible_collections.my0373.diode.plugins.module_utils.sdk_import import (
+    defer_sdk_package,
+)
+
+defer_sdk_package()
+
 try:
     from netboxlabs.diode.sdk.ingester import (
         ASN,
@@ -217,6 +227,270 @@ ENTITY_TYPE_MAP = {
 SUPPORTED_ENTITY_TYPES = sorted(ENTITY_TYPE_MAP.keys())
 
 
+# Python types accepted for each scalar annotation used by the SDK wrappers.
+# Any other class name refers to a nested message, which accepts a dict.
+_ANNOTATION_TYPES = {
+    "str": (str,),
+    "int": (int,),
+    "float": (int, float),
+    "bool": (bool,),
+    "bytes": (bytes, str),
+    "list": (list, tuple),
+    "dict": (dict,),
+}
+_ANNOTATION_SPLIT = re.compile(r"\|(?![^\[]*\])")
+
+# entity type -> (first parameter name, {field: accepted types or None}),
+# or None when the wrapper's signature cannot be introspected.
+_FIELD_TABLES = {}
+
+
+def _accepted_types(annotation):
+    """Return the Python types an annotation accepts, or ``None`` for any."""
+    if annotation is inspect.Parameter.empty or not isinstance(annotation, str):
+        return None
+    accepted = set()
+    for token in _ANNOTATION_SPLIT.split(annotation):
+        token = token.strip().split("[", 1)[0]
+        if token == "None":
+            continue
+        if token in _ANNOTATION_TYPES:
+            accepted.update(_ANNOTATION_TYPES[token])
+        elif token.startswith("pb.") or (token[:1].isupper() and token != "Any"):
+            accepted.add(dict)
+        else:
+            return None
+    return tuple(accepted) or None
+
+
+def field_table(entity_type):
+    """Return the cached field table for ``entity_type``.
+
+    The table is compiled once per process from the SDK wrapper's
+    signature: ``(first_field, {field: accepted_types})``, where
+    ``accepted_types`` is ``None`` when any value is allowed. Returns
+    ``None`` when the signature cannot be introspected, in which case the
+    entity is only checked when it is built.
+    """
+    if entity_type in _FIELD_TABLES:
+        return _FIELD_TABLES[entity_type]
+
+    table = None
+    entity_cls = ENTITY_TYPE_MAP[entity_type][1]
+    try:
+        params = list(inspect.signature(entity_cls).parameters.values())
+    except (TypeError, ValueError):
+        params = None
+    if params and not any(p.kind == p.VAR_KEYWORD for p in params):
+        fields = dict((p.name, _accepted_types(p.annotation)) for p in params)
+        table = (params[0].name, fields)
+
+    _FIELD_TABLES[entity_type] = table
+    return table
+
+
+# Fields NetBox fills in once the referenced object exists (a device's
+# primary IP lives on one of its own interfaces), so they don't order types.
+_BACK_REFERENCE_FIELDS = frozenset(["primary_ip4", "primary_ip6", "oob_ip", "primary_mac_address"])
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+# SDK classes that can wrap any object, mapped to the types they point at
+# where they appear. NetBox cables terminate on these, so a cable's
+# ``a_terminations``/``b_terminations`` depend on all of them.
+_GENERIC_REFERENCE_TYPES = {
+    "GenericObject": (
+        "interface", "front_port", "rear_port", "console_port", "console_server_port",
+        "power_port", "power_outlet", "power_feed", "circuit_termination",
+    ),
+}
+_DEPENDENCY_TIERS = {}
+
+
+def type_dependencies(entity_type):
+    """Return the other entity types ``entity_type`` can reference.
+
+    Read from the class names in the SDK wrapper's signature, e.g. a
+    ``site: str | Site | pb.Site`` parameter makes ``site`` a dependency.
+    A ``GenericObject`` reference counts as every type it can terminate on
+    (see ``_GENERIC_REFERENCE_TYPES``).
+    """
+    class_types = dict((cls.__name__, name) for name, (_kwarg, cls) in ENTITY_TYPE_MAP.items())
+    try:
+        params = inspect.signature(ENTITY_TYPE_MAP[entity_type][1]).parameters.values()
+    except (TypeError, ValueError):
+        return set()
+    dependencies = set()
+    for param in params:
+        if param.name in _BACK_REFERENCE_FIELDS or not isinstance(param.annotation, str):
+            continue
+        for token in _IDENTIFIER.findall(param.annotation):
+            if class_types.get(token, entity_type) != entity_type:
+                dependencies.add(class_types[token])
+            for name in _GENERIC_REFERENCE_TYPES.get(token, ()):
+                if name != entity_type and name in ENTITY_TYPE_MAP:
+                    dependencies.add(name)
+    return dependencies
+
+
+def dependency_tiers():
+    """Return the cached ``{entity_type: tier}`` send order for every known type.
+
+    Tier 0 holds types that reference no others; every other type sits one
+    tier above the highest tier it references, so sites come before
+    devices, devices before interfaces and interfaces before IP addresses.
+    Types that reference each other (e.g. ``device`` and
+    ``virtual_chassis``) share a tier.
+    """
+    if _DEPENDENCY_TIERS:
+        return _DEPENDENCY_TIERS
+
+    graph = dict((name, type_dependencies(name)) for name in ENTITY_TYPE_MAP)
+
+    # Tarjan's algorithm emits each strongly connected component after
+    # every component it depends on.
+    order = {}
+    lowlink = {}
+    stack = []
+    on_stack = set()
+    components = []
+
+    def visit(name):
+        order[name] = lowlink[name] = len(order)
+        stack.append(name)
+        on_stack.add(name)
+        for dependency in graph[name]:
+            if dependency not in order:
+                visit(dependency)
+                lowlink[name] = min(lowlink[name], lowlink[dependency])
+            elif dependency in on_stack:
+                lowlink[name] = min(lowlink[name], order[dependency])
+        if lowlink[name] == order[name]:
+            component = set()
+            while True:
+                member = stack.pop()
+                on_stack.discard(member)
+                component.add(member)
+                if member == name:
+                    break
+            components.append(component)
+
+    for name in sorted(graph):
+        if name not in order:
+            visit(name)
+
+    for component in components:
+        tier = max(
+            [_DEPENDENCY_TIERS[d] + 1 for name in component for d in graph[name] if d not in component]
+            or [0]
+        )
+        for name in component:
+            _DEPENDENCY_TIERS[name] = tier
+    return _DEPENDENCY_TIERS
+
+
+def _type_names(types):
+    return " or ".join(sorted(set(t.__name__ for t in types)))
+
+
+def _check_value(field, value, accepted):
+    if value is None or accepted is None or isinstance(value, accepted):
+        return None
+    return "field '{0}' expects {1}, got {2}".format(
+        field, _type_names(accepted), type(value).__name__
+    )
+
+
+def validate_entity(entity_dict):
+    """Return a list of problems with one entity dict, empty if it looks valid.
+
+    Checks the entity type, the shape of ``data``, field names and value
+    types against the cached :func:`field_table`, without building
+    anything.
+    """
+    if not isinstance(entity_dict, dict):
+        return ["entity must be a dict, got {0}".format(type(entity_dict).__name__)]
+
+    entity_type = entity_dict.get("type")
+    if not entity_type:
+        return ["missing 'type' field"]
+    if entity_type not in ENTITY_TYPE_MAP:
+        suggestion = difflib.get_close_matches(entity_type, SUPPORTED_ENTITY_TYPES, n=1)
+        return ["unknown entity type '{0}'{1}".format(
+            entity_type, " (did you mean '{0}'?)".format(suggestion[0]) if suggestion else ""
+        )]
+
+    routing = []
+    if entity_dict.get("stream") is not None and not isinstance(entity_dict["stream"], str):
+        routing.append("'stream' must be a string, got {0}".format(
+            type(entity_dict["stream"]).__name__
+        ))
+    if entity_dict.get("metadata") is not None and not isinstance(entity_dict["metadata"], dict):
+        routing.append("'metadata' must be a dict, got {0}".format(
+            type(entity_dict["metadata"]).__name__
+        ))
+    if routing:
+        return routing
+
+    data = entity_dict.get("data", {})
+    if data is None:
+        data = {}
+    table = field_table(entity_type)
+    if isinstance(data, str):
+        if table is not None:
+            problem = _check_value(table[0], data, table[1][table[0]])
+            return [problem] if problem else []
+        return []
+    if not isinstance(data, dict):
+        return ["'data' must be a dict or string, got {0}".format(type(data).__name__)]
+    if table is None:
+        return []
+
+    fields = table[1]
+    problems = []
+    for field, value in data.items():
+        if field not in fields:
+            suggestion = difflib.get_close_matches(field, fields, n=1)
+            problems.append("unknown field '{0}' for {1}{2}".format(
+                field, entity_type,
+                " (did you mean '{0}'?)".format(suggestion[0]) if suggestion else "",
+            ))
+            continue
+        problem = _check_value(field, value, fields[field])
+        if problem:
+            problems.append(problem)
+    return problems
+
+
+def validate_entities(entity_dicts):
+    """Check every entity dict in one pass before anything is built.
+
+    Args:
+        entity_dicts: List of dicts, each with ``type`` and ``data`` keys.
+
+    Returns:
+        List of ``{"index", "type", "message"}`` dicts, one per invalid
+        entity, in input order. Empty when every entity looks valid.
+    """
+    invalid = []
+    for index, entity_dict in enumerate(entity_dicts):
+        problems = validate_entity(entity_dict)
+        if problems:
+            invalid.append({
+                "index": index,
+                "type": entity_dict.get("type") if isinstance(entity_dict, dict) else None,
+                "message": "; ".join(problems),
+            })
+    return invalid
+
+
+def invalid_entities_message(invalid, limit=5):
+    """Summarise rejected entities, listing the first ``limit`` of them."""
+    shown = "; ".join(
+        "[{0}] {1}".format(item["index"], item["message"]) for item in invalid[:limit]
+    )
+    more = " (and {0} more)".format(len(invalid) - limit) if len(invalid) > limit else ""
+    return "{0} invalid entities: {1}{2}".format(len(invalid), shown, more)
+
+
 def build_entity(entity_dict):
     """Convert a single Ansible dict to an SDK Entity protobuf.
 
@@ -257,6 +531,18 @@ def build_entity(entity_dict):
     return Entity(**{entity_kwarg: obj})
 
 
+def _shared_entities():
+    """Return an empty repeated ``Entity`` field to build entities into.
+
+    A standalone ``Entity`` message owns its own arena, which costs far more
+    than the entity itself; entities added to one repeated field share a
+    single arena, kept alive by the messages returned from it.
+    """
+    from netboxlabs.diode.sdk.diode.v1 import ingester_pb2
+
+    return ingester_pb2.IngestRequest().entities
+
+
 def build_entities(entity_dicts):
     """Convert a list of Ansible dicts to SDK Entity protobufs.
 
@@ -264,6 +550,44 @@ def build_entities(entity_dicts):
         entity_dicts: List of dicts, each with ``type`` and ``data`` keys.
 
     Returns:
-        List of protobuf Entity messages.
+        List of protobuf Entity messages, sharing one arena.
+    """
+    shared = _shared_entities()
+    for item in entity_dicts:
+        shared.add().CopyFrom(build_entity(item))
+    return list(shared)
+
+
+def build_entities_skipping(entity_dicts, rejected=None):
+    """Build every entity that can be built, collecting the ones that fail.
+
+    Args:
+        entity_dicts: List of dicts, each with ``type`` and ``data`` keys.
+        rejected: ``{"index", "type", "message"}`` dicts from
+            ``validate_entities``; those entities are not built.
+
+    Returns:
+        ``(entities, indices, rejected)``: the built Entity messages, the
+        input index of each, and every rejected entity sorted by index.
+        The entities share one arena, as with :func:`build_entities`.
     """
-    return [build_entity(item) for item in entity_dicts]
+    rejected = list(rejected or [])
+    skip = set(item["index"] for item in rejected)
+    shared = _shared_entities()
+    indices = []
+    for index, entity_dict in enumerate(entity_dicts):
+        if index in skip:
+            continue
+        try:
+            entity = build_entity(entity_dict)
+        except (ValueError, TypeError) as exc:
+            rejected.append({
+                "index": index,
+                "type": entity_dict.get("type") if isinstance(entity_dict, dict) else None,
+                "message": str(exc),
+            })
+            continue
+        shared.add().CopyFrom(entity)
+        indices.append(index)
+    rejected.sort(key=lambda item: item["index"])
+    return list(shared), indices, rejected
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Opt-in profile of what a Diode module imports while it starts.
+
+Every task runs its module in a brand-new interpreter, so import time is
+paid on every host for every task. Setting ``DIODE_PROFILE_IMPORTS=1`` in
+the task environment makes this module, when it is imported ahead of the
+module's other imports, time each module loaded from then on and add an
+``import_profile`` key to the task result.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import os
+import sys
+import time
+
+from ansible_collections.my0373.diode.plugins.module_utils.result_hooks import (
+    add_result_hook,
+)
+
+ENV_VAR = "DIODE_PROFILE_IMPORTS"
+TOP_MODULES = 25
+
+_STARTED = time.perf_counter()
+
+
+class ImportProfiler(object):
+    """``sys.meta_path`` finder that times the loading of every module.
+
+    It finds nothing itself: it asks the finders after it for the spec and
+    wraps the spec's loader's ``exec_module`` so each load is timed,
+    splitting out the time spent loading nested imports.
+    """
+
+    def __init__(self):
+        self.records = {}
+        self._stack = []
+
+    def find_spec(self, fullname, path=None, target=None):
+        finders = sys.meta_path[sys.meta_path.index(self) + 1:] if self in sys.meta_path else []
+        for finder in finders:
+            find_spec = getattr(finder, "find_spec", None)
+            if find_spec is None:
+                continue
+            spec = find_spec(fullname, path, target)
+            if spec is None:
+                continue
+            loader = spec.loader
+            # Builtin and frozen importers are classes; zipimporters are
+            # shared by every module in the archive, so wrap each only once.
+            if (
+                loader is not None
+                and not isinstance(loader, type)
+                and hasattr(loader, "exec_module")
+                and not getattr(loader, "_diode_timed", False)
+            ):
+                loader.exec_module = self._timed(loader.exec_module)
+                loader._diode_timed = True
+            return spec
+        return None
+
+    def _timed(self, exec_module):
+        def timed_exec_module(module):
+            fullname = module.__name__
+            self._stack.append(0.0)
+            started = time.perf_counter()
+            try:
+                return exec_module(module)
+            finally:
+                cumulative = time.perf_counter() - started
+                nested = self._stack.pop()
+                if self._stack:
+                    self._stack[-1] += cumulative
+                self.records[fullname] = (cumulative - nested, cumulative)
+
+        return timed_exec_module
+
+    def report(self, top=TOP_MODULES):
+        """Return the ``import_profile`` result dict."""
+        ranked = sorted(self.records.items(), key=lambda item: item[1][0], reverse=True)
+        return {
+            "startup_seconds": round(time.perf_counter() - _STARTED, 4),
+            "process_seconds": process_seconds(),
+            "import_seconds": round(sum(own for own, _total in self.records.values()), 4),
+            "module_count": len(self.records),
+            "grpc_imported": "grpc" in sys.modules,
+            "modules": [
+                {
+                    "module": name,
+                    "self_seconds": round(own, 5),
+                    "cumulative_seconds": round(total, 5),
+                }
+                for name, (own, total) in ranked[:top]
+            ],
+        }
+
+
+def process_seconds():
+    """Return how long this process has been running, or ``None`` if unknown.
+
+    This includes interpreter start-up and the AnsiballZ wrapper, which run
+    before any module code can be timed. Only available on Linux.
+    """
+    try:
+        with open("/proc/self/stat") as stat_file:
+            # Fields after the parenthesised command name; starttime is field 22.
+            fields = stat_file.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as uptime_file:
+            uptime = float(uptime_file.read().split()[0])
+        started = int(fields[19]) / float(os.sysconf("SC_CLK_TCK"))
+    except (IOError, OSError, IndexError, ValueError):
+        return None
+    return round(max(uptime - started, 0.0), 3)
+
+
+def profiling_enabled():
+    """Return True if ``DIODE_PROFILE_IMPORTS`` asks for an import profile."""
+    return os.environ.get(ENV_VAR, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+_PROFILER = None
+if profiling_enabled():
+    _PROFILER = ImportProfiler()
+    sys.meta_path.insert(0, _PROFILER)
+
+
+def attach_import_profile(module):
+    """Add ``import_profile`` to whatever ``module`` exits or fails with.
+
+    Does nothing unless profiling was enabled when this file was imported.
+    """
+    if _PROFILER is None:
+        return
+
+    def add_profile(result, failed):
+        result["import_profile"] = _PROFILER.report()
+
+    add_result_hook(module, add_profile)
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Durable on-disk outbox of built entities awaiting delivery to Diode.
+
+``diode_ingest`` with O(outbox_dir) writes each task's chunks to a new
+segment file and returns without contacting Diode; ``diode_flush`` later
+sends the segments oldest first and deletes each once it is delivered.
+
+A segment is a sequence of length-delimited ``IngestRequest`` messages,
+one per chunk, carrying the entities, stream and metadata. Segments are
+written to a temporary name and renamed into place, so a reader never
+sees a partially written one. A partially delivered segment is rewritten
+with only its undelivered chunks, so delivery is at-least-once.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import fcntl
+import os
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+
+from ansible_collections.my0373.diode.plugins.module_utils.client import (
+    chunk_entities,
+    entity_type_counts,
+    merge_entity_type_counts,
+)
+
+try:
+    from google.protobuf import json_format
+    from netboxlabs.diode.sdk.diode.v1 import ingester_pb2
+    from netboxlabs.diode.sdk.ingester import convert_dict_to_struct
+
+    HAS_OUTBOX_SDK = True
+except ImportError:
+    HAS_OUTBOX_SDK = False
+
+SEGMENT_SUFFIX = ".seg"
+LOCK_NAME = ".lock"
+
+
+class OutboxBusyError(Exception):
+    """Raised when another flush already holds the outbox lock."""
+
+
+def _encode_varint(value):
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _decode_varint(data, pos):
+    result = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise ValueError("truncated length prefix")
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def _write_records(path, records):
+    """Atomically write serialized ``records`` to ``path``."""
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            for record in records:
+                fh.write(_encode_varint(len(record)))
+                fh.write(record)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.rename(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+
+def enqueue_entities(outbox_dir, entities, stream=None, metadata=None, chunk_size_mb=3.0):
+    """Write ``entities`` to a new segment in ``outbox_dir``.
+
+    Args:
+        outbox_dir: Outbox directory; created if missing.
+        entities: List of Entity protobuf messages.
+        stream: Optional stream name.
+        metadata: Optional request-level metadata dict.
+        chunk_size_mb: Max chunk size in MB; one record is written per chunk.
+
+    Returns:
+        dict with ``queued_count``, ``chunk_count``, ``total_bytes``,
+        ``entity_type_counts`` and ``segment`` keys.
+    """
+    return enqueue_batches(outbox_dir, [(stream, metadata, entities)], chunk_size_mb)
+
+
+def enqueue_batches(outbox_dir, batches, chunk_size_mb=3.0):
+    """Write ``(stream, metadata, entities)`` batches to one new segment.
+
+    Every record keeps its batch's stream and metadata, so a flush sends
+    each chunk to the stream it was queued for.
+    """
+    if not os.path.isdir(outbox_dir):
+        os.makedirs(outbox_dir, mode=0o700, exist_ok=True)
+
+    records = []
+    type_counts = {}
+    for stream, metadata, entities in batches:
+        for chunk in chunk_entities(entities, chunk_size_mb):
+            request = ingester_pb2.IngestRequest(stream=stream or "", entities=chunk)
+            if metadata is not None:
+                request.metadata.CopyFrom(convert_dict_to_struct(metadata))
+            records.append(request.SerializeToString())
+        merge_entity_type_counts(type_counts, entity_type_counts(entities))
+
+    # Zero-padded nanoseconds keep name order equal to enqueue order.
+    name = "{0:020d}-{1}-{2}{3}".format(
+        time.time_ns(), os.getpid(), uuid.uuid4().hex[:8], SEGMENT_SUFFIX
+    )
+    path = os.path.join(outbox_dir, name)
+    _write_records(path, records)
+
+    return {
+        "queued_count": sum(len(entities) for _stream, _metadata, entities in batches),
+        "chunk_count": len(records),
+        "total_bytes": os.path.getsize(path),
+        "entity_type_counts": type_counts,
+        "segment": path,
+    }
+
+
+def list_segments(outbox_dir):
+    """Return segment paths in ``outbox_dir`` oldest first."""
+    if not os.path.isdir(outbox_dir):
+        return []
+    return [
+        os.path.join(outbox_dir, name)
+        for name in sorted(os.listdir(outbox_dir))
+        if name.endswith(SEGMENT_SUFFIX)
+    ]
+
+
+def read_segment(path):
+    """Return the ``IngestRequest`` records stored in a segment."""
+    with open(path, "rb") as fh:
+        data = fh.read()
+    records = []
+    pos = 0
+    while pos < len(data):
+        size, pos = _decode_varint(data, pos)
+        if pos + size > len(data):
+            raise ValueError("truncated record in {0}".format(path))
+        records.append(ingester_pb2.IngestRequest.FromString(data[pos:pos + size]))
+        pos += size
+    return records
+
+
+def rewrite_segment(path, records):
+    """Replace a segment's contents with ``records`` (its undelivered chunks)."""
+    _write_records(path, [record.SerializeToString() for record in records])
+
+
+def record_metadata(record):
+    """Return a record's request metadata as a dict, or ``None``."""
+    if not record.HasField("metadata"):
+        return None
+    return json_format.MessageToDict(record.metadata)
+
+
+@contextmanager
+def outbox_lock(outbox_dir):
+    """Hold an exclusive, non-blocking lock on ``outbox_dir`` for a flush.
+
+    Raises:
+        OutboxBusyError: If another process is already flushing.
+    """
+    if not os.path.isdir(outbox_dir):
+        os.makedirs(outbox_dir, mode=0o700, exist_ok=True)
+    with open(os.path.join(outbox_dir, LOCK_NAME), "a") as fh:
+        try:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except (IOError, OSError):
+            raise OutboxBusyError("Outbox {0} is being flushed by another process".format(outbox_dir))
+        try:
+            yield
+        finally:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Hooks that add to a module's result just before it exits or fails.
+
+Import profiling, CPU profiling and tracing each need to finish their work
+and add a key to whatever result the module ends with. Rather than each
+wrapping ``exit_json`` and ``fail_json`` in turn, they register a hook
+here; the two methods are wrapped once per module and run every hook.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+# Attribute of an AnsibleModule holding its registered hooks.
+HOOKS_ATTR = "_diode_result_hooks"
+
+
+def add_result_hook(module, hook):
+    """Call ``hook(result, failed)`` before ``module`` exits or fails.
+
+    ``result`` is the dict of keyword arguments ``exit_json`` or
+    ``fail_json`` was called with, including ``msg`` when it was passed
+    positionally to ``fail_json``; hooks change it in place. Hooks run
+    most recently added first.
+    """
+    hooks = vars(module).get(HOOKS_ATTR)
+    if hooks is None:
+        hooks = []
+        setattr(module, HOOKS_ATTR, hooks)
+        exit_json = module.exit_json
+        fail_json = module.fail_json
+
+        def run_hooks(result, failed):
+            for registered in reversed(hooks):
+                registered(result, failed)
+
+        def exit_with_hooks(**kwargs):
+            run_hooks(kwargs, failed=False)
+            return exit_json(**kwargs)
+
+        def fail_with_hooks(msg=None, **kwargs):
+            if msg is not None:
+                kwargs["msg"] = msg
+            run_hooks(kwargs, failed=True)
+            return fail_json(**kwargs)
+
+        module.exit_json = exit_with_hooks
+        module.fail_json = fail_with_hooks
+    hooks.append(hook)
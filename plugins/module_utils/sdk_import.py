@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Import the Diode SDK without paying for grpc until a client is needed.
+
+The SDK package's ``__init__`` imports ``netboxlabs.diode.sdk.client``,
+which pulls in grpc, requests and their dependencies -- most of the SDK's
+import time. Building, validating and sizing entities only needs the
+protobuf modules (``ingester``, ``chunking``, ``diode.v1.ingester_pb2``).
+
+:func:`defer_sdk_package` registers the package without running its
+``__init__`` so those submodules import on their own; the send path
+imports ``netboxlabs.diode.sdk.client`` directly. :func:`load_sdk_package`
+runs the deferred ``__init__`` for code that needs the package namespace.
+
+Deferring only happens in module processes. The controller imports these
+module_utils too (the dry-run inventory plugin, filters), shares
+``sys.modules`` with other plugins and pays import time once, so it keeps
+the real package.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import importlib
+import importlib.util
+import sys
+
+SDK_PACKAGE = "netboxlabs.diode.sdk"
+_DEFERRED = "_diode_deferred_init"
+
+
+def _module_process():
+    """Return True when running as a module under AnsiballZ.
+
+    AnsiballZ hands the module its arguments through
+    ``basic._ANSIBLE_ARGS`` before running it; the controller never sets it.
+    """
+    basic = sys.modules.get("ansible.module_utils.basic")
+    return getattr(basic, "_ANSIBLE_ARGS", None) is not None
+
+
+def defer_sdk_package():
+    """Register the SDK package in ``sys.modules`` without executing it.
+
+    Does nothing outside a module process, or if the package is already
+    imported (or mocked) or not installed; importing its submodules then
+    behaves as usual.
+    """
+    if SDK_PACKAGE in sys.modules or not _module_process():
+        return
+    try:
+        spec = importlib.util.find_spec(SDK_PACKAGE)
+    except (ImportError, ValueError):
+        return
+    if spec is None or spec.loader is None or spec.submodule_search_locations is None:
+        return
+
+    package = importlib.util.module_from_spec(spec)
+    setattr(package, _DEFERRED, True)
+    sys.modules[SDK_PACKAGE] = package
+    parent, _, name = SDK_PACKAGE.rpartition(".")
+    setattr(sys.modules[parent], name, package)
+
+
+def load_sdk_package():
+    """Return the SDK package, running its deferred ``__init__`` if needed."""
+    package = sys.modules.get(SDK_PACKAGE)
+    if package is not None and getattr(package, _DEFERRED, False):
+        delattr(package, _DEFERRED)
+        try:
+            package.__spec__.loader.exec_module(package)
+        except BaseException:
+            setattr(package, _DEFERRED, True)
+            raise
+        return package
+    return importlib.import_module(SDK_PACKAGE)
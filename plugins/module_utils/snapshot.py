@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Per-target snapshot of the entities last sent to Diode, for ``--diff``.
+
+A snapshot is a text file with one line per entity, ``<key>\\t<data>``,
+sorted by key. The key is the canonical JSON of the entity type and its
+natural key fields, so lines sort by type first; the data is the entity's
+canonical JSON. A sidecar index records the byte offset of every
+:data:`INDEX_INTERVAL`-th line.
+
+Diffing a task's entities against a snapshot is a sorted merge: the
+task's entries are sorted once, then the snapshot is read forward only,
+using the index to skip blocks that hold none of the task's keys. Memory
+stays proportional to the task rather than to the snapshot, and a small
+task diffed against a 500k-entity snapshot reads only the blocks it needs.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import bisect
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+
+from ansible_collections.my0373.diode.plugins.module_utils.entity_builder import (
+    ENTITY_TYPE_MAP,
+    field_table,
+)
+
+SNAPSHOT_SUFFIX = ".snap"
+INDEX_SUFFIX = ".idx"
+INDEX_INTERVAL = 256
+# Entities shown in the before/after text of the Ansible diff; the counts
+# in ``entity_diff`` always cover every entity.
+DIFF_LIMIT = 100
+
+# Fields that name an object within its parent. An entity's natural key
+# is its type plus its signature's leading fields up to the first of these,
+# e.g. ``(device, module, name)`` for an interface.
+_NAME_FIELDS = frozenset([
+    "name", "address", "prefix", "asn", "cid", "ssid", "mac_address",
+    "model", "vid", "identifier", "start_address", "local_vid",
+])
+# Leading fields that are attributes rather than parents.
+_NON_KEY_FIELDS = frozenset(["default_platform"])
+_KEY_FIELDS = {}
+
+
+# One encoder for every entity: json.dumps() with options builds a new one
+# per call, which dominates the cost of snapshotting large tasks.
+canonical_json = json.JSONEncoder(sort_keys=True, separators=(",", ":"), default=str).encode
+
+
+def key_fields(entity_type):
+    """Return the natural key fields of ``entity_type``, or ``None``.
+
+    ``None`` means the type has no naming field; such entities are keyed
+    by their whole ``data``, so any edit shows up as an added entity.
+    """
+    if entity_type in _KEY_FIELDS:
+        return _KEY_FIELDS[entity_type]
+    fields = None
+    table = field_table(entity_type) if entity_type in ENTITY_TYPE_MAP else None
+    if table is not None:
+        leading = []
+        for name in table[1]:
+            if name not in _NON_KEY_FIELDS:
+                leading.append(name)
+            if name in _NAME_FIELDS:
+                fields = tuple(leading)
+                break
+    _KEY_FIELDS[entity_type] = fields
+    return fields
+
+
+def _entity_data(entity_type, data):
+    """Return ``data`` as a dict, expanding the string shorthand."""
+    if isinstance(data, dict):
+        return data
+    table = field_table(entity_type) if entity_type in ENTITY_TYPE_MAP else None
+    return {table[0] if table else "value": data}
+
+
+def natural_key(entity_type, data):
+    """Return ``[entity_type, key values]`` for an entity's ``data`` dict.
+
+    Types without natural key fields give ``[entity_type, data]``.
+    """
+    fields = key_fields(entity_type)
+    if fields is None:
+        return [entity_type, data]
+    return [entity_type, [data.get(field) for field in fields]]
+
+
+def snapshot_entry(entity_dict):
+    """Return the ``(key, data)`` snapshot strings for one entity dict."""
+    entity_type = entity_dict.get("type")
+    data = _entity_data(entity_type, entity_dict.get("data", {}))
+    return canonical_json(natural_key(entity_type, data)), canonical_json(data)
+
+
+def snapshot_entries(entity_dicts):
+    """Return the ``(key, data)`` entry of each entity dict, in input order.
+
+    Anything that is not a dict gives ``None``.
+    """
+    return [
+        snapshot_entry(entity_dict) if isinstance(entity_dict, dict) else None
+        for entity_dict in entity_dicts
+    ]
+
+
+def sorted_entries(entries, skip=()):
+    """Sort :func:`snapshot_entries` output by key for diffing and merging.
+
+    Args:
+        entries: Per-input ``(key, data)`` pairs.
+        skip: Input indexes to leave out, e.g. rejected entities.
+
+    Returns:
+        ``[(key, data)]`` sorted by key. When a key appears more than once
+        the last entity wins, as it would in Diode.
+    """
+    skip = set(skip)
+    latest = {}
+    for index, entry in enumerate(entries):
+        if entry is not None and index not in skip:
+            latest[entry[0]] = entry[1]
+    return sorted(latest.items())
+
+
+def snapshot_path(snapshot_dir, target):
+    """Return the snapshot file for ``target`` inside ``snapshot_dir``."""
+    name = hashlib.sha256(target.encode("utf-8")).hexdigest()[:32]
+    return os.path.join(snapshot_dir, name + SNAPSHOT_SUFFIX)
+
+
+class _Reader(object):
+    """Forward-only reader of a snapshot file that seeks through its index."""
+
+    def __init__(self, path):
+        self._fh = None
+        self._keys = []
+        self._offsets = []
+        self._pending = None
+        try:
+            self._fh = open(path, "rb")
+        except (IOError, OSError):
+            return
+        try:
+            with open(path[:-len(SNAPSHOT_SUFFIX)] + INDEX_SUFFIX, "r") as fh:
+                index = json.load(fh)
+            if index.get("size") == os.fstat(self._fh.fileno()).st_size:
+                self._keys = [entry[0] for entry in index["blocks"]]
+                self._offsets = [entry[1] for entry in index["blocks"]]
+        except (IOError, OSError, ValueError, KeyError, TypeError, IndexError):
+            pass
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+
+    def __iter__(self):
+        """Yield every remaining ``(key, data)`` record."""
+        while True:
+            record = self._next()
+            if record is None:
+                return
+            yield record
+
+    def _next(self):
+        if self._pending is not None:
+            record, self._pending = self._pending, None
+            return record
+        if self._fh is None:
+            return None
+        line = self._fh.readline()
+        if not line:
+            return None
+        key, _tab, data = line.decode("utf-8").rstrip("\n").partition("\t")
+        return key, data
+
+    def find(self, key):
+        """Return the data stored for ``key``, or ``None``.
+
+        Keys must be looked up in ascending order. Records before ``key``
+        are skipped, seeking ahead through the index when ``key`` lies in a
+        later block.
+        """
+        if self._fh is None:
+            return None
+        block = bisect.bisect_right(self._keys, key) - 1
+        if block >= 0 and self._offsets[block] > self._fh.tell():
+            self._fh.seek(self._offsets[block])
+            self._pending = None
+        while True:
+            record = self._next()
+            if record is None:
+                return None
+            if record[0] == key:
+                return record[1]
+            if record[0] > key:
+                self._pending = record
+                return None
+
+
+@contextmanager
+def _locked(path, mode):
+    directory = os.path.dirname(path)
+    if not os.path.isdir(directory):
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+    with open(path + ".lock", "a") as fh:
+        fcntl.flock(fh.fileno(), mode)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+def diff_snapshot(path, entries, limit=DIFF_LIMIT):
+    """Compare sorted ``entries`` with the snapshot at ``path``.
+
+    Args:
+        path: Snapshot file; a missing file is an empty snapshot.
+        entries: Sorted ``(key, data)`` pairs from :func:`sorted_entries`.
+        limit: Most entities to include in the before/after text.
+
+    Returns:
+        dict with ``added``, ``changed`` and ``unchanged`` counts, and
+        ``before``/``after`` text with one ``<key> <data>`` line per
+        added or changed entity. Snapshot entities that are not in
+        ``entries`` are not reported: Diode does not delete them either.
+    """
+    counts = {"added": 0, "changed": 0, "unchanged": 0}
+    before = []
+    after = []
+    with _locked(path, fcntl.LOCK_SH):
+        reader = _Reader(path)
+        try:
+            for key, data in entries:
+                previous = reader.find(key)
+                if previous == data:
+                    counts["unchanged"] += 1
+                    continue
+                counts["added" if previous is None else "changed"] += 1
+                if len(after) < limit:
+                    if previous is not None:
+                        before.append("{0} {1}\n".format(key, previous))
+                    after.append("{0} {1}\n".format(key, data))
+        finally:
+            reader.close()
+    shown = len(after)
+    hidden = counts["added"] + counts["changed"] - shown
+    if hidden:
+        after.append("... {0} more added or changed entities not shown\n".format(hidden))
+    counts["before"] = "".join(before)
+    counts["after"] = "".join(after)
+    return counts
+
+
+def update_snapshot(path, entries):
+    """Merge sent ``entries`` into the snapshot at ``path``.
+
+    Entries replace the stored entity with the same key and are inserted
+    otherwise; other stored entities are kept. The merged snapshot and
+    its index are written to temporary files and renamed into place, the
+    index first; a reader ignores an index whose size does not match the
+    snapshot, so stopping between the two renames only costs the index.
+    Both temporary files are removed if anything fails.
+    """
+    with _locked(path, fcntl.LOCK_EX):
+        directory = os.path.dirname(path)
+        reader = _Reader(path)
+        tmp_paths = []
+        blocks = []
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+            tmp_paths.append(tmp_path)
+            with os.fdopen(fd, "wb") as out:
+                for count, (key, data) in enumerate(_merge(reader, entries)):
+                    if count % INDEX_INTERVAL == 0:
+                        blocks.append([key, out.tell()])
+                    out.write("{0}\t{1}\n".format(key, data).encode("utf-8"))
+                size = out.tell()
+            index_fd, index_tmp = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+            tmp_paths.append(index_tmp)
+            with os.fdopen(index_fd, "w") as out:
+                json.dump({"size": size, "blocks": blocks}, out)
+            os.rename(index_tmp, path[:-len(SNAPSHOT_SUFFIX)] + INDEX_SUFFIX)
+            os.rename(tmp_path, path)
+        except Exception:
+            for leftover in tmp_paths:
+                if os.path.exists(leftover):
+                    os.unlink(leftover)
+            raise
+        finally:
+            reader.close()
+
+
+def _merge(reader, entries):
+    """Yield stored records and ``entries`` in key order, entries winning ties."""
+    stored = iter(reader)
+    record = next(stored, None)
+    for key, data in entries:
+        while record is not None and record[0] < key:
+            yield record
+            record = next(stored, None)
+        if record is not None and record[0] == key:
+            record = next(stored, None)
+        yield key, data
+    while record is not None:
+        yield record
+        record = next(stored, None)
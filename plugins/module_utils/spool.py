@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Controller-side spool for buffering raw entities between tasks.
+
+Per-host ``diode_ingest`` tasks with O(buffer=append) write their raw
+entity dicts here instead of sending them; a later O(buffer=flush) task
+reads everything back and sends it in full-size chunks. Each host gets
+its own JSON Lines file so forked workers never write to the same file.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import os
+import re
+import stat
+import tempfile
+
+SPOOL_SUFFIX = ".jsonl"
+
+
+def default_spool_dir():
+    """Return the spool directory scoped to the current playbook run.
+
+    Task workers are forked from the ``ansible-playbook`` process, so its
+    PID (the worker's parent) identifies the run.
+    """
+    return os.path.join(
+        tempfile.gettempdir(),
+        "diode-spool-{0}-{1}".format(os.getuid(), os.getppid()),
+    )
+
+
+def check_private_dir(spool_dir, create=False):
+    """Make sure ``spool_dir`` is a directory only the current user can use.
+
+    The default spool directory has a predictable name in a shared
+    temporary directory, so another user could create it first and read or
+    plant buffered entities. A missing directory is created with mode
+    ``0700`` when ``create`` is true and otherwise left missing.
+
+    Raises:
+        ValueError: If ``spool_dir`` is a symlink or not a directory, is
+            owned by another user, or is accessible to group or others.
+    """
+    if create:
+        os.makedirs(spool_dir, mode=0o700, exist_ok=True)
+    try:
+        st = os.lstat(spool_dir)
+    except FileNotFoundError:
+        return
+    if not stat.S_ISDIR(st.st_mode):
+        raise ValueError("Spool directory {0} is not a directory".format(spool_dir))
+    if st.st_uid != os.getuid():
+        raise ValueError(
+            "Spool directory {0} is owned by uid {1}, not the current user".format(
+                spool_dir, st.st_uid
+            )
+        )
+    if stat.S_IMODE(st.st_mode) & 0o077:
+        raise ValueError(
+            "Spool directory {0} has mode {1:04o}; it must be 0700".format(
+                spool_dir, stat.S_IMODE(st.st_mode)
+            )
+        )
+
+
+def _spool_file(spool_dir, host):
+    safe = re.sub(r"[^A-Za-z0-9_.-]", "_", host) or "_"
+    return os.path.join(spool_dir, safe + SPOOL_SUFFIX)
+
+
+def append_entities(spool_dir, host, entities):
+    """Append raw entity dicts for ``host`` to the spool.
+
+    Returns:
+        Path of the host's spool file.
+
+    Raises:
+        ValueError: If an entity cannot be serialized to JSON; nothing is
+            written then.
+    """
+    lines = []
+    for index, entity in enumerate(entities):
+        try:
+            lines.append(json.dumps(entity, sort_keys=True) + "\n")
+        except (TypeError, ValueError) as exc:
+            raise ValueError("Cannot buffer entity {0}: {1}".format(index, exc))
+    data = "".join(lines)
+    if not os.path.isdir(spool_dir):
+        os.makedirs(spool_dir, mode=0o700, exist_ok=True)
+    path = _spool_file(spool_dir, host)
+    with open(path, "a") as fh:
+        fh.write(data)
+    return path
+
+
+def spool_files(spool_dir):
+    """Return the spool files in ``spool_dir``, sorted by name."""
+    if not os.path.isdir(spool_dir):
+        return []
+    return sorted(
+        os.path.join(spool_dir, name)
+        for name in os.listdir(spool_dir)
+        if name.endswith(SPOOL_SUFFIX)
+    )
+
+
+def read_spool(spool_dir):
+    """Read every buffered entity back in host-name order.
+
+    Returns:
+        ``(entities, files)``: the raw entity dicts and the spool files
+        they came from.
+    """
+    entities = []
+    files = spool_files(spool_dir)
+    for path in files:
+        with open(path) as fh:
+            for line_no, line in enumerate(fh, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entities.append(json.loads(line))
+                except ValueError as exc:
+                    raise ValueError(
+                        "Corrupt spool file {0} line {1}: {2}".format(path, line_no, exc)
+                    )
+    return entities, files
+
+
+def clear_spool(files):
+    """Remove spool files that have been flushed."""
+    for path in files:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def remove_spool_dir(spool_dir):
+    """Remove ``spool_dir`` if it is empty.
+
+    A directory that is missing, or that an append filled again since the
+    flush read it, is left alone.
+    """
+    try:
+        os.rmdir(spool_dir)
+    except OSError:
+        pass
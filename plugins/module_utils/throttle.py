@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Token-bucket rate limiting for chunk sends.
+
+A :class:`Throttle` caps how many entities and bytes per second are sent
+to Diode so that one large sync cannot saturate a shared gateway. It can
+also honour back-off hints from the server: when a send fails with
+``RESOURCE_EXHAUSTED`` or ``UNAVAILABLE``, the chunk is retried after the
+delay given in the ``retry-after`` or ``grpc-retry-pushback-ms`` trailers,
+or after an exponential back-off when no hint is present.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import time
+
+RETRYABLE_STATUS_NAMES = ("RESOURCE_EXHAUSTED", "UNAVAILABLE")
+MAX_HINT_RETRIES = 5
+MAX_BACKOFF_SECONDS = 30.0
+
+
+class TokenBucket(object):
+    """Classic token bucket refilled continuously at ``rate`` per second.
+
+    ``reserve`` never refuses: a request larger than the available tokens
+    drives the bucket into debt and returns how long the caller must wait
+    for it to be paid back. This lets a single chunk larger than the burst
+    size through while still holding the long-run average to ``rate``, and
+    makes reservations safe to interleave between concurrent senders.
+
+    Args:
+        rate: Tokens added per second.
+        burst: Bucket capacity; defaults to one second's worth of tokens.
+        clock: Monotonic time source, injectable for tests.
+    """
+
+    def __init__(self, rate, burst=None, clock=time.monotonic):
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else rate)
+        self.tokens = self.capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def reserve(self, amount):
+        """Take ``amount`` tokens and return the seconds to wait before using them."""
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self.tokens -= amount
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+
+def _status_name(exc):
+    """Return the gRPC status name carried by ``exc`` or its cause, if any."""
+    for err in (exc, getattr(exc, "__cause__", None)):
+        if err is None:
+            continue
+        code = getattr(err, "status_code", None)
+        if code is None and callable(getattr(err, "code", None)):
+            try:
+                code = err.code()
+            except Exception:
+                code = None
+        if code is not None:
+            return getattr(code, "name", str(code))
+    return None
+
+
+def server_retry_hint(exc):
+    """Return the back-off in seconds the server asked for, or ``None``.
+
+    ``DiodeClientError`` drops the trailing metadata, so the original
+    ``RpcError`` is looked up through ``__cause__`` as well.
+    """
+    for err in (exc, getattr(exc, "__cause__", None)):
+        trailing = getattr(err, "trailing_metadata", None)
+        if not callable(trailing):
+            continue
+        try:
+            metadata = trailing() or ()
+        except Exception:
+            continue
+        for key, value in metadata:
+            try:
+                if key == "grpc-retry-pushback-ms":
+                    return max(0.0, float(value) / 1000.0)
+                if key == "retry-after":
+                    return max(0.0, float(value))
+            except (TypeError, ValueError):
+                continue
+    return None
+
+
+class Throttle(object):
+    """Rate limits chunk sends by entity count and byte size.
+
+    Args:
+        max_entities_per_second: Optional cap on entities sent per second.
+        max_bytes_per_second: Optional cap on serialized bytes per second.
+        respect_server_hints: Retry chunks the server rejects with
+            ``RESOURCE_EXHAUSTED``/``UNAVAILABLE`` after the requested delay.
+        clock: Monotonic time source, injectable for tests.
+        sleep: Blocking sleep function, injectable for tests.
+    """
+
+    def __init__(self, max_entities_per_second=None, max_bytes_per_second=None,
+                 respect_server_hints=False, clock=time.monotonic, sleep=time.sleep):
+        self._buckets = []
+        if max_entities_per_second:
+            self._buckets.append(("entities", TokenBucket(max_entities_per_second, clock=clock)))
+        if max_bytes_per_second:
+            self._buckets.append(("bytes", TokenBucket(max_bytes_per_second, clock=clock)))
+        self.respect_server_hints = respect_server_hints
+        self._clock = clock
+        self._sleep = sleep
+        self._blocked_until = None
+        self.wait_seconds = 0.0
+        self.hint_retries = 0
+
+    def _record_wait(self, delay):
+        """Add the part of a wait starting now that no earlier wait covers.
+
+        Concurrent senders wait at the same time, so summing their delays
+        would overstate how long sending was held up; ``wait_seconds`` is
+        the wall-clock time during which at least one sender was waiting.
+        """
+        now = self._clock()
+        end = now + delay
+        start = now if self._blocked_until is None else max(now, self._blocked_until)
+        if end > start:
+            self.wait_seconds += end - start
+            self._blocked_until = end
+
+    def _reserve(self, entity_count, byte_count):
+        amounts = {"entities": entity_count, "bytes": byte_count}
+        delay = 0.0
+        for kind, bucket in self._buckets:
+            delay = max(delay, bucket.reserve(amounts[kind]))
+        self._record_wait(delay)
+        return delay
+
+    def wait(self, entity_count, byte_count):
+        """Block until a chunk of this size may be sent."""
+        delay = self._reserve(entity_count, byte_count)
+        if delay > 0:
+            self._sleep(delay)
+        return delay
+
+    async def wait_async(self, entity_count, byte_count):
+        """Coroutine form of :meth:`wait` for the asyncio engine."""
+        # asyncio is only needed (and only imported) on the concurrent path.
+        import asyncio
+
+        delay = self._reserve(entity_count, byte_count)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def retry_delay(self, exc, attempt):
+        """Return how long to wait before retrying after ``exc``, or ``None``.
+
+        Only used when ``respect_server_hints`` is set, and only for
+        overload-style statuses; anything else is not retried.
+        """
+        if not self.respect_server_hints or attempt >= MAX_HINT_RETRIES:
+            return None
+        if _status_name(exc) not in RETRYABLE_STATUS_NAMES:
+            return None
+        delay = server_retry_hint(exc)
+        if delay is None:
+            delay = min(MAX_BACKOFF_SECONDS, 2.0 ** attempt)
+        self.hint_retries += 1
+        self._record_wait(delay)
+        return delay
+
+    def sleep(self, seconds):
+        """Blocking sleep used between retries."""
+        self._sleep(seconds)
+
+    def stats(self):
+        """Return throttling totals for inclusion in module results."""
+        return {
+            "throttle_wait_seconds": round(self.wait_seconds, 3),
+            "server_hint_retries": self.hint_retries,
+        }
+
+
+def create_throttle(params):
+    """Create a :class:`Throttle` from module params, or ``None`` if unlimited.
+
+    Args:
+        params: The ``module.params`` dict.
+
+    Raises:
+        ValueError: If a rate limit is negative.
+    """
+    max_entities = params.get("max_entities_per_second")
+    max_bytes = params.get("max_bytes_per_second")
+    for name, value in (("max_entities_per_second", max_entities),
+                        ("max_bytes_per_second", max_bytes)):
+        if value is not None and value < 0:
+            raise ValueError("{0} must not be negative, got: {1}".format(name, value))
+    respect_hints = bool(params.get("respect_server_hints"))
+    if not (max_entities or max_bytes or respect_hints):
+        return None
+    return Throttle(
+        max_entities_per_second=max_entities,
+        max_bytes_per_second=max_bytes,
+        respect_server_hints=respect_hints,
+    )
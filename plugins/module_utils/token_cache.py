@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""On-disk OAuth2 token cache shared by concurrent module processes.
+
+Every ``DiodeClient`` requests an access token when it is created, so a
+play that runs ``diode_ingest`` on fifty hosts with ``forks: 50`` asks the
+auth endpoint for fifty tokens at once. With O(token_cache_dir) set, the
+first process to need a token fetches it and writes it to the cache; the
+others wait on the same lock and reuse it until it expires.
+
+Entries are keyed by target, client ID and scope, and encrypted with a
+key derived from the client secret, so a cache file is useless without
+the secret and a rotated secret simply misses. Tokens are reused until
+their ``exp`` claim (for JWTs) or :data:`DEFAULT_TTL_SECONDS` after they
+were fetched, less :data:`EXPIRY_MARGIN_SECONDS`; a token the server
+rejects as ``UNAUTHENTICATED`` is replaced rather than re-read.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import base64
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+    HAS_CRYPTOGRAPHY = True
+except ImportError:
+    HAS_CRYPTOGRAPHY = False
+
+try:
+    from netboxlabs.diode.sdk.client import DiodeClient
+
+    HAS_DIODE_CLIENT = True
+except ImportError:
+    DiodeClient = object
+    HAS_DIODE_CLIENT = False
+
+CRYPTOGRAPHY_IMPORT_ERROR = (
+    "token_cache_dir requires the cryptography package. "
+    "Install it with: pip install cryptography"
+)
+
+# Lifetime assumed for opaque (non-JWT) tokens, whose expiry is not visible
+# to the client. Well under Hydra's one-hour default, so a token revoked or
+# issued with a shorter lifespan is not reused for long.
+DEFAULT_TTL_SECONDS = 300
+EXPIRY_MARGIN_SECONDS = 30
+
+_KDF_INFO = b"my0373.diode token cache v1"
+
+
+def token_expiry(token, fetched_at):
+    """Return the epoch time ``token`` should stop being reused.
+
+    JWT access tokens carry an ``exp`` claim; anything else is assumed to
+    live for :data:`DEFAULT_TTL_SECONDS`.
+    """
+    parts = token.split(".")
+    if len(parts) == 3:
+        payload = parts[1] + "=" * (-len(parts[1]) % 4)
+        try:
+            exp = json.loads(base64.urlsafe_b64decode(payload.encode("ascii"))).get("exp")
+        except (ValueError, TypeError, AttributeError):
+            exp = None
+        if isinstance(exp, (int, float)) and not isinstance(exp, bool):
+            return float(exp) - EXPIRY_MARGIN_SECONDS
+    return fetched_at + DEFAULT_TTL_SECONDS - EXPIRY_MARGIN_SECONDS
+
+
+class TokenCache(object):
+    """Encrypted, file-locked store for one (target, client, scope) token.
+
+    Args:
+        cache_dir: Directory holding cache files; created ``0700`` if missing.
+        target: Diode target the token is for.
+        client_id: OAuth2 client ID.
+        client_secret: OAuth2 client secret; the encryption key is derived
+            from it and it is never written to disk.
+        scope: OAuth2 scope the token grants.
+        clock: Wall-clock time source, injectable for tests.
+
+    Raises:
+        ImportError: If ``cryptography`` is not installed.
+    """
+
+    def __init__(self, cache_dir, target, client_id, client_secret, scope, clock=time.time):
+        if not HAS_CRYPTOGRAPHY:
+            raise ImportError(CRYPTOGRAPHY_IMPORT_ERROR)
+        key_id = hashlib.sha256(
+            "\0".join([target, client_id, scope]).encode("utf-8")
+        ).hexdigest()[:32]
+        self.cache_dir = cache_dir
+        self.path = os.path.join(cache_dir, key_id + ".token")
+        self._clock = clock
+        key = HKDF(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=key_id.encode("ascii"),
+            info=_KDF_INFO,
+        ).derive(client_secret.encode("utf-8"))
+        self._fernet = Fernet(base64.urlsafe_b64encode(key))
+
+    @contextmanager
+    def locked(self):
+        """Hold an exclusive, blocking lock on this entry."""
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+        with open(self.path + ".lock", "a") as fh:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+    def read(self):
+        """Return the cached token if it is present, readable and unexpired."""
+        try:
+            with open(self.path, "rb") as fh:
+                entry = json.loads(self._fernet.decrypt(fh.read()).decode("utf-8"))
+        except (IOError, OSError, ValueError, InvalidToken):
+            return None
+        if not isinstance(entry, dict) or not isinstance(entry.get("token"), str):
+            return None
+        if entry.get("expires_at", 0) <= self._clock():
+            return None
+        return entry["token"]
+
+    def write(self, token):
+        """Encrypt and atomically store ``token`` with its reuse deadline."""
+        entry = {"token": token, "expires_at": token_expiry(token, self._clock())}
+        payload = self._fernet.encrypt(json.dumps(entry).encode("utf-8"))
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(payload)
+            os.rename(tmp_path, self.path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def get(self, fetch, stale=None):
+        """Return a cached token, calling ``fetch()`` only on a miss.
+
+        The lock is held across the fetch, so processes that miss at the
+        same time wait for the first one and then read what it stored.
+
+        Args:
+            fetch: Callable returning a fresh access token.
+            stale: A token the server has rejected; it is never returned.
+        """
+        with self.locked():
+            token = self.read()
+            if token is not None and token != stale:
+                return token
+            token = fetch()
+            self.write(token)
+            return token
+
+
+class CachedTokenDiodeClient(DiodeClient):
+    """``DiodeClient`` that takes its access tokens from a :class:`TokenCache`.
+
+    Args:
+        token_cache_dir: Directory for the shared token cache.
+        **kwargs: Passed to ``DiodeClient``.
+    """
+
+    def __init__(self, token_cache_dir, **kwargs):
+        # DiodeClient.__init__ authenticates, so this must be set first.
+        self._token_cache_dir = token_cache_dir
+        self._token_caches = {}
+        super(CachedTokenDiodeClient, self).__init__(**kwargs)
+
+    def _token_cache(self, scope):
+        cache = self._token_caches.get(scope)
+        if cache is None:
+            target = "{0}{1}".format(self._target, self._path or "")
+            cache = TokenCache(
+                self._token_cache_dir, target, self._client_id, self._client_secret, scope
+            )
+            self._token_caches[scope] = cache
+        return cache
+
+    def _current_token(self):
+        for key, value in self._metadata:
+            if key == "authorization" and value.startswith("Bearer "):
+                return value[len("Bearer "):]
+        return None
+
+    def _fetch_token(self, scope):
+        super(CachedTokenDiodeClient, self)._authenticate(scope)
+        return self._current_token()
+
+    def _authenticate(self, scope):
+        # A token already in use is only re-requested after the server
+        # rejected it, so it must not be handed back from the cache.
+        token = self._token_cache(scope).get(
+            lambda: self._fetch_token(scope), stale=self._current_token()
+        )
+        self._metadata = [
+            item for item in self._metadata if item[0] != "authorization"
+        ] + [("authorization", "Bearer {0}".format(token))]
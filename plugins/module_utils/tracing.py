@@ -0,0 +1,401 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Trace spans for a module run, exported as OTLP/JSON.
+
+With O(trace_file) or O(trace_endpoint) set, a module run is recorded as
+one trace: a root span for the task with child spans for building the
+entities, creating the client (which authenticates), sending them with a
+span per chunk, and replaying each file. The spans are exported when the
+module exits, as one OTLP/JSON line appended to a file (the format the
+OpenTelemetry Collector's ``otlpjsonfile`` receiver reads) and/or posted
+to an OTLP/HTTP collector. The OpenTelemetry SDK is not needed.
+
+A W3C ``TRACEPARENT`` in the task environment makes the root span a
+child of the caller's span. Every chunk is sent with a ``traceparent``
+gRPC header, so Diode's own spans for a request can join the trace.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import binascii
+import fcntl
+import json
+import os
+import socket
+import time
+from contextlib import contextmanager
+
+from ansible_collections.my0373.diode.plugins.module_utils.result_hooks import (
+    add_result_hook,
+)
+
+SCOPE_NAME = "my0373.diode"
+SERVICE_NAME = "ansible-diode"
+OTLP_TRACES_PATH = "/v1/traces"
+EXPORT_TIMEOUT_SECONDS = 5
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+STATUS_ERROR = 2
+
+# Result keys copied onto the root span when the module exits.
+_RESULT_ATTRIBUTES = (
+    "ingested_count", "total_ingested", "chunk_count", "total_bytes",
+    "files_processed", "rejected_count",
+)
+
+
+def _random_id(size):
+    return binascii.hexlify(os.urandom(size)).decode("ascii")
+
+
+def parse_traceparent(value):
+    """Return ``(trace_id, span_id)`` from a W3C ``traceparent`` value, or ``None``."""
+    parts = (value or "").strip().lower().split("-")
+    if len(parts) < 4 or len(parts[0]) != 2 or parts[0] == "ff":
+        return None
+    trace_id, span_id = parts[1], parts[2]
+    if len(trace_id) != 32 or len(span_id) != 16:
+        return None
+    try:
+        if not int(trace_id, 16) or not int(span_id, 16):
+            return None
+    except ValueError:
+        return None
+    return trace_id, span_id
+
+
+def _any_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_any_value(item) for item in value]}}
+    return {"stringValue": str(value)}
+
+
+def _attributes(attributes):
+    return [
+        {"key": key, "value": _any_value(value)}
+        for key, value in sorted(attributes.items())
+        if value is not None
+    ]
+
+
+class Span(object):
+    """One timed operation; times are epoch nanoseconds."""
+
+    def __init__(self, trace_id, parent_span_id, name, attributes=None,
+                 kind=SPAN_KIND_INTERNAL, start=None):
+        self.trace_id = trace_id
+        self.span_id = _random_id(8)
+        self.parent_span_id = parent_span_id
+        self.name = name
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.start = time.time_ns() if start is None else start
+        self.end = None
+        self.error = None
+
+    @property
+    def traceparent(self):
+        """The W3C ``traceparent`` value that makes this span the parent."""
+        return "00-{0}-{1}-01".format(self.trace_id, self.span_id)
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def record_error(self, error):
+        self.error = str(error) or type(error).__name__
+
+    def finish(self, end=None):
+        if self.end is None:
+            self.end = time.time_ns() if end is None else end
+
+    def to_otlp(self):
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start),
+            "endTimeUnixNano": str(self.end),
+            "attributes": _attributes(self.attributes),
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        if self.error is not None:
+            span["status"] = {"code": STATUS_ERROR, "message": self.error}
+        return span
+
+
+class _NullSpan(object):
+    """Span stand-in used when tracing is off."""
+
+    traceparent = None
+
+    def set_attribute(self, key, value):
+        pass
+
+    def record_error(self, error):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Tracer(object):
+    """Records the spans of one module run and exports them.
+
+    Spans started with :meth:`span` nest: each is a child of the span that
+    was open when it started.
+
+    Args:
+        exporters: Objects with an ``export(request)`` method taking an
+            OTLP/JSON ``ExportTraceServiceRequest`` dict.
+        parent: Optional ``(trace_id, span_id)`` of a remote parent span,
+            as returned by :func:`parse_traceparent`.
+        service_name: ``service.name`` resource attribute.
+    """
+
+    def __init__(self, exporters, parent=None, service_name=SERVICE_NAME):
+        self.exporters = exporters
+        self.trace_id, self._parent_span_id = parent or (_random_id(16), None)
+        self.resource = {
+            "service.name": service_name,
+            "host.name": socket.gethostname(),
+            "process.pid": os.getpid(),
+        }
+        self.spans = []
+        self._open = []
+
+    @property
+    def current(self):
+        """The innermost open span, or ``None``."""
+        return self._open[-1] if self._open else None
+
+    def _parent_id(self):
+        return self._open[-1].span_id if self._open else self._parent_span_id
+
+    def start_span(self, name, attributes=None, kind=SPAN_KIND_INTERNAL):
+        """Start a span under the current one; end it with :meth:`end_span`."""
+        span = Span(self.trace_id, self._parent_id(), name, attributes, kind)
+        self.spans.append(span)
+        self._open.append(span)
+        return span
+
+    def end_span(self, span):
+        span.finish()
+        if span in self._open:
+            del self._open[self._open.index(span):]
+
+    @contextmanager
+    def span(self, name, attributes=None, kind=SPAN_KIND_INTERNAL):
+        """Context manager timing a child span; an exception marks it failed."""
+        span = self.start_span(name, attributes, kind)
+        try:
+            yield span
+        except Exception as exc:
+            span.record_error(exc)
+            raise
+        finally:
+            self.end_span(span)
+
+    def add_span(self, name, start, seconds, attributes=None, error=None,
+                 kind=SPAN_KIND_INTERNAL):
+        """Record a span timed elsewhere as a child of the current span.
+
+        Args:
+            start: Epoch time in seconds the operation started.
+            seconds: How long it took.
+            error: Optional exception or message marking it failed.
+        """
+        start_ns = int(start * 1e9)
+        span = Span(self.trace_id, self._parent_id(), name, attributes, kind, start=start_ns)
+        span.finish(start_ns + int(seconds * 1e9))
+        if error is not None:
+            span.record_error(error)
+        self.spans.append(span)
+        return span
+
+    def finish(self, error=None):
+        """End every open span, marking them failed with ``error`` if given."""
+        while self._open:
+            span = self._open.pop()
+            if error is not None and span.error is None:
+                span.record_error(error)
+            span.finish()
+
+    def to_otlp(self):
+        """Return the finished spans as an ``ExportTraceServiceRequest`` dict."""
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": _attributes(self.resource)},
+                "scopeSpans": [{
+                    "scope": {"name": SCOPE_NAME},
+                    "spans": [span.to_otlp() for span in self.spans if span.end is not None],
+                }],
+            }],
+        }
+
+    def export(self):
+        """Send the finished spans to every exporter and drop them.
+
+        Returns:
+            List of error messages, one per exporter that failed. Tracing
+            never fails a task.
+        """
+        request = self.to_otlp()
+        errors = []
+        for exporter in self.exporters:
+            try:
+                exporter.export(request)
+            except Exception as exc:
+                errors.append("{0}: {1}".format(exporter.destination, str(exc)))
+        self.spans = [span for span in self.spans if span.end is None]
+        return errors
+
+
+class FileSpanExporter(object):
+    """Appends each export to ``path`` as one line of OTLP/JSON.
+
+    Modules on several hosts may share the file; lines are written under
+    an exclusive lock so they never interleave.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.destination = path
+
+    def export(self, request):
+        line = json.dumps(request, separators=(",", ":")) + "\n"
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a") as fh:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+            try:
+                fh.write(line)
+                fh.flush()
+            finally:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+class OtlpHttpSpanExporter(object):
+    """Posts each export to an OTLP/HTTP collector as JSON.
+
+    Args:
+        endpoint: Collector URL; :data:`OTLP_TRACES_PATH` is appended
+            unless the URL already ends with it.
+        headers: Optional extra request headers, e.g. for authentication.
+        timeout: Request timeout in seconds.
+    """
+
+    def __init__(self, endpoint, headers=None, timeout=EXPORT_TIMEOUT_SECONDS):
+        endpoint = endpoint.rstrip("/")
+        if not endpoint.endswith(OTLP_TRACES_PATH):
+            endpoint += OTLP_TRACES_PATH
+        self.destination = endpoint
+        self.headers = dict(headers or {})
+        self.timeout = timeout
+
+    def export(self, request):
+        # Imported here so that runs without an endpoint do not load
+        # the HTTP and TLS stack.
+        from ansible.module_utils.urls import open_url
+
+        headers = {"Content-Type": "application/json"}
+        headers.update(self.headers)
+        response = open_url(
+            self.destination,
+            data=json.dumps(request, separators=(",", ":")),
+            headers=headers,
+            method="POST",
+            timeout=self.timeout,
+        )
+        response.read()
+
+
+def create_tracer(params):
+    """Return a :class:`Tracer` for ``trace_file``/``trace_endpoint``, or ``None``."""
+    exporters = []
+    if params.get("trace_file"):
+        exporters.append(FileSpanExporter(params["trace_file"]))
+    if params.get("trace_endpoint"):
+        exporters.append(
+            OtlpHttpSpanExporter(params["trace_endpoint"], headers=params.get("trace_headers"))
+        )
+    if not exporters:
+        return None
+    return Tracer(exporters, parent=parse_traceparent(os.environ.get("TRACEPARENT")))
+
+
+@contextmanager
+def _null_span():
+    yield NULL_SPAN
+
+
+def trace_span(tracer, name, attributes=None, kind=SPAN_KIND_INTERNAL):
+    """Return ``tracer.span(...)``, or a no-op context when ``tracer`` is ``None``."""
+    if tracer is None:
+        return _null_span()
+    return tracer.span(name, attributes, kind)
+
+
+def inject_traceparent(client, span):
+    """Send ``span``'s ``traceparent`` with the client's future gRPC calls.
+
+    Only applies to clients that keep their call metadata in a
+    ``_metadata`` list, as ``DiodeClient`` does.
+    """
+    metadata = getattr(client, "_metadata", None)
+    if span.traceparent is None or not isinstance(metadata, list):
+        return
+    client._metadata = [item for item in metadata if item[0] != "traceparent"] + [
+        ("traceparent", span.traceparent)
+    ]
+
+
+def attach_tracer(module, name):
+    """Trace the rest of the module run when ``trace_file`` or ``trace_endpoint`` is set.
+
+    Starts a root span named ``name`` and adds a result hook so that
+    every open span is ended (and marked failed by
+    ``fail_json``), the spans are exported, and ``trace_id`` is added to
+    the result. Export errors are reported as warnings.
+
+    Args:
+        module: The ``AnsibleModule``.
+        name: Module name used as the root span name.
+
+    Returns:
+        The :class:`Tracer`, or ``None`` when tracing is off.
+    """
+    tracer = create_tracer(module.params)
+    if tracer is None:
+        return None
+    root = tracer.start_span(name, {
+        "ansible.check_mode": bool(module.check_mode),
+        "diode.target": module.params.get("target"),
+        "diode.app_name": module.params.get("app_name"),
+    })
+
+    def add_trace(result, failed):
+        for key in _RESULT_ATTRIBUTES:
+            if isinstance(result.get(key), int):
+                root.set_attribute("diode." + key, result[key])
+        root.set_attribute("ansible.changed", bool(result.get("changed")))
+        tracer.finish(error=result.get("msg", "failed") if failed else None)
+        for error in tracer.export():
+            module.warn("Could not export trace spans to {0}".format(error))
+        result["trace_id"] = tracer.trace_id
+
+    add_result_hook(module, add_trace)
+    return tracer
@@ -22,6 +22,7 @@ description:
   - File names follow the pattern C(<app_name>_<timestamp_ns>.json).
 extends_documentation_fragment:
   - my0373.diode.common.ENTITIES
+  - my0373.diode.common.PROFILE
 options:
   app_name:
     description:
@@ -72,22 +73,71 @@ output_dir:
   type: str
   returned: success
   sample: "/tmp/diode-dryrun"
+rejected:
+  description:
+    - One entry per entity that was not built, with its C(index) in
+      O(entities), its C(type) and a C(message) listing every problem.
+  type: list
+  elements: dict
+  returned: when entities are invalid or fail to build
+  sample:
+    - index: 3
+      type: device
+      message: "unknown field 'devcie_type' for device (did you mean 'device_type'?)"
+rejected_count:
+  description: Number of entities skipped.
+  type: int
+  returned: when O(on_error=skip) and entities were rejected
+  sample: 1
+cpu_profile:
+  description:
+    - CPU profile of the module run.
+    - C(path) is the C(.pstats) file written, C(total_seconds) the
+      profiled time and C(functions) the functions with the most
+      cumulative time.
+  type: dict
+  returned: when O(profile_dir) is set
+  sample: {"path": "/tmp/diode-profiles/diode_ingest-20260101T120000-4242.pstats",
+           "total_seconds": 2.41, "functions": []}
+import_profile:
+  description:
+    - Start-up import profile of the module process.
+    - C(startup_seconds) and C(import_seconds) cover the collection's own
+      imports, C(process_seconds) the whole process including the
+      interpreter; C(modules) lists the slowest imports.
+  type: dict
+  returned: when the E(DIODE_PROFILE_IMPORTS) environment variable is set
+  sample: {"startup_seconds": 0.14, "process_seconds": 0.31, "import_seconds": 0.13,
+           "module_count": 180, "grpc_imported": false, "modules": []}
 """
 
+# Imported first so that DIODE_PROFILE_IMPORTS times every import after it.
+from ansible_collections.my0373.diode.plugins.module_utils.import_profile import (
+    attach_import_profile,
+)
 from ansible.module_utils.basic import AnsibleModule
 
 from ansible_collections.my0373.diode.plugins.module_utils.arg_specs import (
     diode_dry_run_arg_spec,
     diode_entities_arg_spec,
+    diode_profile_arg_spec,
 )
 from ansible_collections.my0373.diode.plugins.module_utils.client import (
     HAS_DIODE_SDK,
     SDK_IMPORT_ERROR,
     create_dry_run_client,
-    ingest_with_chunking,
+    group_tiers,
+    ingest_batches,
+)
+from ansible_collections.my0373.diode.plugins.module_utils.cpu_profile import (
+    attach_cpu_profile,
 )
 from ansible_collections.my0373.diode.plugins.module_utils.entity_builder import (
     build_entities,
+    build_entities_skipping,
+    dependency_tiers,
+    invalid_entities_message,
+    validate_entities,
 )
 
 
@@ -96,27 +146,42 @@ def main():
     arg_spec = {}
     arg_spec.update(diode_dry_run_arg_spec())
     arg_spec.update(diode_entities_arg_spec())
+    arg_spec.update(diode_profile_arg_spec())
 
     module = AnsibleModule(
         argument_spec=arg_spec,
         supports_check_mode=True,
     )
+    attach_import_profile(module)
+    attach_cpu_profile(module, "diode_dry_run")
 
     if not HAS_DIODE_SDK:
         module.fail_json(msg=SDK_IMPORT_ERROR)
 
+    invalid = validate_entities(module.params["entities"])
+    entity_dicts = module.params["entities"]
+    rejection = {}
+    indices = None
+    if module.params.get("on_error") == "skip":
+        entities, indices, rejected = build_entities_skipping(entity_dicts, invalid)
+        if rejected:
+            rejection = dict(rejected=rejected, rejected_count=len(rejected))
+    elif invalid:
+        module.fail_json(msg=invalid_entities_message(invalid), rejected=invalid)
+    else:
+        try:
+            entities = build_entities(entity_dicts)
+        except (ValueError, TypeError) as exc:
+            module.fail_json(msg="Failed to build entities: {0}".format(str(exc)))
+
     if module.check_mode:
         module.exit_json(
             changed=True,
-            entity_count=len(module.params["entities"]),
+            entity_count=len(entities),
             output_dir=module.params.get("output_dir", ""),
+            **rejection
         )
 
-    try:
-        entities = build_entities(module.params["entities"])
-    except (ValueError, TypeError) as exc:
-        module.fail_json(msg="Failed to build entities: {0}".format(str(exc)))
-
     try:
         client = create_dry_run_client(module.params)
     except Exception as exc:
@@ -124,13 +189,19 @@ def main():
             msg="Failed to create dry-run client: {0}".format(str(exc))
         )
 
+    tiers, _indices = group_tiers(
+        entity_dicts,
+        entities,
+        indices=indices,
+        stream=module.params.get("stream"),
+        metadata=module.params.get("metadata"),
+        tiers=dependency_tiers() if module.params.get("dependency_order") else None,
+    )
     try:
         with client:
-            result = ingest_with_chunking(
+            result = ingest_batches(
                 client=client,
-                entities=entities,
-                stream=module.params.get("stream"),
-                metadata=module.params.get("metadata"),
+                batches=[batch for tier in tiers for batch in tier],
                 chunk_size_mb=module.params.get("chunk_size_mb", 3.0),
             )
     except Exception as exc:
@@ -140,6 +211,7 @@ def main():
         changed=True,
         entity_count=result["ingested_count"],
         output_dir=module.params.get("output_dir", ""),
+        **rejection
     )
 
 
@@ -0,0 +1,267 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Ansible module for compacting many dry-run capture files into a few."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+---
+module: diode_dryrun_compact
+short_description: Merge many dry-run capture files into a few, keeping the latest entities
+version_added: "1.11.0"
+description:
+  - Read every dry-run capture in O(src_dir) written by
+    M(my0373.diode.diode_dry_run), the C(DiodeDryRunClient) or
+    O(my0373.diode.diode_ingest#module:capture_dir), oldest first, and
+    write their entities to a few large captures in O(dest_dir).
+  - Only the latest version of each entity is kept, matched by stream,
+    entity type and natural key (for example the device and name of an
+    interface), so M(my0373.diode.diode_replay) sends less data from
+    fewer files.
+  - Captures are streamed one file at a time as plain JSON; memory grows
+    with the number of distinct entities, not the number of files.
+notes:
+  - Entities keep the order in which they first appeared. Each stream
+    and request metadata combination gets its own output files.
+  - Each output file gets the modification time of the newest capture it
+    draws from, so O(my0373.diode.diode_replay#module:newer_than) keeps
+    working across a compaction.
+  - Nothing is written when there is nothing to gain, that is when no
+    entity was superseded and the captures would not fit in fewer files.
+  - In check mode the captures are read and the result is reported, but
+    nothing is written or removed.
+options:
+  src_dir:
+    description:
+      - Directory containing the dry-run captures to compact.
+    type: path
+    required: true
+  pattern:
+    description:
+      - Shell-style glob matched against file names in O(src_dir).
+    type: str
+    default: "*.json"
+  dest_dir:
+    description:
+      - Directory to write the compacted captures to; created if missing.
+      - May be O(src_dir) itself, together with O(remove_sources).
+    type: path
+    required: true
+  app_name:
+    description:
+      - File name prefix of the compacted captures.
+    type: str
+    default: compacted
+  max_file_mb:
+    description:
+      - Maximum size in megabytes of the entities in one compacted file.
+      - M(my0373.diode.diode_replay) loads a whole file at a time, so this
+        bounds its memory use.
+    type: float
+    default: 32.0
+  remove_sources:
+    description:
+      - Delete the captures that were read once the compacted files are
+        written.
+      - Files that could not be read are never deleted.
+    type: bool
+    default: false
+author:
+  - Matt York (@my0373)
+  - NetBox Labs
+"""
+
+EXAMPLES = r"""
+- name: Compact the hourly captures in place
+  my0373.diode.diode_dryrun_compact:
+    src_dir: /var/lib/diode/captures
+    dest_dir: /var/lib/diode/captures
+    remove_sources: true
+
+- name: Compact into a separate directory and replay the result
+  my0373.diode.diode_dryrun_compact:
+    src_dir: /var/lib/diode/captures
+    pattern: "inventory_*.json"
+    dest_dir: /var/lib/diode/compacted
+    app_name: inventory
+  register: compacted
+
+- name: Replay the compacted captures
+  my0373.diode.diode_replay:
+    target: "grpc://diode.example.com:8080/diode"
+    app_name: "ansible-replay"
+    files: "{{ compacted.files_written }}"
+"""
+
+RETURN = r"""
+changed:
+  description: Whether compacted captures were written, or would be in check mode.
+  type: bool
+  returned: always
+  sample: true
+files_read:
+  description: Number of captures read from O(src_dir).
+  type: int
+  returned: always
+  sample: 2160
+files_written:
+  description: Paths of the compacted captures written. Empty in check mode.
+  type: list
+  elements: path
+  returned: always
+  sample: ["/var/lib/diode/compacted/compacted_81723546213.json"]
+file_count:
+  description: Number of compacted captures written, or that would be written in check mode.
+  type: int
+  returned: always
+  sample: 3
+entities_read:
+  description: Number of entities in all captures read.
+  type: int
+  returned: always
+  sample: 1080000
+entities_written:
+  description: Number of distinct entities kept.
+  type: int
+  returned: always
+  sample: 12000
+superseded_count:
+  description: Number of entities dropped because a later capture had a newer version.
+  type: int
+  returned: always
+  sample: 1068000
+bytes_read:
+  description: Total size in bytes of the captures read.
+  type: int
+  returned: always
+  sample: 734003200
+bytes_written:
+  description: Total size in bytes of the compacted captures written.
+  type: int
+  returned: always
+  sample: 8388608
+removed_count:
+  description: Number of source captures deleted by O(remove_sources).
+  type: int
+  returned: always
+  sample: 2160
+errors:
+  description: Captures that could not be read; they are left in place.
+  type: list
+  elements: str
+  returned: always
+  sample: []
+import_profile:
+  description:
+    - Start-up import profile of the module process.
+    - C(startup_seconds) and C(import_seconds) cover the collection's own
+      imports, C(process_seconds) the whole process including the
+      interpreter; C(modules) lists the slowest imports.
+  type: dict
+  returned: when the E(DIODE_PROFILE_IMPORTS) environment variable is set
+  sample: {"startup_seconds": 0.14, "process_seconds": 0.31, "import_seconds": 0.13,
+           "module_count": 180, "grpc_imported": false, "modules": []}
+"""
+
+import os
+
+# Imported first so that DIODE_PROFILE_IMPORTS times every import after it.
+from ansible_collections.my0373.diode.plugins.module_utils.import_profile import (
+    attach_import_profile,
+)
+from ansible.module_utils.basic import AnsibleModule
+
+from ansible_collections.my0373.diode.plugins.module_utils.client import (
+    HAS_DIODE_SDK,
+    SDK_IMPORT_ERROR,
+)
+from ansible_collections.my0373.diode.plugins.module_utils.compact import (
+    CaptureCompactor,
+)
+from ansible_collections.my0373.diode.plugins.module_utils.dryrun import (
+    discover_dryrun_files,
+)
+
+
+def main():
+    """Main entry point for module execution."""
+    module = AnsibleModule(
+        argument_spec=dict(
+            src_dir=dict(type="path", required=True),
+            pattern=dict(type="str", default="*.json"),
+            dest_dir=dict(type="path", required=True),
+            app_name=dict(type="str", default="compacted"),
+            max_file_mb=dict(type="float", default=32.0),
+            remove_sources=dict(type="bool", default=False),
+        ),
+        supports_check_mode=True,
+    )
+    attach_import_profile(module)
+
+    if not HAS_DIODE_SDK:
+        module.fail_json(msg=SDK_IMPORT_ERROR)
+
+    params = module.params
+    src_dir = params["src_dir"]
+    if not os.path.isdir(src_dir):
+        module.fail_json(msg="Directory not found: {0}".format(src_dir))
+    if params["max_file_mb"] <= 0:
+        module.fail_json(msg="max_file_mb must be greater than 0")
+    same_dir = os.path.realpath(src_dir) == os.path.realpath(params["dest_dir"])
+    if same_dir and not params["remove_sources"]:
+        module.warn(
+            "dest_dir is src_dir and remove_sources is false; replaying src_dir "
+            "will send both the captures and their compacted copies"
+        )
+
+    compactor = CaptureCompactor(max_file_mb=params["max_file_mb"])
+    for path, mtime in discover_dryrun_files(src_dir, pattern=params["pattern"] or "*.json"):
+        compactor.add(path, mtime)
+
+    file_count = sum(1 for _layout in compactor.layout())
+    result = dict(
+        files_read=len(compactor.sources),
+        files_written=[],
+        file_count=file_count,
+        entities_read=compactor.entities_read,
+        entities_written=compactor.entity_count,
+        superseded_count=compactor.superseded_count,
+        bytes_read=compactor.bytes_read,
+        bytes_written=0,
+        removed_count=0,
+        errors=compactor.errors,
+    )
+
+    if not compactor.superseded_count and file_count >= len(compactor.sources):
+        result["file_count"] = 0
+        result["entities_written"] = 0
+        module.exit_json(changed=False, msg="Nothing to compact", **result)
+    if module.check_mode:
+        module.exit_json(changed=True, **result)
+
+    try:
+        result["files_written"], result["bytes_written"] = compactor.write(
+            params["dest_dir"], params["app_name"]
+        )
+    except Exception as exc:
+        module.fail_json(msg="Failed to write compacted captures: {0}".format(str(exc)), **result)
+
+    if params["remove_sources"]:
+        for path in compactor.sources:
+            try:
+                os.unlink(path)
+            except OSError as exc:
+                result["errors"].append("Failed to remove {0}: {1}".format(path, str(exc)))
+                continue
+            result["removed_count"] += 1
+
+    module.exit_json(changed=True, **result)
+
+
+if __name__ == "__main__":
+    main()
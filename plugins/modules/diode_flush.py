@@ -0,0 +1,345 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Ansible module for sending entities queued in a local outbox to Diode."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+---
+module: diode_flush
+short_description: Send entities queued in a local outbox to Diode
+version_added: "1.11.0"
+description:
+  - Deliver the segments written by M(my0373.diode.diode_ingest) with
+    O(my0373.diode.diode_ingest#module:outbox_dir), oldest first.
+  - Each segment is deleted once all of its chunks are acknowledged. A
+    chunk whose send raises is retried with exponential back-off; if it
+    still fails, the segment is rewritten with only its undelivered
+    chunks and the task fails, so the next flush resumes where this one
+    stopped.
+  - Only one flush can run per outbox at a time; it can be scheduled
+    independently of the playbooks that queue data, for example from cron.
+extends_documentation_fragment:
+  - my0373.diode.common.DIODE_CONNECTION
+  - my0373.diode.common.CHECK_MODE
+notes:
+  - Delivery is at-least-once. A chunk retried after a partial send may be
+    ingested twice; Diode reconciles duplicates on the server side.
+  - No connection is made when the outbox is empty.
+  - In check mode the queued segments are read and sized but nothing is
+    sent or deleted.
+options:
+  outbox_dir:
+    description:
+      - Outbox directory to drain.
+    type: path
+    required: true
+  chunk_size_mb:
+    description:
+      - Maximum size in megabytes for each gRPC message chunk.
+    type: float
+    default: 3.0
+  retries:
+    description:
+      - Number of times to retry a chunk whose send raises before failing.
+    type: int
+    default: 3
+  retry_delay:
+    description:
+      - Seconds to wait before the first retry; doubled on each further
+        retry.
+    type: float
+    default: 1.0
+  max_segments:
+    description:
+      - Send at most this many segments, oldest first.
+    type: int
+author:
+  - Matt York (@my0373)
+  - NetBox Labs
+"""
+
+EXAMPLES = r"""
+- name: Drain the outbox
+  my0373.diode.diode_flush:
+    target: "grpc://diode.example.com:8080/diode"
+    app_name: "ansible-outbox"
+    outbox_dir: /var/spool/diode
+    retries: 5
+  register: flush
+
+- name: Show what is still queued
+  ansible.builtin.debug:
+    msg: "{{ flush.pending_segments }} segments still queued"
+"""
+
+RETURN = r"""
+changed:
+  description: Whether any segment was delivered.
+  type: bool
+  returned: always
+  sample: true
+segments_flushed:
+  description: Number of segments delivered and deleted.
+  type: int
+  returned: always
+  sample: 3
+pending_segments:
+  description: Number of segments left in the outbox afterwards.
+  type: int
+  returned: always
+  sample: 0
+total_ingested:
+  description: Total number of entities sent.
+  type: int
+  returned: always
+  sample: 15000
+chunk_count:
+  description: Number of gRPC message chunks sent, or that would be sent in check mode.
+  type: int
+  returned: always
+  sample: 5
+total_bytes:
+  description: Serialized size in bytes of all entities sent.
+  type: int
+  returned: always
+  sample: 1048576
+send_seconds:
+  description: Total time spent in C(Ingest) RPCs, excluding waits.
+  type: float
+  returned: always
+  sample: 3.2
+entity_type_counts:
+  description: Number of entities sent per entity type.
+  type: dict
+  returned: always
+  sample: {"device": 40, "site": 2}
+errors:
+  description: Error messages returned by Diode or raised reading segments.
+  type: list
+  elements: str
+  returned: always
+  sample: []
+error_details:
+  description:
+    - One entry per error returned by Diode, with the C(segment) and
+      C(chunk_index) that produced it and the half-open C(start_index) /
+      C(end_index) range of entities within that segment chunk.
+  type: list
+  elements: dict
+  returned: always
+retries:
+  description: Number of chunk retries made.
+  type: int
+  returned: always
+  sample: 0
+throttle_wait_seconds:
+  description:
+    - Wall-clock time spent waiting on O(max_entities_per_second),
+      O(max_bytes_per_second) and server back-off hints.
+    - With O(concurrency) above C(1), waits that overlap are counted once.
+  type: float
+  returned: when throttling or O(respect_server_hints) is enabled
+  sample: 12.5
+server_hint_retries:
+  description: Number of chunk retries made because of server back-off.
+  type: int
+  returned: when throttling or O(respect_server_hints) is enabled
+  sample: 0
+import_profile:
+  description:
+    - Start-up import profile of the module process.
+    - C(startup_seconds) and C(import_seconds) cover the collection's own
+      imports, C(process_seconds) the whole process including the
+      interpreter; C(modules) lists the slowest imports.
+  type: dict
+  returned: when the E(DIODE_PROFILE_IMPORTS) environment variable is set
+  sample: {"startup_seconds": 0.14, "process_seconds": 0.31, "import_seconds": 0.13,
+           "module_count": 180, "grpc_imported": false, "modules": []}
+"""
+
+import os
+import time
+
+# Imported first so that DIODE_PROFILE_IMPORTS times every import after it.
+from ansible_collections.my0373.diode.plugins.module_utils.import_profile import (
+    attach_import_profile,
+)
+from ansible.module_utils.basic import AnsibleModule
+
+from ansible_collections.my0373.diode.plugins.module_utils.arg_specs import (
+    diode_check_mode_arg_spec,
+    diode_connection_arg_spec,
+)
+from ansible_collections.my0373.diode.plugins.module_utils.client import (
+    HAS_DIODE_SDK,
+    SDK_IMPORT_ERROR,
+    ChunkIngestError,
+    create_diode_client,
+    ingest_with_chunking,
+    merge_ingest_result,
+    plan_chunks,
+)
+from ansible_collections.my0373.diode.plugins.module_utils.outbox import (
+    HAS_OUTBOX_SDK,
+    OutboxBusyError,
+    list_segments,
+    outbox_lock,
+    read_segment,
+    record_metadata,
+    rewrite_segment,
+)
+from ansible_collections.my0373.diode.plugins.module_utils.throttle import (
+    create_throttle,
+)
+
+
+def _read(path, result):
+    """Read a segment, setting corrupt ones aside so they don't block the queue."""
+    try:
+        return read_segment(path)
+    except Exception as exc:
+        os.rename(path, path + ".corrupt")
+        result["errors"].append(
+            "Failed to read segment {0}: {1} (renamed to {0}.corrupt)".format(path, str(exc))
+        )
+        return None
+
+
+def main():
+    """Main entry point for module execution."""
+    arg_spec = {}
+    arg_spec.update(diode_connection_arg_spec())
+    arg_spec.update(diode_check_mode_arg_spec())
+    arg_spec.update(
+        dict(
+            outbox_dir=dict(type="path", required=True),
+            chunk_size_mb=dict(type="float", default=3.0),
+            retries=dict(type="int", default=3),
+            retry_delay=dict(type="float", default=1.0),
+            max_segments=dict(type="int"),
+        )
+    )
+
+    module = AnsibleModule(
+        argument_spec=arg_spec,
+        supports_check_mode=True,
+    )
+    attach_import_profile(module)
+
+    if not HAS_DIODE_SDK or not HAS_OUTBOX_SDK:
+        module.fail_json(msg=SDK_IMPORT_ERROR)
+
+    params = module.params
+    outbox_dir = params["outbox_dir"]
+    chunk_size_mb = params.get("chunk_size_mb", 3.0)
+    segments = list_segments(outbox_dir)
+    if params.get("max_segments"):
+        segments = segments[:params["max_segments"]]
+
+    result = dict(
+        segments_flushed=0,
+        total_ingested=0,
+        chunk_count=0,
+        total_bytes=0,
+        send_seconds=0.0,
+        entity_type_counts={},
+        errors=[],
+        error_details=[],
+        retries=0,
+    )
+
+    if module.check_mode or not segments:
+        for path in segments:
+            try:
+                records = read_segment(path)
+            except Exception as exc:
+                result["errors"].append(
+                    "Failed to read segment {0}: {1}".format(path, str(exc))
+                )
+                continue
+            for record in records:
+                merge_ingest_result(
+                    result, plan_chunks(list(record.entities), chunk_size_mb=chunk_size_mb)
+                )
+        module.exit_json(
+            changed=bool(segments), pending_segments=len(list_segments(outbox_dir)), **result
+        )
+
+    try:
+        throttle = create_throttle(params)
+    except ValueError as exc:
+        module.fail_json(msg=str(exc), pending_segments=len(list_segments(outbox_dir)), **result)
+    try:
+        client = create_diode_client(params)
+    except Exception as exc:
+        module.fail_json(
+            msg="Failed to create Diode client: {0}".format(str(exc)),
+            pending_segments=len(list_segments(outbox_dir)),
+            **result
+        )
+
+    retries = max(0, params.get("retries") or 0)
+    retry_delay = params.get("retry_delay") or 0.0
+
+    try:
+        with outbox_lock(outbox_dir), client:
+            for path in segments:
+                if not os.path.exists(path):
+                    continue
+                records = _read(path, result)
+                if records is None:
+                    continue
+
+                for index, record in enumerate(records):
+                    attempt = 0
+                    while True:
+                        try:
+                            part = ingest_with_chunking(
+                                client=client,
+                                entities=list(record.entities),
+                                stream=record.stream or None,
+                                metadata=record_metadata(record),
+                                chunk_size_mb=chunk_size_mb,
+                                concurrency=params.get("concurrency") or 1,
+                                throttle=throttle,
+                            )
+                            break
+                        except Exception as exc:
+                            if attempt < retries:
+                                time.sleep(retry_delay * (2 ** attempt))
+                                attempt += 1
+                                result["retries"] += 1
+                                continue
+                            if isinstance(exc, ChunkIngestError):
+                                merge_ingest_result(result, exc.result, segment=path)
+                            rewrite_segment(path, records[index:])
+                            module.fail_json(
+                                msg="Flush failed: {0}: {1}".format(path, str(exc)),
+                                pending_segments=len(list_segments(outbox_dir)),
+                                **result
+                            )
+                    merge_ingest_result(result, part, segment=path)
+
+                os.unlink(path)
+                result["segments_flushed"] += 1
+    except OutboxBusyError as exc:
+        module.fail_json(msg=str(exc), pending_segments=len(list_segments(outbox_dir)), **result)
+
+    if throttle is not None:
+        result.update(throttle.stats())
+
+    module.exit_json(
+        changed=result["segments_flushed"] > 0,
+        pending_segments=len(list_segments(outbox_dir)),
+        **result
+    )
+
+
+if __name__ == "__main__":
+    main()
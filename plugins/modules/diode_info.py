@@ -19,8 +19,59 @@ description:
     and all supported entity types.
   - Useful for validating that the SDK is installed and discovering available
     entity types for use with M(my0373.diode.diode_ingest).
-  - This module makes no changes and requires no connection parameters.
-options: {}
+  - With O(diagnostics=true) it also measures the execution environment,
+    that is SDK import time in a fresh interpreter, the protobuf backend,
+    the cost of constructing each entity type and serialization throughput. Given
+    O(target), it also times client authentication and channel connect.
+  - This module makes no changes and requires no connection parameters;
+    the connection options are only used to time the connection to
+    O(target).
+options:
+  diagnostics:
+    description:
+      - Run the performance self-diagnostics and return them in
+        RV(diagnostics).
+    type: bool
+    default: false
+    version_added: "1.11.0"
+  diagnostics_sample_size:
+    description:
+      - Number of IP address entities built and serialized to measure
+        throughput.
+    type: int
+    default: 10000
+    version_added: "1.11.0"
+  target:
+    description:
+      - Diode gRPC target to time authentication and connection against,
+        for example C(grpc://localhost:8080/diode).
+      - Only used with O(diagnostics=true).
+    type: str
+    required: false
+    version_added: "1.11.0"
+  app_name:
+    description: Producer application name used for the connection check.
+    type: str
+    required: false
+    default: diode-info
+    version_added: "1.11.0"
+  app_version:
+    version_added: "1.11.0"
+  client_id:
+    version_added: "1.11.0"
+  client_secret:
+    version_added: "1.11.0"
+  cert_file:
+    version_added: "1.11.0"
+  skip_tls_verify:
+    version_added: "1.11.0"
+  connect_timeout:
+    description: Seconds to wait for the gRPC channel to become ready.
+    type: float
+    default: 10.0
+    version_added: "1.11.0"
+extends_documentation_fragment:
+  - my0373.diode.common.DIODE_CONNECTION
 requirements:
   - netboxlabs-diode-sdk >= 1.10.0
 author:
@@ -40,6 +91,19 @@ EXAMPLES = r"""
 - name: Display supported entity types
   ansible.builtin.debug:
     msg: "Supported types: {{ diode_sdk_info.supported_entity_types }}"
+
+- name: Check the execution environment and connection
+  my0373.diode.diode_info:
+    diagnostics: true
+    target: "grpcs://diode.example.com/diode"
+    client_id: "{{ vault_client_id }}"
+    client_secret: "{{ vault_client_secret }}"
+  register: diag
+
+- name: Fail on a slow protobuf runtime
+  ansible.builtin.assert:
+    that: diag.diagnostics.protobuf_backend != "python"
+    fail_msg: "{{ diag.diagnostics.warnings }}"
 """
 
 RETURN = r"""
@@ -67,24 +131,109 @@ entity_type_count:
   type: int
   returned: when SDK is installed
   sample: 73
+diagnostics:
+  description: Execution environment measurements.
+  type: dict
+  returned: when O(diagnostics=true) and the SDK is installed
+  contains:
+    python_version:
+      description: Python version running the module.
+      type: str
+      sample: "3.11.7"
+    protobuf_backend:
+      description: Active protobuf runtime, C(upb), C(cpp) or C(python).
+      type: str
+      sample: upb
+    protobuf_version:
+      description: Installed protobuf version.
+      type: str
+      sample: "5.29.3"
+    sdk_import_seconds:
+      description: Time to import the SDK in a fresh interpreter.
+      type: float
+      sample: 0.19
+    construct_microseconds:
+      description: Time to build one entity of each type.
+      type: dict
+      sample: {"device": 21.4, "site": 9.8}
+    slowest_entity_types:
+      description: The five entity types most expensive to build.
+      type: list
+      elements: str
+    serialization:
+      description:
+        - C(entity_count), C(build_entities_per_second),
+          C(serialize_entities_per_second), C(serialize_mb_per_second) and
+          C(request_bytes) for O(diagnostics_sample_size) IP addresses.
+      type: dict
+      sample:
+        entity_count: 10000
+        build_entities_per_second: 36000
+        serialize_entities_per_second: 1800000
+        serialize_mb_per_second: 98.6
+        request_bytes: 553124
+    connection:
+      description:
+        - C(client_seconds), C(auth_seconds) and C(connect_seconds), or
+          C(error) if the connection check failed.
+      type: dict
+      returned: when O(target) is set
+      sample: {"client_seconds": 0.21, "auth_seconds": 0.08, "connect_seconds": 0.03}
+    warnings:
+      description: Findings that indicate a slow environment.
+      type: list
+      elements: str
+import_profile:
+  description:
+    - Start-up import profile of the module process.
+    - C(startup_seconds) and C(import_seconds) cover the collection's own
+      imports, C(process_seconds) the whole process including the
+      interpreter; C(modules) lists the slowest imports.
+  type: dict
+  returned: when the E(DIODE_PROFILE_IMPORTS) environment variable is set
+  sample: {"startup_seconds": 0.14, "process_seconds": 0.31, "import_seconds": 0.13,
+           "module_count": 180, "grpc_imported": false, "modules": []}
 """
 
+# Imported first so that DIODE_PROFILE_IMPORTS times every import after it.
+from ansible_collections.my0373.diode.plugins.module_utils.import_profile import (
+    attach_import_profile,
+)
 from ansible.module_utils.basic import AnsibleModule
 
+from ansible_collections.my0373.diode.plugins.module_utils.arg_specs import (
+    diode_connection_arg_spec,
+)
 from ansible_collections.my0373.diode.plugins.module_utils.client import (
     HAS_DIODE_SDK,
     get_sdk_version,
 )
+from ansible_collections.my0373.diode.plugins.module_utils.diagnostics import (
+    run_diagnostics,
+)
 from ansible_collections.my0373.diode.plugins.module_utils.entity_builder import (
     SUPPORTED_ENTITY_TYPES,
 )
 
 
+
 def main():
+    arg_spec = diode_connection_arg_spec()
+    arg_spec.update(
+        dict(
+            diagnostics=dict(type="bool", default=False),
+            diagnostics_sample_size=dict(type="int", default=10000),
+            target=dict(type="str"),
+            app_name=dict(type="str", default="diode-info"),
+            connect_timeout=dict(type="float", default=10.0),
+        )
+    )
+
     module = AnsibleModule(
-        argument_spec={},
+        argument_spec=arg_spec,
         supports_check_mode=True,
     )
+    attach_import_profile(module)
 
     result = dict(
         changed=False,
@@ -95,6 +244,11 @@ def main():
         result["sdk_version"] = get_sdk_version()
         result["supported_entity_types"] = SUPPORTED_ENTITY_TYPES
         result["entity_type_count"] = len(SUPPORTED_ENTITY_TYPES)
+        if module.params.get("diagnostics"):
+            result["diagnostics"] = run_diagnostics(
+                module.params,
+                sample_size=module.params.get("diagnostics_sample_size") or 10000,
+            )
     else:
         result["msg"] = (
             "netboxlabs-diode-sdk is not installed. "
@@ -26,6 +26,98 @@ description:
 extends_documentation_fragment:
   - my0373.diode.common.DIODE_CONNECTION
   - my0373.diode.common.ENTITIES
+  - my0373.diode.common.CHECK_MODE
+  - my0373.diode.common.PROFILE
+  - my0373.diode.common.TRACING
+options:
+  target:
+    description:
+      - The Diode gRPC service URL.
+      - "Use C(grpc://) or C(http://) for insecure connections."
+      - "Use C(grpcs://) or C(https://) for TLS-secured connections."
+      - Required unless O(buffer=append).
+    type: str
+    required: false
+  app_name:
+    description:
+      - Application name sent to Diode as the producer identifier.
+      - Required unless O(buffer=append).
+    type: str
+    required: false
+  buffer:
+    description:
+      - Buffer entities across hosts instead of sending them per task.
+      - V(append) adds this task's O(entities) to a controller-side spool
+        and sends nothing. Connection options, including O(target) and
+        O(app_name), are not needed. In check mode nothing is appended.
+      - V(flush) sends every buffered entity, plus any given in
+        O(entities), in one module run and then empties the spool. Run it
+        once, for example with C(run_once) or from a handler notified by
+        the appending tasks so it runs at the end of the play.
+      - The spool is kept if the flush fails, and in check mode. After a
+        successful flush the default O(buffer_dir) is removed.
+    type: str
+    choices: [append, flush]
+    version_added: "1.11.0"
+  buffer_dir:
+    description:
+      - Directory holding the spool.
+      - Defaults to a temporary directory scoped to the current
+        C(ansible-playbook) run. It is created with mode C(0700), and the
+        task fails if it already exists but is owned by another user or
+        open to group or others.
+    type: path
+    version_added: "1.11.0"
+  outbox_dir:
+    description:
+      - Build and chunk the entities, write them to a new segment file in
+        this durable local outbox, and return without contacting Diode.
+      - Queued segments are sent later by M(my0373.diode.diode_flush), so
+        the play neither waits on Diode nor fails when it is unreachable.
+      - Connection options are still validated but not used.
+      - Mutually exclusive with O(capture_dir).
+      - Queued entities are never merged into the O(snapshot_dir) snapshot,
+        and a warning is returned when both are set.
+    type: path
+    version_added: "1.11.0"
+  capture_dir:
+    description:
+      - Also write every chunk Diode accepts to this directory as a dry-run
+        capture file, in the same format as M(my0373.diode.diode_dry_run).
+      - The chunks are the exact requests sent, written as they are sent,
+        so the entities are built once for both the ingest and the audit
+        copy. The files can be replayed with M(my0373.diode.diode_replay).
+      - Nothing is written in check mode. Chunks that fail to send are not
+        written.
+    type: path
+    version_added: "1.11.0"
+  snapshot_dir:
+    description:
+      - Directory holding a snapshot of the entities last sent to each
+        O(target), sorted by entity type and natural key.
+      - After a send that Diode accepts without errors, the sent entities
+        are merged into the snapshot. Entities from other tasks are kept,
+        so the snapshot reflects everything sent to the target.
+      - With C(--diff), the entities are compared with the snapshot and
+        the result reports which are added, changed or unchanged. In check
+        mode this shows what a sync would change without sending it, and
+        C(changed) is only true if something would.
+      - Entities queued with O(outbox_dir) are not merged into the snapshot,
+        neither when they are queued nor when M(my0373.diode.diode_flush)
+        sends them.
+    type: path
+    version_added: "1.11.0"
+notes:
+  - In check mode the entities are built and chunked exactly as for a real
+    run, so C(chunk_count), C(total_bytes) and C(entity_type_counts) reflect
+    what would be sent. Nothing is sent to Diode.
+  - The natural key of an entity is its type plus the leading fields of
+    its type up to its naming field, for example C(device), C(module) and
+    C(name) for an interface. Types without a naming field are keyed by
+    their whole C(data), so an edit shows as an added entity.
+  - O(buffer) is handled on the controller by the action plugin. Buffered
+    tasks must finish before the flush task reads the spool, so use the
+    default C(linear) strategy.
 author:
   - Matt York (@my0373)
   - NetBox Labs
@@ -86,6 +178,76 @@ EXAMPLES = r"""
         data: "NYC-DC1"
       - type: manufacturer
         data: "Cisco"
+
+- name: Greenfield import, parents first
+  my0373.diode.diode_ingest:
+    target: "grpc://diode.example.com:8080/diode"
+    app_name: "ansible-netbox"
+    dependency_order: true
+    concurrency: 4
+    entities: "{{ sites + device_types + devices + interfaces + ip_addresses }}"
+
+- name: Send each region to its own stream in one task
+  my0373.diode.diode_ingest:
+    target: "grpc://diode.example.com:8080/diode"
+    app_name: "ansible-netbox"
+    concurrency: 4
+    entities:
+      - type: site
+        data: "LON-DC1"
+        stream: emea
+      - type: site
+        data: "SIN-DC1"
+        stream: apac
+        metadata:
+          source: "apac-cmdb"
+
+- name: Queue entities locally and return immediately
+  my0373.diode.diode_ingest:
+    target: "grpc://diode.example.com:8080/diode"
+    app_name: "ansible-netbox"
+    outbox_dir: /var/spool/diode
+    entities: "{{ cmdb_entities }}"
+
+- name: Ingest and keep an audit copy of exactly what was sent
+  my0373.diode.diode_ingest:
+    target: "grpc://diode.example.com:8080/diode"
+    app_name: "ansible-netbox"
+    capture_dir: /var/lib/diode/audit
+    entities: "{{ cmdb_entities }}"
+
+# Run with --check --diff to see what would change since the last sync.
+- name: Sync and keep a snapshot of what was sent
+  my0373.diode.diode_ingest:
+    target: "grpc://diode.example.com:8080/diode"
+    app_name: "ansible-netbox"
+    snapshot_dir: /var/lib/diode/snapshots
+    entities: "{{ cmdb_entities }}"
+
+- name: Buffer each host's interfaces and send them all at once
+  my0373.diode.diode_ingest:
+    buffer: append
+    entities: "{{ host_interfaces }}"
+  delegate_to: localhost
+  notify: Flush Diode buffer
+
+# handlers:
+- name: Flush Diode buffer
+  my0373.diode.diode_ingest:
+    target: "grpc://diode.example.com:8080/diode"
+    app_name: "ansible-netbox"
+    buffer: flush
+    entities: []
+  delegate_to: localhost
+  run_once: true
+
+- name: Trace the task to an OpenTelemetry collector
+  my0373.diode.diode_ingest:
+    target: "grpc://diode.example.com:8080/diode"
+    app_name: "ansible-netbox"
+    trace_endpoint: "http://otel-collector:4318"
+    entities: "{{ entities }}"
+  register: result
 """
 
 RETURN = r"""
@@ -110,17 +272,232 @@ errors:
   elements: str
   returned: always
   sample: []
+total_bytes:
+  description: Serialized size in bytes of all entities that would be sent.
+  type: int
+  returned: check mode
+  sample: 1048576
+chunk_bytes:
+  description: Serialized size in bytes of each chunk sent, in send order.
+  type: list
+  elements: int
+  returned: success
+  sample: [1048576]
+chunk_seconds:
+  description:
+    - Latency in seconds of the C(Ingest) RPC for each chunk sent, in send
+      order, excluding throttling waits.
+  type: list
+  elements: float
+  returned: success, except in check mode
+  sample: [0.42]
+entity_type_counts:
+  description: Number of entities sent per entity type.
+  type: dict
+  returned: success
+  sample: {"device": 3, "site": 1}
+error_details:
+  description:
+    - One entry per error returned by Diode, attributed to the chunk that
+      produced it.
+    - C(start_index) and C(end_index) give the half-open range of indices
+      in O(entities) covered by that chunk, so only that slice needs to be
+      re-sent.
+    - When the chunk's entities are not contiguous in O(entities), because
+      rejected entities were skipped with O(on_error=skip) or entities were
+      regrouped by stream or O(dependency_order), C(input_indices) lists
+      exactly the indices in O(entities) it held instead of the range.
+    - When entities are fanned out to several streams, each entry also
+      names the C(stream) of its chunk.
+  type: list
+  elements: dict
+  returned: success
+  sample:
+    - chunk_index: 1
+      start_index: 5000
+      end_index: 10000
+      message: "invalid device_type"
+throttle_wait_seconds:
+  description:
+    - Wall-clock time spent waiting on O(max_entities_per_second),
+      O(max_bytes_per_second) and server back-off hints.
+    - With O(concurrency) above C(1), waits that overlap are counted once.
+  type: float
+  returned: when throttling or O(respect_server_hints) is enabled
+  sample: 12.5
+server_hint_retries:
+  description: Number of chunk retries made because of server back-off.
+  type: int
+  returned: when throttling or O(respect_server_hints) is enabled
+  sample: 0
+failed_chunk:
+  description:
+    - Position and input index range of the first chunk whose send raised
+      an exception, or its C(input_indices) when its entities are not
+      contiguous in O(entities) (see RV(error_details)). Chunks before it
+      were sent successfully; with O(concurrency) above C(1) later chunks
+      may have been sent too and are counted in RV(ingested_count).
+  type: dict
+  returned: failure while sending a chunk
+  sample: {"chunk_index": 2, "start_index": 10000, "end_index": 15000}
+failed_chunks:
+  description:
+    - Every chunk whose send raised an exception, in chunk order, each
+      with its C(chunk_index), input index range or C(input_indices) as in
+      RV(failed_chunk), and the exception C(message).
+    - With O(concurrency) above C(1) every chunk is attempted, so more than
+      one can fail and each must be re-sent; sequential sending stops at
+      the first failure, so this then holds RV(failed_chunk) only.
+  type: list
+  elements: dict
+  returned: failure while sending a chunk
+  sample: [{"chunk_index": 2, "start_index": 10000, "end_index": 15000, "message": "Deadline Exceeded"}]
+tiers:
+  description:
+    - The C(entity_types), C(ingested_count) and send C(seconds) of each
+      dependency tier, in send order.
+  type: list
+  elements: dict
+  returned: when O(dependency_order=true) and entities span several tiers
+  sample:
+    - entity_types: ["site"]
+      ingested_count: 2
+      seconds: 0.04
+    - entity_types: ["device"]
+      ingested_count: 40
+      seconds: 0.31
+tier_count:
+  description: Number of dependency tiers that would be sent.
+  type: int
+  returned: check mode with O(dependency_order=true) and several tiers
+  sample: 3
+stream_counts:
+  description: Number of entities sent per stream.
+  type: dict
+  returned: when entities are fanned out to several streams
+  sample: {"emea": 4000, "apac": 2500}
+rejected:
+  description:
+    - One entry per entity that was not built, with its C(index) in
+      O(entities), its C(type) and a C(message) listing every problem.
+  type: list
+  elements: dict
+  returned: when entities are invalid or fail to build
+  sample:
+    - index: 3
+      type: device
+      message: "unknown field 'devcie_type' for device (did you mean 'device_type'?)"
+rejected_count:
+  description: Number of entities skipped.
+  type: int
+  returned: when O(on_error=skip) and entities were rejected
+  sample: 1
+queued_count:
+  description: Number of entities written to the outbox.
+  type: int
+  returned: when O(outbox_dir) is set
+  sample: 5000
+segment:
+  description: Path of the outbox segment written.
+  type: str
+  returned: when O(outbox_dir) is set
+  sample: /var/spool/diode/00001760000000000000-4242-1a2b3c4d.seg
+entity_diff:
+  description:
+    - Counts of entities that are new, different from or the same as in
+      the last-sent snapshot.
+  type: dict
+  returned: when run with C(--diff) and O(snapshot_dir) is set
+  sample: {"added": 12, "changed": 3, "unchanged": 4985}
+diff:
+  description:
+    - Before and after text of the added and changed entities, one
+      C(<key> <data>) line each, limited to the first 100.
+  type: dict
+  returned: when run with C(--diff) and O(snapshot_dir) is set
+capture_files:
+  description:
+    - Dry-run capture files written, one per chunk sent, in send order.
+  type: list
+  elements: str
+  returned: when O(capture_dir) is set
+  sample: ["/var/lib/diode/audit/ansible-netbox_81234567890123.json"]
+buffered_count:
+  description: Number of entities appended to the spool by this task.
+  type: int
+  returned: when O(buffer=append)
+  sample: 12
+buffer_dir:
+  description: Spool directory used.
+  type: str
+  returned: when O(buffer) is set
+  sample: /tmp/diode-spool-1000-4242
+flushed_hosts:
+  description: Number of per-host spool files sent by the flush.
+  type: int
+  returned: when O(buffer=flush)
+  sample: 250
+estimated_send_seconds:
+  description:
+    - Estimated time to send all chunks at O(estimate_mb_per_second).
+  type: float
+  returned: check mode
+  sample: 1.0
+trace_id:
+  description:
+    - ID of the trace recorded for the run, to look the task up in the
+      tracing backend.
+  type: str
+  returned: when O(trace_file) or O(trace_endpoint) is set
+  sample: "4bf92f3577b34da6a3ce929d0e0e4736"
+cpu_profile:
+  description:
+    - CPU profile of the module run.
+    - C(path) is the C(.pstats) file written, C(total_seconds) the
+      profiled time and C(functions) the functions with the most
+      cumulative time.
+  type: dict
+  returned: when O(profile_dir) is set
+  sample: {"path": "/tmp/diode-profiles/diode_ingest-20260101T120000-4242.pstats",
+           "total_seconds": 2.41, "functions": []}
+import_profile:
+  description:
+    - Start-up import profile of the module process.
+    - C(startup_seconds) and C(import_seconds) cover the collection's own
+      imports, C(process_seconds) the whole process including the
+      interpreter; C(modules) lists the slowest imports.
+  type: dict
+  returned: when the E(DIODE_PROFILE_IMPORTS) environment variable is set
+  sample: {"startup_seconds": 0.14, "process_seconds": 0.31, "import_seconds": 0.13,
+           "module_count": 180, "grpc_imported": false, "modules": []}
 """
 
+# Imported first so that DIODE_PROFILE_IMPORTS times every import after it.
+from ansible_collections.my0373.diode.plugins.module_utils.import_profile import (
+    attach_import_profile,
+)
 from ansible.module_utils.basic import AnsibleModule
 
 from ansible_collections.my0373.diode.plugins.module_utils.arg_specs import (
+    diode_buffer_arg_spec,
+    diode_capture_arg_spec,
+    diode_check_mode_arg_spec,
     diode_connection_arg_spec,
     diode_entities_arg_spec,
+    diode_outbox_arg_spec,
+    diode_profile_arg_spec,
+    diode_snapshot_arg_spec,
+    diode_tracing_arg_spec,
+)
+from ansible_collections.my0373.diode.plugins.module_utils.cpu_profile import (
+    attach_cpu_profile,
 )
 from ansible_collections.my0373.diode.plugins.module_utils.diode_module import (
     DiodeModule,
 )
+from ansible_collections.my0373.diode.plugins.module_utils.tracing import (
+    attach_tracer,
+)
 
 
 def main():
@@ -128,13 +505,31 @@ def main():
     arg_spec = {}
     arg_spec.update(diode_connection_arg_spec())
     arg_spec.update(diode_entities_arg_spec())
+    arg_spec.update(diode_check_mode_arg_spec())
+    arg_spec.update(diode_buffer_arg_spec())
+    arg_spec.update(diode_outbox_arg_spec())
+    arg_spec.update(diode_capture_arg_spec())
+    arg_spec.update(diode_snapshot_arg_spec())
+    arg_spec.update(diode_profile_arg_spec())
+    arg_spec.update(diode_tracing_arg_spec())
+    # Appending to the buffer never connects, so these are checked below.
+    for name in ("target", "app_name"):
+        arg_spec[name] = dict(arg_spec[name], required=False)
 
     module = AnsibleModule(
         argument_spec=arg_spec,
+        mutually_exclusive=[("outbox_dir", "capture_dir")],
         supports_check_mode=True,
     )
+    attach_import_profile(module)
+    attach_cpu_profile(module, "diode_ingest")
+    tracer = attach_tracer(module, "diode_ingest")
+
+    missing = [name for name in ("target", "app_name") if not module.params.get(name)]
+    if missing and module.params.get("buffer") != "append":
+        module.fail_json(msg="missing required arguments: {0}".format(", ".join(missing)))
 
-    diode = DiodeModule(module, "ingest")
+    diode = DiodeModule(module, "ingest", tracer=tracer)
     diode.run()
 
 
@@ -22,20 +22,86 @@ description:
     written to JSON for inspection and then replayed when approved.
 extends_documentation_fragment:
   - my0373.diode.common.DIODE_CONNECTION
+  - my0373.diode.common.CHECK_MODE
+  - my0373.diode.common.PROFILE
+  - my0373.diode.common.TRACING
+notes:
+  - In check mode every file is loaded and chunked exactly as for a real
+    run, so C(total_ingested), C(chunk_count) and C(total_bytes) reflect
+    what would be sent. Nothing is sent to Diode.
+  - O(include_types), O(exclude_types) and O(match) are applied to the
+    JSON of each file as it is read; entities they reject are never built
+    into protobuf messages, so a partial replay takes time in proportion
+    to what it sends rather than to the size of the captures.
 options:
   files:
     description:
       - List of paths to dry-run JSON files to replay.
       - Each file must have been generated by M(my0373.diode.diode_dry_run)
         or the C(DiodeDryRunClient).
+      - Mutually exclusive with O(src_dir); one of the two is required.
     type: list
     elements: path
-    required: true
+  src_dir:
+    description:
+      - Directory to scan for dry-run JSON files instead of listing them in
+        O(files).
+      - Matching files are replayed oldest first, ordered by modification
+        time, and are fed to the ingest loop one at a time.
+    type: path
+    version_added: "1.11.0"
+  pattern:
+    description:
+      - Shell-style glob matched against file names in O(src_dir).
+    type: str
+    default: "*.json"
+    version_added: "1.11.0"
+  newer_than:
+    description:
+      - Only replay files in O(src_dir) modified after this epoch timestamp.
+      - Pass the RV(newest_mtime) of a previous run to replay incrementally.
+    type: float
+    version_added: "1.11.0"
+  newer_than_file:
+    description:
+      - Name of the last file replayed at O(newer_than), so that files
+        modified in the same timestamp tick but sorting after it are still
+        replayed.
+      - Pass the RV(newest_file) of a previous run together with
+        RV(newest_mtime).
+      - Without it, files modified at exactly O(newer_than) are skipped.
+    type: str
+    version_added: "1.11.0"
   chunk_size_mb:
     description:
       - Maximum size in megabytes for each gRPC message chunk.
     type: float
     default: 3.0
+  include_types:
+    description:
+      - Only replay entities of these types, for example C(ip_address).
+      - All types are replayed when empty.
+    type: list
+    elements: str
+    version_added: "1.11.0"
+  exclude_types:
+    description:
+      - Never replay entities of these types.
+    type: list
+    elements: str
+    version_added: "1.11.0"
+  match:
+    description:
+      - Only replay entities whose fields have the given values.
+      - Keys are dotted field paths within the entity, such as C(status) or
+        C(site.name); values are a value or a list of accepted values.
+        Every key must match.
+      - Lists along a path are searched element by element, so
+        C(tags.name) matches an entity with any tag of that name.
+      - Values are compared as strings, so an C(asn) of C(65001) matches
+        the C("65001") that captures hold for 64-bit integers.
+    type: dict
+    version_added: "1.11.0"
 author:
   - Matt York (@my0373)
   - NetBox Labs
@@ -49,6 +115,38 @@ EXAMPLES = r"""
     app_version: "1.0.0"
     files:
       - "/tmp/diode-dryrun/my_import_1706123456789.json"
+
+- name: Replay every capture in a directory
+  my0373.diode.diode_replay:
+    target: "grpc://diode.example.com:8080/diode"
+    app_name: "ansible-replay"
+    src_dir: "/tmp/diode-dryrun"
+    pattern: "my_import_*.json"
+  register: replay
+
+- name: Replay only captures written since the previous run
+  my0373.diode.diode_replay:
+    target: "grpc://diode.example.com:8080/diode"
+    app_name: "ansible-replay"
+    src_dir: "/tmp/diode-dryrun"
+    newer_than: "{{ replay.newest_mtime }}"
+    newer_than_file: "{{ replay.newest_file }}"
+
+- name: Re-send only the IP addresses and prefixes of one VRF
+  my0373.diode.diode_replay:
+    target: "grpc://diode.example.com:8080/diode"
+    app_name: "ansible-replay"
+    src_dir: "/tmp/diode-dryrun"
+    include_types: [ip_address, prefix]
+    match:
+      vrf.name: blue
+
+- name: Replay with a span per file and per chunk written to a trace file
+  my0373.diode.diode_replay:
+    target: "grpc://diode.example.com:8080/diode"
+    app_name: "ansible-replay"
+    src_dir: "/tmp/diode-dryrun"
+    trace_file: "/var/log/diode/traces.jsonl"
 """
 
 RETURN = r"""
@@ -73,100 +171,356 @@ errors:
   elements: str
   returned: always
   sample: []
+chunk_count:
+  description: Number of gRPC message chunks sent, or that would be sent in check mode.
+  type: int
+  returned: success
+  sample: 4
+total_bytes:
+  description: Serialized size in bytes of all entities sent.
+  type: int
+  returned: success
+  sample: 1048576
+send_seconds:
+  description:
+    - Total time spent in C(Ingest) RPCs across all chunks, excluding
+      throttling waits. Always C(0) in check mode.
+  type: float
+  returned: success
+  sample: 3.2
+skipped_count:
+  description:
+    - Number of entities left out by O(include_types), O(exclude_types)
+      and O(match).
+  type: int
+  returned: when O(include_types), O(exclude_types) or O(match) is set
+  sample: 10400
+entity_type_counts:
+  description: Number of entities per entity type across all files.
+  type: dict
+  returned: success
+  sample: {"device": 40, "site": 2}
+error_details:
+  description:
+    - One entry per error returned by Diode, with the C(file) and
+      C(chunk_index) that produced it and the half-open C(start_index) /
+      C(end_index) range of entities within that file.
+  type: list
+  elements: dict
+  returned: success
+  sample:
+    - file: "/tmp/diode-dryrun/my_import_1706123456789.json"
+      chunk_index: 0
+      start_index: 0
+      end_index: 42
+      message: "invalid device_type"
+throttle_wait_seconds:
+  description:
+    - Wall-clock time spent waiting on O(max_entities_per_second),
+      O(max_bytes_per_second) and server back-off hints.
+    - With O(concurrency) above C(1), waits that overlap are counted once.
+  type: float
+  returned: when throttling or O(respect_server_hints) is enabled
+  sample: 12.5
+server_hint_retries:
+  description: Number of chunk retries made because of server back-off.
+  type: int
+  returned: when throttling or O(respect_server_hints) is enabled
+  sample: 0
+failed_chunk:
+  description:
+    - File, chunk position and entity index range of the first chunk whose
+      send raised an exception.
+  type: dict
+  returned: failure while sending a chunk
+failed_chunks:
+  description:
+    - Every chunk of that file whose send raised an exception, in chunk
+      order, each with its C(file), C(chunk_index), C(start_index),
+      C(end_index) and exception C(message).
+    - With O(concurrency) above C(1) every chunk is attempted, so more than
+      one can fail; otherwise this holds RV(failed_chunk) only.
+  type: list
+  elements: dict
+  returned: failure while sending a chunk
+estimated_send_seconds:
+  description:
+    - Estimated time to send all chunks at O(estimate_mb_per_second).
+  type: float
+  returned: check mode
+  sample: 1.0
+newest_mtime:
+  description:
+    - Modification time of the newest file processed from O(src_dir).
+    - Equals O(newer_than) when no new files were found, or C(0.0) when
+      O(newer_than) was not set either, so it can always be passed back.
+    - Stops at the last file processed before the first file that failed to
+      load, so that file is retried on the next run; files after it are
+      still replayed and may be replayed again.
+  type: float
+  returned: when O(src_dir) is set
+  sample: 1706123456.789
+newest_file:
+  description:
+    - Name of the newest file processed from O(src_dir); with
+      RV(newest_mtime) it forms the watermark for O(newer_than_file).
+    - Equals O(newer_than_file) when no new files were found, or an empty
+      string.
+  type: str
+  returned: when O(src_dir) is set
+  sample: my_import_1706123456789.json
+trace_id:
+  description:
+    - ID of the trace recorded for the run, to look the task up in the
+      tracing backend.
+  type: str
+  returned: when O(trace_file) or O(trace_endpoint) is set
+  sample: "4bf92f3577b34da6a3ce929d0e0e4736"
+cpu_profile:
+  description:
+    - CPU profile of the module run.
+    - C(path) is the C(.pstats) file written, C(total_seconds) the
+      profiled time and C(functions) the functions with the most
+      cumulative time.
+  type: dict
+  returned: when O(profile_dir) is set
+  sample: {"path": "/tmp/diode-profiles/diode_ingest-20260101T120000-4242.pstats",
+           "total_seconds": 2.41, "functions": []}
+import_profile:
+  description:
+    - Start-up import profile of the module process.
+    - C(startup_seconds) and C(import_seconds) cover the collection's own
+      imports, C(process_seconds) the whole process including the
+      interpreter; C(modules) lists the slowest imports.
+  type: dict
+  returned: when the E(DIODE_PROFILE_IMPORTS) environment variable is set
+  sample: {"startup_seconds": 0.14, "process_seconds": 0.31, "import_seconds": 0.13,
+           "module_count": 180, "grpc_imported": false, "modules": []}
 """
 
 import os
 
+# Imported first so that DIODE_PROFILE_IMPORTS times every import after it.
+from ansible_collections.my0373.diode.plugins.module_utils.import_profile import (
+    attach_import_profile,
+)
 from ansible.module_utils.basic import AnsibleModule
 
 from ansible_collections.my0373.diode.plugins.module_utils.arg_specs import (
+    diode_check_mode_arg_spec,
     diode_connection_arg_spec,
+    diode_profile_arg_spec,
+    diode_tracing_arg_spec,
 )
 from ansible_collections.my0373.diode.plugins.module_utils.client import (
     HAS_DIODE_SDK,
     SDK_IMPORT_ERROR,
+    ChunkIngestError,
     create_diode_client,
     ingest_with_chunking,
+    merge_ingest_result,
+    plan_chunks,
+)
+from ansible_collections.my0373.diode.plugins.module_utils.cpu_profile import (
+    attach_cpu_profile,
+)
+from ansible_collections.my0373.diode.plugins.module_utils.dryrun import (
+    HAS_LOAD_DRYRUN,
+    EntityFilter,
+    discover_dryrun_files,
+    load_dryrun_entities,
+)
+from ansible_collections.my0373.diode.plugins.module_utils.entity_builder import (
+    SUPPORTED_ENTITY_TYPES,
+)
+from ansible_collections.my0373.diode.plugins.module_utils.throttle import (
+    create_throttle,
 )
+from ansible_collections.my0373.diode.plugins.module_utils.tracing import (
+    attach_tracer,
+    trace_span,
+)
+
 
-try:
-    from netboxlabs.diode.sdk import load_dryrun_entities
+class _NoClient(object):
+    """Stand-in context manager used in check mode, where no client is created."""
 
-    HAS_LOAD_DRYRUN = True
-except ImportError:
-    HAS_LOAD_DRYRUN = False
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        return False
 
 
 def main():
     """Main entry point for module execution."""
     arg_spec = {}
     arg_spec.update(diode_connection_arg_spec())
+    arg_spec.update(diode_check_mode_arg_spec())
+    arg_spec.update(diode_profile_arg_spec())
+    arg_spec.update(diode_tracing_arg_spec())
     arg_spec.update(
         dict(
-            files=dict(type="list", elements="path", required=True),
+            files=dict(type="list", elements="path"),
+            src_dir=dict(type="path"),
+            pattern=dict(type="str", default="*.json"),
+            newer_than=dict(type="float"),
+            newer_than_file=dict(type="str"),
             chunk_size_mb=dict(type="float", default=3.0),
+            include_types=dict(type="list", elements="str"),
+            exclude_types=dict(type="list", elements="str"),
+            match=dict(type="dict"),
         )
     )
 
     module = AnsibleModule(
         argument_spec=arg_spec,
+        mutually_exclusive=[("files", "src_dir")],
+        required_one_of=[("files", "src_dir")],
         supports_check_mode=True,
     )
+    attach_import_profile(module)
+    attach_cpu_profile(module, "diode_replay")
+    tracer = attach_tracer(module, "diode_replay")
 
     if not HAS_DIODE_SDK or not HAS_LOAD_DRYRUN:
         module.fail_json(msg=SDK_IMPORT_ERROR)
 
-    files = module.params["files"]
+    include_types = module.params.get("include_types") or []
+    exclude_types = module.params.get("exclude_types") or []
+    unknown = sorted(set(include_types + exclude_types) - set(SUPPORTED_ENTITY_TYPES))
+    if unknown:
+        module.fail_json(
+            msg="Unknown entity types: {0}. Supported types: {1}".format(
+                ", ".join(unknown), ", ".join(SUPPORTED_ENTITY_TYPES)
+            )
+        )
+    entity_filter = None
+    if include_types or exclude_types or module.params.get("match"):
+        entity_filter = EntityFilter(include_types, exclude_types, module.params.get("match"))
 
-    for filepath in files:
-        if not os.path.isfile(filepath):
-            module.fail_json(msg="File not found: {0}".format(filepath))
+    src_dir = module.params.get("src_dir")
+    newer_than = module.params.get("newer_than")
+    newer_than_file = module.params.get("newer_than_file")
 
-    if module.check_mode:
-        module.exit_json(
-            changed=True,
-            total_ingested=0,
-            files_processed=len(files),
-            errors=[],
+    if src_dir:
+        if not os.path.isdir(src_dir):
+            module.fail_json(msg="Directory not found: {0}".format(src_dir))
+        sources = discover_dryrun_files(
+            src_dir,
+            pattern=module.params.get("pattern") or "*.json",
+            newer_than=newer_than,
+            newer_than_file=newer_than_file,
         )
+    else:
+        files = module.params["files"]
+        for filepath in files:
+            if not os.path.isfile(filepath):
+                module.fail_json(msg="File not found: {0}".format(filepath))
+        sources = ((filepath, None) for filepath in files)
 
-    try:
-        client = create_diode_client(module.params)
-    except Exception as exc:
-        module.fail_json(msg="Failed to create Diode client: {0}".format(str(exc)))
+    client = None
+    throttle = None
+    if not module.check_mode:
+        try:
+            throttle = create_throttle(module.params)
+        except ValueError as exc:
+            module.fail_json(msg=str(exc))
+        with trace_span(tracer, "connect", {"diode.target": module.params.get("target")}):
+            try:
+                client = create_diode_client(module.params)
+            except Exception as exc:
+                module.fail_json(msg="Failed to create Diode client: {0}".format(str(exc)))
 
-    total_ingested = 0
-    files_processed = 0
-    all_errors = []
+    chunk_size_mb = module.params.get("chunk_size_mb", 3.0)
+    result = dict(
+        total_ingested=0,
+        files_processed=0,
+        chunk_count=0,
+        total_bytes=0,
+        send_seconds=0.0,
+        entity_type_counts={},
+        errors=[],
+        error_details=[],
+    )
+    newest_mtime = newer_than if newer_than is not None else 0.0
+    newest_file = newer_than_file or ""
+    # Set once a file fails to load, so the watermark stays before it.
+    watermark_held = False
 
     try:
-        with client:
-            for filepath in files:
-                try:
-                    entities = list(load_dryrun_entities(filepath))
-                except Exception as exc:
-                    all_errors.append(
-                        "Failed to load {0}: {1}".format(filepath, str(exc))
+        with client if client is not None else _NoClient():
+            for filepath, mtime in sources:
+                with trace_span(tracer, "replay_file", {"diode.file": filepath}) as span:
+                    try:
+                        entities = load_dryrun_entities(filepath, entity_filter)
+                    except Exception as exc:
+                        span.record_error(exc)
+                        result["errors"].append(
+                            "Failed to load {0}: {1}".format(filepath, str(exc))
+                        )
+                        watermark_held = True
+                        continue
+
+                    if client is None:
+                        file_result = plan_chunks(entities, chunk_size_mb=chunk_size_mb)
+                    else:
+                        try:
+                            file_result = ingest_with_chunking(
+                                client=client,
+                                entities=entities,
+                                chunk_size_mb=chunk_size_mb,
+                                concurrency=module.params.get("concurrency") or 1,
+                                throttle=throttle,
+                                tracer=tracer,
+                            )
+                        except ChunkIngestError as exc:
+                            merge_ingest_result(result, exc.result, file=filepath)
+                            module.fail_json(
+                                msg="Replay failed: {0}: {1}".format(filepath, str(exc)),
+                                failed_chunk=dict(
+                                    file=filepath,
+                                    chunk_index=exc.chunk_index,
+                                    start_index=exc.start_index,
+                                    end_index=exc.end_index,
+                                ),
+                                failed_chunks=[
+                                    dict(failure, file=filepath) for failure in exc.failures
+                                ],
+                                **result
+                            )
+                    span.set_attribute("diode.entity_count", file_result["ingested_count"])
+                    span.set_attribute("diode.chunk_count", file_result.get("chunk_count", 0))
+                    span.set_attribute(
+                        "diode.total_bytes",
+                        file_result.get("total_bytes", sum(file_result.get("chunk_bytes", []))),
                     )
-                    continue
-
-                result = ingest_with_chunking(
-                    client=client,
-                    entities=entities,
-                    chunk_size_mb=module.params.get("chunk_size_mb", 3.0),
-                )
-                total_ingested += result["ingested_count"]
-                all_errors.extend(result["errors"])
-                files_processed += 1
+
+                merge_ingest_result(result, file_result, file=filepath)
+                result["files_processed"] += 1
+                if mtime is not None and not watermark_held:
+                    newest_mtime = mtime
+                    newest_file = os.path.basename(filepath)
     except Exception as exc:
         module.fail_json(msg="Replay failed: {0}".format(str(exc)))
 
-    module.exit_json(
-        changed=total_ingested > 0,
-        total_ingested=total_ingested,
-        files_processed=files_processed,
-        errors=all_errors,
-    )
+    if src_dir:
+        result["newest_mtime"] = float(newest_mtime)
+        result["newest_file"] = newest_file
+    if entity_filter is not None:
+        result["skipped_count"] = entity_filter.skipped_count
+    if throttle is not None:
+        result.update(throttle.stats())
+
+    if module.check_mode:
+        mb_per_second = module.params.get("estimate_mb_per_second")
+        if mb_per_second and mb_per_second > 0:
+            result["estimated_send_seconds"] = round(
+                result["total_bytes"] / (mb_per_second * 1024 * 1024), 3
+            )
+        module.exit_json(changed=True, **result)
+
+    module.exit_json(changed=result["total_ingested"] > 0, **result)
 
 
 if __name__ == "__main__":
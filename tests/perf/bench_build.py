@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Peak memory of building IP address entities one by one vs into one arena.
+
+``standalone`` builds each ``Entity`` message on its own, so every message
+owns a protobuf arena; ``arena`` adds them to one repeated field, as
+``build_entities`` does, so they share one. Each mode runs in a fresh interpreter and reports its peak RSS, so the
+numbers include protobuf's native allocations. The entity list is decoded
+from JSON, as ``AnsibleModule`` does, so repeated values are separate
+string objects just like in a real task.
+
+Usage::
+
+    PYTHONPATH=/tmp python tests/perf/bench_build.py [--count 1000000]
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+MODES = ("standalone", "arena")
+
+
+def _entity_json(count):
+    return json.dumps([
+        {
+            "type": "ip_address",
+            "data": {
+                "address": "10.{0}.{1}.{2}/32".format(i >> 16 & 255, i >> 8 & 255, i & 255),
+                "status": "active",
+                "role": "loopback",
+                "description": "bench",
+            },
+        }
+        for i in range(count)
+    ])
+
+
+def _rss_mb():
+    # ru_maxrss is KiB on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def run(mode, count):
+    from ansible_collections.my0373.diode.plugins.module_utils.entity_builder import (
+        build_entities,
+        build_entity,
+    )
+
+    build_entities([{"type": "ip_address", "data": {"address": "10.0.0.1/32"}}])
+    baseline = _rss_mb()
+    payload = _entity_json(count)
+    # Held for the whole run, as AnsibleModule holds its params.
+    params = {"entities": json.loads(payload)}
+    del payload
+    input_mb = _rss_mb() - baseline
+
+    started = time.perf_counter()
+    if mode == "arena":
+        entities = build_entities(params["entities"])
+    else:
+        entities = [build_entity(item) for item in params["entities"]]
+    seconds = time.perf_counter() - started
+
+    print(json.dumps({
+        "mode": mode,
+        "count": len(entities),
+        "input_mb": round(input_mb, 1),
+        "peak_mb": round(_rss_mb() - baseline, 1),
+        "build_seconds": round(seconds, 2),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=1000000)
+    parser.add_argument("--mode", choices=MODES)
+    args = parser.parse_args()
+
+    if args.mode:
+        run(args.mode, args.count)
+        return
+
+    print("{0:>10} {1:>10} {2:>10} {3:>10}".format("mode", "input MB", "peak MB", "build s"))
+    for mode in MODES:
+        output = subprocess.check_output(
+            [sys.executable, __file__, "--mode", mode, "--count", str(args.count)]
+        )
+        report = json.loads(output.decode().strip().splitlines()[-1])
+        print("{mode:>10} {input_mb:>10} {peak_mb:>10} {build_seconds:>10}".format(**report))
+
+
+if __name__ == "__main__":
+    main()
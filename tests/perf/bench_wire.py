@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Bytes on the wire vs client CPU time for each gRPC compression setting.
+
+Interface and IP address entities are chunked as ``diode_ingest`` chunks
+them and sent as ``Ingest`` requests to a local gRPC server. The server
+runs in a child process behind a TCP proxy that counts the bytes the
+client sends, so the client's CPU time covers only building requests,
+compressing and sending them. Each setting uses a fresh connection and
+the channel options ``compression`` produces in a real task.
+
+The ``link s`` column adds the client CPU time to the time the counted
+bytes take on a link of ``--link-mbit`` megabits per second, to show
+where compression starts to pay off.
+
+Usage::
+
+    PYTHONPATH=/tmp python tests/perf/bench_wire.py [--count 200000] [--link-mbit 10]
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import argparse
+import json
+import resource
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent import futures
+
+
+def _entity_dicts(count):
+    """Interfaces and their addresses, 50 interfaces per device."""
+    entities = []
+    for i in range(count // 2):
+        device = {
+            "name": "dc1-leaf-{0:04d}".format(i // 50),
+            "site": {"name": "DC1"},
+            "role": {"name": "leaf"},
+            "device_type": {"model": "DCS-7280SR3-48YC8", "manufacturer": {"name": "Arista"}},
+        }
+        name = "Ethernet{0}/1".format(i % 50 + 1)
+        entities.append({"type": "interface", "data": {
+            "device": device,
+            "name": name,
+            "type": "25gbase-x-sfp28",
+            "enabled": True,
+            "mtu": 9214,
+            "description": "server uplink rack {0}".format(i // 50 % 40),
+        }})
+        entities.append({"type": "ip_address", "data": {
+            "address": "10.{0}.{1}.1/31".format(i >> 8 & 255, i & 255),
+            "status": "active",
+            "assigned_object_interface": {"device": device, "name": name},
+        }})
+    return entities
+
+
+class _CountingProxy(object):
+    """TCP proxy counting the bytes sent from client to server."""
+
+    def __init__(self, upstream_port):
+        self.upstream_port = upstream_port
+        self.sent = 0
+        self.lock = threading.Lock()
+        self.listener = socket.socket()
+        self.listener.bind(("127.0.0.1", 0))
+        self.listener.listen(8)
+        self.port = self.listener.getsockname()[1]
+        thread = threading.Thread(target=self._accept)
+        thread.daemon = True
+        thread.start()
+
+    def _accept(self):
+        while True:
+            downstream, _address = self.listener.accept()
+            upstream = socket.create_connection(("127.0.0.1", self.upstream_port))
+            for source, sink, counted in ((downstream, upstream, True), (upstream, downstream, False)):
+                thread = threading.Thread(target=self._pump, args=(source, sink, counted))
+                thread.daemon = True
+                thread.start()
+
+    def _pump(self, source, sink, counted):
+        try:
+            while True:
+                data = source.recv(65536)
+                if not data:
+                    break
+                if counted:
+                    with self.lock:
+                        self.sent += len(data)
+                sink.sendall(data)
+        except OSError:
+            pass
+        finally:
+            for sock in (source, sink):
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+    def take(self):
+        with self.lock:
+            sent, self.sent = self.sent, 0
+        return sent
+
+
+def serve():
+    """Run the server and proxy; answer each stdin line with the bytes counted."""
+    import grpc
+    from netboxlabs.diode.sdk.diode.v1 import ingester_pb2, ingester_pb2_grpc
+
+    class Servicer(ingester_pb2_grpc.IngesterServiceServicer):
+        def Ingest(self, request, context):
+            return ingester_pb2.IngestResponse()
+
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+    ingester_pb2_grpc.add_IngesterServiceServicer_to_server(Servicer(), server)
+    proxy = _CountingProxy(server.add_insecure_port("127.0.0.1:0"))
+    server.start()
+    print(json.dumps({"port": proxy.port}), flush=True)
+    for _line in sys.stdin:
+        # Let the last frames through the proxy before counting.
+        time.sleep(0.2)
+        print(json.dumps({"sent": proxy.take()}), flush=True)
+
+
+def _cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run(args):
+    import grpc
+    from netboxlabs.diode.sdk.diode.v1 import ingester_pb2, ingester_pb2_grpc
+
+    from ansible_collections.my0373.diode.plugins.module_utils.channel import (
+        COMPRESSION_CHOICES,
+        channel_options,
+    )
+    from ansible_collections.my0373.diode.plugins.module_utils.client import chunk_entities
+    from ansible_collections.my0373.diode.plugins.module_utils.entity_builder import (
+        build_entities,
+    )
+
+    chunks = chunk_entities(build_entities(_entity_dicts(args.count)), args.chunk_size_mb)
+    payload = sum(ingester_pb2.IngestRequest(entities=chunk).ByteSize() for chunk in chunks)
+
+    child = subprocess.Popen(
+        [sys.executable, __file__, "--serve"],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, universal_newlines=True,
+    )
+    port = json.loads(child.stdout.readline())["port"]
+
+    def sent_bytes():
+        child.stdin.write("count\n")
+        child.stdin.flush()
+        return json.loads(child.stdout.readline())["sent"]
+
+    print("{0} entities in {1} chunks, {2:.1f} MB of requests, {3} Mbit/s link".format(
+        args.count, len(chunks), payload / 1048576.0, args.link_mbit
+    ))
+    print("{0:>8} {1:>10} {2:>7} {3:>8} {4:>8} {5:>8}".format(
+        "mode", "wire MB", "ratio", "cpu s", "wall s", "link s"
+    ))
+    try:
+        for compression in COMPRESSION_CHOICES:
+            options = channel_options({"compression": compression})
+            channel = grpc.insecure_channel("127.0.0.1:{0}".format(port), options=options)
+            stub = ingester_pb2_grpc.IngesterServiceStub(channel)
+            stub.Ingest(ingester_pb2.IngestRequest())
+            sent_bytes()
+
+            cpu = _cpu_seconds()
+            started = time.perf_counter()
+            for chunk in chunks:
+                stub.Ingest(ingester_pb2.IngestRequest(
+                    stream="latest", id=str(uuid.uuid4()), entities=chunk,
+                    producer_app_name="bench", producer_app_version="1.0.0",
+                ))
+            wall = time.perf_counter() - started
+            cpu = _cpu_seconds() - cpu
+            channel.close()
+            wire = sent_bytes()
+
+            print("{0:>8} {1:>10.2f} {2:>7.2f} {3:>8.2f} {4:>8.2f} {5:>8.2f}".format(
+                compression,
+                wire / 1048576.0,
+                payload / float(wire),
+                cpu,
+                wall,
+                cpu + wire * 8 / (args.link_mbit * 1e6),
+            ))
+    finally:
+        child.stdin.close()
+        child.terminate()
+        child.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=200000)
+    parser.add_argument("--chunk-size-mb", type=float, default=3.0)
+    parser.add_argument("--link-mbit", type=float, default=10.0)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve()
+    else:
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Unit tests for the diode_ingest action plugin."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+from ansible.errors import AnsibleActionFail
+
+from ansible_collections.my0373.diode.plugins.action.diode_ingest import ActionModule
+
+
+def _action(args, check_mode=False):
+    task = MagicMock()
+    task.args = args
+    task.async_val = 0
+    task.check_mode = check_mode
+    action = ActionModule(task, MagicMock(), MagicMock(), MagicMock(), MagicMock(), MagicMock())
+    action._execute_module = MagicMock(
+        return_value={"changed": True, "ingested_count": 0, "chunk_count": 1, "errors": []}
+    )
+    return action
+
+
+class TestDiodeIngestAction:
+    def test_without_buffer_runs_module(self):
+        action = _action({"target": "grpc://x", "entities": [{"type": "site", "data": "a"}]})
+
+        result = action.run(task_vars={})
+
+        assert result["changed"] is True
+        module_args = action._execute_module.call_args[1]["module_args"]
+        assert "buffer" not in module_args
+
+    def test_append_then_flush_sends_once(self, tmp_path):
+        spool = str(tmp_path)
+        for host, name in (("h1", "a"), ("h2", "b")):
+            result = _action({
+                "buffer": "append", "buffer_dir": spool,
+                "entities": [{"type": "site", "data": name}],
+            }).run(task_vars={"inventory_hostname": host})
+            assert result["buffered_count"] == 1
+            assert result["changed"] is False
+
+        flush = _action({
+            "buffer": "flush", "buffer_dir": spool, "target": "grpc://x",
+            "entities": [{"type": "site", "data": "c"}],
+        })
+        result = flush.run(task_vars={})
+
+        flush._execute_module.assert_called_once()
+        module_args = flush._execute_module.call_args[1]["module_args"]
+        assert [e["data"] for e in module_args["entities"]] == ["a", "b", "c"]
+        assert "buffer" not in module_args and "buffer_dir" not in module_args
+        assert result["flushed_hosts"] == 2
+        assert list(tmp_path.iterdir()) == []
+
+    @pytest.mark.parametrize("check_mode,module_result", [
+        (True, {"changed": True}),
+        (False, {"failed": True, "msg": "boom"}),
+    ])
+    def test_spool_kept_after_check_mode_or_failure(self, tmp_path, check_mode, module_result):
+        spool = str(tmp_path)
+        _action({"buffer": "append", "buffer_dir": spool,
+                 "entities": [{"type": "site", "data": "a"}]}).run(task_vars={})
+        flush = _action({"buffer": "flush", "buffer_dir": spool}, check_mode=check_mode)
+        flush._execute_module.return_value = module_result
+
+        flush.run(task_vars={})
+
+        assert len(list(tmp_path.iterdir())) == 1
+
+    def test_flush_with_empty_spool_skips_module(self, tmp_path):
+        flush = _action({"buffer": "flush", "buffer_dir": str(tmp_path)})
+
+        result = flush.run(task_vars={})
+
+        flush._execute_module.assert_not_called()
+        assert result["changed"] is False
+        assert result["ingested_count"] == 0
+
+    def test_append_requires_entity_list(self, tmp_path):
+        with pytest.raises(AnsibleActionFail, match="entities must be a list"):
+            _action({"buffer": "append", "buffer_dir": str(tmp_path)}).run(task_vars={})
+
+    def test_append_in_check_mode_writes_nothing(self, tmp_path):
+        spool = str(tmp_path / "spool")
+        result = _action({
+            "buffer": "append", "buffer_dir": spool,
+            "entities": [{"type": "site", "data": "a"}],
+        }, check_mode=True).run(task_vars={"inventory_hostname": "h1"})
+
+        assert result["buffered_count"] == 1
+        assert not os.path.exists(spool)
+
+    def test_flush_removes_default_spool_dir(self, tmp_path):
+        spool = str(tmp_path / "diode-spool")
+        with patch(
+            "ansible_collections.my0373.diode.plugins.action.diode_ingest.default_spool_dir",
+            return_value=spool,
+        ):
+            _action({"buffer": "append", "entities": [{"type": "site", "data": "a"}]}).run(task_vars={})
+            assert os.path.isdir(spool)
+            _action({"buffer": "flush", "target": "grpc://x"}).run(task_vars={})
+
+        assert not os.path.exists(spool)
+
+    def test_unserializable_entity_fails_with_its_index(self, tmp_path):
+        with pytest.raises(AnsibleActionFail, match="entity 1"):
+            _action({
+                "buffer": "append", "buffer_dir": str(tmp_path),
+                "entities": [{"type": "site", "data": "a"}, {"type": "site", "data": {1, 2}}],
+            }).run(task_vars={"inventory_hostname": "h1"})
+
+    def test_refuses_default_spool_dir_open_to_others(self, tmp_path):
+        spool = tmp_path / "diode-spool"
+        spool.mkdir()
+        os.chmod(str(spool), 0o777)
+        with patch(
+            "ansible_collections.my0373.diode.plugins.action.diode_ingest.default_spool_dir",
+            return_value=str(spool),
+        ):
+            for mode in ("append", "flush"):
+                with pytest.raises(AnsibleActionFail, match="must be 0700"):
+                    _action({
+                        "buffer": mode, "target": "grpc://x",
+                        "entities": [{"type": "site", "data": "a"}],
+                    }).run(task_vars={})
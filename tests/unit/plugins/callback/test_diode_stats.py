@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Unit tests for the diode_stats callback plugin."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import os
+from unittest.mock import MagicMock
+
+import pytest
+
+from ansible_collections.my0373.diode.plugins.callback import diode_stats
+
+
+def _task(action, uuid="t1", name="ingest", check_mode=False):
+    task = MagicMock()
+    task.action = action
+    task._uuid = uuid
+    task.get_name.return_value = name
+    task.check_mode = check_mode
+    return task
+
+
+def _result(task, res, host="h1"):
+    result = MagicMock()
+    result._task = task
+    result._host.get_name.return_value = host
+    result._result = res
+    return result
+
+
+@pytest.fixture
+def callback(tmp_path):
+    display = MagicMock()
+    display.verbosity = 0
+    cb = diode_stats.CallbackModule(display=display)
+    cb._plugin_options = {
+        "json_report": str(tmp_path / "report.json"),
+        "prometheus_textfile": str(tmp_path / "prom" / "diode.prom"),
+        "slowest_tasks": 5,
+    }
+    return cb
+
+
+class TestDiodeModuleName:
+    @pytest.mark.parametrize(
+        "action,expected",
+        [
+            ("my0373.diode.diode_ingest", "diode_ingest"),
+            ("diode_replay", "diode_replay"),
+            ("ansible.builtin.debug", None),
+            ("other.col.diode_ingest", None),
+            (None, None),
+        ],
+    )
+    def test_recognises_diode_actions(self, action, expected):
+        assert diode_stats.diode_module_name(action) == expected
+
+
+class TestDiodeStatsCallback:
+    def test_aggregates_across_hosts_and_tasks(self, callback):
+        ingest = _task("my0373.diode.diode_ingest")
+        replay = _task("my0373.diode.diode_replay", uuid="t2", name="replay")
+        callback.v2_runner_on_ok(_result(ingest, {
+            "ingested_count": 10, "chunk_count": 2, "chunk_bytes": [100, 50],
+            "chunk_seconds": [0.2, 0.4], "errors": [],
+            "entity_type_counts": {"site": 10},
+            "import_profile": {"startup_seconds": 0.1, "process_seconds": 0.3},
+        }))
+        callback.v2_runner_on_ok(_result(ingest, {
+            "ingested_count": 5, "chunk_count": 1, "chunk_bytes": [30],
+            "chunk_seconds": [0.1], "errors": ["bad"],
+            "entity_type_counts": {"site": 2, "device": 3},
+            "trace_id": "4bf92f3577b34da6a3ce929d0e0e4736",
+        }, host="h2"))
+        callback.v2_runner_on_ok(_result(replay, {
+            "total_ingested": 7, "chunk_count": 3, "total_bytes": 70,
+            "send_seconds": 0.9, "errors": [],
+        }))
+        callback.v2_runner_on_ok(_result(_task("ansible.builtin.debug", uuid="t3"), {}))
+
+        report = callback.report()
+
+        ingest_stats = report["modules"]["diode_ingest"]
+        assert ingest_stats["results"] == 2
+        assert ingest_stats["entities"] == 15
+        assert ingest_stats["bytes"] == 180
+        assert ingest_stats["chunks"] == 3
+        assert ingest_stats["errors"] == 1
+        assert ingest_stats["entity_type_counts"] == {"site": 12, "device": 3}
+        assert ingest_stats["chunk_latency_seconds"]["max"] == 0.4
+        assert ingest_stats["chunk_latency_seconds"]["avg"] == pytest.approx(0.2333, abs=1e-4)
+        assert ingest_stats["startup_seconds"] == 0.3
+        assert report["modules"]["diode_replay"]["send_seconds"] == 0.9
+        assert {t["name"] for t in report["tasks"]} == {"ingest", "replay"}
+        assert [t["hosts"] for t in report["tasks"] if t["name"] == "ingest"] == [2]
+        assert [t.get("trace_ids") for t in report["tasks"]] == [
+            ["4bf92f3577b34da6a3ce929d0e0e4736"] if t["name"] == "ingest" else None
+            for t in report["tasks"]
+        ]
+
+    def test_check_mode_and_failures_are_separate(self, callback):
+        task = _task("diode_ingest", check_mode=True)
+        callback.v2_runner_on_ok(_result(task, {"ingested_count": 4, "total_bytes": 40}))
+        callback.v2_runner_on_failed(_result(_task("diode_ingest", uuid="t2"), {
+            "ingested_count": 1, "chunk_count": 1, "chunk_bytes": [10],
+        }))
+
+        modules = callback.report()["modules"]
+        assert modules["diode_ingest (check)"]["entities"] == 4
+        assert modules["diode_ingest"]["failed"] == 1
+
+    def test_looped_results_are_counted_per_item(self, callback):
+        task = _task("diode_dry_run")
+        callback.v2_runner_on_ok(_result(task, {"results": [
+            {"entity_count": 2}, {"entity_count": 3},
+        ]}))
+
+        stats = callback.report()["modules"]["diode_dry_run"]
+        assert stats["results"] == 2
+        assert stats["entities"] == 5
+
+    def test_flush_results_are_counted(self, callback):
+        callback.v2_runner_on_ok(_result(_task("my0373.diode.diode_flush"), {
+            "segments_flushed": 2, "total_ingested": 7, "chunk_count": 2,
+            "total_bytes": 700, "send_seconds": 0.4, "throttle_wait_seconds": 0.1,
+            "entity_type_counts": {"site": 7}, "errors": ["boom"],
+        }))
+
+        stats = callback.report()["modules"]["diode_flush"]
+        assert stats["entities"] == 7
+        assert stats["bytes"] == 700
+        assert stats["chunks"] == 2
+        assert stats["errors"] == 1
+        assert stats["send_seconds"] == 0.4
+        assert stats["throttle_wait_seconds"] == 0.1
+        assert stats["entity_type_counts"] == {"site": 7}
+        assert stats["chunk_latency_seconds"]["avg"] == 0.2
+
+    def test_writes_reports_on_stats(self, callback, tmp_path):
+        callback.v2_runner_on_start(MagicMock(), _task("diode_ingest"))
+        callback.v2_runner_on_ok(_result(_task("diode_ingest"), {
+            "ingested_count": 3, "chunk_count": 1, "chunk_bytes": [12],
+            "chunk_seconds": [0.05],
+        }))
+
+        callback.v2_playbook_on_stats(MagicMock())
+
+        report = json.loads((tmp_path / "report.json").read_text())
+        assert report["modules"]["diode_ingest"]["entities"] == 3
+        prom = (tmp_path / "prom" / "diode.prom").read_text()
+        assert 'diode_ansible_entities{module="diode_ingest"} 3' in prom
+        assert 'diode_ansible_chunk_latency_seconds{module="diode_ingest",stat="max"} 0.05' in prom
+        assert "# TYPE diode_ansible_bytes gauge" in prom
+        for path in (tmp_path / "report.json", tmp_path / "prom" / "diode.prom"):
+            assert os.stat(str(path)).st_mode & 0o777 == 0o644
+        callback._display.banner.assert_called_once_with("DIODE SUMMARY")
+
+    def test_no_diode_tasks_writes_nothing(self, callback, tmp_path):
+        callback.v2_playbook_on_stats(MagicMock())
+
+        assert not (tmp_path / "report.json").exists()
+        callback._display.banner.assert_not_called()
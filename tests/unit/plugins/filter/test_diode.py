@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Unit tests for the Diode entity filter plugins."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+from collections import UserList
+from types import MappingProxyType
+
+import pytest
+from ansible.errors import AnsibleFilterError
+
+from ansible_collections.my0373.diode.plugins.filter.diode import (
+    FilterModule,
+    diode_merge,
+    to_diode_entities,
+)
+
+
+class TestToDiodeEntities:
+    def test_wraps_list_with_fixed_type(self):
+        assert to_diode_entities([{"name": "a"}, "b"], "site") == [
+            {"type": "site", "data": {"name": "a"}},
+            {"type": "site", "data": "b"},
+        ]
+
+    def test_type_key_is_removed_from_data(self):
+        records = [{"_type": "device", "name": "sw1"}, {"name": "s1"}]
+
+        result = to_diode_entities(records, "site", type_key="_type")
+
+        assert result == [
+            {"type": "device", "data": {"name": "sw1"}},
+            {"type": "site", "data": {"name": "s1"}},
+        ]
+        assert records[0]["_type"] == "device"
+
+    def test_dict_input_keyed_by_name(self):
+        result = to_diode_entities({"NYC": {"status": "active"}, "LAX": None}, "site")
+
+        assert result == [
+            {"type": "site", "data": {"name": "NYC", "status": "active"}},
+            {"type": "site", "data": {"name": "LAX"}},
+        ]
+
+    def test_accepts_any_mapping_or_sequence(self):
+        records = UserList([MappingProxyType({"name": "NYC"})])
+
+        assert to_diode_entities(records, "site") == [{"type": "site", "data": records[0]}]
+        assert diode_merge(UserList([UserList(["a"])]), ("b",)) == ["a", "b"]
+
+    @pytest.mark.parametrize("records,kwargs,match", [
+        ([{"name": "a"}], {}, "entity_type or type_key"),
+        ([{"name": "a"}], {"type_key": "_type"}, "record 0 has no '_type'"),
+        ([1], {"entity_type": "site"}, "record 0 must be a dict or string"),
+        ("site", {"entity_type": "site"}, "expects a list or dict"),
+    ])
+    def test_invalid_input(self, records, kwargs, match):
+        with pytest.raises(AnsibleFilterError, match=match):
+            to_diode_entities(records, **kwargs)
+
+
+class TestDiodeMerge:
+    A = {"type": "site", "data": "a"}
+    B = {"type": "site", "data": "b"}
+
+    def test_merges_list_of_lists_and_arguments(self):
+        assert diode_merge([[self.A], [self.B]], [self.A]) == [self.A, self.B, self.A]
+        assert diode_merge([self.A], [self.B]) == [self.A, self.B]
+
+    def test_unique_keeps_first_occurrence(self):
+        duplicate = {"data": "a", "type": "site"}
+
+        assert diode_merge([self.A, self.B], [duplicate], unique=True) == [self.A, self.B]
+
+    def test_rejects_non_lists(self):
+        with pytest.raises(AnsibleFilterError, match="expects lists"):
+            diode_merge([self.A], "oops")
+
+    def test_filters_registered(self):
+        assert set(FilterModule().filters()) == {"to_diode_entities", "diode_merge"}
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Unit tests for the diode inventory plugin."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import os
+
+import pytest
+from ansible.inventory.data import InventoryData
+
+from ansible_collections.my0373.diode.plugins.inventory import diode
+from ansible_collections.my0373.diode.plugins.module_utils.dryrun import (
+    discover_dryrun_files,
+)
+
+DEVICE = {
+    "device": {
+        "name": "sw1",
+        "device_type": {"model": "C9300", "manufacturer": {"name": "Cisco"}},
+        "role": {"name": "access"},
+        "site": {"name": "NYC DC1"},
+        "status": "active",
+        "primary_ip4": {"address": "10.0.0.1/24"},
+        "tags": [{"name": "prod"}],
+    }
+}
+VM = {"virtual_machine": {"name": "vm1", "cluster": {"name": "c1"}, "site": {"name": "LAX"}}}
+
+
+def _capture(directory, name, entities, mtime):
+    path = directory / name
+    path.write_text(json.dumps({"stream": "latest", "entities": entities}))
+    os.utime(str(path), (mtime, mtime))
+    return path
+
+
+@pytest.fixture
+def captures(tmp_path):
+    _capture(tmp_path, "a.json", [DEVICE, {"site": {"name": "NYC DC1"}}], 1000)
+    _capture(tmp_path, "b.json", [VM, {"device": {"name": "sw1", "role": {"name": "core"}}}], 2000)
+    return tmp_path
+
+
+@pytest.fixture
+def plugin():
+    plugin = diode.InventoryModule()
+    plugin.inventory = InventoryData()
+    plugin._options = {
+        "group_by": ["site", "role", "tags"],
+        "strict": False,
+        "compose": {},
+        "groups": {},
+        "keyed_groups": [],
+        "cache": True,
+    }
+    plugin._cache = {}
+    return plugin
+
+
+class TestHostVars:
+    def test_device_fields(self):
+        hostvars = diode.host_vars("device", DEVICE["device"])
+
+        assert hostvars == {
+            "diode_entity_type": "device",
+            "diode_site": "NYC DC1",
+            "diode_role": "access",
+            "diode_device_type": "C9300",
+            "diode_manufacturer": "Cisco",
+            "diode_status": "active",
+            "diode_tags": ["prod"],
+            "diode_primary_ip4": "10.0.0.1/24",
+            "ansible_host": "10.0.0.1",
+        }
+
+
+class TestIndex:
+    def test_newer_captures_update_older_values(self, captures):
+        files = list(discover_dryrun_files(str(captures)))
+        index, parsed = diode.build_index(files)
+
+        hosts = diode.merge_index(files, index)
+
+        assert parsed == 2
+        assert hosts["sw1"]["diode_role"] == "core"
+        assert hosts["sw1"]["ansible_host"] == "10.0.0.1"
+        assert hosts["vm1"]["diode_cluster"] == "c1"
+
+    def test_only_changed_files_are_reparsed(self, captures):
+        files = list(discover_dryrun_files(str(captures)))
+        index, _ = diode.build_index(files)
+        _capture(captures, "c.json", [{"device": {"name": "sw2"}}], 3000)
+
+        files = list(discover_dryrun_files(str(captures)))
+        index, parsed = diode.build_index(files, json.loads(json.dumps(index)))
+
+        assert parsed == 1
+        assert set(diode.merge_index(files, index)) == {"sw1", "sw2", "vm1"}
+
+
+class TestInventoryModule:
+    def test_populates_hosts_and_groups(self, plugin, captures):
+        files = list(discover_dryrun_files(str(captures)))
+        index = plugin._load_index(files, "key", use_cache=True)
+
+        plugin._populate(diode.merge_index(files, index))
+
+        inventory = plugin.inventory
+        assert set(inventory.hosts) == {"sw1", "vm1"}
+        assert [h.name for h in inventory.groups["site_NYC_DC1"].get_hosts()] == ["sw1"]
+        assert [h.name for h in inventory.groups["tags_prod"].get_hosts()] == ["sw1"]
+        assert inventory.get_host("sw1").vars["ansible_host"] == "10.0.0.1"
+
+    def test_unchanged_directory_loads_from_cache(self, plugin, captures, mocker):
+        files = list(discover_dryrun_files(str(captures)))
+        plugin._load_index(files, "key", use_cache=True)
+        parse = mocker.patch.object(diode, "hosts_from_file")
+
+        index = plugin._load_index(files, "key", use_cache=True)
+
+        parse.assert_not_called()
+        assert set(diode.merge_index(files, index)) == {"sw1", "vm1"}
+
+    def test_verify_file_requires_diode_suffix(self, plugin, tmp_path):
+        good = tmp_path / "inv.diode.yml"
+        bad = tmp_path / "inv.yml"
+        good.write_text("plugin: my0373.diode.diode\n")
+        bad.write_text("plugin: my0373.diode.diode\n")
+
+        assert plugin.verify_file(str(good))
+        assert not plugin.verify_file(str(bad))
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Unit tests for gRPC channel tuning.
+
+The reopened channel is exercised against a real in-process gRPC server,
+so the options are known to be accepted by grpc and the rebuilt stub
+still reaches the ingester.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import functools
+import sys
+from concurrent import futures
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from ansible_collections.my0373.diode.plugins.module_utils.channel import (
+    apply_channel_options,
+    channel_options,
+    client_channel_options,
+)
+
+grpc = pytest.importorskip("grpc")
+
+
+@pytest.fixture(scope="module")
+def real_sdk():
+    """Import the real SDK, replacing mocks left behind by other test files."""
+    for name in list(sys.modules):
+        if name.startswith("netboxlabs") and not hasattr(sys.modules[name], "__file__"):
+            del sys.modules[name]
+
+    pytest.importorskip("netboxlabs.diode.sdk")
+    from netboxlabs.diode.sdk import client as sdk_client
+    from netboxlabs.diode.sdk.diode.v1 import ingester_pb2, ingester_pb2_grpc
+    from netboxlabs.diode.sdk.ingester import Entity, Site
+
+    return {
+        "sdk_client": sdk_client,
+        "ingester_pb2": ingester_pb2,
+        "ingester_pb2_grpc": ingester_pb2_grpc,
+        "Entity": Entity,
+        "Site": Site,
+    }
+
+
+@pytest.fixture
+def server(real_sdk):
+    ingester_pb2 = real_sdk["ingester_pb2"]
+    ingester_pb2_grpc = real_sdk["ingester_pb2_grpc"]
+    requests = []
+
+    class Servicer(ingester_pb2_grpc.IngesterServiceServicer):
+        def Ingest(self, request, context):
+            requests.append(request)
+            return ingester_pb2.IngestResponse()
+
+    grpc_server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+    ingester_pb2_grpc.add_IngesterServiceServicer_to_server(Servicer(), grpc_server)
+    port = grpc_server.add_insecure_port("127.0.0.1:0")
+    grpc_server.start()
+    yield requests, "grpc://127.0.0.1:{0}".format(port)
+    grpc_server.stop(None)
+
+
+class TestChannelOptions:
+    def test_defaults_add_nothing(self):
+        assert channel_options({"compression": "none"}) == []
+        assert channel_options({}) == []
+
+    def test_maps_params_to_channel_arguments(self):
+        assert channel_options({
+            "compression": "deflate",
+            "max_send_message_mb": 16,
+            "keepalive_time_s": 60,
+            "keepalive_timeout_s": 2.5,
+        }) == [
+            ("grpc.default_compression_algorithm", 1),
+            ("grpc.max_send_message_length", 16 * 1024 * 1024),
+            ("grpc.keepalive_time_ms", 60000),
+            ("grpc.keepalive_timeout_ms", 2500),
+        ]
+
+
+class TestApplyChannelOptions:
+    def test_reopened_channel_sends_with_options(self, real_sdk, server):
+        requests, target = server
+        sdk_client = real_sdk["sdk_client"]
+        with patch.object(sdk_client.DiodeClient, "_authenticate"):
+            client = sdk_client.DiodeClient(
+                target=target, app_name="test-app", app_version="1.0.0",
+                client_id="id", client_secret="secret",
+            )
+        opened = []
+        original = sdk_client._open_grpc_channel
+
+        @functools.wraps(original)
+        def recording_open(authority, **kwargs):
+            opened.append(kwargs["channel_opts"])
+            return original(authority, **kwargs)
+
+        options = channel_options({"compression": "gzip", "keepalive_time_s": 60})
+        with patch.object(sdk_client, "_open_grpc_channel", recording_open):
+            apply_channel_options(client, options)
+        with client:
+            client.ingest([real_sdk["Entity"](site=real_sdk["Site"](name="NYC"))])
+
+        opts = dict(opened[0])
+        assert opts["grpc.default_compression_algorithm"] == 2
+        assert [name for name, _value in opened[0]].count("grpc.keepalive_time_ms") == 1
+        assert opts["grpc.keepalive_time_ms"] == 60000
+        assert opts["grpc.primary_user_agent"].startswith("diode-sdk-python/")
+        assert [e.site.name for e in requests[0].entities] == ["NYC"]
+        assert client_channel_options(client) == options
+
+    def test_unsupported_sdk_fails_before_touching_the_client(self, real_sdk):
+        sdk_client = real_sdk["sdk_client"]
+        client = MagicMock(spec=["version", "close", "_target", "_secure"])
+        client.version = "1.10.0"
+
+        def old_open(authority, secure, tls_verify, certificates, channel_opts):
+            raise AssertionError("channel must not be reopened")
+
+        with patch.object(sdk_client, "_open_grpc_channel", old_open):
+            with pytest.raises(RuntimeError) as exc:
+                apply_channel_options(client, [("grpc.keepalive_time_ms", 1000)])
+
+        message = str(exc.value)
+        assert "netboxlabs-diode-sdk 1.10.0" in message
+        assert "_tls_verify" in message and "_path" in message
+        assert "_open_grpc_channel(proxy_url=)" in message
+        assert "_secure," not in message
+        client.close.assert_not_called()
+
+    def test_untuned_client_has_no_options(self):
+        assert client_channel_options(object()) == []
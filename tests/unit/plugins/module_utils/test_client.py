@@ -122,6 +122,52 @@ class TestCreateDiodeClient:
             client_mod.create_diode_client(params)
             assert os.environ.get("DIODE_SKIP_TLS_VERIFY") == "true"
 
+    def test_token_cache_dir_uses_cached_client(self, mock_sdk):
+        client_mod = mock_sdk["client_module"]
+        cached_cls = MagicMock()
+        params = {
+            "target": "grpc://localhost:8080/diode",
+            "app_name": "test-app",
+            "app_version": "1.0.0",
+            "client_id": "my-id",
+            "client_secret": "my-secret",
+            "token_cache_dir": "/tmp/diode-tokens",
+        }
+        with patch.dict("sys.modules", {
+            "ansible_collections.my0373.diode.plugins.module_utils.token_cache": MagicMock(
+                CachedTokenDiodeClient=cached_cls,
+            ),
+        }):
+            client_mod.create_diode_client(params)
+        cached_cls.assert_called_once_with(
+            "/tmp/diode-tokens",
+            target="grpc://localhost:8080/diode",
+            app_name="test-app",
+            app_version="1.0.0",
+            client_id="my-id",
+            client_secret="my-secret",
+        )
+        mock_sdk["DiodeClient"].assert_not_called()
+
+    def test_channel_options_reopen_the_channel(self, mock_sdk):
+        client_mod = mock_sdk["client_module"]
+        params = {
+            "target": "grpc://localhost:8080/diode",
+            "app_name": "test-app",
+            "app_version": "1.0.0",
+            "compression": "gzip",
+            "max_send_message_mb": 8.0,
+        }
+        with patch.object(client_mod, "apply_channel_options") as mock_apply:
+            created = client_mod.create_diode_client(params)
+            params["compression"] = "none"
+            params["max_send_message_mb"] = None
+            client_mod.create_diode_client(params)
+        mock_apply.assert_called_once_with(created, [
+            ("grpc.default_compression_algorithm", 2),
+            ("grpc.max_send_message_length", 8 * 1024 * 1024),
+        ])
+
     def test_raises_when_sdk_missing(self, mock_sdk):
         client_mod = mock_sdk["client_module"]
         client_mod.HAS_DIODE_SDK = False
@@ -146,6 +192,25 @@ class TestCreateDryRunClient:
             output_dir="/tmp/output",
         )
 
+    def test_channel_options_reopen_the_channel(self, mock_sdk):
+        client_mod = mock_sdk["client_module"]
+        params = {
+            "target": "grpc://localhost:8080/diode",
+            "app_name": "test-app",
+            "app_version": "1.0.0",
+            "compression": "gzip",
+            "max_send_message_mb": 8.0,
+        }
+        with patch.object(client_mod, "apply_channel_options") as mock_apply:
+            created = client_mod.create_diode_client(params)
+            params["compression"] = "none"
+            params["max_send_message_mb"] = None
+            client_mod.create_diode_client(params)
+        mock_apply.assert_called_once_with(created, [
+            ("grpc.default_compression_algorithm", 2),
+            ("grpc.max_send_message_length", 8 * 1024 * 1024),
+        ])
+
     def test_raises_when_sdk_missing(self, mock_sdk):
         client_mod = mock_sdk["client_module"]
         client_mod.HAS_DIODE_SDK = False
@@ -154,6 +219,13 @@ class TestCreateDryRunClient:
         client_mod.HAS_DIODE_SDK = True
 
 
+def _sized_entity(entity_type, size):
+    entity = MagicMock()
+    entity.WhichOneof.return_value = entity_type
+    entity.ByteSize.return_value = size
+    return entity
+
+
 class TestIngestWithChunking:
     def test_single_chunk_ingest(self, mock_sdk):
         client_mod = mock_sdk["client_module"]
@@ -162,7 +234,7 @@ class TestIngestWithChunking:
         mock_response.errors = []
         mock_client.ingest.return_value = mock_response
 
-        entities = [MagicMock(), MagicMock()]
+        entities = [_sized_entity("device", 10), _sized_entity("device", 10)]
         mock_sdk["create_message_chunks"].return_value = [entities]
 
         result = client_mod.ingest_with_chunking(mock_client, entities)
@@ -178,8 +250,8 @@ class TestIngestWithChunking:
         mock_response.errors = []
         mock_client.ingest.return_value = mock_response
 
-        chunk1 = [MagicMock(), MagicMock()]
-        chunk2 = [MagicMock()]
+        chunk1 = [_sized_entity("site", 10), _sized_entity("device", 10)]
+        chunk2 = [_sized_entity("device", 10)]
         mock_sdk["create_message_chunks"].return_value = [chunk1, chunk2]
 
         result = client_mod.ingest_with_chunking(
@@ -197,9 +269,10 @@ class TestIngestWithChunking:
         mock_response.errors = ["error1", "error2"]
         mock_client.ingest.return_value = mock_response
 
-        mock_sdk["create_message_chunks"].return_value = [[MagicMock()]]
+        entities = [_sized_entity("device", 10)]
+        mock_sdk["create_message_chunks"].return_value = [entities]
 
-        result = client_mod.ingest_with_chunking(mock_client, [MagicMock()])
+        result = client_mod.ingest_with_chunking(mock_client, entities)
 
         assert len(result["errors"]) == 2
 
@@ -210,7 +283,7 @@ class TestIngestWithChunking:
         mock_response.errors = []
         mock_client.ingest.return_value = mock_response
 
-        entities = [MagicMock()]
+        entities = [_sized_entity("device", 10)]
         mock_sdk["create_message_chunks"].return_value = [entities]
 
         result = client_mod.ingest_with_chunking(
@@ -227,6 +300,306 @@ class TestIngestWithChunking:
         )
 
 
+    def test_reports_per_type_and_chunk_stats(self, mock_sdk):
+        client_mod = mock_sdk["client_module"]
+        mock_client = MagicMock()
+        mock_client.ingest.return_value = MagicMock(errors=[])
+
+        chunk1 = [_sized_entity("site", 10), _sized_entity("device", 200)]
+        chunk2 = [_sized_entity("device", 300)]
+        mock_sdk["create_message_chunks"].return_value = [chunk1, chunk2]
+
+        result = client_mod.ingest_with_chunking(mock_client, chunk1 + chunk2)
+
+        assert result["entity_type_counts"] == {"site": 1, "device": 2}
+        assert result["chunk_bytes"] == [(1 + 1 + 10) + (1 + 2 + 200), 1 + 2 + 300]
+        assert len(result["chunk_seconds"]) == 2
+        assert result["error_details"] == []
+
+    def test_attributes_errors_to_chunk_and_input_range(self, mock_sdk):
+        client_mod = mock_sdk["client_module"]
+        mock_client = MagicMock()
+        mock_client.ingest.side_effect = [
+            MagicMock(errors=[]),
+            MagicMock(errors=["bad device"]),
+        ]
+
+        chunk1 = [_sized_entity("site", 10), _sized_entity("site", 10)]
+        chunk2 = [_sized_entity("device", 10)]
+        mock_sdk["create_message_chunks"].return_value = [chunk1, chunk2]
+
+        result = client_mod.ingest_with_chunking(mock_client, chunk1 + chunk2)
+
+        assert result["errors"] == ["bad device"]
+        assert result["error_details"] == [{
+            "chunk_index": 1,
+            "start_index": 2,
+            "end_index": 3,
+            "message": "bad device",
+        }]
+
+    def test_send_failure_reports_progress(self, mock_sdk):
+        client_mod = mock_sdk["client_module"]
+        mock_client = MagicMock()
+        mock_client.ingest.side_effect = [
+            MagicMock(errors=[]),
+            RuntimeError("connection reset"),
+        ]
+
+        chunk1 = [_sized_entity("site", 10)]
+        chunk2 = [_sized_entity("device", 10), _sized_entity("device", 10)]
+        mock_sdk["create_message_chunks"].return_value = [chunk1, chunk2]
+
+        with pytest.raises(client_mod.ChunkIngestError, match="connection reset") as excinfo:
+            client_mod.ingest_with_chunking(mock_client, chunk1 + chunk2)
+
+        assert excinfo.value.chunk_index == 1
+        assert excinfo.value.start_index == 1
+        assert excinfo.value.end_index == 3
+        assert excinfo.value.result["ingested_count"] == 1
+        assert excinfo.value.result["entity_type_counts"] == {"site": 1}
+
+    def test_capture_receives_only_sent_chunks(self, mock_sdk):
+        client_mod = mock_sdk["client_module"]
+        mock_client = MagicMock()
+        mock_client.ingest.side_effect = [
+            MagicMock(errors=[]),
+            RuntimeError("connection reset"),
+        ]
+        capture = MagicMock()
+
+        chunk1 = [_sized_entity("site", 10)]
+        chunk2 = [_sized_entity("device", 10)]
+        mock_sdk["create_message_chunks"].return_value = [chunk1, chunk2]
+
+        with pytest.raises(client_mod.ChunkIngestError):
+            client_mod.ingest_with_chunking(
+                mock_client, chunk1 + chunk2, stream="s1", metadata={"k": "v"}, capture=capture
+            )
+
+        capture.write.assert_called_once_with(chunk1, "s1", {"k": "v"})
+
+    def test_tracer_records_a_span_per_chunk(self, mock_sdk):
+        from ansible_collections.my0373.diode.plugins.module_utils.tracing import Tracer
+
+        client_mod = mock_sdk["client_module"]
+        mock_client = MagicMock()
+        mock_client._metadata = [("authorization", "Bearer t")]
+        sent_headers = []
+
+        def ingest(entities, **kwargs):
+            sent_headers.append(dict(mock_client._metadata)["traceparent"])
+            if len(sent_headers) == 2:
+                raise RuntimeError("connection reset")
+            return MagicMock(errors=["bad"])
+
+        mock_client.ingest.side_effect = ingest
+        chunk1 = [_sized_entity("site", 10), _sized_entity("site", 10)]
+        chunk2 = [_sized_entity("device", 10)]
+        mock_sdk["create_message_chunks"].return_value = [chunk1, chunk2]
+        tracer = Tracer([])
+
+        with pytest.raises(client_mod.ChunkIngestError):
+            client_mod.ingest_with_chunking(
+                mock_client, chunk1 + chunk2, stream="s1", tracer=tracer
+            )
+
+        first, second = tracer.spans
+        assert [first.name, second.name] == ["chunk", "chunk"]
+        assert first.attributes == {
+            "diode.chunk.index": 0,
+            "diode.chunk.entity_count": 2,
+            "diode.chunk.bytes": 24,
+            "diode.stream": "s1",
+            "diode.chunk.retries": 0,
+            "diode.chunk.error_count": 1,
+        }
+        assert first.error is None
+        assert second.error == "connection reset"
+        assert sent_headers == [first.traceparent, second.traceparent]
+
+    def test_tracer_records_concurrent_chunks(self, mock_sdk):
+        from ansible_collections.my0373.diode.plugins.module_utils import async_ingest
+        from ansible_collections.my0373.diode.plugins.module_utils.tracing import Tracer
+
+        client_mod = mock_sdk["client_module"]
+        mock_client = MagicMock()
+        mock_client._metadata = []
+        chunk1 = [_sized_entity("site", 10)]
+        chunk2 = [_sized_entity("device", 10)]
+        mock_sdk["create_message_chunks"].return_value = [chunk1, chunk2]
+        tracer = Tracer([])
+
+        with patch.object(async_ingest, "supports_async_ingest", return_value=True), \
+                patch.object(async_ingest, "AsyncIngestEngine") as mock_engine_cls:
+            engine = mock_engine_cls.return_value
+            engine.ingest_chunks.return_value = [MagicMock(errors=[]), MagicMock(errors=[])]
+            engine.chunk_seconds = [0.5, 0.25]
+            engine.chunk_started = [100.0, 100.5]
+            with tracer.span("send") as send:
+                client_mod.ingest_with_chunking(
+                    mock_client, chunk1 + chunk2, concurrency=4, tracer=tracer
+                )
+
+        chunks = [span for span in tracer.spans if span.name == "chunk"]
+        assert [span.parent_span_id for span in chunks] == [send.span_id] * 2
+        assert [(span.start, span.end) for span in chunks] == [
+            (100 * 10 ** 9, 100500 * 10 ** 6),
+            (100500 * 10 ** 6, 100750 * 10 ** 6),
+        ]
+        assert mock_client._metadata == [("traceparent", send.traceparent)]
+
+
+    def test_batches_send_each_stream_with_its_metadata(self, mock_sdk, monkeypatch):
+        client_mod = mock_sdk["client_module"]
+        mock_client = MagicMock()
+        mock_client.ingest.side_effect = [
+            MagicMock(errors=[]),
+            MagicMock(errors=["bad ip"]),
+        ]
+        emea = [_sized_entity("site", 10), _sized_entity("device", 10)]
+        apac = [_sized_entity("ip_address", 10)]
+        monkeypatch.setattr(client_mod, "chunk_entities", lambda entities, size: [entities])
+
+        result = client_mod.ingest_batches(
+            mock_client, [("emea", {"src": "a"}, emea), (None, None, apac)]
+        )
+
+        assert mock_client.ingest.call_args_list[0][1] == {
+            "entities": emea, "stream": "emea", "metadata": {"src": "a"},
+        }
+        assert mock_client.ingest.call_args_list[1][1] == {"entities": apac}
+        assert result["ingested_count"] == 3
+        assert result["stream_counts"] == {"emea": 2, "latest": 1}
+        assert result["error_details"] == [{
+            "chunk_index": 1,
+            "start_index": 2,
+            "end_index": 3,
+            "message": "bad ip",
+            "stream": "latest",
+        }]
+
+    def test_concurrency_uses_async_engine(self, mock_sdk):
+        client_mod = mock_sdk["client_module"]
+        mock_client = MagicMock()
+
+        chunk1 = [_sized_entity("site", 10)]
+        chunk2 = [_sized_entity("device", 10)]
+        chunk3 = [_sized_entity("device", 10)]
+        mock_sdk["create_message_chunks"].return_value = [chunk1, chunk2, chunk3]
+
+        from ansible_collections.my0373.diode.plugins.module_utils import async_ingest
+
+        with patch.object(async_ingest, "supports_async_ingest", return_value=True), \
+                patch.object(async_ingest, "AsyncIngestEngine") as mock_engine_cls:
+            mock_engine_cls.return_value.ingest_chunks.return_value = [
+                MagicMock(errors=[]),
+                RuntimeError("deadline exceeded"),
+                MagicMock(errors=["bad"]),
+            ]
+            mock_engine_cls.return_value.chunk_seconds = [0.1, None, 0.2]
+            with pytest.raises(client_mod.ChunkIngestError) as excinfo:
+                client_mod.ingest_with_chunking(
+                    mock_client, chunk1 + chunk2 + chunk3, stream="s", concurrency=4
+                )
+
+        mock_engine_cls.assert_called_once_with(mock_client, concurrency=4)
+        mock_client.ingest.assert_not_called()
+        assert excinfo.value.chunk_index == 1
+        # Chunks after the failed one were still delivered and are counted.
+        assert excinfo.value.result["ingested_count"] == 2
+        assert excinfo.value.result["error_details"][0]["chunk_index"] == 2
+        assert excinfo.value.result["chunk_seconds"] == [0.1, 0.2]
+
+    def test_concurrent_failures_are_all_reported(self, mock_sdk):
+        client_mod = mock_sdk["client_module"]
+        chunks = [[_sized_entity("site", 10)] for _ in range(2)] + [
+            [_sized_entity("device", 10), _sized_entity("device", 10)],
+            [_sized_entity("site", 10)],
+        ]
+        parent = [_sized_entity("site", 10)]
+        mock_sdk["create_message_chunks"].side_effect = [[parent], chunks]
+
+        from ansible_collections.my0373.diode.plugins.module_utils import async_ingest
+
+        with patch.object(async_ingest, "supports_async_ingest", return_value=True), \
+                patch.object(async_ingest, "AsyncIngestEngine") as mock_engine_cls:
+            mock_engine_cls.return_value.ingest_chunks.return_value = [
+                RuntimeError("reset"),
+                MagicMock(errors=[]),
+                RuntimeError("deadline exceeded"),
+                MagicMock(errors=[]),
+            ]
+            mock_engine_cls.return_value.chunk_seconds = [None, 0.1, None, 0.1]
+            with pytest.raises(client_mod.ChunkIngestError, match="2 chunks failed") as excinfo:
+                client_mod.ingest_tiers(
+                    MagicMock(),
+                    [[(None, None, parent)], [(None, None, sum(chunks, []))]],
+                    concurrency=4,
+                )
+
+        # The first tier's single entity shifts every position by one.
+        assert excinfo.value.failures == [
+            {"chunk_index": 1, "start_index": 1, "end_index": 2, "message": "reset"},
+            {"chunk_index": 3, "start_index": 3, "end_index": 5, "message": "deadline exceeded"},
+        ]
+        assert (excinfo.value.chunk_index, excinfo.value.start_index) == (1, 1)
+
+    def test_throttle_paces_and_retries_on_server_hint(self, mock_sdk):
+        client_mod = mock_sdk["client_module"]
+        mock_client = MagicMock()
+        overloaded = RuntimeError("overloaded")
+        mock_client.ingest.side_effect = [
+            MagicMock(errors=[]),
+            overloaded,
+            MagicMock(errors=[]),
+        ]
+
+        chunk1 = [_sized_entity("site", 10)]
+        chunk2 = [_sized_entity("device", 10), _sized_entity("device", 10)]
+        mock_sdk["create_message_chunks"].return_value = [chunk1, chunk2]
+
+        throttle = MagicMock()
+        throttle.retry_delay.return_value = 0.25
+
+        result = client_mod.ingest_with_chunking(
+            mock_client, chunk1 + chunk2, throttle=throttle
+        )
+
+        assert result["ingested_count"] == 3
+        assert [c[0] for c in throttle.wait.call_args_list] == [(1, 12), (2, 24)]
+        throttle.retry_delay.assert_called_once_with(overloaded, 0)
+        throttle.sleep.assert_called_once_with(0.25)
+
+
+class TestPlanChunks:
+    def test_reports_sizes_without_sending(self, mock_sdk):
+        client_mod = mock_sdk["client_module"]
+        chunk1 = [_sized_entity("site", 10), _sized_entity("device", 200)]
+        chunk2 = [_sized_entity("device", 300)]
+        mock_sdk["create_message_chunks"].return_value = [chunk1, chunk2]
+
+        result = client_mod.plan_chunks(chunk1 + chunk2, chunk_size_mb=1.0)
+
+        assert result["ingested_count"] == 3
+        assert result["chunk_count"] == 2
+        # Each entity adds a tag byte and a varint length prefix.
+        assert result["chunk_bytes"] == [(1 + 1 + 10) + (1 + 2 + 200), 1 + 2 + 300]
+        assert result["total_bytes"] == sum(result["chunk_bytes"])
+        assert result["entity_type_counts"] == {"site": 1, "device": 2}
+        assert "estimated_send_seconds" not in result
+
+    def test_estimates_send_time(self, mock_sdk):
+        client_mod = mock_sdk["client_module"]
+        entities = [_sized_entity("prefix", 1024 * 1024 - 4)]
+        mock_sdk["create_message_chunks"].return_value = [entities]
+
+        result = client_mod.plan_chunks(entities, mb_per_second=0.5)
+
+        assert result["total_bytes"] == 1024 * 1024
+        assert result["estimated_send_seconds"] == 2.0
+
+
 class TestGetSdkVersion:
     def test_returns_version_string(self, mock_sdk):
         client_mod = mock_sdk["client_module"]
@@ -245,3 +618,163 @@ class TestGetSdkVersion:
         ):
             result = client_mod.get_sdk_version()
             assert result == "unknown"
+
+
+class TestRemapErrorDetails:
+    def test_contiguous_slices_keep_a_range(self):
+        from ansible_collections.my0373.diode.plugins.module_utils.client import (
+            input_positions,
+            remap_error_details,
+        )
+
+        indices = [0, 1, 2, 5, 6]
+        result = {"error_details": [
+            {"start_index": 0, "end_index": 3},
+            {"start_index": 3, "end_index": 5},
+        ]}
+
+        remap_error_details(result, indices)
+
+        assert result["error_details"] == [
+            {"start_index": 0, "end_index": 3},
+            {"start_index": 5, "end_index": 7},
+        ]
+        assert input_positions(None, 1, 5) == {"start_index": 1, "end_index": 5}
+
+    def test_interleaved_streams_list_exact_indices(self, mock_sdk):
+        client_mod = mock_sdk["client_module"]
+        entity_dicts = [
+            {"type": "site", "data": "a", "stream": "emea"},
+            {"type": "site", "data": "b", "stream": "apac"},
+            {"type": "site", "data": "c", "stream": "emea"},
+            {"type": "site", "data": "d", "stream": "apac"},
+        ]
+        batches, indices = client_mod.group_batches(entity_dicts, ["A", "B", "C", "D"])
+        assert [entities for _s, _m, entities in batches] == [["A", "C"], ["B", "D"]]
+
+        # The apac chunk failed; a, c went out in the emea chunk and must
+        # not be named for re-sending.
+        result = {"error_details": [{"chunk_index": 1, "start_index": 2, "end_index": 4}]}
+        client_mod.remap_error_details(result, indices)
+
+        assert result["error_details"] == [{"chunk_index": 1, "input_indices": [1, 3]}]
+
+
+class TestGroupBatches:
+    def test_groups_by_stream_and_merged_metadata(self, mock_sdk):
+        client_mod = mock_sdk["client_module"]
+        entity_dicts = [
+            {"type": "site", "data": "a", "stream": "emea"},
+            {"type": "site", "data": "b"},
+            {"type": "site", "data": "c", "stream": "emea"},
+            {"type": "site", "data": "d", "metadata": {"src": "cmdb"}},
+        ]
+
+        batches, indices = client_mod.group_batches(
+            entity_dicts, ["A", "B", "C", "D"], stream="default", metadata={"run": 1}
+        )
+
+        assert batches == [
+            ("emea", {"run": 1}, ["A", "C"]),
+            ("default", {"run": 1}, ["B"]),
+            ("default", {"run": 1, "src": "cmdb"}, ["D"]),
+        ]
+        assert indices == [0, 2, 1, 3]
+
+    def test_unrouted_entities_form_one_batch(self, mock_sdk):
+        client_mod = mock_sdk["client_module"]
+        entity_dicts = [{"type": "site", "data": "a"}, {"type": "site", "data": "b"}]
+
+        batches, indices = client_mod.group_batches(entity_dicts, ["A", "B"], stream="s")
+
+        assert batches == [("s", None, ["A", "B"])]
+        assert indices is None
+
+    def test_keeps_input_indices_of_skipped_entities(self, mock_sdk):
+        client_mod = mock_sdk["client_module"]
+        entity_dicts = [
+            {"type": "site", "data": "a", "stream": "x"},
+            {"type": "bad"},
+            {"type": "site", "data": "c", "stream": "y"},
+            {"type": "site", "data": "d", "stream": "x"},
+        ]
+
+        batches, indices = client_mod.group_batches(entity_dicts, ["A", "C", "D"], indices=[0, 2, 3])
+
+        assert [b[0] for b in batches] == ["x", "y"]
+        assert indices == [0, 3, 2]
+
+
+class TestIngestTiers:
+    TIERS = {"site": 0, "device": 1, "ip_address": 2}
+
+    def test_group_tiers_orders_parents_first(self, mock_sdk):
+        client_mod = mock_sdk["client_module"]
+        entity_dicts = [
+            {"type": "ip_address", "data": {}},
+            {"type": "device", "data": {}, "stream": "x"},
+            {"type": "site", "data": "a"},
+            {"type": "device", "data": {}},
+        ]
+
+        tiers, indices = client_mod.group_tiers(
+            entity_dicts, ["IP", "D1", "S", "D2"], tiers=self.TIERS
+        )
+
+        assert tiers == [
+            [(None, None, ["S"])],
+            [("x", None, ["D1"]), (None, None, ["D2"])],
+            [(None, None, ["IP"])],
+        ]
+        assert indices == [2, 1, 3, 0]
+
+    def test_tiers_are_sent_in_order_with_shifted_positions(self, mock_sdk, monkeypatch):
+        client_mod = mock_sdk["client_module"]
+        mock_client = MagicMock()
+        mock_client.ingest.side_effect = [
+            MagicMock(errors=[]),
+            MagicMock(errors=["bad device"]),
+        ]
+        sites = [_sized_entity("site", 10), _sized_entity("site", 10)]
+        devices = [_sized_entity("device", 10)]
+        monkeypatch.setattr(client_mod, "chunk_entities", lambda entities, size: [entities])
+
+        result = client_mod.ingest_tiers(
+            mock_client, [[(None, None, sites)], [(None, None, devices)]]
+        )
+
+        assert [c[1]["entities"] for c in mock_client.ingest.call_args_list] == [sites, devices]
+        assert result["ingested_count"] == 3
+        assert result["chunk_count"] == 2
+        assert result["error_details"] == [{
+            "chunk_index": 1, "start_index": 2, "end_index": 3, "message": "bad device",
+        }]
+        assert [t["entity_types"] for t in result["tiers"]] == [["site"], ["device"]]
+
+    def test_failed_tier_stops_dependents(self, mock_sdk, monkeypatch):
+        client_mod = mock_sdk["client_module"]
+        mock_client = MagicMock()
+        mock_client.ingest.side_effect = [MagicMock(errors=[]), RuntimeError("unavailable")]
+        tiers = [
+            [(None, None, [_sized_entity("site", 10)])],
+            [(None, None, [_sized_entity("device", 10), _sized_entity("device", 10)])],
+            [(None, None, [_sized_entity("ip_address", 10)])],
+        ]
+        monkeypatch.setattr(client_mod, "chunk_entities", lambda entities, size: [entities])
+
+        with pytest.raises(client_mod.ChunkIngestError, match="unavailable") as excinfo:
+            client_mod.ingest_tiers(mock_client, tiers)
+
+        assert mock_client.ingest.call_count == 2
+        assert (excinfo.value.chunk_index, excinfo.value.start_index, excinfo.value.end_index) == (1, 1, 3)
+        assert excinfo.value.result["ingested_count"] == 1
+
+    def test_single_tier_is_a_plain_batch_send(self, mock_sdk, monkeypatch):
+        client_mod = mock_sdk["client_module"]
+        mock_client = MagicMock()
+        mock_client.ingest.return_value = MagicMock(errors=[])
+        monkeypatch.setattr(client_mod, "chunk_entities", lambda entities, size: [entities])
+
+        result = client_mod.ingest_tiers(mock_client, [[(None, None, [_sized_entity("site", 10)])]])
+
+        assert "tiers" not in result
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Unit tests for dry-run capture compaction."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import os
+
+import pytest
+
+from ansible_collections.my0373.diode.plugins.module_utils import compact
+from ansible_collections.my0373.diode.plugins.module_utils.compact import (
+    CaptureCompactor,
+    capture_entity_key,
+)
+from ansible_collections.my0373.diode.plugins.module_utils.dryrun import (
+    HAS_LOAD_DRYRUN,
+    load_dryrun_entities,
+)
+
+pytestmark = pytest.mark.skipif(not HAS_LOAD_DRYRUN, reason="Diode SDK is not installed")
+
+
+def _capture(tmp_path, name, entities, mtime, **request):
+    request["entities"] = entities
+    path = tmp_path / name
+    path.write_text(json.dumps(request))
+    os.utime(str(path), (mtime, mtime))
+    return str(path)
+
+
+def _site(name, status="active"):
+    return {"site": {"name": name, "status": status}}
+
+
+def _interface(device, name, enabled=True):
+    return {"interface": {"device": {"name": device}, "name": name, "enabled": enabled}}
+
+
+def _compacted(tmp_path, *captures, **kwargs):
+    compactor = CaptureCompactor(**kwargs)
+    for path in captures:
+        compactor.add(path)
+    paths, _written = compactor.write(str(tmp_path / "out"), "compacted")
+    return compactor, paths
+
+
+class TestCaptureEntityKey:
+    def test_natural_key_ignores_other_fields(self):
+        assert capture_entity_key("latest", _site("A", "active")) == capture_entity_key(
+            "latest", dict(_site("A", "planned"), timestamp="2026-01-01T00:00:00Z")
+        )
+
+    def test_parents_are_part_of_the_key(self):
+        assert capture_entity_key("latest", _interface("sw1", "eth0")) != capture_entity_key(
+            "latest", _interface("sw2", "eth0")
+        )
+
+    def test_stream_is_part_of_the_key(self):
+        assert capture_entity_key("a", _site("A")) != capture_entity_key("b", _site("A"))
+
+
+class TestCaptureCompactor:
+    def test_keeps_latest_version_in_first_seen_order(self, tmp_path):
+        first = _capture(tmp_path, "1.json", [_site("A", "planned"), _site("B")], 100)
+        second = _capture(tmp_path, "2.json", [_site("C"), _site("A", "active")], 200)
+
+        compactor, paths = _compacted(tmp_path, first, second)
+
+        assert (compactor.entities_read, compactor.entity_count, compactor.superseded_count) == (4, 3, 1)
+        assert len(paths) == 1
+        entities = load_dryrun_entities(paths[0])
+        assert [(e.site.name, e.site.status) for e in entities] == [
+            ("A", "active"), ("B", "active"), ("C", "active"),
+        ]
+        assert os.path.getmtime(paths[0]) == 200
+
+    def test_same_name_under_other_parent_is_kept(self, tmp_path):
+        path = _capture(tmp_path, "1.json", [
+            _interface("sw1", "eth0", False), _interface("sw2", "eth0"), _interface("sw1", "eth0"),
+        ], 100)
+
+        compactor, paths = _compacted(tmp_path, path)
+
+        entities = load_dryrun_entities(paths[0])
+        assert [(e.interface.device.name, e.interface.enabled) for e in entities] == [
+            ("sw1", True), ("sw2", True),
+        ]
+
+    def test_streams_and_metadata_get_their_own_files(self, tmp_path):
+        emea = _capture(tmp_path, "1.json", [_site("A")], 100, stream="emea",
+                        producer_app_name="old", metadata={"source": "cmdb"})
+        apac = _capture(tmp_path, "2.json", [_site("A")], 200, stream="apac")
+        emea_new = _capture(tmp_path, "3.json", [_site("B")], 300, stream="emea",
+                            producer_app_name="new", metadata={"source": "cmdb"})
+
+        compactor, paths = _compacted(tmp_path, emea, apac, emea_new)
+
+        requests = []
+        for path in paths:
+            with open(path) as fh:
+                requests.append(json.load(fh))
+        assert [(r["stream"], len(r["entities"])) for r in requests] == [("emea", 2), ("apac", 1)]
+        assert requests[0]["metadata"] == {"source": "cmdb"}
+        assert requests[0]["producer_app_name"] == "new"
+        assert "metadata" not in requests[1]
+        assert compactor.superseded_count == 0
+
+    def test_splits_files_at_max_size(self, tmp_path):
+        sites = [_site("site-{0:03d}".format(i)) for i in range(100)]
+        path = _capture(tmp_path, "1.json", sites, 100)
+
+        compactor, paths = _compacted(tmp_path, path, max_file_mb=1000.0 / (1024 * 1024))
+
+        assert len(paths) > 1
+        assert all(os.path.getsize(p) < 1200 for p in paths)
+        names = [e.site.name for p in paths for e in load_dryrun_entities(p)]
+        assert names == ["site-{0:03d}".format(i) for i in range(100)]
+
+    def test_unreadable_capture_is_reported_and_skipped(self, tmp_path):
+        bad = tmp_path / "bad.json"
+        bad.write_text("{not json")
+        wrong = _capture(tmp_path, "wrong.json", ["x"], 100)
+        good = _capture(tmp_path, "good.json", [_site("A")], 100)
+        compactor = CaptureCompactor()
+
+        assert compactor.add(str(bad)) is False
+        assert compactor.add(wrong) is False
+        assert compactor.add(good) is True
+        assert compactor.sources == [good]
+        assert len(compactor.errors) == 2
+
+    def test_failed_write_removes_partial_output(self, tmp_path, monkeypatch):
+        path = _capture(tmp_path, "1.json", [_site("A")], 100, stream="a")
+        other = _capture(tmp_path, "2.json", [_site("A")], 100, stream="b")
+        compactor = CaptureCompactor()
+        compactor.add(path)
+        compactor.add(other)
+        original = compact.write_capture_file
+        calls = []
+
+        def failing_write(directory, prefix, text):
+            calls.append(prefix)
+            if len(calls) == 2:
+                raise OSError("disk full")
+            return original(directory, prefix, text)
+
+        monkeypatch.setattr(compact, "write_capture_file", failing_write)
+        with pytest.raises(OSError):
+            compactor.write(str(tmp_path / "out"), "compacted")
+        assert os.listdir(str(tmp_path / "out")) == []
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Unit tests for opt-in CPU profiling of module runs."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import os
+import pstats
+import sys
+
+import pytest
+
+from ansible_collections.my0373.diode.plugins.module_utils.cpu_profile import (
+    attach_cpu_profile,
+    profile_file_name,
+)
+
+
+class FakeModule(object):
+    def __init__(self, **params):
+        self.params = params
+        self.results = []
+
+    def exit_json(self, **kwargs):
+        self.results.append(kwargs)
+        raise SystemExit(0)
+
+    def fail_json(self, **kwargs):
+        self.results.append(kwargs)
+        raise SystemExit(1)
+
+
+def _busy_work():
+    return sum(i * i for i in range(20000))
+
+
+@pytest.fixture(autouse=True)
+def no_outer_profiler():
+    # pytest-cov and debuggers install their own profile hooks; cProfile
+    # cannot run alongside them.
+    if sys.getprofile() is not None:
+        pytest.skip("another profiler is active")
+
+
+class TestAttachCpuProfile:
+    def test_disabled_without_profile_dir(self):
+        module = FakeModule(profile_dir=None)
+        exit_json = module.exit_json
+
+        assert attach_cpu_profile(module, "diode_ingest") is None
+        assert module.exit_json == exit_json
+
+    def test_writes_stats_and_reports_them(self, tmp_path):
+        module = FakeModule(profile_dir=str(tmp_path / "profiles"))
+        attach_cpu_profile(module, "diode_ingest")
+        _busy_work()
+
+        with pytest.raises(SystemExit):
+            module.exit_json(changed=True)
+
+        profile = module.results[0]["cpu_profile"]
+        assert module.results[0]["changed"] is True
+        assert os.path.basename(profile["path"]).startswith("diode_ingest-")
+        assert profile["path"].endswith(".pstats")
+        assert profile["total_seconds"] >= 0
+        assert any("_busy_work" in row["function"] for row in profile["functions"])
+        stats = pstats.Stats(profile["path"])
+        assert any(func[2] == "_busy_work" for func in stats.stats)
+
+    def test_failures_carry_the_profile_too(self, tmp_path):
+        module = FakeModule(profile_dir=str(tmp_path))
+        attach_cpu_profile(module, "diode_replay")
+
+        with pytest.raises(SystemExit):
+            module.fail_json(msg="boom")
+
+        assert os.path.isfile(module.results[0]["cpu_profile"]["path"])
+
+    def test_unwritable_dir_reports_error(self, tmp_path):
+        blocker = tmp_path / "file"
+        blocker.write_text("")
+        module = FakeModule(profile_dir=str(blocker))
+        attach_cpu_profile(module, "diode_ingest")
+
+        with pytest.raises(SystemExit):
+            module.exit_json(changed=False)
+
+        assert "Could not write profile" in module.results[0]["cpu_profile"]["error"]
+
+
+def test_profile_file_name():
+    assert profile_file_name("diode_ingest", clock=lambda: 0) == (
+        "diode_ingest-19700101T000000-{0}.pstats".format(os.getpid())
+    )
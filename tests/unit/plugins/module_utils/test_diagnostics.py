@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Unit tests for diagnostics module_utils."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+UTILS_PKG = "ansible_collections.my0373.diode.plugins.module_utils"
+CLIENT_MOD = UTILS_PKG + ".client"
+
+
+@pytest.fixture
+def diagnostics():
+    """Import diagnostics, then unload it and entity_builder again.
+
+    test_entity_builder re-imports entity_builder under its SDK mocks,
+    which only works if no other test left the real one loaded.
+    """
+    from ansible_collections.my0373.diode.plugins.module_utils import diagnostics
+
+    yield diagnostics
+
+    package = sys.modules[UTILS_PKG]
+    for name in ("diagnostics", "entity_builder"):
+        sys.modules.pop("{0}.{1}".format(UTILS_PKG, name), None)
+        if hasattr(package, name):
+            delattr(package, name)
+
+
+class TestDiagnostics:
+    def test_protobuf_backend_is_reported(self, diagnostics):
+        backend, version = diagnostics.protobuf_backend()
+
+        assert backend in ("upb", "cpp", "python", None)
+        assert (version is None) == (backend is None)
+
+    def test_cold_import_runs_in_a_child_interpreter(self, diagnostics):
+        seconds = diagnostics.cold_import_seconds("json")
+
+        assert 0 <= seconds < 10
+
+    def test_construct_costs_skip_unbuildable_types(self, diagnostics, monkeypatch):
+        monkeypatch.setattr(diagnostics, "ENTITY_TYPE_MAP", {"site": None, "cable": None})
+        monkeypatch.setattr(diagnostics, "field_table", lambda t: ("name", {"name": (str,)}))
+
+        def build(entity_dict):
+            if entity_dict["type"] == "cable":
+                raise TypeError("no")
+            return entity_dict
+
+        monkeypatch.setattr(diagnostics, "build_entity", build)
+
+        costs = diagnostics.construct_costs(iterations=5)
+
+        assert list(costs) == ["site"]
+        assert costs["site"] >= 0
+
+    def test_connection_latency_times_each_step(self, diagnostics):
+        client = MagicMock()
+        with patch("{0}.create_diode_client".format(CLIENT_MOD), return_value=client), \
+                patch("grpc.channel_ready_future") as ready:
+            result = diagnostics.connection_latency({"target": "grpc://x:1"}, timeout=2)
+
+        client._authenticate.assert_called_once_with("diode:ingest")
+        ready.return_value.result.assert_called_once_with(timeout=2)
+        client.close.assert_called_once()
+        assert set(result) == {"client_seconds", "auth_seconds", "connect_seconds"}
+
+    def test_run_diagnostics_warns_on_pure_python_protobuf(self, diagnostics, monkeypatch):
+        monkeypatch.setattr(diagnostics, "protobuf_backend", lambda: ("python", "5.0"))
+        monkeypatch.setattr(diagnostics, "cold_import_seconds", lambda: 0.5)
+        monkeypatch.setattr(
+            diagnostics, "construct_costs", lambda: {"site": 1.0, "device": 5.0, "tag": 0.5}
+        )
+        monkeypatch.setattr(diagnostics, "serialization_throughput", lambda count: {"entity_count": count})
+
+        def fail(params, timeout):
+            raise RuntimeError("refused")
+
+        monkeypatch.setattr(diagnostics, "connection_latency", fail)
+
+        report = diagnostics.run_diagnostics({"target": "grpc://x:1"}, sample_size=10)
+
+        assert report["protobuf_backend"] == "python"
+        assert "pure-Python" in report["warnings"][0]
+        assert report["slowest_entity_types"] == ["device", "site", "tag"]
+        assert report["serialization"] == {"entity_count": 10}
+        assert report["connection"] == {"error": "refused"}
+
+    def test_connection_is_skipped_without_target(self, diagnostics, monkeypatch):
+        monkeypatch.setattr(diagnostics, "cold_import_seconds", lambda: 0.5)
+        monkeypatch.setattr(diagnostics, "construct_costs", lambda: {})
+        monkeypatch.setattr(diagnostics, "serialization_throughput", lambda count: {})
+
+        assert "connection" not in diagnostics.run_diagnostics({})
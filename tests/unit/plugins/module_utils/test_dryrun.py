@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Unit tests for dryrun module_utils."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import os
+
+import pytest
+
+from ansible_collections.my0373.diode.plugins.module_utils.dryrun import (
+    HAS_LOAD_DRYRUN,
+    CaptureWriter,
+    EntityFilter,
+    discover_dryrun_files,
+    load_dryrun_entities,
+)
+
+
+def _touch(path, mtime):
+    path.write_text('{"entities": []}')
+    os.utime(str(path), (mtime, mtime))
+
+
+class TestDiscoverDryrunFiles:
+    def test_orders_by_mtime(self, tmp_path):
+        _touch(tmp_path / "b.json", 300)
+        _touch(tmp_path / "a.json", 200)
+        _touch(tmp_path / "c.json", 100)
+
+        result = [os.path.basename(p) for p, _ in discover_dryrun_files(str(tmp_path))]
+
+        assert result == ["c.json", "a.json", "b.json"]
+
+    def test_ties_broken_by_name(self, tmp_path):
+        _touch(tmp_path / "b.json", 100)
+        _touch(tmp_path / "a.json", 100)
+
+        result = [os.path.basename(p) for p, _ in discover_dryrun_files(str(tmp_path))]
+
+        assert result == ["a.json", "b.json"]
+
+    def test_applies_pattern(self, tmp_path):
+        _touch(tmp_path / "audit_1.json", 100)
+        _touch(tmp_path / "other_1.json", 100)
+        _touch(tmp_path / "audit_2.txt", 100)
+
+        result = [
+            os.path.basename(p)
+            for p, _ in discover_dryrun_files(str(tmp_path), pattern="audit_*.json")
+        ]
+
+        assert result == ["audit_1.json"]
+
+    def test_skips_directories(self, tmp_path):
+        (tmp_path / "nested.json").mkdir()
+        _touch(tmp_path / "a.json", 100)
+
+        result = [os.path.basename(p) for p, _ in discover_dryrun_files(str(tmp_path))]
+
+        assert result == ["a.json"]
+
+    def test_newer_than_filters_old_files(self, tmp_path):
+        _touch(tmp_path / "old.json", 100)
+        _touch(tmp_path / "edge.json", 200)
+        _touch(tmp_path / "new.json", 300)
+
+        result = list(discover_dryrun_files(str(tmp_path), newer_than=200))
+
+        assert result == [(str(tmp_path / "new.json"), 300)]
+
+    def test_file_name_completes_the_watermark(self, tmp_path):
+        for name in ("a.json", "b.json", "c.json"):
+            _touch(tmp_path / name, 200)
+        _touch(tmp_path / "new.json", 300)
+
+        result = discover_dryrun_files(str(tmp_path), newer_than=200, newer_than_file="b.json")
+
+        assert [os.path.basename(p) for p, _ in result] == ["c.json", "new.json"]
+
+
+@pytest.mark.skipif(not HAS_LOAD_DRYRUN, reason="Diode SDK not installed")
+class TestLoadDryrunEntities:
+    def test_reads_entities_like_the_sdk(self, tmp_path):
+        path = tmp_path / "capture.json"
+        path.write_text(
+            '{"stream": "latest", "entities": ['
+            '{"site": {"name": "Site-A"}}, {"device": {"name": "sw1"}}]}'
+        )
+
+        entities = load_dryrun_entities(str(path))
+
+        assert [e.WhichOneof("entity") for e in entities] == ["site", "device"]
+        assert entities[1].device.name == "sw1"
+
+
+
+_IPAM_CAPTURE = {"entities": [
+    {"site": {"name": "NYC"}},
+    {"ip_address": {"address": "10.0.0.1/24", "vrf": {"name": "blue"}, "status": "active"}},
+    {"prefix": {"prefix": "10.0.0.0/24", "vrf": {"name": "red"}, "tags": [{"name": "core"}]}},
+    {"ip_address": {"address": "10.0.1.1/24", "status": "reserved"}},
+    {"asn": {"asn": "65001"}, "timestamp": "2026-01-01T00:00:00Z"},
+]}
+
+
+class TestEntityFilter:
+    def _kept(self, **kwargs):
+        entity_filter = EntityFilter(**kwargs)
+        kept = [e for e in _IPAM_CAPTURE["entities"] if entity_filter(e)]
+        return [list(e)[0] for e in kept], entity_filter.skipped_count
+
+    def test_include_and_exclude_types(self):
+        assert self._kept(include_types=["ip_address", "prefix"]) == (["ip_address", "prefix", "ip_address"], 2)
+        assert self._kept(exclude_types=["ip_address"]) == (["site", "prefix", "asn"], 2)
+
+    def test_match_nested_field_and_value_list(self):
+        assert self._kept(match={"vrf.name": ["blue", "red"]}) == (["ip_address", "prefix"], 3)
+        assert self._kept(include_types=["ip_address"], match={"status": "reserved"})[0] == ["ip_address"]
+
+    def test_match_searches_lists_and_compares_as_text(self):
+        assert self._kept(match={"tags.name": "core"})[0] == ["prefix"]
+        assert self._kept(match={"asn": 65001})[0] == ["asn"]
+        assert self._kept(match={"missing": "x"}) == ([], 5)
+
+    @pytest.mark.skipif(not HAS_LOAD_DRYRUN, reason="Diode SDK not installed")
+    def test_load_parses_only_kept_entities(self, tmp_path, monkeypatch):
+        from ansible_collections.my0373.diode.plugins.module_utils import dryrun
+
+        path = tmp_path / "capture.json"
+        path.write_text(json.dumps(_IPAM_CAPTURE))
+        parsed = []
+        original = dryrun.ParseDict
+
+        def recording_parse(data, message):
+            parsed.append(len(data["entities"]))
+            return original(data, message)
+
+        monkeypatch.setattr(dryrun, "ParseDict", recording_parse)
+        entities = load_dryrun_entities(str(path), EntityFilter(include_types=["ip_address"]))
+
+        assert [e.ip_address.address for e in entities] == ["10.0.0.1/24", "10.0.1.1/24"]
+        assert parsed == [2]
+
+@pytest.mark.skipif(not HAS_LOAD_DRYRUN, reason="Diode SDK not installed")
+class TestCaptureWriter:
+    def _entities(self, path):
+        path.write_text('{"entities": [{"site": {"name": "Site-A"}}, {"device": {"name": "sw1"}}]}')
+        return load_dryrun_entities(str(path))
+
+    def test_writes_replayable_capture_per_chunk(self, tmp_path):
+        entities = self._entities(tmp_path / "source.json")
+        capture = CaptureWriter(
+            str(tmp_path / "audit"), "my app", app_version="2.0", sdk_name="diode-sdk-python",
+        )
+
+        first = capture.write(entities[:1])
+        second = capture.write(entities[1:], "emea", {"batch": "b1"})
+
+        assert capture.files == [first, second]
+        assert os.path.basename(first).startswith("my_app_")
+        assert [e.site.name for e in load_dryrun_entities(first)] == ["Site-A"]
+        with open(second) as fh:
+            request = json.load(fh)
+        assert request["stream"] == "emea"
+        assert request["metadata"] == {"batch": "b1"}
+        assert request["producer_app_name"] == "my app"
+        assert request["producer_app_version"] == "2.0"
+        assert request["sdk_name"] == "diode-sdk-python"
+
+    def test_default_stream_and_discovery(self, tmp_path):
+        entities = self._entities(tmp_path / "source.json")
+        capture = CaptureWriter(str(tmp_path / "audit"), "app")
+
+        path = capture.write(entities)
+
+        with open(path) as fh:
+            assert json.load(fh)["stream"] == "latest"
+        assert [p for p, _mtime in discover_dryrun_files(str(tmp_path / "audit"))] == [path]
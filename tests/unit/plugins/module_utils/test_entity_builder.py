@@ -13,6 +13,19 @@ from unittest.mock import MagicMock, patch
 import pytest
 
 
+class FakeRepeatedEntities(list):
+    """Stands in for the SDK's repeated ``Entity`` field."""
+
+    def add(self):
+        field = self
+
+        class Slot:
+            def CopyFrom(self, message):
+                field.append(message)
+
+        return Slot()
+
+
 @pytest.fixture
 def mock_sdk(monkeypatch):
     """Patch the SDK imports so entity_builder can be tested without the real SDK."""
@@ -51,6 +64,22 @@ def mock_sdk(monkeypatch):
         setattr(mock_ingester, name, mock_cls)
 
     import sys
+    from ansible_collections.my0373.diode.plugins import module_utils
+
+    # Put the real SDK and entity_builder back afterwards so later tests
+    # do not build entities from these mocks.
+    saved_modules = dict(
+        (name, sys.modules.get(name))
+        for name in (
+            "netboxlabs",
+            "netboxlabs.diode",
+            "netboxlabs.diode.sdk",
+            "netboxlabs.diode.sdk.ingester",
+            "ansible_collections.my0373.diode.plugins.module_utils.entity_builder",
+        )
+    )
+    saved_builder = getattr(module_utils, "entity_builder", None)
+
     sys.modules["netboxlabs"] = MagicMock()
     sys.modules["netboxlabs.diode"] = MagicMock()
     sys.modules["netboxlabs.diode.sdk"] = MagicMock()
@@ -63,9 +92,12 @@ def mock_sdk(monkeypatch):
 
     if "ansible_collections.my0373.diode.plugins.module_utils.entity_builder" in sys.modules:
         del sys.modules["ansible_collections.my0373.diode.plugins.module_utils.entity_builder"]
+    if saved_builder is not None:
+        del module_utils.entity_builder
 
     from ansible_collections.my0373.diode.plugins.module_utils import entity_builder
     entity_builder.HAS_DIODE_SDK = True
+    monkeypatch.setattr(entity_builder, "_shared_entities", FakeRepeatedEntities)
 
     for type_name, (kwarg, _) in list(entity_builder.ENTITY_TYPE_MAP.items()):
         cls_name_map = {
@@ -137,7 +169,17 @@ def mock_sdk(monkeypatch):
         if sdk_cls_name and sdk_cls_name in mock_classes:
             entity_builder.ENTITY_TYPE_MAP[type_name] = (kwarg, mock_classes[sdk_cls_name])
 
-    return mock_classes, entity_builder
+    yield mock_classes, entity_builder
+
+    for name, module in saved_modules.items():
+        if module is None:
+            sys.modules.pop(name, None)
+        else:
+            sys.modules[name] = module
+    if saved_builder is None:
+        del module_utils.entity_builder
+    else:
+        module_utils.entity_builder = saved_builder
 
 
 class TestBuildEntity:
@@ -276,3 +318,236 @@ class TestEntityTypeCoverage:
                 "type": type_name,
                 "data": {},
             })
+
+
+class FakeSite(object):
+    def __new__(cls, name: "str | None" = None, status: "str | None" = None):
+        return object.__new__(cls)
+
+
+class FakeDevice(object):
+    def __new__(
+        cls,
+        name: "str | None" = None,
+        device_type: "str | DeviceType | pb.DeviceType | None" = None,
+        position: "float | None" = None,
+        tags: "list[str | Tag | pb.Tag] | None" = None,
+        custom_fields: "dict[str, CustomFieldValue] | None" = None,
+    ):
+        return object.__new__(cls)
+
+
+@pytest.fixture
+def fake_schema(mock_sdk):
+    _, entity_builder = mock_sdk
+    entity_builder.ENTITY_TYPE_MAP["site"] = ("site", FakeSite)
+    entity_builder.ENTITY_TYPE_MAP["device"] = ("device", FakeDevice)
+    entity_builder._FIELD_TABLES.clear()
+    return entity_builder
+
+
+class TestValidateEntities:
+    def test_valid_entities_pass(self, fake_schema):
+        entities = [
+            {"type": "site", "data": "NYC"},
+            {"type": "site", "data": {"name": "NYC", "status": "active"}},
+            {"type": "device", "data": {
+                "name": "sw1", "device_type": {"model": "C9300"}, "position": 4,
+                "tags": ["a"], "custom_fields": {"x": {"text": "y"}},
+            }},
+            {"type": "device"},
+        ]
+
+        assert fake_schema.validate_entities(entities) == []
+
+    def test_reports_every_bad_index(self, fake_schema):
+        entities = [
+            {"type": "device", "data": {"devcie_type": "x", "name": 5}},
+            {"type": "site", "data": "ok"},
+            {"type": "devise", "data": {}},
+            {"data": {}},
+            "not-a-dict",
+            {"type": "device", "data": {"position": "4"}},
+            {"type": "site", "data": 7},
+        ]
+
+        invalid = fake_schema.validate_entities(entities)
+
+        assert [i["index"] for i in invalid] == [0, 2, 3, 4, 5, 6]
+        assert "did you mean 'device_type'" in invalid[0]["message"]
+        assert "field 'name' expects str, got int" in invalid[0]["message"]
+        assert "did you mean 'device'" in invalid[1]["message"]
+        assert invalid[2]["message"] == "missing 'type' field"
+        assert invalid[3]["type"] is None
+        assert "expects float or int, got str" in invalid[4]["message"]
+        assert "'data' must be a dict or string" in invalid[5]["message"]
+
+    def test_checks_routing_keys(self, fake_schema):
+        invalid = fake_schema.validate_entities([
+            {"type": "site", "data": "a", "stream": "emea", "metadata": {"k": "v"}},
+            {"type": "site", "data": "b", "stream": 5},
+            {"type": "site", "data": "c", "metadata": "x"},
+        ])
+
+        assert [(i["index"], i["message"]) for i in invalid] == [
+            (1, "'stream' must be a string, got int"),
+            (2, "'metadata' must be a dict, got str"),
+        ]
+
+    def test_field_table_is_compiled_once(self, fake_schema, monkeypatch):
+        fake_schema.field_table("device")
+        monkeypatch.setattr(fake_schema.inspect, "signature", MagicMock(side_effect=AssertionError))
+
+        assert "position" in fake_schema.field_table("device")[1]
+
+    def test_uninspectable_classes_are_not_checked(self, fake_schema):
+        assert fake_schema.validate_entities([{"type": "tag", "data": {"anything": 1}}]) == []
+
+    def test_message_lists_first_failures(self, fake_schema):
+        invalid = [{"index": i, "type": "site", "message": "bad"} for i in range(7)]
+
+        message = fake_schema.invalid_entities_message(invalid)
+
+        assert message.startswith("7 invalid entities: [0] bad; [1] bad")
+        assert message.endswith("(and 2 more)")
+
+
+class TestBuildEntitiesSkipping:
+    def test_collects_build_failures_with_input_indices(self, fake_schema, monkeypatch):
+        def build(entity_dict):
+            if entity_dict["data"] == "bad":
+                raise TypeError("unexpected keyword")
+            return entity_dict["data"]
+
+        monkeypatch.setattr(fake_schema, "build_entity", build)
+        entity_dicts = [
+            {"type": "site", "data": "a"},
+            {"type": "site", "data": "invalid"},
+            {"type": "site", "data": "bad"},
+            {"type": "site", "data": "b"},
+        ]
+        invalid = [{"index": 1, "type": "site", "message": "invalid"}]
+
+        entities, indices, rejected = fake_schema.build_entities_skipping(entity_dicts, invalid)
+
+        assert entities == ["a", "b"]
+        assert indices == [0, 3]
+        assert [(r["index"], r["message"]) for r in rejected] == [
+            (1, "invalid"), (2, "unexpected keyword"),
+        ]
+
+
+class FakeInterface(object):
+    def __new__(cls, name: "str | None" = None, device: "str | Device | pb.Device | None" = None):
+        return object.__new__(cls)
+
+
+class FakeIPAddress(object):
+    def __new__(
+        cls,
+        address: "str | None" = None,
+        assigned_object_interface: "Interface | pb.Interface | None" = None,
+    ):
+        return object.__new__(cls)
+
+
+class FakeNetboxDevice(object):
+    def __new__(
+        cls,
+        name: "str | None" = None,
+        site: "str | Site | pb.Site | None" = None,
+        primary_ip4: "str | IPAddress | pb.IPAddress | None" = None,
+        virtual_chassis: "str | VirtualChassis | None" = None,
+    ):
+        return object.__new__(cls)
+
+
+class FakeVirtualChassis(object):
+    def __new__(cls, name: "str | None" = None, master: "str | Device | None" = None):
+        return object.__new__(cls)
+
+
+def _named(name, cls):
+    """Subclass ``cls`` under the SDK class name its annotations refer to."""
+    return type(name, (cls,), {})
+
+
+class TestDependencyTiers:
+    def test_parents_come_first_and_cycles_share_a_tier(self, mock_sdk, monkeypatch):
+        _, entity_builder = mock_sdk
+        monkeypatch.setattr(entity_builder, "ENTITY_TYPE_MAP", {
+            "site": ("site", _named("Site", FakeSite)),
+            "device": ("device", _named("Device", FakeNetboxDevice)),
+            "virtual_chassis": ("virtual_chassis", _named("VirtualChassis", FakeVirtualChassis)),
+            "interface": ("interface", _named("Interface", FakeInterface)),
+            "ip_address": ("ip_address", _named("IPAddress", FakeIPAddress)),
+        })
+        entity_builder._DEPENDENCY_TIERS.clear()
+
+        tiers = entity_builder.dependency_tiers()
+
+        # primary_ip4 is a back-reference, so it does not pull IPs before devices.
+        assert entity_builder.type_dependencies("device") == {"site", "virtual_chassis"}
+        assert tiers == {
+            "site": 0,
+            "device": 1,
+            "virtual_chassis": 1,
+            "interface": 2,
+            "ip_address": 3,
+        }
+
+
+class TestDependencyTiersWithSdk:
+    def test_cables_come_after_what_they_terminate_on(self):
+        pytest.importorskip("netboxlabs.diode.sdk.ingester")
+        from ansible_collections.my0373.diode.plugins.module_utils import entity_builder
+
+        if not entity_builder.HAS_DIODE_SDK:
+            pytest.skip("Diode SDK is not installed")
+        entity_builder._DEPENDENCY_TIERS.clear()
+        tiers = entity_builder.dependency_tiers()
+
+        assert tiers["site"] < tiers["device"] < tiers["interface"] < tiers["cable"]
+        assert tiers["interface"] < tiers["ip_address"]
+        for termination in ("front_port", "rear_port", "power_port", "circuit_termination"):
+            assert tiers[termination] < tiers["cable"]
+
+
+class TestBuildEntitiesWithSdk:
+    def _builder(self):
+        pytest.importorskip("netboxlabs.diode.sdk.ingester")
+        from ansible_collections.my0373.diode.plugins.module_utils import entity_builder
+
+        if not entity_builder.HAS_DIODE_SDK:
+            pytest.skip("Diode SDK is not installed")
+        return entity_builder
+
+    def test_builds_plain_lists_into_one_arena(self):
+        entity_builder = self._builder()
+        entity_dicts = [
+            {"type": "ip_address", "data": {"address": "10.0.0.{0}/24".format(i)}}
+            for i in range(3)
+        ]
+
+        entities = entity_builder.build_entities(entity_dicts)
+
+        assert [e.ip_address.address for e in entities] == [
+            "10.0.0.0/24", "10.0.0.1/24", "10.0.0.2/24",
+        ]
+        assert len(entity_dicts) == 3
+        assert entity_dicts[0] == {"type": "ip_address", "data": {"address": "10.0.0.0/24"}}
+
+    def test_skipping_keeps_input_indices(self):
+        entity_builder = self._builder()
+        entity_dicts = [
+            {"type": "site", "data": {"name": "A"}},
+            {"type": "site", "data": {"nmae": "B"}},
+            {"type": "site", "data": {"name": "C"}},
+        ]
+
+        entities, indices, rejected = entity_builder.build_entities_skipping(entity_dicts)
+
+        assert [e.site.name for e in entities] == ["A", "C"]
+        assert indices == [0, 2]
+        assert [r["index"] for r in rejected] == [1]
+        assert len(entity_dicts) == 3
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Unit tests for import_profile module_utils."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import sys
+from unittest.mock import MagicMock
+
+import pytest
+
+from ansible_collections.my0373.diode.plugins.module_utils import import_profile
+
+
+@pytest.fixture
+def profiler(tmp_path, monkeypatch):
+    """Install a profiler over a throwaway package that imports a submodule."""
+    package = tmp_path / "profiled_pkg"
+    package.mkdir()
+    (package / "__init__.py").write_text("import time\ntime.sleep(0.02)\nfrom . import child\n")
+    (package / "child.py").write_text("import time\ntime.sleep(0.05)\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    instance = import_profile.ImportProfiler()
+    monkeypatch.setattr(sys, "meta_path", [instance] + sys.meta_path)
+    yield instance
+    for name in ("profiled_pkg", "profiled_pkg.child"):
+        sys.modules.pop(name, None)
+
+
+class TestImportProfiler:
+    def test_nested_imports_split_self_and_cumulative_time(self, profiler):
+        import profiled_pkg  # noqa: F401
+
+        own, total = profiler.records["profiled_pkg"]
+        child_own, child_total = profiler.records["profiled_pkg.child"]
+        assert child_own == pytest.approx(child_total)
+        assert child_total >= 0.05
+        assert total >= own + child_total - 1e-6
+        assert own < child_total
+
+    def test_report_ranks_modules_by_self_time(self, profiler):
+        import profiled_pkg  # noqa: F401
+
+        report = profiler.report(top=1)
+
+        assert report["module_count"] == 2
+        assert [item["module"] for item in report["modules"]] == ["profiled_pkg.child"]
+        assert report["import_seconds"] >= 0.07
+        assert isinstance(report["grpc_imported"], bool)
+
+
+class TestAttachImportProfile:
+    def test_results_gain_the_profile_when_enabled(self, monkeypatch):
+        monkeypatch.setattr(import_profile, "_PROFILER", import_profile.ImportProfiler())
+        module = MagicMock()
+        exit_json = module.exit_json
+
+        import_profile.attach_import_profile(module)
+        module.exit_json(changed=False)
+
+        assert "import_profile" in exit_json.call_args[1]
+        assert exit_json.call_args[1]["changed"] is False
+
+    def test_nothing_changes_when_disabled(self, monkeypatch):
+        monkeypatch.setattr(import_profile, "_PROFILER", None)
+        module = MagicMock()
+        exit_json = module.exit_json
+
+        import_profile.attach_import_profile(module)
+
+        assert module.exit_json is exit_json
+
+    @pytest.mark.parametrize("value,expected", [("1", True), ("yes", True), ("", False), ("0", False)])
+    def test_environment_switch(self, monkeypatch, value, expected):
+        monkeypatch.setenv(import_profile.ENV_VAR, value)
+
+        assert import_profile.profiling_enabled() is expected
+
+
+def test_process_seconds_is_positive_or_unknown():
+    seconds = import_profile.process_seconds()
+
+    assert seconds is None or seconds >= 0
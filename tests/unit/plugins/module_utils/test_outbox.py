@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Unit tests for outbox module_utils.
+
+Segment framing, ordering, rewriting and locking are tested with a
+stand-in for ``IngestRequest`` so the tests do not depend on which SDK
+modules other test files have mocked.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from ansible_collections.my0373.diode.plugins.module_utils import outbox
+
+
+class FakeRequest(object):
+    def __init__(self, stream="", entities=()):
+        self.stream = stream
+        self.entities = list(entities)
+
+    def SerializeToString(self):
+        return json.dumps({"stream": self.stream, "entities": self.entities}).encode()
+
+    @classmethod
+    def FromString(cls, data):
+        return cls(**json.loads(data.decode()))
+
+
+class FakeEntity(object):
+    def __init__(self, kind):
+        self.kind = kind
+
+    def WhichOneof(self, name):
+        return self.kind
+
+
+@pytest.fixture
+def fake_pb(monkeypatch):
+    monkeypatch.setattr(
+        outbox, "ingester_pb2", SimpleNamespace(IngestRequest=FakeRequest), raising=False
+    )
+    # Two entities per chunk; entities serialize as their kind.
+    monkeypatch.setattr(
+        outbox,
+        "chunk_entities",
+        lambda entities, size: [
+            [e.kind for e in entities[i:i + 2]] for i in range(0, len(entities), 2)
+        ],
+    )
+
+
+class TestOutbox:
+    def test_enqueue_round_trip(self, tmp_path, fake_pb):
+        entities = [FakeEntity("site"), FakeEntity("device"), FakeEntity("device")]
+
+        result = outbox.enqueue_entities(str(tmp_path / "ob"), entities, stream="s1")
+
+        assert result["queued_count"] == 3
+        assert result["chunk_count"] == 2
+        assert result["entity_type_counts"] == {"site": 1, "device": 2}
+        assert result["total_bytes"] == os.path.getsize(result["segment"])
+        records = outbox.read_segment(result["segment"])
+        assert [r.entities for r in records] == [["site", "device"], ["device"]]
+        assert {r.stream for r in records} == {"s1"}
+
+    def test_enqueue_batches_keeps_stream_per_record(self, tmp_path, fake_pb):
+        batches = [
+            ("emea", None, [FakeEntity("site"), FakeEntity("device"), FakeEntity("device")]),
+            ("apac", None, [FakeEntity("site")]),
+        ]
+
+        result = outbox.enqueue_batches(str(tmp_path), batches)
+
+        assert result["queued_count"] == 4
+        assert result["entity_type_counts"] == {"site": 2, "device": 2}
+        records = outbox.read_segment(result["segment"])
+        assert [(r.stream, r.entities) for r in records] == [
+            ("emea", ["site", "device"]), ("emea", ["device"]), ("apac", ["site"]),
+        ]
+
+    def test_segments_listed_in_enqueue_order(self, tmp_path, fake_pb):
+        paths = [
+            outbox.enqueue_entities(str(tmp_path), [FakeEntity("site")])["segment"]
+            for _ in range(3)
+        ]
+        (tmp_path / ".tmpfile.tmp").write_text("partial")
+
+        assert outbox.list_segments(str(tmp_path)) == paths
+        assert outbox.list_segments(str(tmp_path / "missing")) == []
+
+    def test_rewrite_keeps_only_given_records(self, tmp_path, fake_pb):
+        entities = [FakeEntity("a"), FakeEntity("b"), FakeEntity("c")]
+        path = outbox.enqueue_entities(str(tmp_path), entities)["segment"]
+        records = outbox.read_segment(path)
+
+        outbox.rewrite_segment(path, records[1:])
+
+        assert [r.entities for r in outbox.read_segment(path)] == [["c"]]
+
+    def test_truncated_segment_raises(self, tmp_path, fake_pb):
+        path = outbox.enqueue_entities(str(tmp_path), [FakeEntity("site")])["segment"]
+        with open(path, "rb") as fh:
+            data = fh.read()
+        with open(path, "wb") as fh:
+            fh.write(data[:-3])
+
+        with pytest.raises(ValueError, match="truncated"):
+            outbox.read_segment(path)
+
+    def test_varint_round_trip(self):
+        for value in (0, 1, 127, 128, 300, 2 ** 31):
+            encoded = outbox._encode_varint(value)
+            assert outbox._decode_varint(encoded, 0) == (value, len(encoded))
+
+    def test_lock_is_exclusive(self, tmp_path):
+        with outbox.outbox_lock(str(tmp_path)):
+            with pytest.raises(outbox.OutboxBusyError):
+                with outbox.outbox_lock(str(tmp_path)):
+                    pass
+        with outbox.outbox_lock(str(tmp_path)):
+            pass
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Unit tests for result hooks run before a module exits or fails."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+
+import pytest
+
+from ansible_collections.my0373.diode.plugins.module_utils import import_profile
+from ansible_collections.my0373.diode.plugins.module_utils.result_hooks import (
+    add_result_hook,
+)
+from ansible_collections.my0373.diode.plugins.module_utils.tracing import attach_tracer
+
+
+class FakeModule(object):
+    """Mirrors AnsibleModule's signatures: ``fail_json(msg, **kwargs)``."""
+
+    check_mode = False
+
+    def __init__(self, **params):
+        self.params = params
+        self.results = []
+        self.warnings = []
+
+    def warn(self, warning):
+        self.warnings.append(warning)
+
+    def exit_json(self, **kwargs):
+        self.results.append(kwargs)
+        raise SystemExit(0)
+
+    def fail_json(self, msg, **kwargs):
+        kwargs["msg"] = msg
+        self.results.append(kwargs)
+        raise SystemExit(1)
+
+
+class TestAddResultHook:
+    def test_hooks_run_latest_first_and_wrap_once(self):
+        module = FakeModule()
+        calls = []
+        add_result_hook(module, lambda result, failed: calls.append(("first", failed)))
+        exit_json = module.exit_json
+        add_result_hook(module, lambda result, failed: calls.append(("second", failed)))
+
+        assert module.exit_json is exit_json
+        with pytest.raises(SystemExit):
+            module.exit_json(changed=True)
+
+        assert calls == [("second", False), ("first", False)]
+        assert module.results == [{"changed": True}]
+
+    def test_positional_fail_message_reaches_hooks(self):
+        module = FakeModule()
+        seen = []
+
+        def hook(result, failed):
+            seen.append((result["msg"], failed))
+            result["extra"] = 1
+
+        add_result_hook(module, hook)
+        with pytest.raises(SystemExit):
+            module.fail_json("boom", rejected=[])
+
+        assert seen == [("boom", True)]
+        assert module.results == [{"msg": "boom", "rejected": [], "extra": 1}]
+
+    def test_tracing_and_import_profile_share_the_hooks(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(import_profile, "_PROFILER", import_profile.ImportProfiler())
+        path = str(tmp_path / "spans.jsonl")
+        module = FakeModule(trace_file=path)
+        import_profile.attach_import_profile(module)
+        attach_tracer(module, "diode_ingest")
+
+        with pytest.raises(SystemExit):
+            module.fail_json("Ingest failed")
+
+        result = module.results[0]
+        assert result["msg"] == "Ingest failed"
+        assert result["trace_id"]
+        assert "import_profile" in result
+        with open(path) as fh:
+            spans = json.loads(fh.readline())["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        assert spans[0]["status"]["message"] == "Ingest failed"
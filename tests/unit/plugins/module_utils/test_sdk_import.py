@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Unit tests for sdk_import module_utils.
+
+Each test runs in a fresh interpreter: what matters is which modules a
+cold start imports, and this process has long since imported grpc.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+pytest.importorskip("netboxlabs.diode.sdk")
+
+MODULES = "ansible_collections.my0373.diode.plugins.modules"
+
+
+def _run(code, args=None):
+    env = dict(os.environ)
+    root = os.path.abspath(__file__).split(os.sep + "ansible_collections" + os.sep)[0]
+    env["PYTHONPATH"] = os.pathsep.join([root, env.get("PYTHONPATH", "")])
+    code = textwrap.dedent(code)
+    if args is not None:
+        code = "from ansible.module_utils import basic\nbasic._ANSIBLE_ARGS = {0!r}\nbasic._ANSIBLE_PROFILE = \"legacy\"\n{1}".format(
+            json.dumps({"ANSIBLE_MODULE_ARGS": args}).encode(), code
+        )
+    output = subprocess.check_output([sys.executable, "-c", code], env=env)
+    return output.decode().strip().splitlines()
+
+
+class TestDeferredSdkPackage:
+    def test_ingester_imports_without_grpc_and_package_loads_later(self):
+        lines = _run("""
+            import sys
+            from ansible_collections.my0373.diode.plugins.module_utils.sdk_import import (
+                defer_sdk_package, load_sdk_package,
+            )
+            defer_sdk_package()
+            from netboxlabs.diode.sdk.ingester import Site
+            print("grpc" in sys.modules)
+            print(load_sdk_package().DiodeClient.__name__)
+        """, args={})
+
+        assert lines == ["False", "DiodeClient"]
+
+    def test_controller_keeps_the_real_package(self):
+        lines = _run("""
+            import sys
+            from ansible_collections.my0373.diode.plugins.module_utils import dryrun
+            import netboxlabs.diode.sdk as sdk
+            print(hasattr(sdk, "_diode_deferred_init"))
+            print(sdk.DiodeClient.__name__)
+        """)
+
+        assert lines == ["False", "DiodeClient"]
+
+    @pytest.mark.parametrize("name", ["diode_info", "diode_ingest", "diode_dry_run", "diode_replay", "diode_flush"])
+    def test_modules_import_without_grpc(self, name):
+        lines = _run("""
+            import sys
+            import {0}.{1}
+            print("grpc" in sys.modules)
+        """.format(MODULES, name), args={})
+
+        assert lines == ["False"]
+
+    def test_check_mode_builds_and_sizes_without_grpc(self):
+        lines = _run("""
+            import sys
+            from {0} import diode_ingest
+            try:
+                diode_ingest.main()
+            except SystemExit:
+                pass
+            print("grpc" in sys.modules)
+        """.format(MODULES), args={
+            "target": "grpc://localhost:8080/diode",
+            "app_name": "test",
+            "entities": [{"type": "site", "data": {"name": "Site-A"}}],
+            "_ansible_check_mode": True,
+        })
+
+        result = json.loads(lines[-2])
+        assert result["changed"] is True
+        assert result["ingested_count"] == 1
+        assert lines[-1] == "False"
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Unit tests for the last-sent snapshot used by ``--diff``."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import os
+
+import pytest
+
+from ansible_collections.my0373.diode.plugins.module_utils import snapshot
+from ansible_collections.my0373.diode.plugins.module_utils.snapshot import (
+    diff_snapshot,
+    key_fields,
+    snapshot_entries,
+    snapshot_entry,
+    snapshot_path,
+    sorted_entries,
+    update_snapshot,
+)
+
+
+def _sites(*names, **data):
+    return [{"type": "site", "data": dict(data, name=name)} for name in names]
+
+
+def _entries(entity_dicts):
+    return sorted_entries(snapshot_entries(entity_dicts))
+
+
+class TestNaturalKey:
+    def test_key_fields_include_parents(self):
+        assert key_fields("site") == ("name",)
+        assert key_fields("interface") == ("device", "module", "name")
+        assert key_fields("ip_address") == ("address",)
+        assert key_fields("device_type") == ("manufacturer", "model")
+
+    def test_type_without_name_field_keys_on_data(self):
+        assert key_fields("cable") is None
+        key, _data = snapshot_entry({"type": "cable", "data": {"label": "c1"}})
+        assert json.loads(key) == ["cable", {"label": "c1"}]
+
+    def test_shorthand_matches_dict_form(self):
+        assert snapshot_entry({"type": "site", "data": "NYC"}) == snapshot_entry(
+            {"type": "site", "data": {"name": "NYC"}}
+        )
+
+    def test_key_ignores_non_key_fields(self):
+        first, _ = snapshot_entry({"type": "site", "data": {"name": "NYC", "status": "active"}})
+        second, _ = snapshot_entry({"type": "site", "data": {"status": "planned", "name": "NYC"}})
+        assert first == second
+
+
+class TestSortedEntries:
+    def test_sorted_by_type_then_key_and_last_wins(self):
+        entity_dicts = [
+            {"type": "site", "data": {"name": "B"}},
+            {"type": "device", "data": {"name": "sw1"}},
+            {"type": "site", "data": {"name": "A", "status": "planned"}},
+            {"type": "site", "data": {"name": "A", "status": "active"}},
+        ]
+
+        entries = _entries(entity_dicts)
+
+        assert [json.loads(key)[0] for key, _data in entries] == ["device", "site", "site"]
+        assert json.loads(entries[1][1]) == {"name": "A", "status": "active"}
+
+    def test_skips_rejected_indexes(self):
+        entries = sorted_entries(snapshot_entries(_sites("A", "B")), skip=[0])
+        assert [json.loads(key)[1] for key, _data in entries] == [["B"]]
+
+
+class TestDiffSnapshot:
+    def test_everything_is_added_without_snapshot(self, tmp_path):
+        result = diff_snapshot(str(tmp_path / "none.snap"), _entries(_sites("A", "B")))
+
+        assert (result["added"], result["changed"], result["unchanged"]) == (2, 0, 0)
+        assert result["before"] == ""
+        assert result["after"].count("\n") == 2
+
+    def test_added_changed_unchanged(self, tmp_path):
+        path = str(tmp_path / "t.snap")
+        update_snapshot(path, _entries(_sites("A", "B", status="active")))
+
+        current = _sites("A", status="active") + _sites("B", status="planned") + _sites("C")
+        result = diff_snapshot(path, _entries(current))
+
+        assert (result["added"], result["changed"], result["unchanged"]) == (1, 1, 1)
+        assert '"status":"active"' in result["before"]
+        assert '"status":"planned"' in result["after"]
+        assert '"C"' in result["after"]
+
+    def test_limit_summarises_the_rest(self, tmp_path):
+        result = diff_snapshot(str(tmp_path / "t.snap"), _entries(_sites("A", "B", "C")), limit=1)
+
+        assert result["added"] == 3
+        assert "2 more added or changed entities not shown" in result["after"]
+
+    def test_index_skips_to_the_needed_block(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(snapshot, "INDEX_INTERVAL", 4)
+        path = str(tmp_path / "t.snap")
+        names = ["n{0:04d}".format(i) for i in range(200)]
+        update_snapshot(path, _entries(_sites(*names)))
+
+        reads = []
+        original = snapshot._Reader._next
+
+        def counting_next(reader):
+            record = original(reader)
+            reads.append(record)
+            return record
+
+        monkeypatch.setattr(snapshot._Reader, "_next", counting_next)
+        current = _sites("n0150") + _sites("n0151", status="active")
+        result = diff_snapshot(path, _entries(current))
+
+        assert (result["added"], result["changed"], result["unchanged"]) == (0, 1, 1)
+        assert len(reads) < 10
+
+    def test_stale_index_is_ignored(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(snapshot, "INDEX_INTERVAL", 2)
+        path = str(tmp_path / "t.snap")
+        update_snapshot(path, _entries(_sites("A", "B", "C", "D")))
+        with open(str(tmp_path / "t.idx"), "w") as fh:
+            json.dump({"size": 1, "blocks": [["x", 999]]}, fh)
+
+        result = diff_snapshot(path, _entries(_sites("D")))
+
+        assert result["unchanged"] == 1
+
+
+class TestUpdateSnapshot:
+    def test_merges_and_keeps_other_entities(self, tmp_path):
+        path = str(tmp_path / "t.snap")
+        update_snapshot(path, _entries(_sites("A", "C")))
+        update_snapshot(path, _entries(_sites("B") + _sites("C", status="active")))
+
+        with open(path) as fh:
+            lines = fh.read().splitlines()
+
+        assert [json.loads(line.split("\t")[0])[1] for line in lines] == [["A"], ["B"], ["C"]]
+        assert json.loads(lines[2].split("\t")[1]) == {"name": "C", "status": "active"}
+        result = diff_snapshot(path, _entries(_sites("A", "B") + _sites("C", status="active")))
+        assert result["unchanged"] == 3
+
+    def test_failed_update_leaves_no_temporary_files(self, tmp_path, monkeypatch):
+        path = str(tmp_path / "t.snap")
+        update_snapshot(path, _entries(_sites("A")))
+        rename = snapshot.os.rename
+
+        def failing_rename(src, dst):
+            if dst == path:
+                raise OSError("disk full")
+            rename(src, dst)
+
+        monkeypatch.setattr(snapshot.os, "rename", failing_rename)
+        with pytest.raises(OSError):
+            update_snapshot(path, _entries(_sites("B")))
+
+        assert not [name for name in os.listdir(str(tmp_path)) if name.endswith(".tmp")]
+        result = diff_snapshot(path, _entries(_sites("A")))
+        assert result["unchanged"] == 1
+
+    def test_snapshot_path_is_per_target(self, tmp_path):
+        assert snapshot_path(str(tmp_path), "grpc://a") != snapshot_path(str(tmp_path), "grpc://b")
+        assert snapshot_path(str(tmp_path), "grpc://a").endswith(".snap")
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Unit tests for spool module_utils."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import os
+
+import pytest
+
+from ansible_collections.my0373.diode.plugins.module_utils.spool import (
+    append_entities,
+    check_private_dir,
+    clear_spool,
+    read_spool,
+)
+
+
+class TestSpool:
+    def test_round_trips_entities_per_host(self, tmp_path):
+        spool = str(tmp_path / "spool")
+        append_entities(spool, "web-02", [{"type": "site", "data": "b"}])
+        append_entities(spool, "web-01", [{"type": "site", "data": "a"}])
+        append_entities(spool, "web-01", [{"type": "device", "data": {"name": "x"}}])
+
+        entities, files = read_spool(spool)
+
+        assert entities == [
+            {"type": "site", "data": "a"},
+            {"type": "device", "data": {"name": "x"}},
+            {"type": "site", "data": "b"},
+        ]
+        assert len(files) == 2
+
+    def test_unsafe_host_names_are_sanitised(self, tmp_path):
+        path = append_entities(str(tmp_path), "../evil host", [{"type": "site", "data": "a"}])
+
+        assert path.startswith(str(tmp_path))
+        assert read_spool(str(tmp_path))[0] == [{"type": "site", "data": "a"}]
+
+    def test_missing_spool_is_empty(self, tmp_path):
+        assert read_spool(str(tmp_path / "nope")) == ([], [])
+
+    def test_clear_removes_flushed_files(self, tmp_path):
+        append_entities(str(tmp_path), "h1", [{"type": "site", "data": "a"}])
+        _, files = read_spool(str(tmp_path))
+
+        clear_spool(files)
+        clear_spool(files)
+
+        assert read_spool(str(tmp_path)) == ([], [])
+
+    def test_corrupt_line_raises(self, tmp_path):
+        (tmp_path / "h1.jsonl").write_text("{not json\n")
+
+        with pytest.raises(ValueError, match="h1.jsonl line 1"):
+            read_spool(str(tmp_path))
+
+    def test_unserializable_entity_names_its_index(self, tmp_path):
+        spool = str(tmp_path / "spool")
+
+        with pytest.raises(ValueError, match="entity 1"):
+            append_entities(spool, "h1", [{"type": "site", "data": "a"}, {"data": object()}])
+
+        assert read_spool(spool) == ([], [])
+
+
+class TestCheckPrivateDir:
+    def test_creates_missing_dir_with_mode_0700(self, tmp_path):
+        spool = str(tmp_path / "spool")
+
+        check_private_dir(spool, create=True)
+
+        assert os.stat(spool).st_mode & 0o777 == 0o700
+
+    def test_missing_dir_is_left_missing(self, tmp_path):
+        spool = str(tmp_path / "spool")
+
+        check_private_dir(spool)
+
+        assert not os.path.exists(spool)
+
+    def test_rejects_open_existing_dir(self, tmp_path):
+        spool = tmp_path / "spool"
+        spool.mkdir()
+        os.chmod(str(spool), 0o777)
+
+        with pytest.raises(ValueError, match="must be 0700"):
+            check_private_dir(str(spool), create=True)
+
+    def test_rejects_symlink(self, tmp_path):
+        target = tmp_path / "target"
+        target.mkdir(mode=0o700)
+        link = tmp_path / "spool"
+        link.symlink_to(target)
+
+        with pytest.raises(ValueError, match="not a directory"):
+            check_private_dir(str(link))
+
+    def test_rejects_dir_owned_by_another_user(self, tmp_path, monkeypatch):
+        spool = tmp_path / "spool"
+        spool.mkdir(mode=0o700)
+        monkeypatch.setattr(os, "getuid", lambda: os.stat(str(spool)).st_uid + 1)
+
+        with pytest.raises(ValueError, match="owned by uid"):
+            check_private_dir(str(spool))
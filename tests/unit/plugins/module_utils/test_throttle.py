@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Unit tests for throttle module_utils."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import asyncio
+
+import pytest
+
+from ansible_collections.my0373.diode.plugins.module_utils.throttle import (
+    Throttle,
+    TokenBucket,
+    create_throttle,
+    server_retry_hint,
+)
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class FakeStatus(object):
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeRpcError(Exception):
+    def __init__(self, status, trailers=()):
+        super(FakeRpcError, self).__init__(status)
+        self._status = FakeStatus(status)
+        self._trailers = trailers
+
+    def code(self):
+        return self._status
+
+    def trailing_metadata(self):
+        return self._trailers
+
+
+class TestTokenBucket:
+    def test_allows_burst_then_paces(self):
+        clock = FakeClock()
+        bucket = TokenBucket(10, clock=clock)
+
+        assert bucket.reserve(10) == 0.0
+        assert bucket.reserve(5) == 0.5
+
+    def test_refills_over_time(self):
+        clock = FakeClock()
+        bucket = TokenBucket(10, clock=clock)
+        bucket.reserve(10)
+
+        clock.now = 1.0
+
+        assert bucket.reserve(10) == 0.0
+
+    def test_oversized_request_goes_into_debt(self):
+        clock = FakeClock()
+        bucket = TokenBucket(100, clock=clock)
+
+        assert bucket.reserve(300) == 2.0
+        assert bucket.reserve(100) == 3.0
+
+
+class TestThrottle:
+    def test_holds_average_rate(self):
+        clock = FakeClock()
+        throttle = Throttle(max_entities_per_second=100, clock=clock, sleep=clock.sleep)
+
+        for _ in range(10):
+            throttle.wait(50, 0)
+
+        # 500 entities at 100/s with a 100-entity burst takes 4 seconds.
+        assert clock.now == 4.0
+        assert throttle.stats()["throttle_wait_seconds"] == 4.0
+
+    def test_stricter_limit_wins(self):
+        clock = FakeClock()
+        throttle = Throttle(
+            max_entities_per_second=1000,
+            max_bytes_per_second=1000,
+            clock=clock,
+            sleep=clock.sleep,
+        )
+
+        throttle.wait(1, 1000)
+        throttle.wait(1, 2000)
+
+        assert clock.now == 2.0
+
+    def test_wait_async(self):
+        clock = FakeClock()
+        throttle = Throttle(max_entities_per_second=10, clock=clock)
+
+        assert asyncio.run(throttle.wait_async(10, 0)) == 0.0
+
+    def test_concurrent_waits_count_wall_clock_time(self):
+        clock = FakeClock()
+        throttle = Throttle(max_bytes_per_second=1000, clock=clock)
+
+        async def send_three():
+            return await asyncio.gather(
+                throttle.wait_async(1, 1000),
+                throttle.wait_async(1, 10),
+                throttle.wait_async(1, 10),
+            )
+
+        delays = asyncio.run(send_three())
+
+        # The senders wait side by side, so only the longest wait counts.
+        assert delays == [0.0, 0.01, 0.02]
+        assert throttle.stats()["throttle_wait_seconds"] == 0.02
+
+    def test_retry_delay_uses_pushback_trailer(self):
+        throttle = Throttle(respect_server_hints=True)
+        exc = FakeRpcError("RESOURCE_EXHAUSTED", [("grpc-retry-pushback-ms", "1500")])
+
+        assert throttle.retry_delay(exc, 0) == 1.5
+        assert throttle.stats()["server_hint_retries"] == 1
+
+    def test_retry_delay_reads_cause_of_wrapped_error(self):
+        throttle = Throttle(respect_server_hints=True)
+        try:
+            raise Exception("wrapped") from FakeRpcError("UNAVAILABLE", [("retry-after", "3")])
+        except Exception as exc:
+            assert throttle.retry_delay(exc, 0) == 3.0
+
+    def test_retry_delay_backs_off_without_hint(self):
+        throttle = Throttle(respect_server_hints=True)
+        exc = FakeRpcError("UNAVAILABLE")
+
+        assert throttle.retry_delay(exc, 0) == 1.0
+        assert throttle.retry_delay(exc, 3) == 8.0
+
+    def test_no_retry_for_other_errors_or_when_disabled(self):
+        assert Throttle(respect_server_hints=True).retry_delay(
+            FakeRpcError("INVALID_ARGUMENT"), 0
+        ) is None
+        assert Throttle().retry_delay(FakeRpcError("UNAVAILABLE"), 0) is None
+        assert Throttle(respect_server_hints=True).retry_delay(
+            FakeRpcError("UNAVAILABLE"), 5
+        ) is None
+
+
+class TestServerRetryHint:
+    def test_no_trailers(self):
+        assert server_retry_hint(ValueError("x")) is None
+
+    def test_ignores_malformed_values(self):
+        assert server_retry_hint(FakeRpcError("UNAVAILABLE", [("retry-after", "soon")])) is None
+
+
+class TestCreateThrottle:
+    def test_returns_none_when_unlimited(self):
+        params = {
+            "max_entities_per_second": None,
+            "max_bytes_per_second": None,
+            "respect_server_hints": False,
+        }
+        assert create_throttle(params) is None
+
+    def test_creates_when_limited(self):
+        throttle = create_throttle({"max_bytes_per_second": 1024})
+        assert isinstance(throttle, Throttle)
+
+    @pytest.mark.parametrize("name", ["max_entities_per_second", "max_bytes_per_second"])
+    def test_rejects_negative_rates(self, name):
+        with pytest.raises(ValueError, match="{0} must not be negative".format(name)):
+            create_throttle({name: -1})
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Unit tests for the on-disk OAuth2 token cache."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import base64
+import json
+import multiprocessing
+import os
+import stat
+import time
+
+import pytest
+
+from ansible_collections.my0373.diode.plugins.module_utils import token_cache
+from ansible_collections.my0373.diode.plugins.module_utils.token_cache import (
+    DEFAULT_TTL_SECONDS,
+    EXPIRY_MARGIN_SECONDS,
+    TokenCache,
+    token_expiry,
+)
+
+pytestmark = pytest.mark.skipif(
+    not token_cache.HAS_CRYPTOGRAPHY, reason="cryptography is not installed"
+)
+
+
+def _jwt(claims):
+    payload = base64.urlsafe_b64encode(json.dumps(claims).encode()).rstrip(b"=").decode()
+    return "eyJhbGciOiJub25lIn0.{0}.sig".format(payload)
+
+
+def _cache(cache_dir, secret="secret", clock=time.time):
+    return TokenCache(str(cache_dir), "localhost:8080/diode", "client", secret, "diode:ingest", clock=clock)
+
+
+class Fetcher(object):
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return "token-{0}".format(self.calls)
+
+
+class TestTokenExpiry:
+    def test_uses_jwt_exp_claim(self):
+        assert token_expiry(_jwt({"exp": 5000}), 1000) == 5000 - EXPIRY_MARGIN_SECONDS
+
+    def test_opaque_token_uses_default_ttl(self):
+        assert token_expiry("ory_at_abc", 1000) == 1000 + DEFAULT_TTL_SECONDS - EXPIRY_MARGIN_SECONDS
+
+    def test_malformed_jwt_uses_default_ttl(self):
+        assert token_expiry("a.!!!.c", 1000) == 1000 + DEFAULT_TTL_SECONDS - EXPIRY_MARGIN_SECONDS
+
+
+class TestTokenCache:
+    def test_fetches_once_and_shares_between_instances(self, tmp_path):
+        fetch = Fetcher()
+        assert _cache(tmp_path).get(fetch) == "token-1"
+        assert _cache(tmp_path).get(fetch) == "token-1"
+        assert fetch.calls == 1
+
+    def test_refetches_after_expiry(self, tmp_path):
+        now = [1000.0]
+        cache = _cache(tmp_path, clock=lambda: now[0])
+        fetch = Fetcher()
+        cache.get(fetch)
+        now[0] += DEFAULT_TTL_SECONDS - EXPIRY_MARGIN_SECONDS
+        assert cache.get(fetch) == "token-2"
+
+    def test_never_returns_stale_token(self, tmp_path):
+        cache = _cache(tmp_path)
+        fetch = Fetcher()
+        token = cache.get(fetch)
+        assert cache.get(fetch, stale=token) == "token-2"
+        assert _cache(tmp_path).get(fetch) == "token-2"
+
+    def test_file_is_encrypted_and_private(self, tmp_path):
+        cache = _cache(tmp_path)
+        cache.get(lambda: "very-secret-token")
+        with open(cache.path, "rb") as fh:
+            assert b"very-secret-token" not in fh.read()
+        assert stat.S_IMODE(os.stat(cache.path).st_mode) == 0o600
+
+    def test_other_secret_misses(self, tmp_path):
+        _cache(tmp_path).get(lambda: "old")
+        fetch = Fetcher()
+        assert _cache(tmp_path, secret="rotated").get(fetch) == "token-1"
+
+    def test_keyed_by_client_and_scope(self, tmp_path):
+        base = _cache(tmp_path)
+        other_scope = TokenCache(str(tmp_path), "localhost:8080/diode", "client", "secret", "diode:read")
+        other_client = TokenCache(str(tmp_path), "localhost:8080/diode", "other", "secret", "diode:ingest")
+        assert len(set([base.path, other_scope.path, other_client.path])) == 3
+
+    def test_corrupt_file_is_a_miss(self, tmp_path):
+        cache = _cache(tmp_path)
+        with open(cache.path, "wb") as fh:
+            fh.write(b"garbage")
+        assert cache.get(Fetcher()) == "token-1"
+
+    def test_missing_cryptography_raises(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(token_cache, "HAS_CRYPTOGRAPHY", False)
+        with pytest.raises(ImportError, match="cryptography"):
+            _cache(tmp_path)
+
+
+def _fork_get(cache_dir, count_path):
+    def fetch():
+        with open(count_path, "a") as fh:
+            fh.write("x")
+        time.sleep(0.2)
+        return "shared"
+
+    assert _cache(cache_dir).get(fetch) == "shared"
+
+
+def test_concurrent_processes_fetch_once(tmp_path):
+    count_path = str(tmp_path / "fetches")
+    context = multiprocessing.get_context("fork")
+    workers = [
+        context.Process(target=_fork_get, args=(tmp_path / "cache", count_path))
+        for _ in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(10)
+    assert [worker.exitcode for worker in workers] == [0] * 4
+    with open(count_path) as fh:
+        assert fh.read() == "x"
+
+
+@pytest.mark.skipif(not token_cache.HAS_DIODE_CLIENT, reason="Diode SDK is not installed")
+class TestCachedTokenDiodeClient:
+    @pytest.fixture
+    def fetches(self, monkeypatch):
+        calls = []
+
+        def authenticate(client, scope):
+            calls.append(scope)
+            client._metadata = [
+                item for item in client._metadata if item[0] != "authorization"
+            ] + [("authorization", "Bearer token-{0}".format(len(calls)))]
+
+        monkeypatch.setattr(token_cache.DiodeClient, "_authenticate", authenticate)
+        return calls
+
+    def _client(self, cache_dir):
+        return token_cache.CachedTokenDiodeClient(
+            str(cache_dir),
+            target="grpc://localhost:8080/diode",
+            app_name="test",
+            app_version="1.0.0",
+            client_id="client",
+            client_secret="secret",
+        )
+
+    def test_clients_share_one_token(self, tmp_path, fetches):
+        first = self._client(tmp_path)
+        second = self._client(tmp_path)
+        try:
+            assert fetches == ["diode:ingest"]
+            assert ("authorization", "Bearer token-1") in second._metadata
+        finally:
+            first.close()
+            second.close()
+
+    def test_reauthentication_replaces_rejected_token(self, tmp_path, fetches):
+        client = self._client(tmp_path)
+        try:
+            client._authenticate("diode:ingest")
+            assert len(fetches) == 2
+            assert ("authorization", "Bearer token-2") in client._metadata
+        finally:
+            client.close()
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Unit tests for trace spans and their OTLP/JSON exporters."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from ansible_collections.my0373.diode.plugins.module_utils.tracing import (
+    STATUS_ERROR,
+    FileSpanExporter,
+    OtlpHttpSpanExporter,
+    Tracer,
+    attach_tracer,
+    inject_traceparent,
+    parse_traceparent,
+    trace_span,
+)
+
+PARENT = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+
+class FakeModule(object):
+    check_mode = False
+
+    def __init__(self, **params):
+        self.params = params
+        self.results = []
+        self.warnings = []
+
+    def warn(self, warning):
+        self.warnings.append(warning)
+
+    def exit_json(self, **kwargs):
+        self.results.append(kwargs)
+        raise SystemExit(0)
+
+    def fail_json(self, **kwargs):
+        self.results.append(kwargs)
+        raise SystemExit(1)
+
+
+def _spans(request):
+    return request["resourceSpans"][0]["scopeSpans"][0]["spans"]
+
+
+def _read_spans(path):
+    with open(path) as fh:
+        return [span for line in fh for span in _spans(json.loads(line))]
+
+
+@pytest.fixture
+def collector():
+    """A local OTLP/HTTP collector stand-in recording each request."""
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            received.append((self.path, self.headers, json.loads(body)))
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield "http://127.0.0.1:{0}".format(server.server_port), received
+    server.shutdown()
+    server.server_close()
+
+
+class TestParseTraceparent:
+    def test_valid(self):
+        assert parse_traceparent(PARENT) == (
+            "4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7"
+        )
+
+    @pytest.mark.parametrize("value", [
+        None,
+        "",
+        "garbage",
+        "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7",
+        "00-00000000000000000000000000000000-00f067aa0ba902b7-01",
+        "ff-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01",
+        "00-4bf92f3577b34da6a3ce929d0e0e473z-00f067aa0ba902b7-01",
+    ])
+    def test_invalid(self, value):
+        assert parse_traceparent(value) is None
+
+
+class TestTracer:
+    def test_spans_nest_and_share_the_trace(self):
+        tracer = Tracer([])
+        with tracer.span("root") as root:
+            with tracer.span("child") as child:
+                pass
+            with tracer.span("sibling") as sibling:
+                pass
+
+        assert root.parent_span_id is None
+        assert child.parent_span_id == sibling.parent_span_id == root.span_id
+        assert len(set([root.trace_id, child.trace_id, sibling.trace_id])) == 1
+        assert root.start <= child.start <= child.end <= sibling.start <= root.end
+
+    def test_remote_parent(self):
+        tracer = Tracer([], parent=parse_traceparent(PARENT))
+        with tracer.span("root") as root:
+            pass
+        assert root.trace_id == "4bf92f3577b34da6a3ce929d0e0e4736"
+        assert root.parent_span_id == "00f067aa0ba902b7"
+
+    def test_exception_marks_span_failed(self):
+        tracer = Tracer([])
+        with pytest.raises(ValueError):
+            with tracer.span("build"):
+                raise ValueError("bad entity")
+        assert tracer.spans[0].error == "bad entity"
+        assert tracer.spans[0].to_otlp()["status"] == {"code": STATUS_ERROR, "message": "bad entity"}
+
+    def test_finish_ends_open_spans_with_error(self):
+        tracer = Tracer([])
+        root = tracer.start_span("root")
+        child = tracer.start_span("child")
+        tracer.finish(error="Failed to create client")
+        assert root.end is not None and child.end is not None
+        assert root.error == child.error == "Failed to create client"
+        assert tracer.current is None
+
+    def test_otlp_attribute_types(self):
+        tracer = Tracer([])
+        with tracer.span("chunk", {"n": 3, "ok": True, "s": "x", "f": 0.5, "none": None}):
+            pass
+        span = _spans(tracer.to_otlp())[0]
+        assert span["attributes"] == [
+            {"key": "f", "value": {"doubleValue": 0.5}},
+            {"key": "n", "value": {"intValue": "3"}},
+            {"key": "ok", "value": {"boolValue": True}},
+            {"key": "s", "value": {"stringValue": "x"}},
+        ]
+        assert int(span["endTimeUnixNano"]) >= int(span["startTimeUnixNano"])
+
+    def test_trace_span_without_tracer_is_a_no_op(self):
+        with trace_span(None, "build") as span:
+            span.set_attribute("diode.entity_count", 1)
+            span.record_error(ValueError("x"))
+        assert span.traceparent is None
+
+
+class TestExporters:
+    def test_file_exporter_appends_one_line_per_export(self, tmp_path):
+        path = str(tmp_path / "traces" / "spans.jsonl")
+        tracer = Tracer([FileSpanExporter(path)])
+        with tracer.span("first"):
+            pass
+        assert tracer.export() == []
+        with tracer.span("second"):
+            pass
+        assert tracer.export() == []
+
+        with open(path) as fh:
+            lines = fh.read().splitlines()
+        assert len(lines) == 2
+        assert [span["name"] for span in _read_spans(path)] == ["first", "second"]
+        resource = json.loads(lines[0])["resourceSpans"][0]["resource"]["attributes"]
+        assert {"key": "service.name", "value": {"stringValue": "ansible-diode"}} in resource
+
+    def test_otlp_http_exporter_posts_to_collector(self, collector):
+        endpoint, received = collector
+        tracer = Tracer([OtlpHttpSpanExporter(endpoint, headers={"x-api-key": "k"})])
+        with tracer.span("diode_ingest"):
+            pass
+
+        assert tracer.export() == []
+        path, headers, request = received[0]
+        assert path == "/v1/traces"
+        assert headers["Content-Type"] == "application/json"
+        assert headers["x-api-key"] == "k"
+        assert _spans(request)[0]["name"] == "diode_ingest"
+
+    def test_endpoint_with_traces_path_is_kept(self):
+        exporter = OtlpHttpSpanExporter("http://collector:4318/v1/traces/")
+        assert exporter.destination == "http://collector:4318/v1/traces"
+
+    def test_export_failure_is_reported_not_raised(self, tmp_path):
+        tracer = Tracer([FileSpanExporter(str(tmp_path))])
+        with tracer.span("x"):
+            pass
+        errors = tracer.export()
+        assert len(errors) == 1 and errors[0].startswith(str(tmp_path))
+
+
+class TestAttachTracer:
+    def test_disabled_without_exporter(self):
+        module = FakeModule()
+        assert attach_tracer(module, "diode_ingest") is None
+        with pytest.raises(SystemExit):
+            module.exit_json(changed=False)
+        assert "trace_id" not in module.results[0]
+
+    def test_exit_exports_spans_and_returns_trace_id(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("TRACEPARENT", PARENT)
+        path = str(tmp_path / "spans.jsonl")
+        module = FakeModule(trace_file=path, target="grpc://diode:8080/diode")
+        tracer = attach_tracer(module, "diode_ingest")
+        with tracer.span("build"):
+            pass
+        tracer.start_span("send")
+
+        with pytest.raises(SystemExit):
+            module.exit_json(changed=True, ingested_count=7)
+
+        assert module.results[0]["trace_id"] == "4bf92f3577b34da6a3ce929d0e0e4736"
+        spans = dict((span["name"], span) for span in _read_spans(path))
+        assert set(spans) == set(["diode_ingest", "build", "send"])
+        assert spans["diode_ingest"]["parentSpanId"] == "00f067aa0ba902b7"
+        assert spans["send"]["parentSpanId"] == spans["diode_ingest"]["spanId"]
+        assert {"key": "diode.ingested_count", "value": {"intValue": "7"}} in (
+            spans["diode_ingest"]["attributes"]
+        )
+        assert "status" not in spans["diode_ingest"]
+
+    def test_fail_marks_open_spans_failed(self, tmp_path):
+        path = str(tmp_path / "spans.jsonl")
+        module = FakeModule(trace_file=path)
+        tracer = attach_tracer(module, "diode_replay")
+        tracer.start_span("replay_file")
+
+        with pytest.raises(SystemExit):
+            module.fail_json(msg="Replay failed")
+
+        assert [span["status"]["message"] for span in _read_spans(path)] == ["Replay failed"] * 2
+
+    def test_unreachable_collector_only_warns(self):
+        module = FakeModule(trace_endpoint="http://127.0.0.1:1")
+        attach_tracer(module, "diode_ingest")
+
+        with pytest.raises(SystemExit):
+            module.exit_json(changed=True)
+
+        assert module.results[0]["trace_id"]
+        assert module.warnings[0].startswith("Could not export trace spans to http://127.0.0.1:1/v1/traces")
+
+
+def test_inject_traceparent_replaces_previous_header():
+    tracer = Tracer([])
+    client = type("Client", (), {})()
+    client._metadata = [("authorization", "Bearer t"), ("traceparent", "old")]
+    with tracer.span("chunk") as span:
+        inject_traceparent(client, span)
+    assert client._metadata == [("authorization", "Bearer t"), ("traceparent", span.traceparent)]
@@ -66,7 +66,7 @@ class TestDiodeDryRunExecution:
         "ansible_collections.my0373.diode.plugins.modules.diode_dry_run.create_dry_run_client"
     )
     @patch(
-        "ansible_collections.my0373.diode.plugins.modules.diode_dry_run.ingest_with_chunking"
+        "ansible_collections.my0373.diode.plugins.modules.diode_dry_run.ingest_batches"
     )
     def test_successful_dry_run(
         self, mock_ingest, mock_create_client, mock_build, module_args
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Unit tests for the diode_dryrun_compact module."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from ansible_collections.my0373.diode.plugins.module_utils.dryrun import HAS_LOAD_DRYRUN
+
+COMPACT_MOD = "ansible_collections.my0373.diode.plugins.modules.diode_dryrun_compact"
+
+pytestmark = pytest.mark.skipif(not HAS_LOAD_DRYRUN, reason="Diode SDK is not installed")
+
+
+@pytest.fixture
+def module_args(tmp_path):
+    src_dir = tmp_path / "captures"
+    src_dir.mkdir()
+    return {
+        "src_dir": str(src_dir),
+        "pattern": "*.json",
+        "dest_dir": str(src_dir),
+        "app_name": "compacted",
+        "max_file_mb": 32.0,
+        "remove_sources": True,
+    }
+
+
+def _hourly_captures(src_dir, hours):
+    for hour in range(hours):
+        path = os.path.join(src_dir, "hourly_{0:02d}.json".format(hour))
+        with open(path, "w") as fh:
+            json.dump({"stream": "latest", "entities": [
+                {"site": {"name": "NYC", "status": "active"}},
+                {"device": {"name": "sw{0}".format(hour % 2), "serial": str(hour)}},
+            ]}, fh)
+        os.utime(path, (1000 + hour, 1000 + hour))
+
+
+def _run(module_args, check_mode=False):
+    with patch("{0}.AnsibleModule".format(COMPACT_MOD)) as MockAM:
+        mock_instance = MagicMock()
+        mock_instance.params = module_args
+        mock_instance.check_mode = check_mode
+        MockAM.return_value = mock_instance
+        mock_instance.exit_json.side_effect = SystemExit(0)
+        mock_instance.fail_json.side_effect = SystemExit(1)
+
+        from ansible_collections.my0373.diode.plugins.modules import diode_dryrun_compact
+
+        with pytest.raises(SystemExit):
+            diode_dryrun_compact.main()
+        return mock_instance
+
+
+class TestDiodeDryrunCompact:
+    def test_compacts_in_place_and_removes_sources(self, module_args):
+        _hourly_captures(module_args["src_dir"], 24)
+
+        module = _run(module_args)
+
+        result = module.exit_json.call_args[1]
+        assert result["changed"] is True
+        assert (result["files_read"], result["file_count"], result["removed_count"]) == (24, 1, 24)
+        assert (result["entities_read"], result["entities_written"]) == (48, 3)
+        assert result["superseded_count"] == 45
+        assert os.listdir(module_args["src_dir"]) == [os.path.basename(result["files_written"][0])]
+        with open(result["files_written"][0]) as fh:
+            serials = [e["device"]["serial"] for e in json.load(fh)["entities"] if "device" in e]
+        assert serials == ["22", "23"]
+        module.warn.assert_not_called()
+
+    def test_second_run_has_nothing_to_compact(self, module_args):
+        _hourly_captures(module_args["src_dir"], 3)
+        _run(module_args)
+
+        result = _run(module_args).exit_json.call_args[1]
+
+        assert result["changed"] is False
+        assert result["files_read"] == 1
+        assert result["removed_count"] == 0
+        assert len(os.listdir(module_args["src_dir"])) == 1
+
+    def test_check_mode_writes_and_removes_nothing(self, module_args):
+        _hourly_captures(module_args["src_dir"], 3)
+
+        result = _run(module_args, check_mode=True).exit_json.call_args[1]
+
+        assert result["changed"] is True
+        assert result["file_count"] == 1
+        assert result["files_written"] == []
+        assert len(os.listdir(module_args["src_dir"])) == 3
+
+    def test_warns_when_compacting_in_place_without_removing(self, module_args, tmp_path):
+        _hourly_captures(module_args["src_dir"], 2)
+        module_args["remove_sources"] = False
+
+        module = _run(module_args)
+
+        module.warn.assert_called_once()
+        assert len(os.listdir(module_args["src_dir"])) == 3
+
+    def test_missing_src_dir_fails(self, module_args, tmp_path):
+        module_args["src_dir"] = str(tmp_path / "missing")
+
+        module = _run(module_args)
+
+        assert "Directory not found" in module.fail_json.call_args[1]["msg"]
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024-2026 NetBox Labs Inc
+# Apache License 2.0 (see LICENSE)
+
+"""Unit tests for the diode_flush module."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+FLUSH_MOD = "ansible_collections.my0373.diode.plugins.modules.diode_flush"
+
+
+@pytest.fixture
+def module_args(tmp_path):
+    return {
+        "target": "grpc://localhost:8080/diode",
+        "app_name": "flush-test",
+        "app_version": "1.0.0",
+        "outbox_dir": str(tmp_path),
+        "chunk_size_mb": 3.0,
+        "retries": 2,
+        "retry_delay": 0.0,
+        "max_segments": None,
+    }
+
+
+def _segments(tmp_path, count):
+    paths = []
+    for i in range(count):
+        path = tmp_path / "{0:020d}-1-abc.seg".format(i)
+        path.write_bytes(b"")
+        paths.append(str(path))
+    return paths
+
+
+def _record(n):
+    record = MagicMock()
+    record.entities = [MagicMock() for _ in range(n)]
+    record.stream = ""
+    return record
+
+
+def _part(n):
+    return {
+        "ingested_count": n,
+        "chunk_count": 1,
+        "chunk_bytes": [10 * n],
+        "chunk_seconds": [0.01],
+        "entity_type_counts": {"site": n},
+        "errors": [],
+        "error_details": [],
+    }
+
+
+def _run(module_args, check_mode=False):
+    with patch("{0}.AnsibleModule".format(FLUSH_MOD)) as MockAM:
+        mock_instance = MagicMock()
+        mock_instance.params = module_args
+        mock_instance.check_mode = check_mode
+        MockAM.return_value = mock_instance
+        mock_instance.exit_json.side_effect = SystemExit(0)
+        mock_instance.fail_json.side_effect = SystemExit(1)
+
+        from ansible_collections.my0373.diode.plugins.modules import diode_flush
+
+        with pytest.raises(SystemExit):
+            diode_flush.main()
+        return mock_instance
+
+
+@patch("{0}.HAS_DIODE_SDK".format(FLUSH_MOD), True)
+@patch("{0}.HAS_OUTBOX_SDK".format(FLUSH_MOD), True)
+@patch("{0}.record_metadata".format(FLUSH_MOD), return_value=None)
+@patch("{0}.create_diode_client".format(FLUSH_MOD))
+@patch("{0}.read_segment".format(FLUSH_MOD))
+@patch("{0}.ingest_with_chunking".format(FLUSH_MOD))
+class TestDiodeFlush:
+    def test_empty_outbox_does_not_connect(
+        self, mock_ingest, mock_read, mock_client, mock_meta, module_args
+    ):
+        result = _run(module_args)
+
+        mock_client.assert_not_called()
+        kwargs = result.exit_json.call_args[1]
+        assert kwargs["changed"] is False
+        assert kwargs["pending_segments"] == 0
+
+    def test_flushes_segments_oldest_first_and_deletes_them(
+        self, mock_ingest, mock_read, mock_client, mock_meta, module_args, tmp_path
+    ):
+        paths = _segments(tmp_path, 2)
+        mock_read.side_effect = lambda path: [_record(2), _record(1)]
+        mock_ingest.side_effect = lambda **kw: _part(len(kw["entities"]))
+
+        result = _run(module_args)
+
+        assert [c[0][0] for c in mock_read.call_args_list] == paths
+        kwargs = result.exit_json.call_args[1]
+        assert kwargs["changed"] is True
+        assert kwargs["segments_flushed"] == 2
+        assert kwargs["total_ingested"] == 6
+        assert kwargs["chunk_count"] == 4
+        assert kwargs["pending_segments"] == 0
+        assert not any(p.exists() for p in tmp_path.glob("*.seg"))
+
+    def test_retries_then_rewrites_undelivered_chunks(
+        self, mock_ingest, mock_read, mock_client, mock_meta, module_args, tmp_path
+    ):
+        (path,) = _segments(tmp_path, 1)
+        records = [_record(1), _record(1), _record(1)]
+        mock_read.return_value = records
+        mock_ingest.side_effect = [_part(1)] + [RuntimeError("down")] * 3
+
+        with patch("{0}.rewrite_segment".format(FLUSH_MOD)) as mock_rewrite:
+            result = _run(module_args)
+
+        mock_rewrite.assert_called_once_with(path, records[1:])
+        kwargs = result.fail_json.call_args[1]
+        assert "down" in kwargs["msg"]
+        assert kwargs["retries"] == 2
+        assert kwargs["total_ingested"] == 1
+        assert kwargs["pending_segments"] == 1
+
+    def test_retry_recovers(
+        self, mock_ingest, mock_read, mock_client, mock_meta, module_args, tmp_path
+    ):
+        _segments(tmp_path, 1)
+        mock_read.return_value = [_record(1)]
+        mock_ingest.side_effect = [RuntimeError("blip"), _part(1)]
+
+        result = _run(module_args)
+
+        kwargs = result.exit_json.call_args[1]
+        assert kwargs["segments_flushed"] == 1
+        assert kwargs["retries"] == 1
+
+    def test_corrupt_segment_is_set_aside(
+        self, mock_ingest, mock_read, mock_client, mock_meta, module_args, tmp_path
+    ):
+        (path,) = _segments(tmp_path, 1)
+        mock_read.side_effect = ValueError("truncated record")
+
+        result = _run(module_args)
+
+        kwargs = result.exit_json.call_args[1]
+        assert kwargs["segments_flushed"] == 0
+        assert "truncated record" in kwargs["errors"][0]
+        assert (tmp_path / (path.split("/")[-1] + ".corrupt")).exists()
+
+    def test_check_mode_sizes_without_sending(
+        self, mock_ingest, mock_read, mock_client, mock_meta, module_args, tmp_path
+    ):
+        _segments(tmp_path, 2)
+        mock_read.return_value = [_record(3)]
+
+        with patch("{0}.plan_chunks".format(FLUSH_MOD), return_value=_part(3)):
+            result = _run(module_args, check_mode=True)
+
+        mock_client.assert_not_called()
+        mock_ingest.assert_not_called()
+        kwargs = result.exit_json.call_args[1]
+        assert kwargs["total_ingested"] == 6
+        assert kwargs["pending_segments"] == 2
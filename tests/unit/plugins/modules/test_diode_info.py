@@ -51,6 +51,56 @@ class TestDiodeInfoWithSdk:
             ]
             assert call_kwargs["entity_type_count"] == 3
 
+    def test_accepts_the_shared_connection_options(self):
+        from ansible_collections.my0373.diode.plugins.module_utils.arg_specs import (
+            diode_connection_arg_spec,
+        )
+
+        with patch(
+            "ansible_collections.my0373.diode.plugins.modules.diode_info.AnsibleModule"
+        ) as MockAM:
+            MockAM.return_value.params = {}
+            MockAM.return_value.exit_json.side_effect = SystemExit(0)
+            from ansible_collections.my0373.diode.plugins.modules import diode_info
+
+            with pytest.raises(SystemExit):
+                diode_info.main()
+
+        arg_spec = MockAM.call_args[1]["argument_spec"]
+        assert set(diode_connection_arg_spec()) <= set(arg_spec)
+        assert arg_spec["target"] == dict(type="str")
+        assert arg_spec["app_name"] == dict(type="str", default="diode-info")
+
+    @patch(
+        "ansible_collections.my0373.diode.plugins.modules.diode_info.HAS_DIODE_SDK",
+        True,
+    )
+    @patch(
+        "ansible_collections.my0373.diode.plugins.modules.diode_info.run_diagnostics",
+        return_value={"protobuf_backend": "upb", "warnings": []},
+    )
+    def test_diagnostics_are_opt_in(self, mock_diagnostics):
+        from ansible_collections.my0373.diode.plugins.modules import diode_info
+
+        for enabled in (False, True):
+            with patch(
+                "ansible_collections.my0373.diode.plugins.modules.diode_info.AnsibleModule"
+            ) as MockAM:
+                mock_instance = MagicMock()
+                mock_instance.params = {"diagnostics": enabled, "diagnostics_sample_size": 500}
+                MockAM.return_value = mock_instance
+                mock_instance.exit_json.side_effect = SystemExit(0)
+
+                with pytest.raises(SystemExit):
+                    diode_info.main()
+
+                call_kwargs = mock_instance.exit_json.call_args[1]
+                assert ("diagnostics" in call_kwargs) is enabled
+
+        mock_diagnostics.assert_called_once_with(
+            {"diagnostics": True, "diagnostics_sample_size": 500}, sample_size=500
+        )
+
 
 class TestDiodeInfoWithoutSdk:
     @patch(
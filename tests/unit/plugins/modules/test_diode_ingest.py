@@ -69,12 +69,75 @@ class TestDiodeIngestCheckMode:
             assert call_kwargs["changed"] is True
             assert call_kwargs["ingested_count"] == 1
 
+    def test_target_required_without_buffer(self, mock_module):
+        mock_module["target"] = None
+        with patch(
+            "ansible_collections.my0373.diode.plugins.modules.diode_ingest.AnsibleModule"
+        ) as MockAM:
+            mock_instance = MagicMock()
+            mock_instance.params = mock_module
+            mock_instance.check_mode = True
+            MockAM.return_value = mock_instance
+            mock_instance.fail_json.side_effect = SystemExit(1)
+
+            with pytest.raises(SystemExit):
+                from ansible_collections.my0373.diode.plugins.modules import (
+                    diode_ingest,
+                )
+                diode_ingest.main()
+
+            assert mock_instance.fail_json.call_args[1]["msg"] == "missing required arguments: target"
+
+    @patch("{0}.HAS_DIODE_SDK".format(DIODE_MOD), True)
+    @patch("{0}.build_entities".format(DIODE_MOD))
+    @patch("{0}.create_diode_client".format(DIODE_MOD))
+    @patch("{0}.plan_batches".format(DIODE_MOD))
+    def test_check_mode_sizes_without_sending(
+        self, mock_plan, mock_create_client, mock_build, mock_module
+    ):
+        mock_module["estimate_mb_per_second"] = 2.0
+        built = [MagicMock()]
+        mock_build.return_value = built
+        mock_plan.return_value = {
+            "ingested_count": 1,
+            "chunk_count": 1,
+            "chunk_bytes": [64],
+            "total_bytes": 64,
+            "entity_type_counts": {"device": 1},
+            "estimated_send_seconds": 0.0,
+        }
+        with patch(
+            "ansible_collections.my0373.diode.plugins.modules.diode_ingest.AnsibleModule"
+        ) as MockAM:
+            mock_instance = MagicMock()
+            mock_instance.params = mock_module
+            mock_instance.check_mode = True
+            MockAM.return_value = mock_instance
+            mock_instance.exit_json.side_effect = SystemExit(0)
+
+            with pytest.raises(SystemExit):
+                from ansible_collections.my0373.diode.plugins.modules import (
+                    diode_ingest,
+                )
+                diode_ingest.main()
+
+            mock_create_client.assert_not_called()
+            mock_plan.assert_called_once_with(
+                [(None, None, built)], chunk_size_mb=3.0, mb_per_second=2.0
+            )
+            call_kwargs = mock_instance.exit_json.call_args[1]
+            assert call_kwargs["changed"] is True
+            assert call_kwargs["chunk_count"] == 1
+            assert call_kwargs["total_bytes"] == 64
+            assert call_kwargs["entity_type_counts"] == {"device": 1}
+            assert call_kwargs["errors"] == []
+
 
 class TestDiodeIngestExecution:
     @patch("{0}.HAS_DIODE_SDK".format(DIODE_MOD), True)
     @patch("{0}.build_entities".format(DIODE_MOD))
     @patch("{0}.create_diode_client".format(DIODE_MOD))
-    @patch("{0}.ingest_with_chunking".format(DIODE_MOD))
+    @patch("{0}.ingest_tiers".format(DIODE_MOD))
     def test_successful_ingestion(
         self, mock_ingest, mock_create_client, mock_build, mock_module
     ):
@@ -113,7 +176,7 @@ class TestDiodeIngestExecution:
     @patch("{0}.HAS_DIODE_SDK".format(DIODE_MOD), True)
     @patch("{0}.build_entities".format(DIODE_MOD))
     @patch("{0}.create_diode_client".format(DIODE_MOD))
-    @patch("{0}.ingest_with_chunking".format(DIODE_MOD))
+    @patch("{0}.ingest_tiers".format(DIODE_MOD))
     def test_ingestion_with_errors(
         self, mock_ingest, mock_create_client, mock_build, mock_module
     ):
@@ -168,6 +231,89 @@ class TestDiodeIngestExecution:
             mock_instance.fail_json.assert_called_once()
             assert "Bad entity" in mock_instance.fail_json.call_args[1]["msg"]
 
+    @patch("{0}.HAS_DIODE_SDK".format(DIODE_MOD), True)
+    @patch("{0}.build_entities".format(DIODE_MOD))
+    @patch("{0}.validate_entities".format(DIODE_MOD))
+    def test_invalid_entities_fail_before_building(self, mock_validate, mock_build, mock_module):
+        invalid = [{"index": 0, "type": "device", "message": "unknown field 'devcie_type'"}]
+        mock_validate.return_value = invalid
+
+        with patch(
+            "ansible_collections.my0373.diode.plugins.modules.diode_ingest.AnsibleModule"
+        ) as MockAM:
+            mock_instance = MagicMock()
+            mock_instance.params = mock_module
+            mock_instance.check_mode = False
+            MockAM.return_value = mock_instance
+            mock_instance.fail_json.side_effect = SystemExit(1)
+
+            with pytest.raises(SystemExit):
+                from ansible_collections.my0373.diode.plugins.modules import (
+                    diode_ingest,
+                )
+                diode_ingest.main()
+
+            mock_build.assert_not_called()
+            call_kwargs = mock_instance.fail_json.call_args[1]
+            assert "1 invalid entities" in call_kwargs["msg"]
+            assert call_kwargs["rejected"] == invalid
+
+    @patch("{0}.HAS_DIODE_SDK".format(DIODE_MOD), True)
+    @patch("{0}.build_entities_skipping".format(DIODE_MOD))
+    @patch("{0}.validate_entities".format(DIODE_MOD))
+    @patch("{0}.create_diode_client".format(DIODE_MOD))
+    @patch("{0}.ingest_tiers".format(DIODE_MOD))
+    def test_on_error_skip_sends_the_rest_and_remaps_indices(
+        self, mock_ingest, mock_create_client, mock_validate, mock_build, mock_module
+    ):
+        mock_module["entities"] = [
+            {"type": "site", "data": "a"},
+            {"type": "device", "data": {"devcie_type": "x"}},
+            {"type": "site", "data": "b"},
+            {"type": "site", "data": "c"},
+        ]
+        entity_dicts = list(mock_module["entities"])
+        mock_module["on_error"] = "skip"
+        invalid = [{"index": 1, "type": "device", "message": "bad"}]
+        rejected = invalid + [{"index": 3, "type": "site", "message": "boom"}]
+        mock_validate.return_value = invalid
+        mock_build.return_value = (["e0", "e2"], [0, 2], rejected)
+        mock_create_client.return_value = MagicMock()
+        mock_ingest.return_value = {
+            "ingested_count": 2,
+            "chunk_count": 2,
+            "errors": ["invalid site"],
+            "error_details": [
+                {"chunk_index": 1, "start_index": 1, "end_index": 2, "message": "invalid site"},
+            ],
+        }
+
+        with patch(
+            "ansible_collections.my0373.diode.plugins.modules.diode_ingest.AnsibleModule"
+        ) as MockAM:
+            mock_instance = MagicMock()
+            mock_instance.params = mock_module
+            mock_instance.check_mode = False
+            MockAM.return_value = mock_instance
+            mock_instance.exit_json.side_effect = SystemExit(0)
+
+            with pytest.raises(SystemExit):
+                from ansible_collections.my0373.diode.plugins.modules import (
+                    diode_ingest,
+                )
+                diode_ingest.main()
+
+            passed_dicts, passed_invalid = mock_build.call_args[0]
+            assert passed_dicts == entity_dicts
+            assert passed_invalid == invalid
+            assert mock_module["entities"] == entity_dicts
+            assert mock_ingest.call_args[1]["tiers"] == [[(None, None, ["e0", "e2"])]]
+            call_kwargs = mock_instance.exit_json.call_args[1]
+            assert call_kwargs["rejected_count"] == 2
+            assert [r["index"] for r in call_kwargs["rejected"]] == [1, 3]
+            detail = call_kwargs["error_details"][0]
+            assert (detail["start_index"], detail["end_index"]) == (2, 3)
+
     @patch("{0}.HAS_DIODE_SDK".format(DIODE_MOD), False)
     def test_fails_when_sdk_missing(self, mock_module):
         with patch(
@@ -187,3 +333,434 @@ class TestDiodeIngestExecution:
 
             mock_instance.fail_json.assert_called_once()
             assert "netboxlabs-diode-sdk" in mock_instance.fail_json.call_args[1]["msg"]
+
+    @patch("{0}.HAS_DIODE_SDK".format(DIODE_MOD), True)
+    @patch("{0}.build_entities".format(DIODE_MOD))
+    @patch("{0}.create_diode_client".format(DIODE_MOD))
+    @patch("{0}.ingest_tiers".format(DIODE_MOD))
+    def test_per_entity_streams_fan_out_over_one_client(
+        self, mock_ingest, mock_create_client, mock_build, mock_module
+    ):
+        mock_module["entities"] = [
+            {"type": "site", "data": "a", "stream": "emea"},
+            {"type": "site", "data": "b", "stream": "apac"},
+            {"type": "site", "data": "c", "stream": "emea"},
+        ]
+        mock_module["concurrency"] = 4
+        mock_build.return_value = ["A", "B", "C"]
+        mock_create_client.return_value = MagicMock()
+        mock_ingest.return_value = {
+            "ingested_count": 3,
+            "chunk_count": 2,
+            "errors": ["bad"],
+            "error_details": [
+                {"chunk_index": 1, "start_index": 2, "end_index": 3, "message": "bad", "stream": "apac"},
+            ],
+            "stream_counts": {"emea": 2, "apac": 1},
+        }
+
+        with patch(
+            "ansible_collections.my0373.diode.plugins.modules.diode_ingest.AnsibleModule"
+        ) as MockAM:
+            mock_instance = MagicMock()
+            mock_instance.params = mock_module
+            mock_instance.check_mode = False
+            MockAM.return_value = mock_instance
+            mock_instance.exit_json.side_effect = SystemExit(0)
+
+            with pytest.raises(SystemExit):
+                from ansible_collections.my0373.diode.plugins.modules import (
+                    diode_ingest,
+                )
+                diode_ingest.main()
+
+            mock_create_client.assert_called_once()
+            kwargs = mock_ingest.call_args[1]
+            assert kwargs["tiers"] == [[("emea", None, ["A", "C"]), ("apac", None, ["B"])]]
+            assert kwargs["concurrency"] == 4
+            call_kwargs = mock_instance.exit_json.call_args[1]
+            assert call_kwargs["stream_counts"] == {"emea": 2, "apac": 1}
+            detail = call_kwargs["error_details"][0]
+            assert (detail["start_index"], detail["end_index"]) == (1, 2)
+
+    @patch("{0}.HAS_DIODE_SDK".format(DIODE_MOD), True)
+    @patch("{0}.build_entities".format(DIODE_MOD))
+    @patch("{0}.create_diode_client".format(DIODE_MOD))
+    @patch("{0}.ingest_tiers".format(DIODE_MOD))
+    @patch("{0}.dependency_tiers".format(DIODE_MOD))
+    def test_dependency_order_sends_parent_tiers_first(
+        self, mock_tiers, mock_ingest, mock_create_client, mock_build, mock_module
+    ):
+        mock_module["entities"] = [
+            {"type": "ip_address", "data": {"address": "10.0.0.1/24"}},
+            {"type": "device", "data": {"name": "sw1"}},
+            {"type": "site", "data": "a"},
+        ]
+        mock_module["dependency_order"] = True
+        mock_tiers.return_value = {"site": 0, "device": 3, "ip_address": 7}
+        mock_build.return_value = ["IP", "D", "S"]
+        mock_create_client.return_value = MagicMock()
+        mock_ingest.return_value = {
+            "ingested_count": 3,
+            "chunk_count": 3,
+            "errors": ["bad"],
+            "error_details": [{"chunk_index": 2, "start_index": 2, "end_index": 3, "message": "bad"}],
+        }
+
+        with patch(
+            "ansible_collections.my0373.diode.plugins.modules.diode_ingest.AnsibleModule"
+        ) as MockAM:
+            mock_instance = MagicMock()
+            mock_instance.params = mock_module
+            mock_instance.check_mode = False
+            MockAM.return_value = mock_instance
+            mock_instance.exit_json.side_effect = SystemExit(0)
+
+            with pytest.raises(SystemExit):
+                from ansible_collections.my0373.diode.plugins.modules import (
+                    diode_ingest,
+                )
+                diode_ingest.main()
+
+            assert mock_ingest.call_args[1]["tiers"] == [
+                [(None, None, ["S"])], [(None, None, ["D"])], [(None, None, ["IP"])],
+            ]
+            detail = mock_instance.exit_json.call_args[1]["error_details"][0]
+            assert (detail["start_index"], detail["end_index"]) == (0, 1)
+
+    @patch("{0}.HAS_DIODE_SDK".format(DIODE_MOD), True)
+    @patch("{0}.build_entities".format(DIODE_MOD))
+    @patch("{0}.create_diode_client".format(DIODE_MOD))
+    @patch("{0}.ingest_tiers".format(DIODE_MOD))
+    def test_chunk_failure_reports_failed_slice(
+        self, mock_ingest, mock_create_client, mock_build, mock_module
+    ):
+        from ansible_collections.my0373.diode.plugins.module_utils.diode_module import (
+            ChunkIngestError,
+        )
+
+        mock_build.return_value = [MagicMock()]
+        mock_client = MagicMock()
+        mock_client.__enter__ = MagicMock(return_value=mock_client)
+        mock_client.__exit__ = MagicMock(return_value=False)
+        mock_create_client.return_value = mock_client
+        mock_ingest.side_effect = ChunkIngestError(
+            RuntimeError("unavailable"), 2, 200, 300,
+            {"ingested_count": 200, "chunk_count": 2, "errors": []},
+        )
+
+        with patch(
+            "ansible_collections.my0373.diode.plugins.modules.diode_ingest.AnsibleModule"
+        ) as MockAM:
+            mock_instance = MagicMock()
+            mock_instance.params = mock_module
+            mock_instance.check_mode = False
+            MockAM.return_value = mock_instance
+            mock_instance.fail_json.side_effect = SystemExit(1)
+
+            with pytest.raises(SystemExit):
+                from ansible_collections.my0373.diode.plugins.modules import (
+                    diode_ingest,
+                )
+                diode_ingest.main()
+
+            call_kwargs = mock_instance.fail_json.call_args[1]
+            assert "unavailable" in call_kwargs["msg"]
+            assert call_kwargs["failed_chunk"] == {
+                "chunk_index": 2,
+                "start_index": 200,
+                "end_index": 300,
+            }
+            assert call_kwargs["failed_chunks"] == [dict(
+                call_kwargs["failed_chunk"], message="unavailable"
+            )]
+            assert call_kwargs["ingested_count"] == 200
+
+    @patch("{0}.HAS_DIODE_SDK".format(DIODE_MOD), True)
+    @patch("{0}.build_entities_skipping".format(DIODE_MOD))
+    @patch("{0}.validate_entities".format(DIODE_MOD))
+    @patch("{0}.create_diode_client".format(DIODE_MOD))
+    @patch("{0}.ingest_tiers".format(DIODE_MOD))
+    def test_every_failed_chunk_is_reported_at_input_positions(
+        self, mock_ingest, mock_create_client, mock_validate, mock_build, mock_module
+    ):
+        from ansible_collections.my0373.diode.plugins.module_utils.diode_module import (
+            ChunkIngestError,
+        )
+
+        mock_module["entities"] = [{"type": "site", "data": name} for name in "abcde"]
+        mock_module["on_error"] = "skip"
+        mock_module["concurrency"] = 4
+        mock_validate.return_value = [{"index": 1, "type": "site", "message": "bad"}]
+        mock_build.return_value = (
+            ["e0", "e2", "e3", "e4"], [0, 2, 3, 4], mock_validate.return_value
+        )
+        mock_create_client.return_value = MagicMock()
+        mock_ingest.side_effect = ChunkIngestError(
+            RuntimeError("reset"), 0, 0, 2, {"ingested_count": 1, "chunk_count": 1, "errors": []},
+            failures=[
+                {"chunk_index": 0, "start_index": 0, "end_index": 2, "message": "reset"},
+                {"chunk_index": 2, "start_index": 3, "end_index": 4, "message": "deadline"},
+            ],
+        )
+
+        with patch(
+            "ansible_collections.my0373.diode.plugins.modules.diode_ingest.AnsibleModule"
+        ) as MockAM:
+            mock_instance = MagicMock()
+            mock_instance.params = mock_module
+            mock_instance.check_mode = False
+            MockAM.return_value = mock_instance
+            mock_instance.fail_json.side_effect = SystemExit(1)
+
+            with pytest.raises(SystemExit):
+                from ansible_collections.my0373.diode.plugins.modules import (
+                    diode_ingest,
+                )
+                diode_ingest.main()
+
+            call_kwargs = mock_instance.fail_json.call_args[1]
+            assert call_kwargs["failed_chunk"] == {"chunk_index": 0, "input_indices": [0, 2]}
+            assert call_kwargs["failed_chunks"] == [
+                {"chunk_index": 0, "input_indices": [0, 2], "message": "reset"},
+                {"chunk_index": 2, "start_index": 4, "end_index": 5, "message": "deadline"},
+            ]
+
+
+class TestDiodeIngestOutbox:
+    @patch("{0}.HAS_DIODE_SDK".format(DIODE_MOD), True)
+    @patch("{0}.build_entities".format(DIODE_MOD))
+    @patch("{0}.create_diode_client".format(DIODE_MOD))
+    @patch("{0}.enqueue_batches".format(DIODE_MOD))
+    def test_outbox_queues_without_connecting(
+        self, mock_enqueue, mock_create_client, mock_build, mock_module
+    ):
+        entities = [MagicMock()]
+        mock_build.return_value = entities
+        mock_enqueue.return_value = {
+            "queued_count": 1,
+            "chunk_count": 1,
+            "total_bytes": 12,
+            "entity_type_counts": {"device": 1},
+            "segment": "/spool/1.seg",
+        }
+        mock_module["outbox_dir"] = "/spool"
+        mock_module["stream"] = "s1"
+
+        with patch(
+            "ansible_collections.my0373.diode.plugins.modules.diode_ingest.AnsibleModule"
+        ) as MockAM:
+            mock_instance = MagicMock()
+            mock_instance.params = mock_module
+            mock_instance.check_mode = False
+            MockAM.return_value = mock_instance
+            mock_instance.exit_json.side_effect = SystemExit(0)
+
+            with pytest.raises(SystemExit):
+                from ansible_collections.my0373.diode.plugins.modules import (
+                    diode_ingest,
+                )
+                diode_ingest.main()
+
+            mock_create_client.assert_not_called()
+            mock_enqueue.assert_called_once_with(
+                "/spool", [("s1", None, entities)], chunk_size_mb=3.0
+            )
+            call_kwargs = mock_instance.exit_json.call_args[1]
+            assert call_kwargs["changed"] is True
+            assert call_kwargs["queued_count"] == 1
+            assert call_kwargs["segment"] == "/spool/1.seg"
+
+
+class TestDiodeIngestCapture:
+    @patch("{0}.HAS_DIODE_SDK".format(DIODE_MOD), True)
+    @patch("{0}.build_entities".format(DIODE_MOD))
+    @patch("{0}.create_diode_client".format(DIODE_MOD))
+    @patch("{0}.ingest_tiers".format(DIODE_MOD))
+    @patch("{0}.CaptureWriter".format(DIODE_MOD))
+    def test_capture_dir_tees_sent_chunks(
+        self, mock_capture_cls, mock_ingest, mock_create_client, mock_build, mock_module
+    ):
+        mock_build.return_value = [MagicMock()]
+        mock_client = MagicMock()
+        mock_client.name = "diode-sdk-python"
+        mock_client.version = "1.14.2"
+        mock_client.__enter__ = MagicMock(return_value=mock_client)
+        mock_client.__exit__ = MagicMock(return_value=False)
+        mock_create_client.return_value = mock_client
+        capture = mock_capture_cls.return_value
+        capture.files = ["/audit/test-app_1.json"]
+        mock_ingest.return_value = {"ingested_count": 1, "chunk_count": 1, "errors": []}
+        mock_module["capture_dir"] = "/audit"
+
+        with patch(
+            "ansible_collections.my0373.diode.plugins.modules.diode_ingest.AnsibleModule"
+        ) as MockAM:
+            mock_instance = MagicMock()
+            mock_instance.params = mock_module
+            mock_instance.check_mode = False
+            MockAM.return_value = mock_instance
+            mock_instance.exit_json.side_effect = SystemExit(0)
+
+            with pytest.raises(SystemExit):
+                from ansible_collections.my0373.diode.plugins.modules import (
+                    diode_ingest,
+                )
+                diode_ingest.main()
+
+            mock_capture_cls.assert_called_once_with(
+                "/audit",
+                "test-app",
+                app_version="1.0.0",
+                sdk_name="diode-sdk-python",
+                sdk_version="1.14.2",
+            )
+            assert mock_ingest.call_args[1]["capture"] is capture
+            assert mock_instance.exit_json.call_args[1]["capture_files"] == ["/audit/test-app_1.json"]
+
+
+class TestDiodeIngestSnapshotDiff:
+    def _run(self, mock_module, check_mode):
+        with patch(
+            "ansible_collections.my0373.diode.plugins.modules.diode_ingest.AnsibleModule"
+        ) as MockAM:
+            mock_instance = MagicMock()
+            mock_instance.params = mock_module
+            mock_instance.check_mode = check_mode
+            mock_instance._diff = True
+            MockAM.return_value = mock_instance
+            mock_instance.exit_json.side_effect = SystemExit(0)
+
+            with pytest.raises(SystemExit):
+                from ansible_collections.my0373.diode.plugins.modules import (
+                    diode_ingest,
+                )
+                diode_ingest.main()
+            return mock_instance.exit_json.call_args[1]
+
+    def _seed(self, tmp_path, mock_module, status):
+        from ansible_collections.my0373.diode.plugins.module_utils.snapshot import (
+            snapshot_entries,
+            snapshot_path,
+            sorted_entries,
+            update_snapshot,
+        )
+
+        sent = [{"type": "device", "data": {"name": "switch-01", "status": status}}]
+        update_snapshot(
+            snapshot_path(str(tmp_path), mock_module["target"]),
+            sorted_entries(snapshot_entries(sent)),
+        )
+
+    @patch("{0}.HAS_DIODE_SDK".format(DIODE_MOD), True)
+    def test_check_mode_unchanged_since_last_send(self, mock_module, tmp_path):
+        self._seed(tmp_path, mock_module, "active")
+        mock_module["snapshot_dir"] = str(tmp_path)
+
+        result = self._run(mock_module, check_mode=True)
+
+        assert result["changed"] is False
+        assert result["entity_diff"] == {"added": 0, "changed": 0, "unchanged": 1}
+        assert result["diff"]["after"] == ""
+
+    @patch("{0}.HAS_DIODE_SDK".format(DIODE_MOD), True)
+    def test_check_mode_reports_changed_entity(self, mock_module, tmp_path):
+        self._seed(tmp_path, mock_module, "planned")
+        mock_module["snapshot_dir"] = str(tmp_path)
+
+        result = self._run(mock_module, check_mode=True)
+
+        assert result["changed"] is True
+        assert result["entity_diff"] == {"added": 0, "changed": 1, "unchanged": 0}
+        assert '"planned"' in result["diff"]["before"]
+        assert '"active"' in result["diff"]["after"]
+
+    @patch("{0}.HAS_DIODE_SDK".format(DIODE_MOD), True)
+    @patch("{0}.create_diode_client".format(DIODE_MOD))
+    @patch("{0}.ingest_tiers".format(DIODE_MOD))
+    def test_successful_send_updates_snapshot(
+        self, mock_ingest, mock_create_client, mock_module, tmp_path
+    ):
+        mock_client = MagicMock()
+        mock_client.__enter__ = MagicMock(return_value=mock_client)
+        mock_client.__exit__ = MagicMock(return_value=False)
+        mock_create_client.return_value = mock_client
+        mock_ingest.return_value = {"ingested_count": 1, "chunk_count": 1, "errors": []}
+        mock_module["snapshot_dir"] = str(tmp_path)
+
+        first = self._run(dict(mock_module, entities=list(mock_module["entities"])), check_mode=False)
+        second = self._run(mock_module, check_mode=True)
+
+        assert first["entity_diff"]["added"] == 1
+        assert second["entity_diff"] == {"added": 0, "changed": 0, "unchanged": 1}
+
+    @patch("{0}.HAS_DIODE_SDK".format(DIODE_MOD), True)
+    @patch("{0}.create_diode_client".format(DIODE_MOD))
+    @patch("{0}.enqueue_batches".format(DIODE_MOD))
+    def test_outbox_warns_and_leaves_snapshot_alone(
+        self, mock_enqueue, mock_create_client, mock_module, tmp_path
+    ):
+        mock_enqueue.return_value = {"queued_count": 1, "chunk_count": 1, "segment": "/spool/1.seg"}
+        mock_module["snapshot_dir"] = str(tmp_path)
+        mock_module["outbox_dir"] = "/spool"
+
+        with patch(
+            "ansible_collections.my0373.diode.plugins.modules.diode_ingest.AnsibleModule"
+        ) as MockAM:
+            mock_instance = MagicMock()
+            mock_instance.params = mock_module
+            mock_instance.check_mode = False
+            MockAM.return_value = mock_instance
+            mock_instance.exit_json.side_effect = SystemExit(0)
+
+            with pytest.raises(SystemExit):
+                from ansible_collections.my0373.diode.plugins.modules import (
+                    diode_ingest,
+                )
+                diode_ingest.main()
+
+            mock_create_client.assert_not_called()
+            assert "snapshot_dir is not updated" in mock_instance.warn.call_args[0][0]
+        assert not list(tmp_path.glob("*.snap"))
+
+
+class TestDiodeIngestTracing:
+    @patch("{0}.HAS_DIODE_SDK".format(DIODE_MOD), True)
+    @patch("{0}.create_diode_client".format(DIODE_MOD))
+    @patch("{0}.ingest_tiers".format(DIODE_MOD))
+    def test_spans_cover_build_connect_and_send(
+        self, mock_ingest, mock_create_client, mock_module, tmp_path
+    ):
+        mock_client = MagicMock()
+        mock_client.__enter__ = MagicMock(return_value=mock_client)
+        mock_client.__exit__ = MagicMock(return_value=False)
+        mock_create_client.return_value = mock_client
+        mock_ingest.return_value = {"ingested_count": 1, "chunk_count": 1, "errors": []}
+        trace_file = str(tmp_path / "spans.jsonl")
+        mock_module["trace_file"] = trace_file
+
+        with patch(
+            "ansible_collections.my0373.diode.plugins.modules.diode_ingest.AnsibleModule"
+        ) as MockAM:
+            mock_instance = MagicMock()
+            mock_instance.params = mock_module
+            mock_instance.check_mode = False
+            MockAM.return_value = mock_instance
+            exit_json = mock_instance.exit_json
+            exit_json.side_effect = SystemExit(0)
+
+            with pytest.raises(SystemExit):
+                from ansible_collections.my0373.diode.plugins.modules import (
+                    diode_ingest,
+                )
+                diode_ingest.main()
+
+        result = exit_json.call_args[1]
+        with open(trace_file) as fh:
+            spans = json.loads(fh.read())["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        names = dict((span["name"], span) for span in spans)
+        assert set(names) == set(["diode_ingest", "build", "connect", "send"])
+        root = names["diode_ingest"]
+        assert result["trace_id"] == root["traceId"]
+        assert all(names[name]["parentSpanId"] == root["spanId"] for name in ("build", "connect", "send"))
+        assert mock_ingest.call_args[1]["tracer"].trace_id == root["traceId"]
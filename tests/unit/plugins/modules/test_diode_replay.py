@@ -8,11 +8,14 @@ from __future__ import absolute_import, division, print_function
 
 __metaclass__ = type
 
+import json
 import os
 from unittest.mock import MagicMock, patch
 
 import pytest
 
+from ansible_collections.my0373.diode.plugins.module_utils.dryrun import HAS_LOAD_DRYRUN
+
 
 @pytest.fixture
 def module_args(tmp_path):
@@ -60,6 +63,72 @@ class TestDiodeReplayCheckMode:
             assert call_kwargs["changed"] is True
             assert call_kwargs["files_processed"] == 1
 
+    @patch(
+        "ansible_collections.my0373.diode.plugins.module_utils.client.HAS_DIODE_SDK",
+        True,
+    )
+    @patch(
+        "ansible_collections.my0373.diode.plugins.modules.diode_replay.HAS_LOAD_DRYRUN",
+        True,
+    )
+    @patch(
+        "ansible_collections.my0373.diode.plugins.modules.diode_replay.load_dryrun_entities"
+    )
+    @patch(
+        "ansible_collections.my0373.diode.plugins.modules.diode_replay.create_diode_client"
+    )
+    @patch(
+        "ansible_collections.my0373.diode.plugins.modules.diode_replay.plan_chunks"
+    )
+    def test_check_mode_sizes_file_contents(
+        self, mock_plan, mock_create_client, mock_load, module_args, tmp_path
+    ):
+        second = tmp_path / "second.json"
+        second.write_text('{"entities": []}')
+        module_args["files"].append(str(second))
+        module_args["estimate_mb_per_second"] = 1.0
+        mock_load.return_value = [MagicMock(), MagicMock()]
+        mock_plan.side_effect = [
+            {
+                "ingested_count": 2,
+                "chunk_count": 1,
+                "chunk_bytes": [1024 * 1024],
+                "total_bytes": 1024 * 1024,
+                "entity_type_counts": {"site": 2},
+            },
+            {
+                "ingested_count": 2,
+                "chunk_count": 1,
+                "chunk_bytes": [1024 * 1024],
+                "total_bytes": 1024 * 1024,
+                "entity_type_counts": {"site": 1, "device": 1},
+            },
+        ]
+
+        with patch(
+            "ansible_collections.my0373.diode.plugins.modules.diode_replay.AnsibleModule"
+        ) as MockAM:
+            mock_instance = MagicMock()
+            mock_instance.params = module_args
+            mock_instance.check_mode = True
+            MockAM.return_value = mock_instance
+            mock_instance.exit_json.side_effect = SystemExit(0)
+
+            with pytest.raises(SystemExit):
+                from ansible_collections.my0373.diode.plugins.modules import (
+                    diode_replay,
+                )
+                diode_replay.main()
+
+            mock_create_client.assert_not_called()
+            call_kwargs = mock_instance.exit_json.call_args[1]
+            assert call_kwargs["files_processed"] == 2
+            assert call_kwargs["total_ingested"] == 4
+            assert call_kwargs["chunk_count"] == 2
+            assert call_kwargs["total_bytes"] == 2 * 1024 * 1024
+            assert call_kwargs["entity_type_counts"] == {"site": 3, "device": 1}
+            assert call_kwargs["estimated_send_seconds"] == 2.0
+
 
 class TestDiodeReplayExecution:
     @patch(
@@ -114,6 +183,220 @@ class TestDiodeReplayExecution:
             assert call_kwargs["files_processed"] == 1
             assert call_kwargs["errors"] == []
 
+    @patch(
+        "ansible_collections.my0373.diode.plugins.module_utils.client.HAS_DIODE_SDK",
+        True,
+    )
+    @patch(
+        "ansible_collections.my0373.diode.plugins.modules.diode_replay.HAS_LOAD_DRYRUN",
+        True,
+    )
+    @patch(
+        "ansible_collections.my0373.diode.plugins.modules.diode_replay.load_dryrun_entities"
+    )
+    @patch(
+        "ansible_collections.my0373.diode.plugins.modules.diode_replay.create_diode_client"
+    )
+    @patch(
+        "ansible_collections.my0373.diode.plugins.modules.diode_replay.ingest_with_chunking"
+    )
+    def test_replays_src_dir_in_mtime_order(
+        self, mock_ingest, mock_create_client, mock_load, module_args, tmp_path
+    ):
+        for name, mtime in (("new.json", 300), ("old.json", 100), ("mid.json", 200)):
+            path = tmp_path / name
+            path.write_text('{"entities": []}')
+            os.utime(str(path), (mtime, mtime))
+        os.utime(str(tmp_path / "test_dryrun.json"), (50, 50))
+
+        module_args["files"] = None
+        module_args["src_dir"] = str(tmp_path)
+        module_args["pattern"] = "*.json"
+        module_args["newer_than"] = 50.0
+
+        mock_load.return_value = [MagicMock()]
+        mock_client = MagicMock()
+        mock_client.__enter__ = MagicMock(return_value=mock_client)
+        mock_client.__exit__ = MagicMock(return_value=False)
+        mock_create_client.return_value = mock_client
+        mock_ingest.return_value = {
+            "ingested_count": 1,
+            "chunk_count": 1,
+            "errors": [],
+        }
+
+        with patch(
+            "ansible_collections.my0373.diode.plugins.modules.diode_replay.AnsibleModule"
+        ) as MockAM:
+            mock_instance = MagicMock()
+            mock_instance.params = module_args
+            mock_instance.check_mode = False
+            MockAM.return_value = mock_instance
+            mock_instance.exit_json.side_effect = SystemExit(0)
+
+            with pytest.raises(SystemExit):
+                from ansible_collections.my0373.diode.plugins.modules import (
+                    diode_replay,
+                )
+                diode_replay.main()
+
+            loaded = [os.path.basename(c[0][0]) for c in mock_load.call_args_list]
+            assert loaded == ["old.json", "mid.json", "new.json"]
+            call_kwargs = mock_instance.exit_json.call_args[1]
+            assert call_kwargs["files_processed"] == 3
+            assert call_kwargs["total_ingested"] == 3
+            assert call_kwargs["newest_mtime"] == 300
+            assert call_kwargs["newest_file"] == "new.json"
+
+    @patch(
+        "ansible_collections.my0373.diode.plugins.module_utils.client.HAS_DIODE_SDK",
+        True,
+    )
+    @patch(
+        "ansible_collections.my0373.diode.plugins.modules.diode_replay.HAS_LOAD_DRYRUN",
+        True,
+    )
+    @patch(
+        "ansible_collections.my0373.diode.plugins.modules.diode_replay.load_dryrun_entities"
+    )
+    @patch(
+        "ansible_collections.my0373.diode.plugins.modules.diode_replay.create_diode_client"
+    )
+    @patch(
+        "ansible_collections.my0373.diode.plugins.modules.diode_replay.ingest_with_chunking"
+    )
+    def test_load_failure_holds_the_watermark(
+        self, mock_ingest, mock_create_client, mock_load, module_args, tmp_path
+    ):
+        for name, mtime in (("old.json", 100), ("mid.json", 200), ("new.json", 300)):
+            path = tmp_path / name
+            path.write_text('{"entities": []}')
+            os.utime(str(path), (mtime, mtime))
+        os.utime(str(tmp_path / "test_dryrun.json"), (50, 50))
+
+        module_args["files"] = None
+        module_args["src_dir"] = str(tmp_path)
+        module_args["pattern"] = "*.json"
+        module_args["newer_than"] = 50.0
+
+        def load(filepath, entity_filter=None):
+            if filepath.endswith("mid.json"):
+                raise ValueError("truncated")
+            return [MagicMock()]
+
+        mock_load.side_effect = load
+        mock_client = MagicMock()
+        mock_client.__enter__ = MagicMock(return_value=mock_client)
+        mock_client.__exit__ = MagicMock(return_value=False)
+        mock_create_client.return_value = mock_client
+        mock_ingest.return_value = {
+            "ingested_count": 1,
+            "chunk_count": 1,
+            "errors": [],
+        }
+
+        with patch(
+            "ansible_collections.my0373.diode.plugins.modules.diode_replay.AnsibleModule"
+        ) as MockAM:
+            mock_instance = MagicMock()
+            mock_instance.params = module_args
+            mock_instance.check_mode = False
+            MockAM.return_value = mock_instance
+            mock_instance.exit_json.side_effect = SystemExit(0)
+
+            with pytest.raises(SystemExit):
+                from ansible_collections.my0373.diode.plugins.modules import (
+                    diode_replay,
+                )
+                diode_replay.main()
+
+            call_kwargs = mock_instance.exit_json.call_args[1]
+            assert call_kwargs["files_processed"] == 2
+            assert "mid.json" in call_kwargs["errors"][0]
+            assert call_kwargs["newest_mtime"] == 100
+            assert call_kwargs["newest_file"] == "old.json"
+
+    @pytest.mark.skipif(not HAS_LOAD_DRYRUN, reason="Diode SDK not installed")
+    def test_empty_src_dir_returns_a_reusable_watermark(self, module_args, tmp_path):
+        module_args["files"] = None
+        module_args["src_dir"] = str(tmp_path)
+        module_args["pattern"] = "none_*.json"
+
+        with patch(
+            "ansible_collections.my0373.diode.plugins.modules.diode_replay.AnsibleModule"
+        ) as MockAM:
+            mock_instance = MagicMock()
+            mock_instance.params = module_args
+            mock_instance.check_mode = True
+            MockAM.return_value = mock_instance
+            mock_instance.exit_json.side_effect = SystemExit(0)
+
+            with pytest.raises(SystemExit):
+                from ansible_collections.my0373.diode.plugins.modules import (
+                    diode_replay,
+                )
+                diode_replay.main()
+
+            call_kwargs = mock_instance.exit_json.call_args[1]
+            assert call_kwargs["files_processed"] == 0
+            assert isinstance(call_kwargs["newest_mtime"], float)
+            assert call_kwargs["newest_mtime"] == 0.0
+            assert call_kwargs["newest_file"] == ""
+
+    @pytest.mark.skipif(not HAS_LOAD_DRYRUN, reason="Diode SDK not installed")
+    def test_filters_entities_while_reading(self, module_args, tmp_path):
+        capture = tmp_path / "capture.json"
+        capture.write_text(json.dumps({"entities": [
+            {"site": {"name": "NYC"}},
+            {"ip_address": {"address": "10.0.0.1/24", "vrf": {"name": "blue"}}},
+            {"prefix": {"prefix": "10.0.0.0/24", "vrf": {"name": "blue"}}},
+            {"ip_address": {"address": "10.0.1.1/24", "vrf": {"name": "red"}}},
+        ]}))
+        module_args["files"] = [str(capture)]
+        module_args["include_types"] = ["ip_address", "prefix"]
+        module_args["match"] = {"vrf.name": "blue"}
+
+        with patch(
+            "ansible_collections.my0373.diode.plugins.modules.diode_replay.AnsibleModule"
+        ) as MockAM:
+            mock_instance = MagicMock()
+            mock_instance.params = module_args
+            mock_instance.check_mode = True
+            MockAM.return_value = mock_instance
+            mock_instance.exit_json.side_effect = SystemExit(0)
+
+            with pytest.raises(SystemExit):
+                from ansible_collections.my0373.diode.plugins.modules import (
+                    diode_replay,
+                )
+                diode_replay.main()
+
+            call_kwargs = mock_instance.exit_json.call_args[1]
+            assert call_kwargs["total_ingested"] == 2
+            assert call_kwargs["skipped_count"] == 2
+            assert call_kwargs["entity_type_counts"] == {"ip_address": 1, "prefix": 1}
+
+    @pytest.mark.skipif(not HAS_LOAD_DRYRUN, reason="Diode SDK not installed")
+    def test_unknown_entity_type_fails(self, module_args):
+        module_args["exclude_types"] = ["ip_adress"]
+
+        with patch(
+            "ansible_collections.my0373.diode.plugins.modules.diode_replay.AnsibleModule"
+        ) as MockAM:
+            mock_instance = MagicMock()
+            mock_instance.params = module_args
+            mock_instance.check_mode = True
+            MockAM.return_value = mock_instance
+            mock_instance.fail_json.side_effect = SystemExit(1)
+
+            with pytest.raises(SystemExit):
+                from ansible_collections.my0373.diode.plugins.modules import (
+                    diode_replay,
+                )
+                diode_replay.main()
+
+            assert "Unknown entity types: ip_adress" in mock_instance.fail_json.call_args[1]["msg"]
+
     @patch(
         "ansible_collections.my0373.diode.plugins.module_utils.client.HAS_DIODE_SDK",
         True,